@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Worker for queued analytics regenerations (services/analytics_jobs.py).
+
+The API only queues regenerations (/api/analytics-generator/regenerate-all,
+/regenerate-missing); this process runs them, outside the API workers.
+Start as many processes as the database can take; they share the queue
+through FOR UPDATE SKIP LOCKED, and SIGTERM/Ctrl+C lets each finish its
+current person before exiting. While the queue is empty the workers keep
+analytics current incrementally, recomputing only the people, banks,
+insurers and companies that recent case, gazette and people changes affect
+(services/incremental_analytics.py).
+
+    python analytics_worker.py --processes 4
+    python analytics_worker.py --once        # drain the queue, then exit
+"""
+
+import os
+import sys
+import signal
+import socket
+import logging
+import argparse
+import multiprocessing
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from config import settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def run_worker(batch_size, poll_seconds, once):
+    """Run one worker in this process until stopped"""
+    from database import engine
+    from services.analytics_jobs import AnalyticsWorker
+
+    # Connections inherited from the parent process must not be shared
+    engine.dispose(close=False)
+
+    worker = AnalyticsWorker(f"{socket.gethostname()}:{os.getpid()}", batch_size=batch_size)
+
+    def stop(signum, frame):
+        logger.info("Stopping after the current task")
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(poll_seconds=poll_seconds, once=once)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Run queued analytics regenerations")
+    parser.add_argument("--processes", type=int, default=settings.analytics_worker_processes,
+                        help="Worker processes (default: settings.analytics_worker_processes)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Tasks claimed per query")
+    parser.add_argument("--poll-seconds", type=float, default=5.0, help="Wait between polls of an empty queue")
+    parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args.batch_size, args.poll_seconds, args.once)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(args.batch_size, args.poll_seconds, args.once),
+            name=f"analytics-worker-{index}"
+        )
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} analytics workers")
+
+    def forward(signum, frame):
+        # Pass SIGTERM on (Ctrl+C already reaches the whole process group)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
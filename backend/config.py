@@ -39,9 +39,79 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: Optional[str] = None
     
+    # Bulk LLM job limits (keep within the account's rate limits)
+    llm_concurrency: int = 8
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200000
+    llm_max_retries: int = 5
+    
+    # AI Response Cache Configuration (0 keeps entries until their template version changes)
+    ai_cache_enabled: bool = True
+    ai_cache_ttl_days: int = 180
+    ai_cache_hit_flush_seconds: float = 30.0  # Entry hit counts are batched in memory between flushes
+    
+    # Long-Document Prompt Configuration (tokens; longer case text is chunked and summarized map-reduce)
+    ai_prompt_token_budget: int = 3000
+    ai_chunk_tokens: int = 2000
+    
+    # Analytics Job Queue Configuration (analytics_worker.py runs the queued regenerations)
+    analytics_worker_processes: int = 2
+    analytics_task_max_attempts: int = 3
+    analytics_task_lock_timeout_minutes: int = 15
+    # Case, gazette and people changes wait this long before being resolved, so the case parties index catches up
+    analytics_change_delay_seconds: int = 30
+    # Processed changes are kept this long (hours), then deleted by the workers
+    analytics_change_retention_hours: int = 24
+    # Entity names matched against changed cases' parties are reloaded this often
+    analytics_entity_names_refresh_minutes: int = 15
+    
     # Google Maps Configuration
     react_app_google_maps_api_key: Optional[str] = None
     
+    # Autocomplete Configuration (0 disables the periodic rebuild)
+    autocomplete_rebuild_minutes: int = 30
+    
+    # Response Cache Configuration (set response_cache_redis_url to share entries between workers)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1024
+    response_cache_redis_url: Optional[str] = None
+    
+    # AI Chat Context Cache Configuration (built case contexts and prompts, shared by sessions)
+    chat_context_cache_max_entries: int = 256
+    chat_context_cache_max_mb: int = 64
+    
+    # Search Count Configuration (hits are batched in memory between flushes)
+    search_count_flush_seconds: float = 5.0
+    search_count_max_pending: int = 50000
+    
+    # Usage Tracking Configuration (billing events are buffered in memory and inserted in batches;
+    # a full buffer drops the "oldest" or "newest" event)
+    usage_buffer_capacity: int = 100000
+    usage_buffer_batch_size: int = 500
+    usage_buffer_flush_ms: int = 1000
+    usage_buffer_drop_policy: str = "oldest"
+    
+    # Request Logging Configuration (log rows are queued and inserted in batches; successful, fast
+    # requests are kept at the access log sample rate, errors and slow requests always)
+    log_buffer_capacity: int = 50000
+    log_buffer_batch_size: int = 500
+    log_buffer_flush_ms: int = 2000
+    access_log_sample_rate: float = 1.0
+    access_log_slow_ms: int = 1000
+    
+    # Log Retention Configuration (days; whole partitions are dropped, 0 keeps everything)
+    log_retention_days_access: int = 30
+    log_retention_days_activity: int = 90
+    log_retention_days_audit: int = 0
+    log_retention_days_error: int = 180
+    log_retention_days_security: int = 365
+    
+    # Gazette Import Configuration (spreadsheet rows inserted per statement and transaction)
+    gazette_import_batch_size: int = 1000
+    gazette_import_chunk_rows: int = 10000  # Sheet rows read and imported at a time by import jobs
+    gazette_import_upload_chunk_bytes: int = 1048576  # Upload bytes read into memory at a time
+    gazette_import_report_dir: str = "gazette_import_reports"  # Error reports (kept out of the public uploads/ mount)
+    
     # Application Configuration
     debug: bool = True
     host: str = "0.0.0.0"
@@ -14,6 +14,8 @@ from models.people import People
 from models.person_analytics import PersonAnalytics
 from models.person_case_statistics import PersonCaseStatistics
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from services.corpus_iterator import Checkpoint, iter_rows
 import logging
 
 # Configure logging
@@ -26,18 +28,22 @@ def generate_missing_analytics():
         # Get database session
         db = next(get_db())
         
-        # Find people without analytics
-        people_with_analytics = db.query(PersonAnalytics.person_id).subquery()
-        people_without_analytics = db.query(People).filter(
-            ~People.id.in_(people_with_analytics)
-        ).all()
+        # Find people without analytics (streamed by id; a rerun picks up whoever is still missing)
+        without_analytics = ~People.id.in_(select(PersonAnalytics.person_id))
+        missing_count = db.query(People).filter(without_analytics).count()
         
-        logger.info(f"Found {len(people_without_analytics)} people without analytics")
+        logger.info(f"Found {missing_count} people without analytics")
         
-        if not people_without_analytics:
+        if not missing_count:
             logger.info("All people already have analytics generated")
             return
         
+        people_without_analytics = iter_rows(
+            select(People.id, People.full_name).where(without_analytics),
+            People.id,
+            bind=db.get_bind()
+        )
+        
         # Initialize analytics generator
         generator = AutoAnalyticsGenerator(db)
         
@@ -48,7 +54,7 @@ def generate_missing_analytics():
         
         for i, person in enumerate(people_without_analytics, 1):
             try:
-                logger.info(f"Processing person {i}/{len(people_without_analytics)}: {person.full_name} (ID: {person.id})")
+                logger.info(f"Processing person {i}/{missing_count}: {person.full_name} (ID: {person.id})")
                 generator.generate_analytics_for_person(person.id)
                 successful += 1
                 logger.info(f"✓ Analytics generated for {person.full_name}")
@@ -60,7 +66,7 @@ def generate_missing_analytics():
         
         # Summary
         logger.info(f"\n=== ANALYTICS GENERATION SUMMARY ===")
-        logger.info(f"Total people processed: {len(people_without_analytics)}")
+        logger.info(f"Total people processed: {successful + failed}")
         logger.info(f"Successful: {successful}")
         logger.info(f"Failed: {failed}")
         
@@ -89,15 +95,17 @@ def generate_missing_analytics():
     finally:
         db.close()
 
-def regenerate_all_analytics():
+def regenerate_all_analytics(checkpoint_path=None):
     """Regenerate analytics for all people in the database"""
     try:
         # Get database session
         db = next(get_db())
         
-        # Get all people
-        all_people = db.query(People).all()
-        logger.info(f"Regenerating analytics for {len(all_people)} people")
+        # Stream all people by id, recording progress so an interrupted run resumes
+        checkpoint = Checkpoint(checkpoint_path)
+        total_people = db.query(People).filter(People.id > checkpoint.last_id).count()
+        all_people = iter_rows(select(People.id, People.full_name), People.id, bind=db.get_bind(), checkpoint=checkpoint)
+        logger.info(f"Regenerating analytics for {total_people} people")
         
         # Initialize analytics generator
         generator = AutoAnalyticsGenerator(db)
@@ -109,7 +117,7 @@ def regenerate_all_analytics():
         
         for i, person in enumerate(all_people, 1):
             try:
-                logger.info(f"Processing person {i}/{len(all_people)}: {person.full_name} (ID: {person.id})")
+                logger.info(f"Processing person {i}/{total_people}: {person.full_name} (ID: {person.id})")
                 generator.generate_analytics_for_person(person.id)
                 successful += 1
                 logger.info(f"✓ Analytics regenerated for {person.full_name}")
@@ -121,7 +129,7 @@ def regenerate_all_analytics():
         
         # Summary
         logger.info(f"\n=== ANALYTICS REGENERATION SUMMARY ===")
-        logger.info(f"Total people processed: {len(all_people)}")
+        logger.info(f"Total people processed: {successful + failed}")
         logger.info(f"Successful: {successful}")
         logger.info(f"Failed: {failed}")
         
@@ -146,6 +154,8 @@ if __name__ == "__main__":
                        help="Regenerate analytics for all people (not just missing ones)")
     parser.add_argument("--person-id", type=int, 
                        help="Generate analytics for a specific person ID")
+    parser.add_argument("--checkpoint", default="analytics_regeneration.checkpoint",
+                       help="File recording --regenerate-all progress, so an interrupted run resumes")
     
     args = parser.parse_args()
     
@@ -162,7 +172,7 @@ if __name__ == "__main__":
             db.close()
     elif args.regenerate_all:
         # Regenerate all analytics
-        regenerate_all_analytics()
+        regenerate_all_analytics(args.checkpoint)
     else:
         # Generate missing analytics only
         generate_missing_analytics()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions API, for benchmarking the
+bulk LLM worker pool (services/llm_worker_pool.py) without network access
+or API spend.
+
+    # Serve on port 8089; point scripts at it with --base-url http://127.0.0.1:8089/v1
+    python llm_mock_server.py serve --latency 1.5 --error-rate 0.05
+
+    # Run the pool against an in-process mock and report throughput
+    python llm_mock_server.py bench --jobs 500 --concurrency 32
+
+Each request sleeps for the configured latency (with jitter) and answers
+with a case analysis JSON document. A fraction of requests fail with 429
+(with Retry-After) or 503 to exercise the retry path. Requests with
+"stream": true get the answer as server-sent chunks after the latency
+(time to first token), ending with a usage chunk when
+stream_options.include_usage is set.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from services.llm_worker_pool import CHARS_PER_TOKEN, CompletionJob, LLMWorkerPool, async_openai_client
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Characters per streamed chunk and seconds between chunks
+STREAM_CHUNK_CHARS = 8
+STREAM_CHUNK_DELAY = 0.01
+
+MOCK_ANALYSIS = {
+    "case_outcome": "WON",
+    "court_orders": "Judgment entered for the plaintiff with costs.",
+    "financial_impact": "MODERATE - Damages and costs awarded against the defendant.",
+    "detailed_outcome": "Mock analysis produced by llm_mock_server.py."
+}
+
+
+def create_app(latency: float, error_rate: float) -> FastAPI:
+    app = FastAPI(title="Mock completions API")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(max(0.0, random.gauss(latency, latency * 0.2)))
+
+        if random.random() < error_rate:
+            if random.random() < 0.5:
+                return JSONResponse(
+                    status_code=429,
+                    headers={"retry-after": "1"},
+                    content={"error": {"message": "Rate limit reached", "type": "requests"}}
+                )
+            return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable"}})
+
+        content = json.dumps(MOCK_ANALYSIS)
+        prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // CHARS_PER_TOKEN
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        completion_id = f"chatcmpl-mock-{random.getrandbits(32):08x}"
+        
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(
+                stream_chunks(completion_id, body.get("model", "mock"), content, usage if include_usage else None),
+                media_type="text/event-stream"
+            )
+        
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    return app
+
+
+async def stream_chunks(completion_id: str, model: str, content: str, usage=None):
+    """Chat completion chunks in the API's server-sent event format"""
+    def chunk(choices, chunk_usage=None):
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": choices,
+            "usage": chunk_usage
+        }) + "\n\n"
+
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        delta = {"content": content[start:start + STREAM_CHUNK_CHARS]}
+        if start == 0:
+            delta["role"] = "assistant"
+        yield chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+        await asyncio.sleep(STREAM_CHUNK_DELAY)
+    yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+    if usage is not None:
+        yield chunk([], usage)
+    yield "data: [DONE]\n\n"
+
+
+def start_server(app: FastAPI, port: int) -> uvicorn.Server:
+    """Run the app on a background thread and wait until it accepts connections"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def bench(args) -> None:
+    server = start_server(create_app(args.latency, args.error_rate), args.port)
+
+    pool = LLMWorkerPool(
+        async_openai_client("mock-key", base_url=f"http://127.0.0.1:{args.port}/v1"),
+        "mock",
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        log_every=max(1, args.jobs // 10)
+    )
+    prompt = "Case Title: Mock v. Mock\n\n" + "Judgement: lorem ipsum " * 300
+    jobs = (
+        CompletionJob(index, [{"role": "user", "content": prompt}], max_tokens=500)
+        for index in range(args.jobs)
+    )
+    stats = asyncio.run(pool.run(jobs, lambda job, text: json.loads(text)))
+    server.should_exit = True
+
+    logger.info("=" * 50)
+    logger.info(f"Jobs: {args.jobs}, concurrency: {args.concurrency}, latency: {args.latency}s, error rate: {args.error_rate}")
+    logger.info(f"Results: {stats}")
+    logger.info(f"Throughput: {stats['succeeded'] / stats['elapsed_seconds'] * 60:.1f} jobs/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.5, help="Mean seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of requests answered with 429/503")
+    parser.add_argument("--jobs", type=int, default=200, help="bench: number of jobs")
+    parser.add_argument("--concurrency", type=int, default=16, help="bench: requests in flight")
+    parser.add_argument("--rpm", type=int, default=3000, help="bench: requests per minute budget")
+    parser.add_argument("--tpm", type=int, default=2000000, help="bench: tokens per minute budget")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        uvicorn.run(create_app(args.latency, args.error_rate), host="127.0.0.1", port=args.port)
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-# from middleware.logging_middleware import LoggingMiddleware
+from middleware.logging_middleware import LoggingMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
@@ -46,6 +46,11 @@ from routes import contact_requests
 from routes import ai_case_analysis
 from routes import analytics_generator
 from config import settings
+from services.autocomplete_index import autocomplete_index
+from services.search_counter import search_counter
+from services.usage_buffer import usage_buffer
+from services.log_sink import log_sink
+from services.ai_response_cache import completion_cache
 
 # Application lifespan
 @asynccontextmanager
@@ -54,9 +59,17 @@ async def lifespan(app: FastAPI):
     print("Starting juridence Backend...")
     create_tables()
     print("Database tables created successfully")
+    autocomplete_index.start()
+    search_counter.start()
+    usage_buffer.start()
+    log_sink.start()
     yield
     # Shutdown
     print("Shutting down juridence Backend...")
+    search_counter.stop()
+    usage_buffer.stop()
+    log_sink.stop()
+    completion_cache.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -75,8 +88,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Logging middleware
-# app.add_middleware(LoggingMiddleware)
+# Logging middleware (log rows are batched and access logs sampled, see services/log_sink.py)
+app.add_middleware(LoggingMiddleware)
 
 # Temporarily override authentication for testing - using real database user
 async def get_real_admin_user():
@@ -156,7 +169,9 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "juridence-api",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "usage_events": usage_buffer.stats(),
+        "logs": log_sink.stats()
     }
 
 # Global exception handler
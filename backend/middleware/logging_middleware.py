@@ -8,12 +8,14 @@ from jose import jwt
 from fastapi import Request, Response
 from fastapi.responses import StreamingResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from database import get_db
 from services.logging_service import LoggingService
+from services.log_sink import log_sink
 from models.logs import ActivityType, LogLevel
 from config import settings
 
+# Activities that only read, logged for sampled requests only
+READ_ACTIVITIES = {ActivityType.VIEW, ActivityType.SEARCH, ActivityType.API_CALL}
+
 class LoggingMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
         super().__init__(app)
@@ -57,23 +59,28 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # Calculate response time
         process_time = int((time.time() - start_time) * 1000)  # Convert to milliseconds
         
-        # Log the request
+        # Log the request (rows are queued and written in batches by services.log_sink)
         try:
-            db = next(get_db())
-            logging_service = LoggingService(db)
+            logging_service = LoggingService()
+            
+            # The JWT subject is the user id; anything else cannot be stored as one
+            user_id = int(user_id) if user_id is not None and str(user_id).isdigit() else None
             
-            # Log access
-            logging_service.log_access(
-                request=request,
-                response=response,
-                user_id=user_id,
-                session_id=session_id,
-                response_time=process_time
-            )
+            # Log access, sampled for successful fast requests
+            sample_rate = log_sink.sample_access(response.status_code, process_time)
+            if sample_rate is not None:
+                logging_service.log_access(
+                    request=request,
+                    response=response,
+                    user_id=user_id,
+                    session_id=session_id,
+                    response_time=process_time,
+                    sample_rate=sample_rate
+                )
             
-            # Log activity for certain endpoints
-            if self.should_log_activity(request):
-                activity_type = self.get_activity_type(request)
+            # Log activity for certain endpoints; reads follow the access log sampling
+            activity_type = self.get_activity_type(request)
+            if self.should_log_activity(request) and (sample_rate is not None or activity_type not in READ_ACTIVITIES):
                 action = self.get_action_description(request)
                 
                 logging_service.log_activity(
@@ -108,8 +115,6 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     user_agent=request.headers.get("user-agent"),
                     severity=LogLevel.ERROR if response.status_code >= 500 else LogLevel.WARNING
                 )
-            
-            db.close()
         except Exception as e:
             # Don't let logging errors break the request
             print(f"Error in logging middleware: {e}")
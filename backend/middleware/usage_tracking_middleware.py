@@ -6,8 +6,6 @@ import time
 import json
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from database import get_db
 from services.usage_tracking_service import UsageTrackingService
 from auth import get_user_from_token
 import logging
@@ -74,8 +72,8 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
         # Track usage if response was successful
         if response.status_code < 400:
             try:
-                db = next(get_db())
-                usage_service = UsageTrackingService(db)
+                # Buffered; no database work in the response path
+                usage_service = UsageTrackingService()
                 
                 # Extract request data
                 request_data = await self._extract_request_data(request)
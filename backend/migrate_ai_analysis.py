@@ -146,7 +146,8 @@ def main():
         logger.info("Starting AI analysis process...")
         start_time = datetime.now()
         
-        result = ai_service.process_all_cases(batch_size=5)  # Smaller batch size for stability
+        # Finished case ids are recorded so an interrupted run can be resumed
+        result = ai_service.process_all_cases(progress_path="ai_analysis_progress.log")
         
         end_time = datetime.now()
         duration = end_time - start_time
@@ -158,6 +159,7 @@ def main():
         logger.info(f"Processed: {result.get('processed', 0)}")
         logger.info(f"Successful: {result.get('successful', 0)}")
         logger.info(f"Failed: {result.get('failed', 0)}")
+        logger.info(f"Served from response cache: {result.get('cache_hits', 0)}")
         logger.info(f"Completion percentage: {result.get('completion_percentage', 0):.2f}%")
         logger.info(f"Duration: {duration}")
         
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Database migration script to create and prune the ai_response_cache table.
+The table stores AI completions by a hash of their prompt, so re-processing a
+case whose content has not changed reuses the stored analysis
+(services/ai_response_cache.py). Running this script creates the table if
+needed, then drops expired entries and entries written under a template
+version that is no longer current. Safe to run repeatedly, e.g. before the
+nightly reanalysis.
+"""
+
+import os
+import sys
+import logging
+import argparse
+from sqlalchemy import create_engine, text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from database import Base
+from models.ai_response_cache import AIResponseCache
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main migration function"""
+    parser = argparse.ArgumentParser(description="Create and prune the AI response cache")
+    parser.add_argument("--clear", metavar="NAMESPACE", action="append", default=[],
+                        help="Also delete every entry of a namespace (repeatable)")
+    args = parser.parse_args()
+
+    logger.info("Starting AI response cache migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine, tables=[AIResponseCache.__table__])
+
+    try:
+        logger.info(f"Deleted {completion_cache.purge_expired()} expired entries")
+        for namespace, version in TEMPLATE_VERSIONS.items():
+            deleted = completion_cache.invalidate(namespace, keep_version=version)
+            if deleted:
+                logger.info(f"Deleted {deleted} '{namespace}' entries older than template version {version}")
+        for namespace in args.clear:
+            logger.info(f"Deleted {completion_cache.invalidate(namespace)} '{namespace}' entries")
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+    for namespace, stored in completion_cache.stats()["stored"].items():
+        logger.info(f"{namespace}: {stored['entries']} entries, {stored['total_hits']} hits")
+
+    logger.info("=" * 50)
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Database migration script to create and backfill the case_parties table.
+The table backs person -> cases lookups (/api/case-search/person/{name},
+person analytics and legal history). New and edited cases are indexed as they
+are saved; this script fills in cases that existed before the table.
+Safe to run repeatedly: each case's rows are replaced, not duplicated.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from database import Base
+from models.case_parties import CaseParty
+from services.case_party_index import rebuild_case_parties
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main migration function"""
+    logger.info("Starting case parties migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = datetime.now()
+
+    Base.metadata.create_all(bind=engine, tables=[CaseParty.__table__])
+    db = sessionmaker(bind=engine)()
+    try:
+        row_count = rebuild_case_parties(db, checkpoint_path="case_parties_migration.checkpoint")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    logger.info("=" * 50)
+    logger.info(f"Indexed {row_count} case parties in {datetime.now() - start_time}")
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
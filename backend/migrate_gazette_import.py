@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Database migration script for bulk gazette imports.
+Adds gazette_entries.import_key with its unique index, which lets a
+re-imported spreadsheet skip the rows it already added, and the
+ix_people_name_key index that bulk imports resolve people by name with
+(services/gazette_bulk_import.py). Existing entries keep a NULL import_key.
+Safe to run repeatedly: existing columns and indexes are skipped.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from models.gazette import Gazette
+from models.people import People
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+INDEXES = [
+    next(index for index in Gazette.__table__.indexes if index.name == "ux_gazette_entries_import_key"),
+    next(index for index in People.__table__.indexes if index.name == "ix_people_name_key"),
+]
+
+def main():
+    """Main migration function"""
+    logger.info("Starting gazette import migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = datetime.now()
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE gazette_entries ADD COLUMN IF NOT EXISTS import_key VARCHAR(64)"))
+        logger.info("Ensured gazette_entries.import_key")
+
+        for index in INDEXES:
+            logger.info(f"Ensuring index {index.name}")
+            index.create(bind=engine, checkfirst=True)
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+    logger.info("=" * 50)
+    logger.info(f"Gazette import migration finished in {datetime.now() - start_time}")
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
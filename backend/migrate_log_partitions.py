@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Database migration script to convert the log tables to time partitions.
+access_logs, activity_logs, audit_logs, error_logs and security_logs are
+range-partitioned on created_at (services/log_partitions.py). For each table
+that is still a plain table, this script renames it aside, creates the
+partitioned table and the partitions its retained rows need, copies those
+rows (rows older than the table's retention are not carried over) and drops
+the old table, all in one transaction per table. It then creates upcoming
+partitions and drops expired ones, as the API's log writer does hourly.
+Safe to run repeatedly: already partitioned tables are only maintained.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from database import Base
+from models.logs import AccessLog, ActivityLog, AuditLog, ErrorLog, SecurityLog
+from services.log_partitions import drop_expired_partitions, ensure_partitions, is_partitioned, retention_days
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LOG_MODELS = [AccessLog, ActivityLog, AuditLog, ErrorLog, SecurityLog]
+
+def convert_table(conn, model) -> int:
+    """Replace a plain log table with the partitioned one, keeping its retained rows"""
+    table = model.__table__
+    legacy = f"{table.name}_unpartitioned"
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy}"'))
+    # Free the index, constraint and sequence names for the new table
+    for (index_name,) in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table"
+    ), {"table": legacy}).all():
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_unpartitioned"'))
+    conn.execute(text(f'ALTER SEQUENCE IF EXISTS "{table.name}_id_seq" RENAME TO "{table.name}_id_seq_unpartitioned"'))
+
+    table.create(bind=conn)
+
+    days = retention_days(table.name)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    oldest, newest = conn.execute(
+        text(f'SELECT min(created_at), max(created_at) FROM "{legacy}"' + (" WHERE created_at >= :cutoff" if cutoff else "")),
+        {"cutoff": cutoff} if cutoff else {}
+    ).one()
+    if oldest:
+        ensure_partitions(conn, start=oldest, end=newest, tables=[table.name])
+    ensure_partitions(conn, tables=[table.name])
+
+    # The new table may have columns the old one lacks (access_logs.sample_rate)
+    legacy_columns = set(conn.execute(text(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = :table"
+    ), {"table": legacy}).scalars())
+    columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in legacy_columns)
+    copied = conn.execute(
+        text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{legacy}"'
+             + (" WHERE created_at >= :cutoff" if cutoff else "")),
+        {"cutoff": cutoff} if cutoff else {}
+    ).rowcount
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+        f'(SELECT coalesce(max(id), 0) + 1 FROM "{table.name}"), false)'
+    ))
+    conn.execute(text(f'DROP TABLE "{legacy}"'))
+    return copied
+
+def main():
+    """Main migration function"""
+    logger.info("Starting log partitions migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = datetime.now()
+
+    try:
+        for model in LOG_MODELS:
+            name = model.__tablename__
+            with engine.begin() as conn:
+                exists = conn.execute(text("SELECT to_regclass(:table)"), {"table": name}).scalar()
+                if not exists:
+                    Base.metadata.create_all(bind=conn, tables=[model.__table__])
+                    logger.info(f"Created partitioned table {name}")
+                elif not is_partitioned(conn, name):
+                    copied = convert_table(conn, model)
+                    logger.info(f"Converted {name} to partitions, copied {copied} rows")
+                else:
+                    logger.info(f"{name} is already partitioned")
+
+        with engine.begin() as conn:
+            ensure_partitions(conn)
+            dropped = drop_expired_partitions(conn)
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+    logger.info("=" * 50)
+    logger.info(f"Dropped expired partitions: {dropped or 'none'}")
+    logger.info(f"Log partitions migrated in {datetime.now() - start_time}")
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
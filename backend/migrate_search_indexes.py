@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Database migration script to create the stored search vectors and the full-text
+and trigram search GIN indexes.
+The indexes back /api/search/unified, /api/search/quick, /api/search/advanced,
+/api/case-search/search and the match=contains and match=fuzzy modes of
+/api/people/search.
+Adding a search vector column rewrites its table (reported_cases is the large one).
+Safe to run repeatedly: columns and indexes that already exist are skipped.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from services.full_text_search import ensure_search_indexes
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main migration function"""
+    logger.info("Starting search index migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = datetime.now()
+
+    try:
+        index_count = ensure_search_indexes(engine)
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+    logger.info("=" * 50)
+    logger.info(f"Checked {index_count} search indexes in {datetime.now() - start_time}")
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
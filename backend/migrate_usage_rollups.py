@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Database migration script to create and backfill the usage rollup tables.
+usage_rollup_hourly and usage_rollup_daily hold usage_tracking totals per
+user, resource type and endpoint, so billing and usage summaries no longer
+scan a period's raw events (services/usage_rollups.py). The usage writer
+keeps them current; this script adds the usage_tracking (user_id,
+created_at) index and rebuilds the rollups from every existing event.
+Safe to run repeatedly, including while the API is running: usage writes
+wait for the rebuild and are then added to it.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from config import settings
+from database import Base
+from models.usage_rollup import UsageRollupHourly, UsageRollupDaily
+from models.usage_tracking import UsageTracking
+from services.usage_rollups import rebuild_rollups
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main migration function"""
+    logger.info("Starting usage rollups migration")
+    logger.info("=" * 50)
+
+    engine = create_engine(settings.database_url)
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        sys.exit(1)
+
+    start_time = datetime.now()
+
+    Base.metadata.create_all(bind=engine, tables=[UsageRollupHourly.__table__, UsageRollupDaily.__table__])
+    try:
+        for index in UsageTracking.__table__.indexes:
+            if index.name == "ix_usage_tracking_user_created":
+                index.create(bind=engine, checkfirst=True)
+        with engine.begin() as conn:
+            row_count = rebuild_rollups(conn)
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+    logger.info("=" * 50)
+    logger.info(f"Rebuilt {row_count} hourly usage rollups in {datetime.now() - start_time}")
+    logger.info("Migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ from .person_case_statistics import PersonCaseStatistics
 from .person_analytics import PersonAnalytics
 from .case_hearings import CaseHearing
 from .case_metadata import CaseMetadata
+from .case_parties import CaseParty
+from .ai_response_cache import AIResponseCache
+from .analytics_job import AnalyticsJob, AnalyticsTask
+from .analytics_change import AnalyticsChange, AnalyticsDirty
+from .gazette_import_job import GazetteImportJob
 from .banks import Banks
 from .bank_analytics import BankAnalytics
 from .bank_case_statistics import BankCaseStatistics
@@ -25,3 +30,4 @@ from .settings import Settings
 from .role import Role, Permission, UserRole
 from .tenant import Tenant, SubscriptionPlan, SubscriptionRequest, TenantSetting
 from .usage_tracking import UsageTracking, BillingSummary
+from .usage_rollup import UsageRollupHourly, UsageRollupDaily
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class AIResponseCache(Base):
+    """
+    A stored chat completion, addressed by a hash of what produced it.
+
+    Maintained by services/ai_response_cache.py; lets re-processing a case
+    whose text has not changed reuse the earlier completion instead of
+    calling the model again.
+    """
+    __tablename__ = "ai_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True)  # sha256 of namespace, template version, model and normalized prompt
+    namespace = Column(String(50), nullable=False)  # Call site, e.g. case_analysis, banking_summary
+    template_version = Column(String(20), nullable=False)
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)  # Raw completion text
+    hit_count = Column(Integer, default=0, nullable=False)
+    last_hit_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    expires_at = Column(DateTime, nullable=True, index=True)  # NULL never expires
+
+    __table_args__ = (
+        Index("ix_ai_response_cache_namespace_version", "namespace", "template_version"),
+    )
@@ -0,0 +1,156 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, PrimaryKeyConstraint, event, insert, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from database import Base
+from models.case_parties import ANALYTICS_ROLES, CaseParty
+
+class AnalyticsChange(Base):
+    """
+    A write to a case, gazette entry or person that analytics depend on.
+
+    Appended in the writing transaction (by the flush listeners below, or
+    record_changes for Core updates); services/incremental_analytics.py turns
+    unprocessed changes into AnalyticsDirty rows.
+    """
+    __tablename__ = "analytics_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(50), nullable=False)  # reported_cases, gazette_entries, people
+    source_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)  # insert, update, delete
+    entity_type = Column(String(20), nullable=True)  # Affected entity when known at write time (people, banks, insurance, companies)
+    entity_id = Column(Integer, nullable=True)
+    party_names = Column(Text, nullable=True)  # A case's normalized party names before an edit or delete, one per line
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The consumer scans only unprocessed changes, in id order
+        Index("ix_analytics_changes_unprocessed", "id", postgresql_where=(processed_at.is_(None))),
+    )
+
+class AnalyticsDirty(Base):
+    """An entity whose analytics are out of date, recomputed and removed by the incremental worker"""
+    __tablename__ = "analytics_dirty"
+
+    entity_type = Column(String(20), nullable=False)  # people, banks, insurance, companies
+    entity_id = Column(Integer, nullable=False)
+    marked_at = Column(DateTime, default=func.now(), nullable=False)  # Last change; a re-mark during recomputation keeps the row
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    available_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("entity_type", "entity_id"),
+        Index("ix_analytics_dirty_available", "available_at", postgresql_where=(locked_by.is_(None))),
+    )
+
+# Tables whose writes change analytics, with the columns whose changes do not
+# (bookkeeping, and the stats analytics generation itself writes back)
+WATCHED_TABLES = {
+    "reported_cases": {"updated_at", "updated_by", "created_by", "file_url", "firebase_url", "file_name"},
+    "gazette_entries": {"updated_at", "updated_by"},
+    "people": {
+        "updated_at", "updated_by", "last_searched", "search_count", "risk_level", "risk_score",
+        "case_count", "case_types", "court_records", "is_verified", "verification_date", "verification_notes"
+    },
+}
+
+_PENDING_KEY = "analytics_changes"
+
+def record_changes(bind, source, source_ids, operation="update"):
+    """
+    Log changes made outside the ORM unit of work (Core or bulk UPDATEs).
+
+    Args:
+        bind: Session or Connection of the writing transaction
+        source: reported_cases, gazette_entries or people
+        source_ids: Ids of the changed rows
+    """
+    rows = [{"source": source, "source_id": source_id, "operation": operation} for source_id in source_ids]
+    if source == "people":
+        # A person is its own affected entity
+        rows = [dict(row, entity_type="people", entity_id=row["source_id"]) for row in rows]
+    if rows:
+        bind.execute(insert(AnalyticsChange.__table__), rows)
+
+def _changed(obj):
+    """True if a flushed update touches columns analytics read"""
+    ignored = WATCHED_TABLES[obj.__tablename__]
+    state = inspect(obj)
+    return any(
+        state.attrs[column.key].history.has_changes()
+        for column in state.mapper.column_attrs
+        if column.key not in ignored
+    )
+
+def _watched(objects):
+    return [obj for obj in objects if getattr(obj, "__tablename__", None) in WATCHED_TABLES]
+
+@event.listens_for(Session, "before_flush")
+def _capture_case_parties(session, flush_context, instances):
+    """Remember the parties of edited and deleted cases before the flush rewrites or cascades them"""
+    case_ids = [
+        (obj.id, "delete" if obj in session.deleted else "update")
+        for obj in _watched(session.dirty | session.deleted)
+        if obj.__tablename__ == "reported_cases" and obj.id
+        and (obj in session.deleted or (session.is_modified(obj) and _changed(obj)))
+    ]
+    if not case_ids:
+        return
+    operations = dict(case_ids)
+    parties = CaseParty.__table__
+    rows = session.connection().execute(
+        select(parties.c.case_id, parties.c.role, parties.c.normalized_name, parties.c.entity_type, parties.c.entity_id)
+        .where(parties.c.case_id.in_(list(operations)))
+    ).all()
+    # Resolved entities, and the names the worker matches against entity names
+    entities, names = set(), {}
+    for case_id, role, normalized_name, entity_type, entity_id in rows:
+        if entity_type:
+            entities.add((case_id, entity_type, entity_id))
+        if role in ANALYTICS_ROLES:
+            names.setdefault(case_id, set()).add(normalized_name)
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    pending.extend(
+        {"source": "reported_cases", "source_id": case_id, "operation": operations[case_id],
+         "entity_type": entity_type, "entity_id": entity_id}
+        for case_id, entity_type, entity_id in sorted(entities)
+    )
+    pending.extend(
+        {"source": "reported_cases", "source_id": case_id, "operation": operations[case_id],
+         "party_names": "\n".join(sorted(case_names))}
+        for case_id, case_names in sorted(names.items())
+    )
+
+@event.listens_for(Session, "after_flush")
+def _log_changes(session, flush_context):
+    """Append the flush's relevant inserts, updates and deletes to analytics_changes, in its transaction"""
+    rows = session.info.pop(_PENDING_KEY, [])
+    for operation, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in _watched(objects):
+            if operation == "update" and not _changed(obj):
+                continue
+            source = obj.__tablename__
+            row = {"source": source, "source_id": obj.id, "operation": operation}
+            if source == "people":
+                rows.append(dict(row, entity_type="people", entity_id=obj.id))
+            elif source == "gazette_entries":
+                # The linked person, and the previously linked one if it changed
+                history = inspect(obj).attrs.person_id.history
+                person_ids = {person_id for person_id in (obj.person_id, *history.deleted) if person_id}
+                rows.extend(dict(row, entity_type="people", entity_id=person_id) for person_id in person_ids)
+            elif operation != "delete":
+                # Resolved through case_parties when processed (the parties index is written after the case);
+                # a deleted case's parties were captured before the flush
+                rows.append(dict(row, entity_type=None, entity_id=None))
+    if rows:
+        # One executemany needs the same columns in every row
+        rows = [{"entity_type": None, "entity_id": None, "party_names": None, **row} for row in rows]
+        session.connection().execute(insert(AnalyticsChange.__table__), rows)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from database import Base
+
+class AnalyticsJob(Base):
+    """
+    A requested analytics regeneration (e.g. all people, or those without analytics).
+
+    Its work is one AnalyticsTask per person, run by analytics_worker.py
+    (services/analytics_jobs.py); progress is counted from the tasks.
+    """
+    __tablename__ = "analytics_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # regenerate_all, regenerate_missing, people
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, cancelled
+    total_tasks = Column(Integer, default=0, nullable=False)
+    requested_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+class AnalyticsTask(Base):
+    """One person's analytics regeneration within a job, claimed by workers with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "analytics_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("analytics_jobs.id", ondelete="CASCADE"), nullable=False)
+    person_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed, cancelled
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    locked_by = Column(String(100), nullable=True)  # Worker holding a running task
+    locked_at = Column(DateTime, nullable=True)
+    available_at = Column(DateTime, default=func.now(), nullable=False)  # Not claimed before (retry backoff)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Enqueuing a person twice in one job is a no-op
+        UniqueConstraint("job_id", "person_id", name="uq_analytics_tasks_job_person"),
+        # Claim scans only pending tasks, in id order
+        Index("ix_analytics_tasks_pending", "id", postgresql_where=(status == "pending")),
+        # Stale-lock recovery scans only running tasks
+        Index("ix_analytics_tasks_running", "locked_at", postgresql_where=(status == "running")),
+        Index("ix_analytics_tasks_job_status", "job_id", "status"),
+    )
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
+from models.search_vectors import search_vector_column, weighted_search_vector
 
 class Banks(Base):
     __tablename__ = "banks"
@@ -74,3 +75,16 @@ class Banks(Base):
     analytics = relationship("BankAnalytics", back_populates="bank", uselist=False)
     case_statistics = relationship("BankCaseStatistics", back_populates="bank", uselist=False)
     gazette_entries = relationship("Gazette", back_populates="bank", lazy="dynamic")
+    
+    # Weighted full-text document, a stored generated column (see models/search_vectors.py)
+    search_vector = search_vector_column(
+        weighted_search_vector(
+            primary=[name, short_name, bank_code],
+            secondary=[city, region, description]
+        )
+    )
+    
+    # Full-text search index (queried through services/full_text_search.py)
+    __table_args__ = (
+        Index("ix_banks_search_vector", "search_vector", postgresql_using="gin"),
+    )
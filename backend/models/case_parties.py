@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from database import Base
+
+# Roles whose names the analytics search for entity names (people, banks, insurers, companies)
+ANALYTICS_ROLES = ("title", "protagonist", "antagonist", "judge")
+
+class CaseParty(Base):
+    """
+    One name field of a case (a party, judge, lawyer list or title), normalized for lookups.
+
+    Maintained by services/case_party_index.py when cases are created or
+    updated; replaces ILIKE scans over reported_cases in person -> cases lookups.
+    """
+    __tablename__ = "case_parties"
+
+    id = Column(Integer, primary_key=True, index=True)
+    case_id = Column(Integer, ForeignKey("reported_cases.id", ondelete="CASCADE"), nullable=False, index=True)
+    party_name = Column(String(500), nullable=False)  # As written in the case
+    normalized_name = Column(String(500), nullable=False, index=True)  # Lowercase, punctuation stripped
+    role = Column(String(20), nullable=False, index=True)  # title, protagonist, antagonist, judge, judgement_by, lawyer, related
+    entity_type = Column(String(20), nullable=True)  # people, banks, insurance, companies when the name resolves to a record
+    entity_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    case = relationship("ReportedCases")
+
+    __table_args__ = (
+        Index("ix_case_parties_entity", "entity_type", "entity_id"),
+        # Substring lookups (LIKE '%name%') on normalized names
+        Index(
+            "ix_case_parties_name_trgm",
+            "normalized_name",
+            postgresql_using="gin",
+            postgresql_ops={"normalized_name": "gin_trgm_ops"}
+        ),
+    )
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, Date, DECIMAL
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, Date, DECIMAL, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
+from models.search_vectors import search_vector_column, weighted_search_vector
 
 class Companies(Base):
     __tablename__ = "companies"
@@ -97,3 +98,16 @@ class Companies(Base):
     analytics = relationship("CompanyAnalytics", back_populates="company", uselist=False)
     case_statistics = relationship("CompanyCaseStatistics", back_populates="company", uselist=False)
     gazette_entries = relationship("Gazette", back_populates="company", lazy="dynamic")
+
+    # Weighted full-text document, a stored generated column (see models/search_vectors.py)
+    search_vector = search_vector_column(
+        weighted_search_vector(
+            primary=[name, short_name, registration_number],
+            secondary=[city, region, industry, description]
+        )
+    )
+
+    # Full-text search index (queried through services/full_text_search.py)
+    __table_args__ = (
+        Index("ix_companies_search_vector", "search_vector", postgresql_using="gin"),
+    )
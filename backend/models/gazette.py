@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from models.search_vectors import search_vector_column, weighted_search_vector, normalized_name_document
 import enum
 
 class GazetteType(str, enum.Enum):
@@ -106,6 +107,7 @@ class Gazette(Base):
     gazette_date = Column(DateTime)  # Gazette publication date
     gazette_page = Column(Integer)  # Page number in gazette
     source_item_number = Column(String(50))  # Item number in source
+    import_key = Column(String(64))  # Hash of an imported spreadsheet row, so re-imports skip it
     
     # Document Attachments
     document_url = Column(String(500))  # URL to attached document
@@ -129,6 +131,27 @@ class Gazette(Base):
     insurance = relationship("Insurance", back_populates="gazette_entries")
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
+    
+    # Weighted full-text document, a stored generated column (see models/search_vectors.py)
+    search_vector = search_vector_column(
+        weighted_search_vector(
+            primary=[old_name, new_name],
+            secondary=[title, reference_number]
+        )
+    )
+    
+    # Search indexes (queried through services/full_text_search.py)
+    __table_args__ = (
+        Index("ix_gazette_entries_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram index for fuzzy name matching
+        Index(
+            "ix_gazette_entries_name_trgm",
+            normalized_name_document(old_name, new_name).label("normalized_name"),
+            postgresql_using="gin",
+            postgresql_ops={"normalized_name": "gin_trgm_ops"}
+        ),
+        Index("ux_gazette_entries_import_key", import_key, unique=True),
+    )
 
 class GazetteSearch(Base):
     __tablename__ = "gazette_search_index"
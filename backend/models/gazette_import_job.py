@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class GazetteImportJob(Base):
+    """
+    An Excel gazette import (services/gazette_import_jobs.py).
+
+    The sheet is imported in chunks and the counts are updated after each
+    chunk, so they show the job's progress; skipped rows are written to a
+    CSV error report.
+    """
+    __tablename__ = "gazette_import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    gazette_type = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    total_rows = Column(Integer, nullable=True)  # Sheet rows below the header, from the sheet dimensions
+    processed_rows = Column(Integer, default=0, nullable=False)
+    imported_count = Column(Integer, default=0, nullable=False)
+    duplicate_count = Column(Integer, default=0, nullable=False)
+    skipped_count = Column(Integer, default=0, nullable=False)
+    created_people = Column(Integer, default=0, nullable=False)
+    updated_people = Column(Integer, default=0, nullable=False)
+    error_report = Column(String(500), nullable=True)  # Path of the CSV of skipped rows
+    error = Column(Text, nullable=True)  # Why a failed job failed
+    requested_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
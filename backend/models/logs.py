@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum, Float
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -27,6 +27,10 @@ class ActivityType(enum.Enum):
     SECURITY = "security"
     ADMIN_ACTION = "admin_action"
 
+# Log tables are range-partitioned on created_at (services/log_partitions.py
+# creates and drops the partitions), so created_at is part of the primary key
+PARTITION_BY_CREATED_AT = {"postgresql_partition_by": "RANGE (created_at)"}
+
 # PostgreSQL ENUM types with proper names
 log_level_enum = Enum(LogLevel, name="log_level")
 activity_type_enum = Enum(ActivityType, name="activity_type")
@@ -52,7 +56,10 @@ class AccessLog(Base):
     device_type = Column(String(50), nullable=True)  # desktop, mobile, tablet
     browser = Column(String(100), nullable=True)
     os = Column(String(100), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sample_rate = Column(Float, nullable=True)  # Fraction of such requests logged (NULL: all)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False)
+    
+    __table_args__ = PARTITION_BY_CREATED_AT
     
     # Relationships - temporarily disabled to avoid circular import issues
     # user = relationship("User", back_populates="access_logs")
@@ -74,7 +81,9 @@ class ActivityLog(Base):
     user_agent = Column(Text, nullable=True)
     log_metadata = Column(JSON, nullable=True)  # Additional context data
     severity = Column(log_level_enum, default=LogLevel.INFO, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False)
+    
+    __table_args__ = PARTITION_BY_CREATED_AT
     
     # Relationships - temporarily disabled to avoid circular import issues
     # user = relationship("User", back_populates="activity_logs")
@@ -93,7 +102,9 @@ class AuditLog(Base):
     new_value = Column(Text, nullable=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False)
+    
+    __table_args__ = PARTITION_BY_CREATED_AT
     
     # Relationships - temporarily disabled to avoid circular import issues
     # user = relationship("User", back_populates="audit_logs")
@@ -117,7 +128,9 @@ class ErrorLog(Base):
     resolved = Column(Boolean, default=False, nullable=False)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     resolved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False)
+    
+    __table_args__ = PARTITION_BY_CREATED_AT
     
     # Relationships - temporarily disabled to avoid circular import issues
     # user = relationship("User", foreign_keys=[user_id], back_populates="error_logs")
@@ -138,7 +151,9 @@ class SecurityLog(Base):
     city = Column(String(100), nullable=True)
     log_metadata = Column(JSON, nullable=True)
     blocked = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, nullable=False)
+    
+    __table_args__ = PARTITION_BY_CREATED_AT
     
     # Relationships - temporarily disabled to avoid circular import issues
     # user = relationship("User", back_populates="security_logs")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON, cast, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
+from models.search_vectors import search_vector_column, weighted_search_vector, normalized_name_document, name_key
 
 class People(Base):
     __tablename__ = "people"
@@ -89,5 +90,37 @@ class People(Base):
     # Relationship with gazette entries
     gazette_entries = relationship("Gazette", back_populates="person", lazy="dynamic")
     
+    # Weighted full-text document, a stored generated column (see models/search_vectors.py)
+    search_vector = search_vector_column(
+        weighted_search_vector(
+            primary=[full_name, first_name, last_name, cast(previous_names, Text)],
+            secondary=[id_number, phone_number, email, address, city, region]
+        )
+    )
+    
+    # Search indexes (queried through services/full_text_search.py)
+    __table_args__ = (
+        Index("ix_people_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram index for fuzzy name matching; previous_names is flattened as JSON text
+        Index(
+            "ix_people_name_trgm",
+            normalized_name_document(full_name, cast(previous_names, Text)).label("normalized_name"),
+            postgresql_using="gin",
+            postgresql_ops={"normalized_name": "gin_trgm_ops"}
+        ),
+        # Trigram index for match=contains searches: LIKE '%term%' over every column they cover
+        Index(
+            "ix_people_contains_trgm",
+            normalized_name_document(
+                full_name, first_name, last_name, id_number, phone_number, email, address,
+                city, region, occupation, employer, organization, cast(previous_names, Text)
+            ).label("contains_document"),
+            postgresql_using="gin",
+            postgresql_ops={"contains_document": "gin_trgm_ops"}
+        ),
+        # Exact match on the normalized name, for bulk imports resolving people by name
+        Index("ix_people_name_key", name_key(full_name)),
+    )
+    
     def __repr__(self):
         return f"<People(id={self.id}, name='{self.full_name}', risk_level='{self.risk_level}')>"
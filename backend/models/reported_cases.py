@@ -1,7 +1,40 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, load_only
 from database import Base
+from models.search_vectors import search_vector_column, leading_text, sectioned_search_vector
+
+# Judgements can run to hundreds of KB; only their opening is indexed so the
+# tsvector stays well under PostgreSQL's 1MB limit
+JUDGEMENT_SEARCH_CHARS = 200000
+
+# Column groups for loader profiles (see ReportedCases.loader). The remaining
+# columns, notably detail_content and summernote, are full document bodies
+# that only single-case views need.
+CASE_COLUMN_GROUPS = {
+    # What list views and CaseSearchResult show
+    "summary": (
+        "id", "title", "suit_reference_number", "date", "year", "presiding_judge",
+        "judgement_by", "lawyers", "protagonist", "antagonist", "citation",
+        "dl_citation_no", "court_type", "court_division", "town", "region",
+        "area_of_law", "type", "status", "case_summary", "keywords_phrases",
+        "created_at", "updated_at"
+    ),
+    # Prose scanned by the analytics services
+    "content": (
+        "judgement", "decision", "conclusion", "headnotes", "commentary",
+        "statutes_cited", "cases_cited"
+    ),
+    "ai_analysis": (
+        "ai_case_outcome", "ai_court_orders", "ai_financial_impact",
+        "ai_detailed_outcome", "ai_summary_generated_at", "ai_summary_version"
+    ),
+}
+
+CASE_LOADER_PROFILES = {
+    "summary": ("summary",),
+    "analysis": ("summary", "content", "ai_analysis"),
+}
 
 class ReportedCases(Base):
     __tablename__ = "reported_cases"
@@ -61,3 +94,37 @@ class ReportedCases(Base):
     case_metadata = relationship("CaseMetadata", back_populates="case", uselist=False)
     case_search_index = relationship("CaseSearchIndex", back_populates="case", uselist=False)
     hearings = relationship("CaseHearing", back_populates="case", cascade="all, delete-orphan")
+
+    @classmethod
+    def load_groups(cls, *groups):
+        """load_only() option for one or more groups in CASE_COLUMN_GROUPS"""
+        columns = [getattr(cls, name) for group in groups for name in CASE_COLUMN_GROUPS[group]]
+        return load_only(*columns)
+
+    @classmethod
+    def loader(cls, profile: str = "summary"):
+        """
+        Query option loading the columns of a loader profile.
+
+        "summary" is for list endpoints, "analysis" adds the prose and AI
+        fields the analytics services read, and "full" loads every column
+        but the stored search vector.
+        """
+        if profile == "full":
+            return load_only(*[getattr(cls, prop.key) for prop in cls.__mapper__.column_attrs if prop.key != "search_vector"])
+        return cls.load_groups(*CASE_LOADER_PROFILES[profile])
+
+    # Weighted full-text document, a stored generated column (see models/search_vectors.py)
+    search_vector = search_vector_column(
+        sectioned_search_vector(
+            ("A", [title]),
+            ("B", [protagonist, antagonist]),
+            ("C", [case_summary, keywords_phrases]),
+            ("D", [leading_text(judgement, JUDGEMENT_SEARCH_CHARS)])
+        )
+    )
+
+    # Full-text search index, ranked with ts_rank_cd (queried through services/full_text_search.py)
+    __table_args__ = (
+        Index("ix_reported_cases_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -0,0 +1,80 @@
+from sqlalchemy import DDL, Column, Computed, event, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from database import Base
+
+# Weighted tsvector and normalized-name expressions behind the full-text and
+# trigram GIN indexes declared in the models' __table_args__. Each model's
+# weighted tsvector is a stored generated column (search_vector_column), so
+# matching and ranking read the stored vector instead of re-parsing the text.
+# The trigram indexes are expression indexes; PostgreSQL only uses one when a
+# query repeats the indexed expression verbatim, so queries reuse the Index
+# expression itself (see services/full_text_search.py) instead of rebuilding it.
+# Constants are literal SQL, never bind parameters, for the same reason.
+
+# 'simple' does no stemming or stop-word removal, which suits personal and
+# company names
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+def _text_document(*columns):
+    """Concatenate columns into one text value, treating NULL as empty"""
+    document = None
+    for column in columns:
+        part = func.coalesce(column, literal_column("''"))
+        document = part if document is None else document.op("||")(literal_column("' '")).op("||")(part)
+    return document
+
+def sectioned_search_vector(*sections):
+    """
+    Build a tsvector from (weight, columns) sections, e.g. ("A", [title]), ("B", [parties]).
+
+    Weights are 'A' (highest) to 'D' (lowest); ts_rank and ts_rank_cd score
+    matches in each section by its weight.
+    """
+    vector = None
+    for weight, columns in sections:
+        part = func.setweight(
+            func.to_tsvector(SEARCH_CONFIG, _text_document(*columns)),
+            literal_column(f"'{weight}'")
+        )
+        vector = part if vector is None else vector.op("||")(part)
+    return vector
+
+def weighted_search_vector(primary, secondary=None):
+    """Build a tsvector where `primary` columns (weight A) outrank `secondary` columns (weight D)"""
+    sections = [("A", primary)]
+    if secondary:
+        sections.append(("D", secondary))
+    return sectioned_search_vector(*sections)
+
+def search_vector_column(vector):
+    """
+    Stored generated tsvector column computed from `vector`, kept current by
+    PostgreSQL on every insert and update. Deferred, so ORM queries do not
+    load it unless asked.
+    """
+    return deferred(Column("search_vector", TSVECTOR, Computed(vector, persisted=True)))
+
+def leading_text(column, length):
+    """First `length` characters of a long text column, to keep its tsvector under PostgreSQL's 1MB limit"""
+    return func.left(column, literal_column(str(int(length))))
+
+def normalized_name_document(*columns):
+    """Lower-cased concatenation of name (or other text) columns, indexed with gin_trgm_ops for fuzzy and substring matching"""
+    return func.lower(_text_document(*columns))
+
+def name_key(column):
+    """
+    Trimmed, lower-cased name with whitespace runs collapsed to one space, for
+    exact lookups by normalized name (services/gazette_bulk_import.py computes
+    the same key in pandas)
+    """
+    collapsed = func.regexp_replace(column, literal_column(r"'\s+'"), literal_column("' '"), literal_column("'g'"))
+    return func.lower(func.btrim(collapsed))
+
+# The trigram indexes need pg_trgm before their tables are created
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, PrimaryKeyConstraint
+from database import Base
+
+class _UsageRollupColumns:
+    """Usage totals of one user, resource type and endpoint over one time bucket"""
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # UTC hour or day
+    user_id = Column(Integer, nullable=False)
+    resource_type = Column(String(100), nullable=False)
+    endpoint = Column(String(255), nullable=False)
+
+    events = Column(BigInteger, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)
+    api_calls = Column(BigInteger, nullable=False, default=0)
+    cost = Column(Float, nullable=False, default=0.0)
+    response_time_ms = Column(BigInteger, nullable=False, default=0)  # Sum, for averages
+
+class UsageRollupHourly(_UsageRollupColumns, Base):
+    """
+    Hourly usage_tracking totals per user, resource type and endpoint.
+
+    Incremented by the usage writer in the transaction that inserts the raw
+    rows (services/usage_rollups.py); events without a user are not rolled up.
+    """
+    __tablename__ = "usage_rollup_hourly"
+
+    __table_args__ = (
+        # Summaries read one user's buckets over a range
+        PrimaryKeyConstraint("user_id", "bucket_start", "resource_type", "endpoint"),
+    )
+
+class UsageRollupDaily(_UsageRollupColumns, Base):
+    """Daily usage_tracking totals per user, resource type and endpoint (see UsageRollupHourly)"""
+    __tablename__ = "usage_rollup_daily"
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "bucket_start", "resource_type", "endpoint"),
+    )
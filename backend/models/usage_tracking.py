@@ -2,7 +2,7 @@
 Usage tracking models for comprehensive billing and analytics
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -52,6 +52,11 @@ class UsageTracking(Base):
     
     # Relationships
     user = relationship("User", back_populates="usage_records")
+    
+    __table_args__ = (
+        # Usage summaries read the part of a user's period not covered by the rollups
+        Index("ix_usage_tracking_user_created", "user_id", "created_at"),
+    )
 
 class BillingSummary(Base):
     __tablename__ = "billing_summary"
@@ -5,9 +5,10 @@ Process all cases with AI analysis - simplified version that bypasses model load
 
 import os
 import sys
+import asyncio
 import logging
 from datetime import datetime
-from sqlalchemy import create_engine, text
+from sqlalchemy import and_, create_engine, or_, select, text
 from sqlalchemy.orm import sessionmaker
 import openai
 import json
@@ -16,6 +17,18 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import settings
+from services.llm_worker_pool import LLMWorkerPool, async_openai_client, complete_sync
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+from services.corpus_iterator import iter_batches
+from services.document_chunker import analysis_job
+from models.analytics_change import record_changes
+from models.reported_cases import ReportedCases
+
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+CACHE_NAMESPACE = "case_analysis"
+TEMPLATE_VERSION = TEMPLATE_VERSIONS[CACHE_NAMESPACE]
+
+reported_cases = ReportedCases.__table__
 
 # Configure logging
 logging.basicConfig(
@@ -29,11 +42,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class SimpleAICaseProcessor:
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.engine = create_engine(settings.database_url)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.openai_client = None
+        self.async_openai_client = None
+        self.base_url = base_url
         self.model = "gpt-3.5-turbo"
+        self.cache_hits = 0
         
     def setup_openai(self):
         """Setup OpenAI client"""
@@ -43,7 +59,8 @@ class SimpleAICaseProcessor:
                 result = conn.execute(text("SELECT value FROM settings WHERE key = 'openai_api_key' LIMIT 1")).fetchone()
                 if result:
                     api_key = result[0]
-                    self.openai_client = openai.OpenAI(api_key=api_key)
+                    self.openai_client = openai.OpenAI(api_key=api_key, base_url=self.base_url)
+                    self.async_openai_client = async_openai_client(api_key, base_url=self.base_url)
                     logger.info("OpenAI client initialized successfully")
                     return True
                 else:
@@ -77,37 +94,16 @@ class SimpleAICaseProcessor:
             logger.error(f"Error getting analyzed count: {e}")
             return 0
     
-    def get_cases_batch(self, offset, limit):
-        """Get a batch of cases"""
-        try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT id, title, decision, judgement, conclusion, case_summary, 
-                           area_of_law, protagonist, antagonist
-                    FROM reported_cases 
-                    WHERE (decision IS NOT NULL AND decision != '') 
-                       OR (judgement IS NOT NULL AND judgement != '')
-                    ORDER BY id
-                    OFFSET :offset LIMIT :limit
-                """), {"offset": offset, "limit": limit})
-                
-                cases = []
-                for row in result:
-                    cases.append({
-                        'id': row[0],
-                        'title': row[1],
-                        'decision': row[2],
-                        'judgement': row[3],
-                        'conclusion': row[4],
-                        'case_summary': row[5],
-                        'area_of_law': row[6],
-                        'protagonist': row[7],
-                        'antagonist': row[8]
-                    })
-                return cases
-        except Exception as e:
-            logger.error(f"Error getting cases batch: {e}")
-            return []
+    def pending_cases_statement(self):
+        """Cases with decision content that have not been analyzed yet"""
+        c = reported_cases.c
+        return select(
+            c.id, c.title, c.decision, c.judgement, c.conclusion,
+            c.case_summary, c.area_of_law, c.protagonist, c.antagonist, c.headnotes
+        ).where(
+            or_(and_(c.decision.isnot(None), c.decision != ''), and_(c.judgement.isnot(None), c.judgement != '')),
+            or_(c.ai_detailed_outcome.is_(None), c.ai_detailed_outcome == '')
+        )
     
     def prepare_case_content(self, case):
         """Prepare case content for AI analysis"""
@@ -137,19 +133,20 @@ class SimpleAICaseProcessor:
         
         return "\n\n".join(content_parts)
     
-    def analyze_case(self, case):
-        """Analyze a single case with AI"""
-        try:
-            case_content = self.prepare_case_content(case)
-            
-            if not case_content.strip():
-                return self.get_default_analysis()
-            
-            # Truncate content to fit within token limits
-            if len(case_content) > 6000:
-                case_content = case_content[:6000] + "..."
-            
-            prompt = f"""
+    def build_job(self, case):
+        """Completion job for a case (chunked map-reduce for long cases), or None if it has no content"""
+        case_content = self.prepare_case_content(case)
+        
+        if not case_content.strip():
+            return None
+        
+        job = analysis_job(case['id'], case, case_content, self.build_messages, self.model, max_tokens=2000, temperature=0.3)
+        job.payload = completion_cache.make_key(CACHE_NAMESPACE, TEMPLATE_VERSION, self.model, job.cache_messages, 2000, 0.3)
+        return job
+    
+    def build_messages(self, case_content):
+        """Build the chat messages for a case's content"""
+        prompt = f"""
 Analyze the following legal case and provide structured insights for banking and financial assessment purposes:
 
 CASE CONTENT:
@@ -174,24 +171,30 @@ Guidelines:
 
 Respond only with valid JSON, no additional text.
 """
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def analyze_case(self, case):
+        """Analyze a single case with AI"""
+        try:
+            job = self.build_job(case)
             
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
+            if job is None:
+                return self.get_default_analysis()
             
-            ai_response = response.choices[0].message.content
+            ai_response = completion_cache.get(CACHE_NAMESPACE, job.payload)
+            if ai_response is None:
+                ai_response = complete_sync(self.openai_client, self.model, job)
+                completion_cache.put(CACHE_NAMESPACE, job.payload, TEMPLATE_VERSION, self.model, ai_response)
             return self.parse_ai_response(ai_response)
             
         except Exception as e:
@@ -249,14 +252,45 @@ Respond only with valid JSON, no additional text.
                     "generated_at": datetime.utcnow(),
                     "version": "1.0"
                 })
+                record_changes(conn, "reported_cases", [case_id])
                 conn.commit()
                 return True
         except Exception as e:
             logger.error(f"Error updating case {case_id}: {e}")
             return False
     
-    def process_all_cases(self, batch_size=5):
-        """Process all cases in batches"""
+    def iter_pending_batches(self, batch_size=100):
+        """Yield batches of cases still needing analysis; a restarted run skips analyzed cases"""
+        for batch in iter_batches(self.pending_cases_statement(), reported_cases.c.id, bind=self.engine, batch_size=batch_size):
+            yield [dict(row._mapping) for row in batch]
+    
+    def iter_jobs(self, batch_size=100):
+        """Completion jobs for pending cases; cases whose prompt is cached are stored without one"""
+        for cases in self.iter_pending_batches(batch_size):
+            jobs = []
+            for case in cases:
+                job = self.build_job(case)
+                if job is None:
+                    self.update_case_with_analysis(case['id'], self.get_default_analysis())
+                    continue
+                jobs.append(job)
+            
+            cached = completion_cache.get_many(CACHE_NAMESPACE, [job.payload for job in jobs])
+            for job in jobs:
+                if job.payload in cached:
+                    self.update_case_with_analysis(job.key, self.parse_ai_response(cached[job.payload]))
+                    self.cache_hits += 1
+                else:
+                    yield job
+    
+    def handle_completion(self, job, ai_response):
+        """Store a completed analysis (runs in a pool worker thread)"""
+        if not self.update_case_with_analysis(job.key, self.parse_ai_response(ai_response)):
+            raise RuntimeError(f"Failed to update case {job.key}")
+        completion_cache.put(CACHE_NAMESPACE, job.payload, TEMPLATE_VERSION, self.model, ai_response)
+    
+    def process_all_cases(self, batch_size=100, concurrency=None):
+        """Process all pending cases concurrently through the LLM worker pool"""
         try:
             total_cases = self.get_case_count()
             analyzed_cases = self.get_analyzed_count()
@@ -270,47 +304,19 @@ Respond only with valid JSON, no additional text.
                 logger.info("All cases have already been analyzed!")
                 return
             
-            processed = 0
-            successful = 0
-            failed = 0
-            
-            # Process cases in batches
-            offset = analyzed_cases  # Start from where we left off
-            while offset < total_cases:
-                cases = self.get_cases_batch(offset, batch_size)
-                if not cases:
-                    break
-                
-                for case in cases:
-                    try:
-                        logger.info(f"Processing case {case['id']}: {case['title'][:50]}...")
-                        analysis = self.analyze_case(case)
-                        
-                        if self.update_case_with_analysis(case['id'], analysis):
-                            successful += 1
-                            logger.info(f"✅ Case {case['id']} analyzed successfully")
-                        else:
-                            failed += 1
-                            logger.error(f"❌ Failed to update case {case['id']}")
-                        
-                        processed += 1
-                        
-                        # Log progress every 10 cases
-                        if processed % 10 == 0:
-                            logger.info(f"Progress: {processed}/{pending_cases} cases processed")
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing case {case['id']}: {e}")
-                        failed += 1
-                        processed += 1
-                
-                offset += batch_size
+            self.cache_hits = 0
+            pool = LLMWorkerPool(self.async_openai_client, self.model, concurrency=concurrency)
+            stats = asyncio.run(pool.run(self.iter_jobs(batch_size), self.handle_completion))
+            processed = stats['succeeded'] + stats['failed'] + self.cache_hits
             
             result = {
                 "total_cases": total_cases,
                 "processed": processed,
-                "successful": successful,
-                "failed": failed,
+                "successful": stats['succeeded'] + self.cache_hits,
+                "failed": stats['failed'],
+                "cache_hits": self.cache_hits,
+                "retries": stats['retries'],
+                "elapsed_seconds": stats['elapsed_seconds'],
                 "completion_percentage": (processed / pending_cases * 100) if pending_cases > 0 else 100
             }
             
@@ -320,6 +326,8 @@ Respond only with valid JSON, no additional text.
             logger.info(f"Processed: {result['processed']}")
             logger.info(f"Successful: {result['successful']}")
             logger.info(f"Failed: {result['failed']}")
+            logger.info(f"Served from cache: {result['cache_hits']}")
+            logger.info(f"Retries: {result['retries']}")
             logger.info(f"Completion: {result['completion_percentage']:.2f}%")
             
             return result
@@ -330,10 +338,17 @@ Respond only with valid JSON, no additional text.
 
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Analyze all pending cases with AI")
+    parser.add_argument("--concurrency", type=int, default=None, help="Requests in flight (default: settings.llm_concurrency)")
+    parser.add_argument("--base-url", default=None, help="Completions API base URL, e.g. llm_mock_server.py")
+    args = parser.parse_args()
+    
     logger.info("Starting AI Case Analysis Processing")
     logger.info("=" * 50)
     
-    processor = SimpleAICaseProcessor()
+    processor = SimpleAICaseProcessor(base_url=args.base_url)
     
     # Setup OpenAI
     if not processor.setup_openai():
@@ -341,7 +356,7 @@ def main():
         return
     
     # Process all cases
-    result = processor.process_all_cases(batch_size=3)  # Small batch size for stability
+    result = processor.process_all_cases(concurrency=args.concurrency)
     
     if result:
         logger.info("✅ Processing completed successfully!")
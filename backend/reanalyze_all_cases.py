@@ -5,18 +5,30 @@ Re-analyze all cases with improved AI algorithm (Version 2.0).
 
 import os
 import sys
+import asyncio
 import logging
 from datetime import datetime
-from sqlalchemy import create_engine, text
+from sqlalchemy import and_, create_engine, or_, select, text
 from sqlalchemy.orm import sessionmaker
 import openai
 import json
-import time
 
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import settings
+from services.llm_worker_pool import LLMWorkerPool, async_openai_client, complete_sync
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+from services.corpus_iterator import iter_batches
+from services.document_chunker import analysis_job
+from models.analytics_change import record_changes
+from models.reported_cases import ReportedCases
+
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+CACHE_NAMESPACE = "case_reanalysis"
+TEMPLATE_VERSION = TEMPLATE_VERSIONS[CACHE_NAMESPACE]
+
+reported_cases = ReportedCases.__table__
 
 # Configure logging
 logging.basicConfig(
@@ -30,13 +42,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class ReAnalysisProcessor:
-    def __init__(self):
+    def __init__(self, base_url=None, skip_unchanged=False):
         self.engine = create_engine(settings.database_url)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.openai_client = None
+        self.async_openai_client = None
+        self.base_url = base_url
         self.model = "gpt-3.5-turbo"
-        self.batch_size = 3  # Small batch for stability
-        self.delay_between_requests = 2  # 2 seconds delay between API calls
+        self.batch_size = 100  # Cases read per query; request pacing is up to the worker pool
+        self.version = "2.0"
+        # Walk every case and only send those whose content changed since their analysis
+        self.skip_unchanged = skip_unchanged
+        self.cache_hits = 0
+        self.unchanged = 0
         
     def setup_openai(self):
         """Setup OpenAI client"""
@@ -45,7 +63,8 @@ class ReAnalysisProcessor:
                 result = conn.execute(text("SELECT value FROM settings WHERE key = 'openai_api_key' LIMIT 1")).fetchone()
                 if result:
                     api_key = result[0]
-                    self.openai_client = openai.OpenAI(api_key=api_key)
+                    self.openai_client = openai.OpenAI(api_key=api_key, base_url=self.base_url)
+                    self.async_openai_client = async_openai_client(api_key, base_url=self.base_url)
                     logger.info("OpenAI client initialized successfully")
                     return True
                 else:
@@ -79,37 +98,18 @@ class ReAnalysisProcessor:
             logger.error(f"Error getting cases with content count: {e}")
             return 0
     
-    def get_cases_batch(self, offset, limit):
-        """Get a batch of cases for re-analysis"""
-        try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT id, title, decision, judgement, conclusion, case_summary, 
-                           area_of_law, protagonist, antagonist
-                    FROM reported_cases 
-                    WHERE (decision IS NOT NULL AND decision != '') 
-                       OR (judgement IS NOT NULL AND judgement != '')
-                    ORDER BY id
-                    OFFSET :offset LIMIT :limit
-                """), {"offset": offset, "limit": limit})
-                
-                cases = []
-                for row in result:
-                    cases.append({
-                        'id': row[0],
-                        'title': row[1],
-                        'decision': row[2],
-                        'judgement': row[3],
-                        'conclusion': row[4],
-                        'case_summary': row[5],
-                        'area_of_law': row[6],
-                        'protagonist': row[7],
-                        'antagonist': row[8]
-                    })
-                return cases
-        except Exception as e:
-            logger.error(f"Error getting cases batch: {e}")
-            return []
+    def cases_statement(self):
+        """Cases with decision content not yet re-analyzed (all of them with skip_unchanged)"""
+        c = reported_cases.c
+        statement = select(
+            c.id, c.title, c.decision, c.judgement, c.conclusion, c.case_summary,
+            c.area_of_law, c.protagonist, c.antagonist, c.headnotes, c.ai_summary_version
+        ).where(
+            or_(and_(c.decision.isnot(None), c.decision != ''), and_(c.judgement.isnot(None), c.judgement != ''))
+        )
+        if not self.skip_unchanged:
+            statement = statement.where(c.ai_summary_version.is_distinct_from(self.version))
+        return statement
     
     def prepare_case_content(self, case):
         """Prepare case content for AI analysis"""
@@ -139,19 +139,21 @@ class ReAnalysisProcessor:
         
         return "\n\n".join(content_parts)
     
-    def analyze_case(self, case):
-        """Analyze a single case with improved AI algorithm"""
-        try:
-            case_content = self.prepare_case_content(case)
-            
-            if not case_content.strip():
-                return self.get_default_analysis()
-            
-            # Truncate content to fit within token limits
-            if len(case_content) > 6000:
-                case_content = case_content[:6000] + "..."
-            
-            prompt = f"""
+    def build_job(self, case):
+        """Completion job for a case (chunked map-reduce for long cases), or None if it has no content"""
+        case_content = self.prepare_case_content(case)
+        
+        if not case_content.strip():
+            return None
+        
+        # Lower temperature for more consistent results
+        job = analysis_job(case['id'], case, case_content, self.build_messages, self.model, max_tokens=2000, temperature=0.2)
+        job.payload = completion_cache.make_key(CACHE_NAMESPACE, TEMPLATE_VERSION, self.model, job.cache_messages, 2000, 0.2)
+        return job
+    
+    def build_messages(self, case_content):
+        """Build the chat messages for a case's content"""
+        prompt = f"""
 Analyze the following legal case and provide structured insights for banking and financial assessment purposes:
 
 CASE CONTENT:
@@ -178,24 +180,30 @@ Guidelines:
 
 Respond only with valid JSON, no additional text.
 """
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation. Be conservative and accurate in your assessments."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def analyze_case(self, case):
+        """Analyze a single case with improved AI algorithm"""
+        try:
+            job = self.build_job(case)
             
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation. Be conservative and accurate in your assessments."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.2  # Lower temperature for more consistent results
-            )
+            if job is None:
+                return self.get_default_analysis()
             
-            ai_response = response.choices[0].message.content
+            ai_response = completion_cache.get(CACHE_NAMESPACE, job.payload)
+            if ai_response is None:
+                ai_response = complete_sync(self.openai_client, self.model, job)
+                completion_cache.put(CACHE_NAMESPACE, job.payload, TEMPLATE_VERSION, self.model, ai_response)
             return self.parse_ai_response(ai_response)
             
         except Exception as e:
@@ -251,15 +259,54 @@ Respond only with valid JSON, no additional text.
                     "financial_impact": analysis.get('financial_impact', 'UNRESOLVED'),
                     "detailed_outcome": analysis.get('detailed_outcome', ''),
                     "generated_at": datetime.utcnow(),
-                    "version": "2.0"  # Updated version
+                    "version": self.version
                 })
+                record_changes(conn, "reported_cases", [case_id])
                 conn.commit()
                 return True
         except Exception as e:
             logger.error(f"Error updating case {case_id}: {e}")
             return False
     
-    def reanalyze_all_cases(self):
+    def iter_pending_batches(self):
+        """Yield batches of cases to re-analyze; a restarted run skips cases already at this version"""
+        for batch in iter_batches(self.cases_statement(), reported_cases.c.id, bind=self.engine, batch_size=self.batch_size):
+            yield [dict(row._mapping) for row in batch]
+    
+    def iter_jobs(self):
+        """
+        Completion jobs for cases still to re-analyze.
+        
+        A case whose prompt is already in the response cache is stored from
+        the cache without a job, or left alone entirely with skip_unchanged
+        when it already carries the current version's analysis.
+        """
+        for cases in self.iter_pending_batches():
+            jobs = []
+            for case in cases:
+                job = self.build_job(case)
+                if job is None:
+                    self.update_case_with_analysis(case['id'], self.get_default_analysis())
+                    continue
+                jobs.append((case, job))
+            
+            cached = completion_cache.get_many(CACHE_NAMESPACE, [job.payload for _, job in jobs])
+            for case, job in jobs:
+                if job.payload not in cached:
+                    yield job
+                elif self.skip_unchanged and case['ai_summary_version'] == self.version:
+                    self.unchanged += 1
+                else:
+                    self.update_case_with_analysis(job.key, self.parse_ai_response(cached[job.payload]))
+                    self.cache_hits += 1
+    
+    def handle_completion(self, job, ai_response):
+        """Store a completed analysis (runs in a pool worker thread)"""
+        if not self.update_case_with_analysis(job.key, self.parse_ai_response(ai_response)):
+            raise RuntimeError(f"Failed to update case {job.key}")
+        completion_cache.put(CACHE_NAMESPACE, job.payload, TEMPLATE_VERSION, self.model, ai_response)
+    
+    def reanalyze_all_cases(self, concurrency=None):
         """Re-analyze all cases with improved algorithm"""
         try:
             total_cases = self.get_total_cases()
@@ -273,54 +320,23 @@ Respond only with valid JSON, no additional text.
                 logger.info("No cases with content found for analysis")
                 return
             
-            processed = 0
-            successful = 0
-            failed = 0
-            
-            # Process all cases
-            offset = 0
-            while offset < cases_with_content:
-                cases = self.get_cases_batch(offset, self.batch_size)
-                if not cases:
-                    break
-                
-                for case in cases:
-                    try:
-                        logger.info(f"Re-analyzing case {case['id']}: {case['title'][:50]}...")
-                        
-                        # Add delay between API calls to avoid rate limiting
-                        if processed > 0:
-                            time.sleep(self.delay_between_requests)
-                        
-                        analysis = self.analyze_case(case)
-                        
-                        if self.update_case_with_analysis(case['id'], analysis):
-                            successful += 1
-                            logger.info(f"✅ Case {case['id']} re-analyzed successfully")
-                        else:
-                            failed += 1
-                            logger.error(f"❌ Failed to update case {case['id']}")
-                        
-                        processed += 1
-                        
-                        # Log progress every 50 cases
-                        if processed % 50 == 0:
-                            logger.info(f"Progress: {processed}/{cases_with_content} cases processed ({processed/cases_with_content*100:.1f}%)")
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing case {case['id']}: {e}")
-                        failed += 1
-                        processed += 1
-                
-                offset += self.batch_size
+            self.cache_hits = 0
+            self.unchanged = 0
+            pool = LLMWorkerPool(self.async_openai_client, self.model, concurrency=concurrency)
+            stats = asyncio.run(pool.run(self.iter_jobs(), self.handle_completion))
+            processed = stats['succeeded'] + stats['failed'] + self.cache_hits
             
             result = {
                 "total_cases": total_cases,
                 "cases_with_content": cases_with_content,
                 "processed": processed,
-                "successful": successful,
-                "failed": failed,
-                "completion_percentage": (processed / cases_with_content * 100) if cases_with_content > 0 else 100
+                "successful": stats['succeeded'] + self.cache_hits,
+                "failed": stats['failed'],
+                "cache_hits": self.cache_hits,
+                "unchanged": self.unchanged,
+                "retries": stats['retries'],
+                "elapsed_seconds": stats['elapsed_seconds'],
+                "completion_percentage": ((processed + self.unchanged) / cases_with_content * 100) if cases_with_content > 0 else 100
             }
             
             logger.info("=" * 60)
@@ -330,6 +346,9 @@ Respond only with valid JSON, no additional text.
             logger.info(f"Processed: {result['processed']:,}")
             logger.info(f"Successful: {result['successful']:,}")
             logger.info(f"Failed: {result['failed']:,}")
+            logger.info(f"Served from cache: {result['cache_hits']:,}")
+            logger.info(f"Skipped as unchanged: {result['unchanged']:,}")
+            logger.info(f"Retries: {result['retries']:,}")
             logger.info(f"Completion: {result['completion_percentage']:.2f}%")
             
             return result
@@ -340,10 +359,19 @@ Respond only with valid JSON, no additional text.
 
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Re-analyze all cases with AI (version 2.0)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Requests in flight (default: settings.llm_concurrency)")
+    parser.add_argument("--base-url", default=None, help="Completions API base URL, e.g. llm_mock_server.py")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="Check every case and skip those whose content is unchanged since their analysis (nightly mode)")
+    args = parser.parse_args()
+    
     logger.info("Starting AI Case Re-Analysis Processing (Version 2.0)")
     logger.info("=" * 60)
     
-    processor = ReAnalysisProcessor()
+    processor = ReAnalysisProcessor(base_url=args.base_url, skip_unchanged=args.skip_unchanged)
     
     # Setup OpenAI
     if not processor.setup_openai():
@@ -351,7 +379,7 @@ def main():
         return
     
     # Re-analyze all cases
-    result = processor.reanalyze_all_cases()
+    result = processor.reanalyze_all_cases(concurrency=args.concurrency)
     
     if result:
         logger.info("✅ Re-analysis completed successfully!")
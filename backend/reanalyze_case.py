@@ -15,6 +15,7 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import settings
+from models.analytics_change import record_changes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -194,6 +195,7 @@ Respond only with valid JSON, no additional text.
                     "generated_at": datetime.utcnow(),
                     "version": "2.0"  # Updated version
                 })
+                record_changes(conn, "reported_cases", [case_id])
                 conn.commit()
             
             print("✅ Database updated successfully!")
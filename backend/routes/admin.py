@@ -25,6 +25,9 @@ from services.logging_service import LoggingService
 from services.case_metadata_service import CaseMetadataService
 from services.simple_case_processing_service import SimpleCaseProcessingService
 from services.document_processing_service import DocumentProcessingService
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.case_party_index import index_case_parties
 from schemas.admin import (
     AdminStatsResponse,
     UserListResponse,
@@ -61,6 +64,7 @@ def check_admin_privileges(user_id: int, db: Session):
 
 # Dashboard Statistics
 @router.get("/stats", response_model=AdminStatsResponse)
+@response_cache.cached(ttl=60, tags=("users", "cases", "people", "banks", "insurance", "companies", "payments", "subscriptions"))
 async def get_dashboard_stats(db: Session = Depends(get_db)):
     """Get overall dashboard statistics"""
     try:
@@ -231,6 +235,7 @@ async def create_user(user_data: UserCreateRequest, db: Session = Depends(get_db
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        response_cache.invalidate("users")
         
         return UserDetailResponse(
             id=new_user.id,
@@ -273,6 +278,7 @@ async def update_user(user_id: int, user_data: UserUpdateRequest, db: Session =
         
         db.commit()
         db.refresh(user)
+        response_cache.invalidate("users")
         
         return UserDetailResponse(
             id=user.id,
@@ -302,6 +308,7 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)):
         
         db.delete(user)
         db.commit()
+        response_cache.invalidate("users")
         
         return {"message": "User deleted successfully"}
     except HTTPException:
@@ -640,7 +647,10 @@ async def create_case(case_data: CaseCreateRequest, db: Session = Depends(get_db
         new_case = ReportedCases(**case_dict)
         db.add(new_case)
         db.commit()
+        index_case_parties(db, new_case)
         db.refresh(new_case)
+        autocomplete_index.refresh_case(new_case)
+        response_cache.invalidate("cases")
         
         # Process case with analytics
         try:
@@ -704,7 +714,10 @@ async def update_case(case_id: int, case_data: CaseUpdateRequest, db: Session =
         
         case.updated_at = datetime.now()
         db.commit()
+        index_case_parties(db, case)
         db.refresh(case)
+        autocomplete_index.refresh_case(case)
+        response_cache.invalidate("cases")
         
         # Convert status back to string for response
         status_mapping = {
@@ -735,6 +748,8 @@ async def delete_case(case_id: int, db: Session = Depends(get_db)):
         
         db.delete(case)
         db.commit()
+        autocomplete_index.remove_case(case_id)
+        response_cache.invalidate("cases")
         return {"message": "Case deleted successfully"}
     except HTTPException:
         raise
@@ -845,7 +860,10 @@ async def upload_case(file: UploadFile = File(...), db: Session = Depends(get_db
         case = ReportedCases(**case_data)
         db.add(case)
         db.commit()
+        index_case_parties(db, case)
         db.refresh(case)
+        autocomplete_index.refresh_case(case)
+        response_cache.invalidate("cases")
         
         # Process the case with AI services for additional analysis
         try:
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
 from models.banks import Banks
 from models.bank_analytics import BankAnalytics
 from models.bank_case_statistics import BankCaseStatistics
@@ -187,6 +189,8 @@ async def create_bank(bank_data: BankCreateRequest, db: Session = Depends(get_db
         db.add(bank)
         db.commit()
         db.refresh(bank)
+        autocomplete_index.refresh_entity("banks", bank)
+        response_cache.invalidate("banks")
         
         return {"message": "Bank created successfully", "bank_id": bank.id}
     except Exception as e:
@@ -221,6 +225,8 @@ async def update_bank(bank_id: int, bank_data: BankUpdateRequest, db: Session =
         
         db.commit()
         db.refresh(bank)
+        autocomplete_index.refresh_entity("banks", bank)
+        response_cache.invalidate("banks")
         
         return {"message": "Bank updated successfully"}
     except HTTPException:
@@ -244,6 +250,8 @@ async def delete_bank(bank_id: int, db: Session = Depends(get_db)):
         # Delete the bank
         db.delete(bank)
         db.commit()
+        autocomplete_index.remove_entity("banks", bank_id)
+        response_cache.invalidate("banks")
         
         return {"message": "Bank deleted successfully"}
     except HTTPException:
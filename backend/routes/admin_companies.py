@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
 from models.companies import Companies
 from models.company_analytics import CompanyAnalytics
 from models.company_case_statistics import CompanyCaseStatistics
@@ -110,6 +112,8 @@ async def get_companies(
                 # Convert SQLAlchemy object to dict
                 company_dict = {}
                 for column in company.__table__.columns:
+                    if column.name == "search_vector":  # Deferred full-text column, not company data
+                        continue
                     value = getattr(company, column.name)
                     company_dict[column.name] = value
                 
@@ -322,6 +326,8 @@ async def create_company(company_data: CompanyCreateRequest, db: Session = Depen
         db.add(company)
         db.commit()
         db.refresh(company)
+        autocomplete_index.refresh_entity("companies", company)
+        response_cache.invalidate("companies")
         
         return {"message": "Company created successfully", "company_id": company.id}
     except Exception as e:
@@ -368,6 +374,8 @@ async def update_company(company_id: int, company_data: CompanyUpdateRequest, db
         
         db.commit()
         db.refresh(company)
+        autocomplete_index.refresh_entity("companies", company)
+        response_cache.invalidate("companies")
         
         return {"message": "Company updated successfully"}
     except HTTPException:
@@ -391,6 +399,8 @@ async def delete_company(company_id: int, db: Session = Depends(get_db)):
         # Delete the company
         db.delete(company)
         db.commit()
+        autocomplete_index.remove_entity("companies", company_id)
+        response_cache.invalidate("companies")
         
         return {"message": "Company deleted successfully"}
     except HTTPException:
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
 from models.insurance import Insurance
 from models.insurance_analytics import InsuranceAnalytics
 from models.insurance_case_statistics import InsuranceCaseStatistics
@@ -253,6 +255,8 @@ async def create_insurance(insurance_data: InsuranceCreateRequest, db: Session =
         db.add(insurance)
         db.commit()
         db.refresh(insurance)
+        autocomplete_index.refresh_entity("insurance", insurance)
+        response_cache.invalidate("insurance")
         
         return {"message": "Insurance company created successfully", "insurance_id": insurance.id}
     except Exception as e:
@@ -297,6 +301,8 @@ async def update_insurance(insurance_id: int, insurance_data: InsuranceUpdateReq
         
         db.commit()
         db.refresh(insurance)
+        autocomplete_index.refresh_entity("insurance", insurance)
+        response_cache.invalidate("insurance")
         
         return {"message": "Insurance company updated successfully"}
     except HTTPException:
@@ -320,6 +326,8 @@ async def delete_insurance(insurance_id: int, db: Session = Depends(get_db)):
         # Delete the insurance company
         db.delete(insurance)
         db.commit()
+        autocomplete_index.remove_entity("insurance", insurance_id)
+        response_cache.invalidate("insurance")
         
         return {"message": "Insurance company deleted successfully"}
     except HTTPException:
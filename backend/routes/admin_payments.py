@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
+from services.response_cache import response_cache
 from models.payment import Payment, PaymentStatus
 from models.subscription import Subscription, SubscriptionStatus
 from models.user import User
@@ -129,6 +130,7 @@ async def delete_payment(payment_id: int, db: Session = Depends(get_db)):
         # Delete the payment
         db.delete(payment)
         db.commit()
+        response_cache.invalidate("payments")
         
         return {"message": "Payment deleted successfully"}
     except HTTPException:
@@ -156,6 +158,7 @@ async def create_payment(payment_data: PaymentCreateRequest, db: Session = Depen
         db.add(payment)
         db.commit()
         db.refresh(payment)
+        response_cache.invalidate("payments")
         
         return payment
     except HTTPException:
@@ -179,6 +182,7 @@ async def update_payment(payment_id: int, payment_data: PaymentUpdateRequest, db
         
         db.commit()
         db.refresh(payment)
+        response_cache.invalidate("payments")
         
         return payment
     except HTTPException:
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
 from models.people import People
 from models.person_analytics import PersonAnalytics
 from models.person_case_statistics import PersonCaseStatistics
@@ -187,6 +189,8 @@ async def create_person(person_data: dict, db: Session = Depends(get_db)):
         db.add(new_person)
         db.commit()
         db.refresh(new_person)
+        autocomplete_index.refresh_entity("people", new_person)
+        response_cache.invalidate("people")
         
         return new_person
     except Exception as e:
@@ -208,6 +212,8 @@ async def update_person(person_id: int, person_data: dict, db: Session = Depends
         
         db.commit()
         db.refresh(person)
+        autocomplete_index.refresh_entity("people", person)
+        response_cache.invalidate("people")
         
         return person
     except HTTPException:
@@ -231,6 +237,8 @@ async def delete_person(person_id: int, db: Session = Depends(get_db)):
         # Delete the person
         db.delete(person)
         db.commit()
+        autocomplete_index.remove_entity("people", person_id)
+        response_cache.invalidate("people")
         
         return {"message": "Person deleted successfully"}
     except HTTPException:
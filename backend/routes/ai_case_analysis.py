@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any
 from database import get_db
 from services.on_demand_ai_analysis import analyze_case_if_needed
+from services.ai_response_cache import completion_cache
 from models.user import User
 from auth import get_current_user
 
@@ -121,4 +122,20 @@ def get_analysis_stats(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Stats retrieval failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/cache-stats", response_model=Dict[str, Any])
+def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get AI response cache hit/miss counters (this worker) and stored entry totals.
+    """
+    try:
+        return completion_cache.stats()
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Cache stats retrieval failed: {str(e)}"
+        )
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import List, Optional, Dict, Any
+import asyncio
+import json
 import uuid
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_db, SessionLocal
 from models.ai_chat_session import AIChatSession
 from models.reported_cases import ReportedCases
 from schemas.ai_chat import (
@@ -252,6 +255,85 @@ async def send_message(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _save_exchange(db: Session, session_id: str, chat_history: List[Dict], user_text: str, ai_text: str):
+    """Append a user message and the assistant's answer to a chat session"""
+    session = db.query(AIChatSession).filter(AIChatSession.session_id == session_id).first()
+    if not session:
+        return
+    
+    session.messages = chat_history + [
+        {"role": "user", "content": user_text, "timestamp": datetime.utcnow().isoformat()},
+        {"role": "assistant", "content": ai_text, "timestamp": datetime.utcnow().isoformat()}
+    ]
+    session.total_messages = len(session.messages)
+    session.last_activity = datetime.utcnow()
+    db.commit()
+
+@router.post("/sessions/{session_id}/messages/stream")
+async def stream_message(
+    session_id: str,
+    message_data: ChatMessageRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Send a message to an AI chat session and stream the answer as Server-Sent Events.
+    
+    Events: "token" ({"content"}) for each piece of the answer as it is
+    generated, then "done" ({"response", "response_time_ms", "first_token_ms",
+    "tokens_used", "timestamp"}) once the exchange is saved to the session,
+    or "error" ({"error"}).
+    """
+    session = db.query(AIChatSession).filter(
+        AIChatSession.session_id == session_id,
+        AIChatSession.is_active == True
+    ).first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    
+    case_id = session.case_id
+    user_id = session.user_id
+    chat_history = list(session.messages or [])
+    
+    # The stream outlives this request's session, so it gets its own
+    stream_db = SessionLocal()
+    try:
+        ai_service = AIChatService(stream_db)
+    except Exception as e:
+        stream_db.close()
+        raise HTTPException(status_code=500, detail=f"Error sending message: {str(e)}")
+    
+    async def events():
+        try:
+            async for event in ai_service.stream_ai_response(
+                case_id=case_id,
+                user_message=message_data.message,
+                chat_history=chat_history,
+                session_id=session_id,
+                user_id=user_id
+            ):
+                event_type = event.pop("type")
+                if event_type == "done":
+                    await asyncio.to_thread(
+                        _save_exchange, stream_db, session_id, chat_history, message_data.message, event["response"]
+                    )
+                yield _sse_event(event_type, event)
+        except Exception as e:
+            stream_db.rollback()
+            yield _sse_event("error", {"error": f"Error sending message: {str(e)}"})
+        finally:
+            stream_db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/sessions/{case_id}/start", response_model=ChatMessageResponse)
 async def start_new_chat(
     case_id: int,
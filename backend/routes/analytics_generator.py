@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from database import get_db
 from services.auto_analytics_generator import AutoAnalyticsGenerator
+from services.analytics_jobs import cancel_job, enqueue_job, job_progress
+from services.incremental_analytics import pending_counts
 from models.people import People
 from models.gazette import Gazette
+from models.analytics_job import AnalyticsJob
 import logging
 
 router = APIRouter(prefix="/analytics-generator", tags=["analytics-generator"])
@@ -82,21 +85,17 @@ async def generate_gazette_person_analytics(
             detail=f"Failed to generate analytics: {str(e)}"
         )
 
-@router.post("/regenerate-all")
-async def regenerate_all_analytics(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Regenerate analytics for all people in the database"""
+@router.post("/regenerate-all", status_code=status.HTTP_202_ACCEPTED)
+async def regenerate_all_analytics(db: Session = Depends(get_db)):
+    """Queue analytics regeneration for all people in the database (run by analytics_worker.py)"""
     try:
-        generator = AutoAnalyticsGenerator(db)
-        
-        # Run in background to avoid timeout
-        background_tasks.add_task(generator.regenerate_all_analytics)
+        job = enqueue_job(db, "regenerate_all")
         
         return {
-            "message": "Analytics regeneration started for all people",
-            "status": "processing"
+            "message": "Analytics regeneration queued for all people",
+            "status": job.status,
+            "job_id": job.id,
+            "total_tasks": job.total_tasks
         }
         
     except Exception as e:
@@ -106,40 +105,17 @@ async def regenerate_all_analytics(
             detail=f"Failed to start analytics regeneration: {str(e)}"
         )
 
-@router.post("/regenerate-missing")
-async def regenerate_missing_analytics(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Regenerate analytics only for people who don't have analytics yet"""
+@router.post("/regenerate-missing", status_code=status.HTTP_202_ACCEPTED)
+async def regenerate_missing_analytics(db: Session = Depends(get_db)):
+    """Queue analytics regeneration for people who don't have analytics yet (run by analytics_worker.py)"""
     try:
-        from models.person_analytics import PersonAnalytics
-        
-        # Find people without analytics
-        people_with_analytics = db.query(PersonAnalytics.person_id).subquery()
-        people_without_analytics = db.query(People).filter(
-            ~People.id.in_(people_with_analytics)
-        ).all()
-        
-        generator = AutoAnalyticsGenerator(db)
-        results = {
-            'total_people_without_analytics': len(people_without_analytics),
-            'successful': 0,
-            'failed': 0,
-            'errors': []
-        }
-        
-        for person in people_without_analytics:
-            try:
-                generator.generate_analytics_for_person(person.id)
-                results['successful'] += 1
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append(f"Person {person.id}: {str(e)}")
+        job = enqueue_job(db, "regenerate_missing")
         
         return {
-            "message": f"Generated analytics for {results['successful']} people",
-            "results": results
+            "message": f"Analytics generation queued for {job.total_tasks} people without analytics",
+            "status": job.status,
+            "job_id": job.id,
+            "total_tasks": job.total_tasks
         }
         
     except Exception as e:
@@ -149,6 +125,55 @@ async def regenerate_missing_analytics(
             detail=f"Failed to regenerate missing analytics: {str(e)}"
         )
 
+@router.get("/jobs")
+async def list_analytics_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """List recent analytics regeneration jobs with their progress"""
+    try:
+        jobs = db.query(AnalyticsJob).order_by(AnalyticsJob.id.desc()).limit(limit).all()
+        return {"jobs": [job_progress(db, job, error_limit=0) for job in jobs]}
+        
+    except Exception as e:
+        logging.error(f"Error listing analytics jobs: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list analytics jobs: {str(e)}"
+        )
+
+@router.get("/jobs/{job_id}")
+async def get_analytics_job(job_id: int, db: Session = Depends(get_db)):
+    """Status and progress of an analytics regeneration job"""
+    job = db.query(AnalyticsJob).filter(AnalyticsJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analytics job not found"
+        )
+    return job_progress(db, job)
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_analytics_job(job_id: int, db: Session = Depends(get_db)):
+    """Cancel the tasks of an analytics job that have not started yet"""
+    job = db.query(AnalyticsJob).filter(AnalyticsJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analytics job not found"
+        )
+    cancelled = cancel_job(db, job_id)
+    db.refresh(job)
+    return {
+        "message": f"Cancelled {cancelled} pending tasks",
+        "job": job_progress(db, job)
+    }
+
+@router.get("/incremental")
+async def get_incremental_status(db: Session = Depends(get_db)):
+    """Case, gazette and people changes not yet resolved, and entities waiting to be recomputed"""
+    return pending_counts(db)
+
 @router.get("/status/{person_id}")
 async def get_analytics_status(
     person_id: int,
@@ -15,6 +15,9 @@ from schemas.banks import (
     BanksStats
 )
 from auth import get_current_user
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.search_counter import search_counter
 from services.bank_analytics_service import BankAnalyticsService
 from typing import List, Optional
 import logging
@@ -136,11 +139,7 @@ async def search_banks(
     banks = db_query.offset(offset).limit(limit).all()
     
     # Update search count for each bank
-    for bank in banks:
-        bank.search_count += 1
-        bank.last_searched = func.now()
-    
-    db.commit()
+    search_counter.record("banks", [bank.id for bank in banks])
     
     # Calculate pagination info
     total_pages = math.ceil(total / limit)
@@ -193,6 +192,8 @@ async def create_bank(
     db.add(db_bank)
     db.commit()
     db.refresh(db_bank)
+    autocomplete_index.refresh_entity("banks", db_bank)
+    response_cache.invalidate("banks")
     return db_bank
 
 @router.put("/{bank_id}", response_model=BanksResponse)
@@ -213,6 +214,8 @@ async def update_bank(
     
     db.commit()
     db.refresh(db_bank)
+    autocomplete_index.refresh_entity("banks", db_bank)
+    response_cache.invalidate("banks")
     return db_bank
 
 @router.delete("/{bank_id}")
@@ -228,9 +231,12 @@ async def delete_bank(
     
     db_bank.is_active = False
     db.commit()
+    autocomplete_index.remove_entity("banks", bank_id)
+    response_cache.invalidate("banks")
     return {"message": "Bank deleted successfully"}
 
 @router.get("/stats/overview", response_model=BanksStats)
+@response_cache.cached(ttl=300, tags=("banks",))
 async def get_banks_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc, text
+from sqlalchemy import and_, or_, func, desc, asc, text, case as sql_case
 from database import get_db
 from models.reported_cases import ReportedCases
 from models.case_metadata import CaseMetadata, CaseSearchIndex
@@ -10,6 +10,9 @@ from schemas.case_metadata import (
     CaseSearchResponse, CaseSearchResult, CaseStats, PersonCaseProfile
 )
 from auth import get_current_user
+from services.autocomplete_index import autocomplete_index
+from services.case_party_index import party_case_ids
+from services.full_text_search import full_text_match
 from typing import List, Optional, Dict, Any
 import logging
 import math
@@ -34,19 +37,19 @@ async def search_cases(
     
     start_time = time.time()
     
-    # Build search query
-    search_term = f"%{query.lower()}%"
+    # Full-text match over title, parties, summary and judgement, ranked in the
+    # database so ordering holds across pages
+    search_conditions, relevance = full_text_match("cases", query, cover_density=True)
     
-    # Base query
-    cases_query = db.query(ReportedCases).outerjoin(
+    # Base query; only the columns CaseSearchResult needs are loaded
+    cases_query = db.query(ReportedCases, relevance.label("relevance_score")).options(
+        ReportedCases.loader("summary")
+    ).outerjoin(
         CaseMetadata, ReportedCases.id == CaseMetadata.case_id
     ).outerjoin(
         CaseSearchIndex, ReportedCases.id == CaseSearchIndex.case_id
     )
     
-    # Search conditions - search only in title field
-    search_conditions = func.lower(ReportedCases.title).like(search_term)
-    
     cases_query = cases_query.filter(search_conditions)
     
     # Apply filters
@@ -62,13 +65,13 @@ async def search_cases(
     # Get total count
     total_cases = cases_query.count()
     
-    # Apply pagination
+    # Order by rank, then apply pagination
     offset = (page - 1) * limit
-    cases = cases_query.offset(offset).limit(limit).all()
+    cases = cases_query.order_by(desc(relevance), ReportedCases.id).offset(offset).limit(limit).all()
     
     # Convert to search results
     results = []
-    for case in cases:
+    for case, relevance_score in cases:
         # Determine match type
         match_type = "title"
         if case.title and query.lower() in case.title.lower():
@@ -84,9 +87,6 @@ async def search_cases(
         else:
             match_type = "content"
         
-        # Calculate relevance score
-        relevance_score = calculate_relevance_score(case, query)
-        
         # Get metadata if available
         metadata = case.case_metadata
         case_result = CaseSearchResult(
@@ -112,14 +112,11 @@ async def search_cases(
             outcome=metadata.outcome if metadata else None,
             decision_type=metadata.decision_type if metadata else None,
             monetary_amount=metadata.monetary_amount if metadata else None,
-            relevance_score=relevance_score,
+            relevance_score=float(relevance_score),
             match_type=match_type
         )
         results.append(case_result)
     
-    # Sort by relevance score
-    results.sort(key=lambda x: x.relevance_score, reverse=True)
-    
     # Calculate pagination info
     total_pages = math.ceil(total_cases / limit)
     has_next = page < total_pages
@@ -150,28 +147,27 @@ async def get_person_cases(
     """Get all cases for a specific person"""
     
     # Search for cases involving this person
-    search_term = f"%{person_name.lower()}%"
-    
-    cases_query = db.query(ReportedCases).outerjoin(
-        CaseMetadata, ReportedCases.id == CaseMetadata.case_id
-    ).filter(
-        or_(
-            func.lower(ReportedCases.title).like(search_term),
-            func.lower(ReportedCases.protagonist).like(search_term),
-            func.lower(ReportedCases.antagonist).like(search_term),
-            func.lower(ReportedCases.presiding_judge).like(search_term),
-            func.lower(ReportedCases.lawyers).like(search_term),
-            func.lower(CaseMetadata.related_people).like(search_term)
-        )
+    cases_query = db.query(ReportedCases).filter(
+        ReportedCases.id.in_(party_case_ids(
+            [person_name],
+            roles=("title", "protagonist", "antagonist", "judge", "lawyer", "related")
+        ))
     )
     
     total_cases = cases_query.count()
-    cases = cases_query.offset((page - 1) * limit).limit(limit).all()
+    
+    # Long text columns are scored in the database instead of being loaded
+    rows = cases_query.add_columns(
+        content_match_score(person_name).label("content_score")
+    ).options(
+        ReportedCases.loader("summary")
+    ).offset((page - 1) * limit).limit(limit).all()
+    cases = [case for case, _ in rows]
     
     # Convert to search results
     results = []
-    for case in cases:
-        relevance_score = calculate_relevance_score(case, person_name)
+    for case, content_score in rows:
+        relevance_score = calculate_relevance_score(case, person_name, content_score)
         metadata = case.case_metadata
         
         case_result = CaseSearchResult(
@@ -241,6 +237,30 @@ async def get_case_suggestions(
 ):
     """Get case search suggestions for autocomplete"""
     
+    if autocomplete_index.is_ready():
+        suggestions = []
+        seen_titles = set()
+        for title in autocomplete_index.complete_case_titles(query, limit):
+            if title not in seen_titles and len(seen_titles) < limit // 2:
+                seen_titles.add(title)
+                suggestions.append({
+                    "text": title,
+                    "type": "case",
+                    "category": "Case Title"
+                })
+        
+        for name in autocomplete_index.complete_case_parties(query, limit // 2):
+            suggestions.append({
+                "text": name,
+                "type": "person",
+                "category": "Person"
+            })
+        
+        return {
+            "suggestions": suggestions[:limit],
+            "total": len(suggestions)
+        }
+    
     search_term = f"%{query.lower()}%"
     
     # Get suggestions from case titles
@@ -282,8 +302,21 @@ async def get_case_suggestions(
         "total": len(suggestions)
     }
 
-def calculate_relevance_score(case: ReportedCases, query: str) -> float:
-    """Calculate relevance score for a case based on search query"""
+def content_match_score(query: str):
+    """SQL expression scoring matches in detail_content and judgement without loading them"""
+    search_term = f"%{query.lower()}%"
+    return (
+        sql_case((func.lower(ReportedCases.detail_content).like(search_term), 2.0), else_=0.0)
+        + sql_case((func.lower(ReportedCases.judgement).like(search_term), 2.0), else_=0.0)
+    )
+
+def calculate_relevance_score(case: ReportedCases, query: str, content_score: Optional[float] = None) -> float:
+    """
+    Calculate relevance score for a case based on search query.
+    
+    Pass `content_score` from content_match_score() when the case was loaded
+    without its long text columns.
+    """
     score = 0.0
     query_lower = query.lower()
     
@@ -311,10 +344,13 @@ def calculate_relevance_score(case: ReportedCases, query: str) -> float:
     # Content match (lower weight)
     if case.case_summary and query_lower in case.case_summary.lower():
         score += 3.0
-    if case.detail_content and query_lower in case.detail_content.lower():
-        score += 2.0
-    if case.judgement and query_lower in case.judgement.lower():
-        score += 2.0
+    if content_score is not None:
+        score += content_score
+    else:
+        if case.detail_content and query_lower in case.detail_content.lower():
+            score += 2.0
+        if case.judgement and query_lower in case.judgement.lower():
+            score += 2.0
     
     return score
 
@@ -582,7 +618,9 @@ async def get_related_cases(
     
     for person in people_to_search:
         # Search in title, protagonist, antagonist, lawyers, presiding_judge, judgement_by
-        person_cases = db.query(ReportedCases).filter(
+        person_cases = db.query(ReportedCases).options(
+            ReportedCases.load_groups("summary", "ai_analysis")
+        ).filter(
             or_(
                 func.lower(ReportedCases.title).like(f"%{person.lower()}%"),
                 func.lower(ReportedCases.protagonist).like(f"%{person.lower()}%"),
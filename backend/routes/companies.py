@@ -16,6 +16,9 @@ from schemas.companies import (
     CompaniesStats
 )
 from auth import get_current_user
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.search_counter import search_counter
 from models.user import User
 
 router = APIRouter()
@@ -126,11 +129,7 @@ async def get_company(
         raise HTTPException(status_code=404, detail="Company not found")
     
     # Update search count and last searched
-    if company.search_count is None:
-        company.search_count = 0
-    company.search_count += 1
-    company.last_searched = func.now()
-    db.commit()
+    search_counter.record("companies", [company.id])
     
     return company
 
@@ -145,6 +144,8 @@ async def create_company(
     db.add(db_company)
     db.commit()
     db.refresh(db_company)
+    autocomplete_index.refresh_entity("companies", db_company)
+    response_cache.invalidate("companies")
     return db_company
 
 @router.put("/{company_id}", response_model=CompaniesResponse)
@@ -166,6 +167,8 @@ async def update_company(
     
     db.commit()
     db.refresh(db_company)
+    autocomplete_index.refresh_entity("companies", db_company)
+    response_cache.invalidate("companies")
     return db_company
 
 @router.delete("/{company_id}")
@@ -182,6 +185,8 @@ async def delete_company(
     
     db.delete(db_company)
     db.commit()
+    autocomplete_index.remove_entity("companies", company_id)
+    response_cache.invalidate("companies")
     return {"message": "Company deleted successfully"}
 
 @router.get("/stats/overview", response_model=CompaniesStats)
@@ -342,7 +347,9 @@ async def get_company_related_cases(
             func.lower(ReportedCases.antagonist).like(f"%{term}%")
         ])
     
-    cases = db.query(ReportedCases).filter(
+    cases = db.query(ReportedCases).options(
+        ReportedCases.load_groups("summary", "ai_analysis")
+    ).filter(
         or_(*conditions)
     ).limit(limit).all()
     
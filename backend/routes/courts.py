@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_, text
+from sqlalchemy import desc, and_, or_, text
 from typing import List, Optional
 import math
 
 from database import get_db
+from services.response_cache import response_cache
+from services.search_counter import search_counter
 from models.court import Court
 from schemas.court import (
     CourtCreate, CourtUpdate, CourtResponse, CourtListResponse,
@@ -139,6 +141,7 @@ def search_courts(
         raise HTTPException(status_code=500, detail=f"Error searching courts: {str(e)}")
 
 @router.get("/regions", response_model=List[str])
+@response_cache.cached(ttl=3600, tags=("courts",))
 def get_regions(db: Session = Depends(get_db)):
     """Get all unique regions"""
     try:
@@ -148,6 +151,7 @@ def get_regions(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error fetching regions: {str(e)}")
 
 @router.get("/cities", response_model=List[str])
+@response_cache.cached(ttl=3600, tags=("courts",))
 def get_cities(
     region: Optional[str] = Query(None, description="Filter cities by region"),
     db: Session = Depends(get_db)
@@ -164,6 +168,7 @@ def get_cities(
         raise HTTPException(status_code=500, detail=f"Error fetching cities: {str(e)}")
 
 @router.get("/types", response_model=List[str])
+@response_cache.cached(ttl=3600, tags=("courts",))
 def get_court_types(db: Session = Depends(get_db)):
     """Get all unique court types"""
     try:
@@ -272,9 +277,7 @@ def get_court(court_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="Court not found")
         
         # Update search count
-        court.search_count += 1
-        court.last_searched = func.now()
-        db.commit()
+        search_counter.record("courts", [court.id])
         
         return court
     except HTTPException:
@@ -290,6 +293,7 @@ def create_court(court: CourtCreate, db: Session = Depends(get_db)):
         db.add(db_court)
         db.commit()
         db.refresh(db_court)
+        response_cache.invalidate("courts")
         return db_court
     except Exception as e:
         db.rollback()
@@ -309,6 +313,7 @@ def update_court(court_id: int, court: CourtUpdate, db: Session = Depends(get_db
         
         db.commit()
         db.refresh(db_court)
+        response_cache.invalidate("courts")
         return db_court
     except HTTPException:
         raise
@@ -326,6 +331,7 @@ def delete_court(court_id: int, db: Session = Depends(get_db)):
         
         db.delete(db_court)
         db.commit()
+        response_cache.invalidate("courts")
         return {"message": "Court deleted successfully"}
     except HTTPException:
         raise
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func, desc, asc, String
-from database import get_db
 from models.reported_cases import ReportedCases
 from models.people import People
 from models.banks import Banks
 from models.insurance import Insurance
 from models.user import User
 from auth import get_current_user
+from services.search_fanout import SearchSource, gather_search_sources
 from typing import List, Optional, Dict, Any
 import logging
 import math
@@ -16,6 +16,14 @@ import time
 
 router = APIRouter()
 
+# Per-source deadlines in seconds; case search scans long text columns
+SOURCE_TIMEOUTS = {
+    "people": 3.0,
+    "cases": 5.0,
+    "banks": 3.0,
+    "insurance": 3.0,
+}
+
 @router.get("/search")
 async def enhanced_search(
     q: str = Query(..., description="Search query"),
@@ -27,29 +35,24 @@ async def enhanced_search(
     case_type: Optional[str] = Query(None, description="Filter by case type"),
     sort_by: str = Query("relevance", description="Sort field"),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort order"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Enhanced search across all entities with progress indication"""
     try:
         start_time = time.time()
-        all_results = []
-        
-        # Search people first (prioritize people for name searches)
-        people_results = await search_people(db, q, risk_level, region, limit)
-        all_results.extend(people_results)
         
-        # Search cases (lower priority for name searches)
-        cases_results = await search_cases(db, q, court_type, region, case_type, limit // 2)
-        all_results.extend(cases_results)
+        # Query every source concurrently, each on its own session
+        sources = [
+            SearchSource("people", lambda db: search_people(db, q, risk_level, region, limit), SOURCE_TIMEOUTS["people"]),
+            SearchSource("cases", lambda db: search_cases(db, q, court_type, region, case_type, limit // 2), SOURCE_TIMEOUTS["cases"]),
+            SearchSource("banks", lambda db: search_banks(db, q, region, limit), SOURCE_TIMEOUTS["banks"]),
+            SearchSource("insurance", lambda db: search_insurance(db, q, region, limit), SOURCE_TIMEOUTS["insurance"]),
+        ]
+        source_results, source_report = await gather_search_sources(sources)
         
-        # Search banks
-        banks_results = await search_banks(db, q, region, limit)
-        all_results.extend(banks_results)
-        
-        # Search insurance
-        insurance_results = await search_insurance(db, q, region, limit)
-        all_results.extend(insurance_results)
+        all_results = []
+        for source in sources:
+            all_results.extend(source_results[source.name])
         
         # Sort results
         sorted_results = sort_results(all_results, sort_by, sort_order)
@@ -71,17 +74,19 @@ async def enhanced_search(
             "total_pages": total_pages,
             "search_time": search_time,
             "has_next": page < total_pages,
-            "has_prev": page > 1
+            "has_prev": page > 1,
+            "sources": source_report,
+            "partial": any(report["status"] != "ok" for report in source_report.values())
         }
         
     except Exception as e:
         logging.error(f"Error in enhanced search: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
-async def search_cases(db: Session, query: str, court_type: Optional[str], region: Optional[str], case_type: Optional[str], limit: int) -> List[Dict]:
+def search_cases(db: Session, query: str, court_type: Optional[str], region: Optional[str], case_type: Optional[str], limit: int) -> List[Dict]:
     """Search cases"""
     try:
-        query_obj = db.query(ReportedCases)
+        query_obj = db.query(ReportedCases).options(ReportedCases.loader("summary"))
         
         # Apply search filters
         search_conditions = or_(
@@ -123,9 +128,9 @@ async def search_cases(db: Session, query: str, court_type: Optional[str], regio
         return results
     except Exception as e:
         logging.error(f"Error searching cases: {e}")
-        return []
+        raise
 
-async def search_people(db: Session, query: str, risk_level: Optional[str], region: Optional[str], limit: int) -> List[Dict]:
+def search_people(db: Session, query: str, risk_level: Optional[str], region: Optional[str], limit: int) -> List[Dict]:
     """Search people"""
     try:
         query_obj = db.query(People)
@@ -174,9 +179,9 @@ async def search_people(db: Session, query: str, risk_level: Optional[str], regi
         return results
     except Exception as e:
         logging.error(f"Error searching people: {e}")
-        return []
+        raise
 
-async def search_banks(db: Session, query: str, region: Optional[str], limit: int) -> List[Dict]:
+def search_banks(db: Session, query: str, region: Optional[str], limit: int) -> List[Dict]:
     """Search banks"""
     try:
         query_obj = db.query(Banks)
@@ -206,6 +211,7 @@ async def search_banks(db: Session, query: str, region: Optional[str], limit: in
                 "city": bank.city,
                 "risk_level": "low",  # Banks typically have low risk
                 "description": f"Banking institution in {bank.city}",
+                "relevance_score": calculate_relevance_score(bank, query),
                 "created_at": bank.created_at,
                 "updated_at": bank.updated_at
             })
@@ -213,9 +219,9 @@ async def search_banks(db: Session, query: str, region: Optional[str], limit: in
         return results
     except Exception as e:
         logging.error(f"Error searching banks: {e}")
-        return []
+        raise
 
-async def search_insurance(db: Session, query: str, region: Optional[str], limit: int) -> List[Dict]:
+def search_insurance(db: Session, query: str, region: Optional[str], limit: int) -> List[Dict]:
     """Search insurance companies"""
     try:
         query_obj = db.query(Insurance)
@@ -245,6 +251,7 @@ async def search_insurance(db: Session, query: str, region: Optional[str], limit
                 "city": insurance.city,
                 "risk_level": "low",  # Insurance companies typically have low risk
                 "description": f"Insurance company in {insurance.city}",
+                "relevance_score": calculate_relevance_score(insurance, query),
                 "created_at": insurance.created_at,
                 "updated_at": insurance.updated_at
             })
@@ -252,7 +259,7 @@ async def search_insurance(db: Session, query: str, region: Optional[str], limit
         return results
     except Exception as e:
         logging.error(f"Error searching insurance: {e}")
-        return []
+        raise
 
 def calculate_relevance_score(item, query: str) -> float:
     """Calculate relevance score for search results"""
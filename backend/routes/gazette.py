@@ -17,6 +17,8 @@ from models.companies import Companies
 from models.banks import Banks
 from models.insurance import Insurance
 from services.gazette_people_sync import sync_gazette_to_people, create_person_from_gazette
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
 
 router = APIRouter(prefix="/gazette", tags=["gazette"])
 
@@ -28,6 +30,8 @@ def create_gazette(gazette: GazetteCreate, db: Session = Depends(get_db)):
     db.add(db_gazette)
     db.commit()
     db.refresh(db_gazette)
+    autocomplete_index.refresh_entity("gazette", db_gazette)
+    response_cache.invalidate("gazette")
     
     # Synchronize with people table
     try:
@@ -88,6 +92,8 @@ def update_gazette(gazette_id: int, gazette_update: GazetteUpdate, db: Session =
     gazette.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(gazette)
+    autocomplete_index.refresh_entity("gazette", gazette)
+    response_cache.invalidate("gazette")
     
     # Synchronize with people table
     try:
@@ -118,6 +124,8 @@ def delete_gazette(gazette_id: int, db: Session = Depends(get_db)):
     
     db.delete(gazette)
     db.commit()
+    autocomplete_index.remove_entity("gazette", gazette_id)
+    response_cache.invalidate("gazette")
     return {"message": "Gazette entry deleted successfully"}
 
 # List Gazette Entries with Search and Filtering
@@ -263,6 +271,7 @@ def create_person_from_gazette_endpoint(gazette_id: int, db: Session = Depends(g
 
 # Get Gazette Statistics
 @router.get("/stats/overview", response_model=GazetteStats)
+@response_cache.cached(ttl=300, tags=("gazette",))
 def get_gazette_stats(db: Session = Depends(get_db)):
     """Get gazette statistics"""
     
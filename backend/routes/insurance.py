@@ -16,6 +16,9 @@ from schemas.insurance import (
     InsuranceStats
 )
 from auth import get_current_user
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.search_counter import search_counter
 from typing import List, Optional
 import logging
 import math
@@ -140,11 +143,7 @@ async def search_insurance(
     insurance_companies = db_query.offset(offset).limit(limit).all()
     
     # Update search count for each insurance company
-    for insurance in insurance_companies:
-        insurance.search_count += 1
-        insurance.last_searched = func.now()
-    
-    db.commit()
+    search_counter.record("insurance", [insurance.id for insurance in insurance_companies])
     
     # Get analytics data for each insurance company
     insurance_with_analytics = []
@@ -266,6 +265,8 @@ async def create_insurance(
     db.add(db_insurance)
     db.commit()
     db.refresh(db_insurance)
+    autocomplete_index.refresh_entity("insurance", db_insurance)
+    response_cache.invalidate("insurance")
     return db_insurance
 
 @router.put("/{insurance_id}", response_model=InsuranceResponse)
@@ -286,6 +287,8 @@ async def update_insurance(
     
     db.commit()
     db.refresh(db_insurance)
+    autocomplete_index.refresh_entity("insurance", db_insurance)
+    response_cache.invalidate("insurance")
     return db_insurance
 
 @router.delete("/{insurance_id}")
@@ -301,6 +304,8 @@ async def delete_insurance(
     
     db_insurance.is_active = False
     db.commit()
+    autocomplete_index.remove_entity("insurance", insurance_id)
+    response_cache.invalidate("insurance")
     return {"message": "Insurance company deleted successfully"}
 
 @router.get("/stats/overview", response_model=InsuranceStats)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc, String
+from sqlalchemy import and_, func, desc, asc
 from database import get_db
 from models.people import People
 from models.user import User
@@ -14,6 +14,10 @@ from schemas.people import (
     PeopleStats
 )
 from auth import get_current_user
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.search_counter import search_counter
+from services.full_text_search import contains_match, fuzzy_name_match, set_fuzzy_threshold
 from typing import List, Optional
 import logging
 import math
@@ -23,6 +27,7 @@ router = APIRouter()
 @router.get("/search", response_model=PeopleSearchResponse)
 async def search_people(
     query: Optional[str] = Query(None, description="General search query"),
+    match: str = Query("contains", pattern="^(contains|fuzzy)$", description="Name matching: contains, or fuzzy for spelling variants"),
     first_name: Optional[str] = Query(None, description="First name filter"),
     last_name: Optional[str] = Query(None, description="Last name filter"),
     id_number: Optional[str] = Query(None, description="ID number filter"),
@@ -62,28 +67,16 @@ async def search_people(
         
         # Apply filters
         filters = []
+        fuzzy_rank = None
         
-        if query:
-            # General search across multiple fields
-            search_term = f"%{query.lower()}%"
-            filters.append(
-                or_(
-                    func.lower(People.full_name).like(search_term),
-                    func.lower(People.first_name).like(search_term),
-                    func.lower(People.last_name).like(search_term),
-                    func.lower(People.id_number).like(search_term),
-                    func.lower(People.phone_number).like(search_term),
-                    func.lower(People.email).like(search_term),
-                    func.lower(People.address).like(search_term),
-                    func.lower(People.city).like(search_term),
-                    func.lower(People.region).like(search_term),
-                    func.lower(People.occupation).like(search_term),
-                    func.lower(People.employer).like(search_term),
-                    func.lower(People.organization).like(search_term),
-                    # Search in previous_names (alias names) JSON array
-                    func.cast(People.previous_names, String).ilike(search_term)
-                )
-            )
+        if query and match == "fuzzy":
+            # Typo-tolerant match on full name and previous names (trigram index)
+            set_fuzzy_threshold(db)
+            fuzzy_condition, fuzzy_rank = fuzzy_name_match("people", query)
+            filters.append(fuzzy_condition)
+        elif query:
+            # Substring search across names, previous names, contact and work fields (trigram index)
+            filters.append(contains_match("people", query))
         
         if first_name:
             filters.append(func.lower(People.first_name).like(f"%{first_name.lower()}%"))
@@ -128,7 +121,9 @@ async def search_people(
         if filters:
             query_obj = query_obj.filter(and_(*filters))
         
-        # Apply sorting
+        # Apply sorting (closest fuzzy matches first)
+        if fuzzy_rank is not None:
+            query_obj = query_obj.order_by(desc(fuzzy_rank))
         sort_column = getattr(People, sort_by, People.full_name)
         if sort_order == "desc":
             query_obj = query_obj.order_by(desc(sort_column))
@@ -183,14 +178,9 @@ async def search_people(
                 person.mixed_cases = 0
                 person.case_outcome = "N/A"
         
-        # Only commit if we're updating search counts (for single searches, not batch loads)
-        if limit <= 20:  # Only update search counts for small queries
-            for person in people:
-                if person.search_count is None:
-                    person.search_count = 0
-                person.search_count += 1
-                person.last_searched = func.now()
-            db.commit()
+        # Only update search counts for single searches, not batch loads
+        if limit <= 20:
+            search_counter.record("people", [person.id for person in people])
         
         return PeopleSearchResponse(
             people=people,
@@ -228,9 +218,7 @@ async def get_person(
             )
         
         # Update search count
-        person.search_count += 1
-        person.last_searched = func.now()
-        db.commit()
+        search_counter.record("people", [person.id])
         
         return person
         
@@ -263,6 +251,8 @@ async def create_person(
         db.add(person)
         db.commit()
         db.refresh(person)
+        autocomplete_index.refresh_entity("people", person)
+        response_cache.invalidate("people")
         
         # Generate analytics for the new person
         try:
@@ -316,6 +306,8 @@ async def update_person(
         person.updated_by = current_user.id
         db.commit()
         db.refresh(person)
+        autocomplete_index.refresh_entity("people", person)
+        response_cache.invalidate("people")
         
         return person
         
@@ -348,6 +340,7 @@ async def delete_person(
         person.status = "archived"
         person.updated_by = current_user.id
         db.commit()
+        response_cache.invalidate("people")
         
         return {"message": "Person deleted successfully"}
         
@@ -362,6 +355,7 @@ async def delete_person(
         )
 
 @router.get("/stats/overview", response_model=PeopleStats)
+@response_cache.cached(ttl=300, tags=("people",))
 async def get_people_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc, String
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, or_, func, desc, asc, Float, cast, literal, select, tuple_, union_all
 from database import get_db
 from models.people import People
 from models.banks import Banks
@@ -24,218 +24,267 @@ import logging
 import math
 import time
 from services.usage_tracking_service import UsageTrackingService
+from services.full_text_search import (
+    FUZZY_NAME_ENTITIES,
+    apply_full_text_search,
+    apply_fuzzy_name_search,
+    full_text_match,
+    fuzzy_name_match,
+    set_fuzzy_threshold
+)
+from services.autocomplete_index import autocomplete_index
+from services.response_cache import response_cache
+from services.search_pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count
+)
 
 router = APIRouter()
 
+# Unified search sources: entity type -> (model, visibility filter, position in the merged order)
+UNIFIED_SOURCES = {
+    "people": (People, lambda: People.is_verified == True, 0),
+    "banks": (Banks, lambda: Banks.is_active == True, 1),
+    "insurance": (Insurance, lambda: Insurance.is_active == True, 2),
+    "companies": (Companies, lambda: Companies.is_active == True, 3),
+}
+
+# Quick search suggestions per entity type, as a function of the requested limit
+QUICK_SEARCH_LIMITS = {
+    "people": lambda limit: limit,
+    "banks": lambda limit: limit // 3,
+    "insurance": lambda limit: limit // 3,
+    "companies": lambda limit: limit // 4,
+    "gazette": lambda limit: limit // 5,
+}
+
+def _person_result(person: People) -> SearchResultItem:
+    # Add case statistics if available (same logic as people search endpoint)
+    if person.case_statistics:
+        stats = person.case_statistics
+        total_cases = stats.total_cases
+        resolved_cases = stats.resolved_cases
+        unresolved_cases = stats.unresolved_cases
+        case_outcome = stats.case_outcome
+    else:
+        # Default values if no statistics available
+        total_cases = 0
+        resolved_cases = 0
+        unresolved_cases = 0
+        case_outcome = "N/A"
+    
+    return SearchResultItem(
+        id=person.id,
+        name=person.full_name,
+        type="people",
+        description=f"{person.risk_level} Risk • {person.case_count} cases",
+        city=person.city,
+        region=person.region,
+        additional_info={
+            "risk_level": person.risk_level,
+            "case_count": person.case_count,
+            "total_cases": total_cases,
+            "resolved_cases": resolved_cases,
+            "unresolved_cases": unresolved_cases,
+            "case_outcome": case_outcome,
+            "phone": person.phone_number,
+            "email": person.email
+        }
+    )
+
+def _bank_result(bank: Banks) -> SearchResultItem:
+    return SearchResultItem(
+        id=bank.id,
+        name=bank.name,
+        type="banks",
+        description=f"{bank.bank_type} • {bank.city}, {bank.region}",
+        city=bank.city,
+        region=bank.region,
+        logo_url=bank.logo_url,
+        additional_info={
+            "bank_type": bank.bank_type,
+            "rating": bank.rating,
+            "phone": bank.phone,
+            "website": bank.website,
+            "has_mobile_app": bank.has_mobile_app,
+            "has_online_banking": bank.has_online_banking
+        }
+    )
+
+def _insurance_result(insurance: Insurance) -> SearchResultItem:
+    return SearchResultItem(
+        id=insurance.id,
+        name=insurance.name,
+        type="insurance",
+        description=f"{insurance.insurance_type} • {insurance.city}, {insurance.region}",
+        city=insurance.city,
+        region=insurance.region,
+        logo_url=insurance.logo_url,
+        additional_info={
+            "insurance_type": insurance.insurance_type,
+            "rating": insurance.rating,
+            "phone": insurance.phone,
+            "website": insurance.website,
+            "has_mobile_app": insurance.has_mobile_app,
+            "has_online_portal": insurance.has_online_portal
+        }
+    )
+
+def _company_result(company: Companies) -> SearchResultItem:
+    return SearchResultItem(
+        id=company.id,
+        name=company.name,
+        type="companies",
+        description=f"{company.company_type} • {company.industry} • {company.city}, {company.region}",
+        city=company.city,
+        region=company.region,
+        logo_url=company.logo_url,
+        additional_info={
+            "company_type": company.company_type,
+            "industry": company.industry,
+            "registration_number": company.registration_number,
+            "phone": company.phone,
+            "website": company.website,
+            "employee_count": company.employee_count,
+            "annual_revenue": company.annual_revenue
+        }
+    )
+
+UNIFIED_RESULT_BUILDERS = {
+    "people": _person_result,
+    "banks": _bank_result,
+    "insurance": _insurance_result,
+    "companies": _company_result,
+}
+
+def _unified_matches(query: Optional[str], search_type: str, match: str = "contains"):
+    """
+    UNION ALL of (entity_type, type_order, entity_id, rank) over every source.
+
+    Only ids and ranks are selected, so the database sorts and pages narrow
+    rows and full entity rows are loaded for the final page only.
+    """
+    selects = []
+    for entity_type, (model, visible, type_order) in UNIFIED_SOURCES.items():
+        if search_type not in ["all", entity_type]:
+            continue
+        
+        condition = visible()
+        # float8 so the rank survives the round trip through the cursor exactly
+        rank = cast(literal(0.0), Float(precision=53))
+        if query:
+            if match == "fuzzy" and entity_type in FUZZY_NAME_ENTITIES:
+                query_condition, query_rank = fuzzy_name_match(entity_type, query)
+            else:
+                query_condition, query_rank = full_text_match(entity_type, query)
+            condition = and_(condition, query_condition)
+            rank = cast(query_rank, Float(precision=53))
+        
+        selects.append(
+            select(
+                literal(entity_type).label("entity_type"),
+                literal(type_order).label("type_order"),
+                model.id.label("entity_id"),
+                rank.label("rank")
+            ).where(condition)
+        )
+    
+    return union_all(*selects).subquery("matches") if selects else None
+
 @router.get("/unified", response_model=UnifiedSearchResponse)
 async def unified_search(
     query: Optional[str] = Query(None, description="General search query"),
     search_type: str = Query("all", description="Type of search (all, people, banks, insurance, companies)"),
-    page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(1000, ge=1, le=5000, description="Items per page"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
+    limit: int = Query(20, ge=1, le=5000, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    match: str = Query("contains", pattern="^(contains|fuzzy)$", description="Name matching: contains, or fuzzy for spelling variants"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Unified search across people, banks, and insurance"""
+    """Unified search across people, banks, insurance and companies"""
     
     start_time = time.time()
-    results = []
-    people_results = []
-    banks_results = []
-    insurance_results = []
-    
-    # Search people
-    if search_type in ["all", "people"]:
-        people_query = db.query(People).filter(People.is_verified == True)
-        if query:
-            search_term = f"%{query.lower()}%"
-            people_query = people_query.filter(
-                or_(
-                    func.lower(People.full_name).like(search_term),
-                    func.lower(People.first_name).like(search_term),
-                    func.lower(People.last_name).like(search_term),
-                    func.lower(People.id_number).like(search_term),
-                    func.lower(People.phone_number).like(search_term),
-                    func.lower(People.email).like(search_term),
-                    func.lower(People.address).like(search_term),
-                    func.lower(People.city).like(search_term),
-                    func.lower(People.region).like(search_term),
-                    # Search in previous_names (alias names) JSON array
-                    func.cast(People.previous_names, String).ilike(search_term)
-                )
-            )
-        
-        people_results = people_query.all()
-        
-        # Add to unified results with case statistics
-        for person in people_results:
-            # Add case statistics if available (same logic as people search endpoint)
-            if hasattr(person, 'case_statistics') and person.case_statistics:
-                stats = person.case_statistics
-                total_cases = stats.total_cases
-                resolved_cases = stats.resolved_cases
-                unresolved_cases = stats.unresolved_cases
-                case_outcome = stats.case_outcome
-            else:
-                # Default values if no statistics available
-                total_cases = 0
-                resolved_cases = 0
-                unresolved_cases = 0
-                case_outcome = "N/A"
-            
-            results.append(SearchResultItem(
-                id=person.id,
-                name=person.full_name,
-                type="people",
-                description=f"{person.risk_level} Risk • {person.case_count} cases",
-                city=person.city,
-                region=person.region,
-                additional_info={
-                    "risk_level": person.risk_level,
-                    "case_count": person.case_count,
-                    "total_cases": total_cases,
-                    "resolved_cases": resolved_cases,
-                    "unresolved_cases": unresolved_cases,
-                    "case_outcome": case_outcome,
-                    "phone": person.phone_number,
-                    "email": person.email
-                }
-            ))
-    
-    # Search banks
-    if search_type in ["all", "banks"]:
-        banks_query = db.query(Banks).filter(Banks.is_active == True)
-        if query:
-            search_term = f"%{query.lower()}%"
-            banks_query = banks_query.filter(
-                or_(
-                    func.lower(Banks.name).like(search_term),
-                    func.lower(Banks.short_name).like(search_term),
-                    func.lower(Banks.bank_code).like(search_term),
-                    func.lower(Banks.city).like(search_term),
-                    func.lower(Banks.region).like(search_term),
-                    func.lower(Banks.description).like(search_term)
-                )
-            )
-        
-        banks_results = banks_query.all()
-        
-        # Add to unified results
-        for bank in banks_results:
-            results.append(SearchResultItem(
-                id=bank.id,
-                name=bank.name,
-                type="banks",
-                description=f"{bank.bank_type} • {bank.city}, {bank.region}",
-                city=bank.city,
-                region=bank.region,
-                logo_url=bank.logo_url,
-                additional_info={
-                    "bank_type": bank.bank_type,
-                    "rating": bank.rating,
-                    "phone": bank.phone,
-                    "website": bank.website,
-                    "has_mobile_app": bank.has_mobile_app,
-                    "has_online_banking": bank.has_online_banking
-                }
-            ))
-    
-    # Search insurance
-    if search_type in ["all", "insurance"]:
-        insurance_query = db.query(Insurance).filter(Insurance.is_active == True)
-        if query:
-            search_term = f"%{query.lower()}%"
-            insurance_query = insurance_query.filter(
-                or_(
-                    func.lower(Insurance.name).like(search_term),
-                    func.lower(Insurance.short_name).like(search_term),
-                    func.lower(Insurance.license_number).like(search_term),
-                    func.lower(Insurance.city).like(search_term),
-                    func.lower(Insurance.region).like(search_term),
-                    func.lower(Insurance.description).like(search_term)
-                )
-            )
-        
-        insurance_results = insurance_query.all()
-        
-        # Add to unified results
-        for insurance in insurance_results:
-            results.append(SearchResultItem(
-                id=insurance.id,
-                name=insurance.name,
-                type="insurance",
-                description=f"{insurance.insurance_type} • {insurance.city}, {insurance.region}",
-                city=insurance.city,
-                region=insurance.region,
-                logo_url=insurance.logo_url,
-                additional_info={
-                    "insurance_type": insurance.insurance_type,
-                    "rating": insurance.rating,
-                    "phone": insurance.phone,
-                    "website": insurance.website,
-                    "has_mobile_app": insurance.has_mobile_app,
-                    "has_online_portal": insurance.has_online_portal
-                }
-            ))
+    if query and match == "fuzzy":
+        set_fuzzy_threshold(db)
+    matches = _unified_matches(query, search_type, match)
+    if matches is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown search type: {search_type}"
+        )
     
-    # Search companies
-    if search_type in ["all", "companies"]:
-        companies_query = db.query(Companies).filter(Companies.is_active == True)
-        if query:
-            search_term = f"%{query.lower()}%"
-            companies_query = companies_query.filter(
-                or_(
-                    func.lower(Companies.name).like(search_term),
-                    func.lower(Companies.short_name).like(search_term),
-                    func.lower(Companies.registration_number).like(search_term),
-                    func.lower(Companies.city).like(search_term),
-                    func.lower(Companies.region).like(search_term),
-                    func.lower(Companies.industry).like(search_term),
-                    func.lower(Companies.description).like(search_term)
-                )
+    # Merged order: best rank first, then entity type, then id (unique, so stable)
+    page_query = select(
+        matches.c.entity_type, matches.c.type_order, matches.c.entity_id, matches.c.rank
+    ).order_by(desc(matches.c.rank), matches.c.type_order, matches.c.entity_id)
+    
+    offset = 0
+    if cursor:
+        try:
+            last_rank, last_type_order, last_id = decode_cursor(cursor, 3)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        page_query = page_query.where(or_(
+            matches.c.rank < last_rank,
+            and_(
+                matches.c.rank == last_rank,
+                tuple_(matches.c.type_order, matches.c.entity_id) > tuple_(last_type_order, last_id)
             )
-        
-        companies_results = companies_query.all()
-        
-        # Add to unified results
-        for company in companies_results:
-            results.append(SearchResultItem(
-                id=company.id,
-                name=company.name,
-                type="companies",
-                description=f"{company.company_type} • {company.industry} • {company.city}, {company.region}",
-                city=company.city,
-                region=company.region,
-                logo_url=company.logo_url,
-                additional_info={
-                    "company_type": company.company_type,
-                    "industry": company.industry,
-                    "registration_number": company.registration_number,
-                    "phone": company.phone,
-                    "website": company.website,
-                    "employee_count": company.employee_count,
-                    "annual_revenue": company.annual_revenue
-                }
-            ))
-    
-    # Calculate total results
-    total_results = len(results)
-    
-    # Apply pagination to unified results
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_results = results[start_idx:end_idx]
+        ))
+    else:
+        offset = (page - 1) * limit
+        page_query = page_query.offset(offset)
+    
+    # One extra row tells us whether there is a next page
+    rows = db.execute(page_query.limit(limit + 1)).all()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    
+    # Exact when everything fit on the first page; otherwise ask the planner
+    if not has_next and offset == 0 and not cursor:
+        total_results = len(rows)
+        total_is_estimate = False
+    else:
+        estimate = estimate_row_count(db, select(matches.c.entity_id))
+        total_results = max(estimate or 0, offset + len(rows) + (1 if has_next else 0))
+        total_is_estimate = True
+    
+    # Load the entities on this page, one IN query per type
+    ids_by_type: Dict[str, List[int]] = {}
+    for row in rows:
+        ids_by_type.setdefault(row.entity_type, []).append(row.entity_id)
+    
+    entities: Dict[str, Dict[int, Any]] = {}
+    for entity_type, ids in ids_by_type.items():
+        model = UNIFIED_SOURCES[entity_type][0]
+        entity_query = db.query(model).filter(model.id.in_(ids))
+        if model is People:
+            entity_query = entity_query.options(selectinload(People.case_statistics))
+        entities[entity_type] = {entity.id: entity for entity in entity_query.all()}
+    
+    paginated_results = []
+    for row in rows:
+        entity = entities[row.entity_type].get(row.entity_id)
+        if entity is not None:
+            paginated_results.append(UNIFIED_RESULT_BUILDERS[row.entity_type](entity))
+    
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([last.rank, last.type_order, last.entity_id])
     
     # Calculate pagination info
-    total_pages = math.ceil(total_results / limit)
-    has_next = page < total_pages
-    has_prev = page > 1
+    total_pages = max(math.ceil(total_results / limit), page + (1 if has_next else 0))
+    has_prev = page > 1 or cursor is not None
     
     search_time = (time.time() - start_time) * 1000  # Convert to milliseconds
     
-    # Track usage for billing
+    # Track usage for billing (buffered, written in the background)
     try:
-        usage_service = UsageTrackingService(db)
+        usage_service = UsageTrackingService()
         usage_service.track_search_usage(
             user_id=current_user.id if current_user else None,
             session_id=None,  # Could be extracted from headers
@@ -248,17 +297,26 @@ async def unified_search(
     except Exception as e:
         logging.error(f"Error tracking search usage: {e}")
     
+    # Entity lists only carry the rows on this page
+    def page_entities(entity_type):
+        if search_type not in ["all", entity_type]:
+            return None
+        by_id = entities.get(entity_type, {})
+        return [by_id[entity_id] for entity_id in ids_by_type.get(entity_type, []) if entity_id in by_id]
+    
     return UnifiedSearchResponse(
         results=paginated_results,
-        people=people_results if search_type in ["all", "people"] else None,
-        banks=banks_results if search_type in ["all", "banks"] else None,
-        insurance=insurance_results if search_type in ["all", "insurance"] else None,
+        people=page_entities("people"),
+        banks=page_entities("banks"),
+        insurance=page_entities("insurance"),
         total=total_results,
+        total_is_estimate=total_is_estimate,
         page=page,
         limit=limit,
         total_pages=total_pages,
         has_next=has_next,
         has_prev=has_prev,
+        next_cursor=next_cursor,
         search_type=search_type,
         query=query,
         search_time_ms=search_time
@@ -268,26 +326,38 @@ async def unified_search(
 async def quick_search(
     query: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(10, ge=1, le=50, description="Maximum results"),
+    match: str = Query("contains", pattern="^(contains|fuzzy)$", description="Name matching: contains, or fuzzy for spelling variants"),
     db: Session = Depends(get_db)
     # Temporarily removed authentication for home page search
     # current_user: User = Depends(get_current_user)
 ):
     """Quick search for suggestions and autocomplete"""
     
-    search_term = f"%{query.lower()}%"
     suggestions = []
+    fuzzy = match == "fuzzy"
+    
+    # Prefix completions come from the in-memory index; the session is never
+    # used on this path, so no pooled connection is checked out
+    if not fuzzy and autocomplete_index.is_ready():
+        for entity_type, type_limit in QUICK_SEARCH_LIMITS.items():
+            for payload in autocomplete_index.complete(entity_type, query, type_limit(limit)):
+                suggestions.append(SearchResultItem(**payload))
+        
+        return QuickSearchResponse(
+            suggestions=suggestions[:limit],
+            total=len(suggestions)
+        )
+    
+    if fuzzy:
+        set_fuzzy_threshold(db)
     
     # Search people
-    people = db.query(People).filter(
-        People.is_verified == True,
-        or_(
-            func.lower(People.full_name).like(search_term),
-            func.lower(People.first_name).like(search_term),
-            func.lower(People.last_name).like(search_term),
-            # Search in previous_names (alias names) JSON array
-            func.cast(People.previous_names, String).ilike(search_term)
-        )
-    ).limit(limit).all()
+    people_query = db.query(People).filter(People.is_verified == True)
+    if fuzzy:
+        people_query = apply_fuzzy_name_search(people_query, "people", query)
+    else:
+        people_query = apply_full_text_search(people_query, "people", query, prefix=True)
+    people = people_query.limit(QUICK_SEARCH_LIMITS["people"](limit)).all()
     
     for person in people:
         suggestions.append(SearchResultItem(
@@ -300,13 +370,9 @@ async def quick_search(
         ))
     
     # Search banks
-    banks = db.query(Banks).filter(
-        Banks.is_active == True,
-        or_(
-            func.lower(Banks.name).like(search_term),
-            func.lower(Banks.short_name).like(search_term)
-        )
-    ).limit(limit // 3).all()
+    banks = apply_full_text_search(
+        db.query(Banks).filter(Banks.is_active == True), "banks", query, prefix=True
+    ).limit(QUICK_SEARCH_LIMITS["banks"](limit)).all()
     
     for bank in banks:
         suggestions.append(SearchResultItem(
@@ -320,13 +386,9 @@ async def quick_search(
         ))
     
     # Search insurance
-    insurance = db.query(Insurance).filter(
-        Insurance.is_active == True,
-        or_(
-            func.lower(Insurance.name).like(search_term),
-            func.lower(Insurance.short_name).like(search_term)
-        )
-    ).limit(limit // 3).all()
+    insurance = apply_full_text_search(
+        db.query(Insurance).filter(Insurance.is_active == True), "insurance", query, prefix=True
+    ).limit(QUICK_SEARCH_LIMITS["insurance"](limit)).all()
     
     for ins in insurance:
         suggestions.append(SearchResultItem(
@@ -340,13 +402,9 @@ async def quick_search(
         ))
     
     # Search companies
-    companies = db.query(Companies).filter(
-        Companies.is_active == True,
-        or_(
-            func.lower(Companies.name).like(search_term),
-            func.lower(Companies.short_name).like(search_term)
-        )
-    ).limit(limit // 4).all()
+    companies = apply_full_text_search(
+        db.query(Companies).filter(Companies.is_active == True), "companies", query, prefix=True
+    ).limit(QUICK_SEARCH_LIMITS["companies"](limit)).all()
     
     for company in companies:
         suggestions.append(SearchResultItem(
@@ -360,15 +418,12 @@ async def quick_search(
         ))
     
     # Search gazette entries (names)
-    gazettes = db.query(Gazette).filter(
-        Gazette.is_public == True,
-        or_(
-            func.lower(Gazette.old_name).like(search_term),
-            func.lower(Gazette.new_name).like(search_term),
-            func.lower(Gazette.title).like(search_term),
-            func.lower(Gazette.reference_number).like(search_term)
-        )
-    ).limit(limit // 5).all()
+    gazette_query = db.query(Gazette).filter(Gazette.is_public == True)
+    if fuzzy:
+        gazette_query = apply_fuzzy_name_search(gazette_query, "gazette", query)
+    else:
+        gazette_query = apply_full_text_search(gazette_query, "gazette", query, prefix=True)
+    gazettes = gazette_query.limit(QUICK_SEARCH_LIMITS["gazette"](limit)).all()
     
     for gazette in gazettes:
         # Determine the primary name to display
@@ -407,17 +462,7 @@ async def advanced_search(
         people_query = db.query(People).filter(People.is_verified == True)
         
         if request.query:
-            search_term = f"%{request.query.lower()}%"
-            people_query = people_query.filter(
-                or_(
-                    func.lower(People.full_name).like(search_term),
-                    func.lower(People.first_name).like(search_term),
-                    func.lower(People.last_name).like(search_term),
-                    func.lower(People.id_number).like(search_term),
-                    func.lower(People.phone_number).like(search_term),
-                    func.lower(People.email).like(search_term)
-                )
-            )
+            people_query = apply_full_text_search(people_query, "people", request.query)
         
         # Apply people filters
         if request.people_filters:
@@ -448,14 +493,7 @@ async def advanced_search(
         banks_query = db.query(Banks).filter(Banks.is_active == True)
         
         if request.query:
-            search_term = f"%{request.query.lower()}%"
-            banks_query = banks_query.filter(
-                or_(
-                    func.lower(Banks.name).like(search_term),
-                    func.lower(Banks.short_name).like(search_term),
-                    func.lower(Banks.bank_code).like(search_term)
-                )
-            )
+            banks_query = apply_full_text_search(banks_query, "banks", request.query)
         
         # Apply banks filters
         if request.banks_filters:
@@ -486,14 +524,7 @@ async def advanced_search(
         insurance_query = db.query(Insurance).filter(Insurance.is_active == True)
         
         if request.query:
-            search_term = f"%{request.query.lower()}%"
-            insurance_query = insurance_query.filter(
-                or_(
-                    func.lower(Insurance.name).like(search_term),
-                    func.lower(Insurance.short_name).like(search_term),
-                    func.lower(Insurance.license_number).like(search_term)
-                )
-            )
+            insurance_query = apply_full_text_search(insurance_query, "insurance", request.query)
         
         # Apply insurance filters
         if request.insurance_filters:
@@ -541,6 +572,7 @@ async def advanced_search(
     )
 
 @router.get("/stats", response_model=SearchStats)
+@response_cache.cached(ttl=300, tags=("people", "banks", "insurance"))
 async def get_search_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
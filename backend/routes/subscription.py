@@ -9,6 +9,7 @@ from schemas.subscription import (
     SubscriptionUsageResponse, SubscriptionPlanResponse, PlanFeature
 )
 from auth import get_current_user
+from services.response_cache import response_cache
 from typing import List, Optional
 import logging
 from datetime import datetime, timedelta
@@ -118,6 +119,7 @@ async def get_current_subscription(
             db.add(subscription)
             db.commit()
             db.refresh(subscription)
+            response_cache.invalidate("subscriptions")
         
         # Get usage data for current month
         start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -212,6 +214,7 @@ async def upgrade_subscription(
         
         db.commit()
         db.refresh(subscription)
+        response_cache.invalidate("subscriptions")
         
         return {
             "message": f"Successfully upgraded to {plan_data['name']} plan",
@@ -257,6 +260,7 @@ async def cancel_subscription(
         current_user.subscription_plan = "free"
         
         db.commit()
+        response_cache.invalidate("subscriptions")
         
         return {"message": "Subscription cancelled successfully"}
     except HTTPException:
@@ -68,11 +68,13 @@ class UnifiedSearchResponse(BaseModel):
     
     # Pagination
     total: int
+    total_is_estimate: bool = False  # True when total comes from the query planner
     page: int
     limit: int
     total_pages: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for keyset pagination
     
     # Search metadata
     search_type: str
@@ -1,16 +1,26 @@
 import os
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import select, text
+from models.analytics_change import record_changes
 from models.reported_cases import ReportedCases
 from models.settings import Settings
-from database import get_db
+from database import get_db, SessionLocal
+from services.llm_worker_pool import CompletionJob, LLMWorkerPool, async_openai_client, complete_sync
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+from services.corpus_iterator import iter_batches
+from services.document_chunker import analysis_job
 import openai
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+ANALYSIS_CACHE_NAMESPACE = "case_analysis"
+ANALYSIS_TEMPLATE_VERSION = TEMPLATE_VERSIONS[ANALYSIS_CACHE_NAMESPACE]
+
 class AICaseAnalysisService:
     def __init__(self, db: Session):
         self.db = db
@@ -45,29 +55,18 @@ class AICaseAnalysisService:
             logger.warning(f"Failed to get AI model from settings, using default: {e}")
             return "gpt-3.5-turbo"
     
-    def _truncate_content(self, content: str, max_length: int = 8000) -> str:
-        """Truncate content to fit within token limits"""
-        if not content:
-            return ""
-        
-        # Simple truncation - in production, you might want to use tiktoken for accurate token counting
-        if len(content) <= max_length:
-            return content
-        
-        return content[:max_length] + "..."
-    
     def analyze_case(self, case: ReportedCases) -> Dict[str, Any]:
         """Analyze a single case and generate AI-powered insights"""
         try:
-            # Prepare case content for analysis
-            case_content = self._prepare_case_content(case)
+            # Prepare the completion job (chunked map-reduce for long cases)
+            job = self._build_analysis_job(case)
             
-            if not case_content.strip():
+            if job is None:
                 logger.warning(f"Case {case.id} has no content for analysis")
                 return self._get_default_analysis()
             
             # Generate AI analysis
-            analysis = self._generate_ai_analysis(case_content, case)
+            analysis = self._generate_ai_analysis(job)
             
             return analysis
             
@@ -109,32 +108,52 @@ class AICaseAnalysisService:
         
         return "\n\n".join(content_parts)
     
-    def _generate_ai_analysis(self, case_content: str, case: ReportedCases) -> Dict[str, Any]:
+    def _build_messages(self, case_content: str, case: ReportedCases) -> List[Dict[str, str]]:
+        """Build the chat messages for a case's analysis"""
+        prompt = self._create_analysis_prompt(case_content, case)
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def _build_analysis_job(self, case: ReportedCases) -> Optional[CompletionJob]:
+        """
+        Completion job for a case's analysis, or None if it has no content.
+        
+        Case text over settings.ai_prompt_token_budget is split into chunks
+        whose notes are summarized together (see services/document_chunker.py).
+        The job's payload is its response cache key.
+        """
+        case_content = self._prepare_case_content(case)
+        if not case_content.strip():
+            return None
+        
+        job = analysis_job(
+            case.id, case, case_content,
+            lambda content: self._build_messages(content, case),
+            self.model, max_tokens=2000, temperature=0.3
+        )
+        job.payload = completion_cache.make_key(
+            ANALYSIS_CACHE_NAMESPACE, ANALYSIS_TEMPLATE_VERSION, self.model, job.cache_messages, 2000, 0.3
+        )
+        return job
+    
+    def _generate_ai_analysis(self, job: CompletionJob) -> Dict[str, Any]:
         """Generate AI analysis for the case"""
         try:
-            # Truncate content to fit within token limits
-            truncated_content = self._truncate_content(case_content, 6000)
-            
-            prompt = self._create_analysis_prompt(truncated_content, case)
-            
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
+            ai_response = completion_cache.get(ANALYSIS_CACHE_NAMESPACE, job.payload)
+            if ai_response is None:
+                ai_response = complete_sync(self.openai_client, self.model, job)
+                completion_cache.put(ANALYSIS_CACHE_NAMESPACE, job.payload, ANALYSIS_TEMPLATE_VERSION, self.model, ai_response)
             
             # Parse the AI response
-            ai_response = response.choices[0].message.content
             return self._parse_ai_response(ai_response)
             
         except Exception as e:
@@ -214,12 +233,8 @@ Respond only with valid JSON, no additional text.
             analysis = self.analyze_case(case)
             
             # Update case with AI analysis
-            case.ai_case_outcome = analysis.get('case_outcome', 'UNRESOLVED')
-            case.ai_court_orders = analysis.get('court_orders', '')
-            case.ai_financial_impact = analysis.get('financial_impact', 'UNKNOWN')
-            case.ai_detailed_outcome = analysis.get('detailed_outcome', '')
-            case.ai_summary_generated_at = datetime.utcnow()
-            case.ai_summary_version = '1.0'
+            for field, value in self._analysis_columns(analysis).items():
+                setattr(case, field, value)
             
             self.db.commit()
             logger.info(f"Successfully updated case {case_id} with AI analysis")
@@ -230,47 +245,110 @@ Respond only with valid JSON, no additional text.
             self.db.rollback()
             return False
     
-    def process_all_cases(self, batch_size: int = 10) -> Dict[str, Any]:
-        """Process all cases in batches and update with AI analysis"""
+    def _analysis_columns(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an analysis result onto reported_cases columns"""
+        return {
+            "ai_case_outcome": analysis.get('case_outcome', 'UNRESOLVED'),
+            "ai_court_orders": analysis.get('court_orders', ''),
+            "ai_financial_impact": analysis.get('financial_impact', 'UNKNOWN'),
+            "ai_detailed_outcome": analysis.get('detailed_outcome', ''),
+            "ai_summary_generated_at": datetime.utcnow(),
+            "ai_summary_version": '1.0'
+        }
+    
+    def _save_analysis(self, case_id: int, analysis: Dict[str, Any]) -> None:
+        """Store an analysis on its own session (called from pool worker threads)"""
+        db = SessionLocal()
+        try:
+            db.query(ReportedCases).filter(ReportedCases.id == case_id).update(
+                self._analysis_columns(analysis), synchronize_session=False
+            )
+            record_changes(db, "reported_cases", [case_id])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _iter_analysis_jobs(self, batch_size: int, skip_unchanged: bool, counts: Dict[str, int]) -> Iterator[CompletionJob]:
+        """
+        Completion jobs for every case, streamed in id order with only the columns the prompt uses.
+        
+        Cases whose prompt is already in the response cache are stored from
+        the cache without a job; with skip_unchanged, those that already
+        carry the current analysis are not written at all.
+        """
+        statement = select(
+            ReportedCases.id, ReportedCases.title, ReportedCases.decision, ReportedCases.judgement,
+            ReportedCases.conclusion, ReportedCases.case_summary, ReportedCases.area_of_law,
+            ReportedCases.protagonist, ReportedCases.antagonist, ReportedCases.headnotes,
+            ReportedCases.ai_detailed_outcome, ReportedCases.ai_summary_version
+        )
+        for cases in iter_batches(statement, ReportedCases.id, bind=self.db.get_bind(), batch_size=batch_size):
+            jobs = []
+            for case in cases:
+                job = self._build_analysis_job(case)
+                if job is None:
+                    logger.warning(f"Case {case.id} has no content for analysis")
+                    self._save_analysis(case.id, self._get_default_analysis())
+                    continue
+                jobs.append((case, job))
+            
+            cached = completion_cache.get_many(ANALYSIS_CACHE_NAMESPACE, [job.payload for _, job in jobs])
+            for case, job in jobs:
+                if job.payload not in cached:
+                    yield job
+                elif skip_unchanged and case.ai_detailed_outcome and case.ai_summary_version == '1.0':
+                    counts["unchanged"] += 1
+                else:
+                    self._save_analysis(case.id, self._parse_ai_response(cached[job.payload]))
+                    counts["cache_hits"] += 1
+    
+    def process_all_cases(self, batch_size: int = 100, concurrency: Optional[int] = None,
+                          progress_path: Optional[str] = None, skip_unchanged: bool = False) -> Dict[str, Any]:
+        """
+        Analyze all cases concurrently through the LLM worker pool.
+        
+        Args:
+            batch_size: Cases read per query
+            concurrency: Requests in flight (default: settings.llm_concurrency)
+            progress_path: File recording finished case ids; cases listed
+                           there are skipped, so an interrupted run resumes
+            skip_unchanged: Leave cases alone whose content has not changed
+                            since their stored analysis (per the response cache)
+        """
         try:
-            # Get total count of cases
             total_cases = self.db.query(ReportedCases).count()
-            processed = 0
-            successful = 0
-            failed = 0
             
-            logger.info(f"Starting AI analysis for {total_cases} cases in batches of {batch_size}")
+            logger.info(f"Starting AI analysis for {total_cases} cases")
+            
+            pool = LLMWorkerPool(
+                async_openai_client(self.openai_client.api_key, base_url=self.openai_client.base_url),
+                self.model,
+                concurrency=concurrency,
+                progress_path=progress_path
+            )
+            
+            def store(job: CompletionJob, ai_response: str) -> None:
+                self._save_analysis(job.key, self._parse_ai_response(ai_response))
+                completion_cache.put(ANALYSIS_CACHE_NAMESPACE, job.payload, ANALYSIS_TEMPLATE_VERSION, self.model, ai_response)
             
-            # Process cases in batches
-            offset = 0
-            while offset < total_cases:
-                cases = self.db.query(ReportedCases).offset(offset).limit(batch_size).all()
-                
-                for case in cases:
-                    try:
-                        if self.update_case_with_ai_analysis(case.id):
-                            successful += 1
-                        else:
-                            failed += 1
-                        processed += 1
-                        
-                        # Log progress every 10 cases
-                        if processed % 10 == 0:
-                            logger.info(f"Processed {processed}/{total_cases} cases")
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing case {case.id}: {e}")
-                        failed += 1
-                        processed += 1
-                
-                offset += batch_size
+            counts = {"cache_hits": 0, "unchanged": 0}
+            stats = asyncio.run(pool.run(self._iter_analysis_jobs(batch_size, skip_unchanged, counts), store))
+            processed = stats["succeeded"] + stats["failed"]
             
             result = {
                 "total_cases": total_cases,
                 "processed": processed,
-                "successful": successful,
-                "failed": failed,
-                "completion_percentage": (processed / total_cases * 100) if total_cases > 0 else 0
+                "successful": stats["succeeded"],
+                "failed": stats["failed"],
+                "skipped": stats["skipped"],
+                "cache_hits": counts["cache_hits"],
+                "unchanged": counts["unchanged"],
+                "retries": stats["retries"],
+                "elapsed_seconds": stats["elapsed_seconds"],
+                "completion_percentage": ((processed + stats["skipped"] + counts["cache_hits"] + counts["unchanged"]) / total_cases * 100) if total_cases > 0 else 0
             }
             
             logger.info(f"AI analysis completed: {result}")
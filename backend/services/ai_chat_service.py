@@ -1,7 +1,9 @@
 import os
+import time
+import asyncio
 import openai
 import logging
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from models.settings import Settings
 from models.reported_cases import ReportedCases
@@ -11,6 +13,8 @@ from datetime import datetime
 import json
 import re
 from services.usage_tracking_service import UsageTrackingService
+from services.case_context_cache import case_context_cache, case_context_version
+from services.document_chunker import truncate_to_tokens
 
 # Configure logging for AI chat
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +24,7 @@ class AIChatService:
     def __init__(self, db: Session):
         self.db = db
         self.openai_client = self._get_openai_client()
+        self.async_openai_client = None
         self.model = self._get_ai_model()
         self.usage_service = UsageTrackingService(db)
         
@@ -38,6 +43,15 @@ class AIChatService:
             raise ValueError("OpenAI API key not found in database or environment variables")
         return openai.OpenAI(api_key=api_key)
     
+    def _get_async_openai_client(self) -> openai.AsyncOpenAI:
+        """Async client with the same credentials, for streaming responses"""
+        if self.async_openai_client is None:
+            self.async_openai_client = openai.AsyncOpenAI(
+                api_key=self.openai_client.api_key,
+                base_url=self.openai_client.base_url
+            )
+        return self.async_openai_client
+    
     def _get_ai_model(self) -> str:
         """Get AI model from settings"""
         try:
@@ -47,11 +61,11 @@ class AIChatService:
             print(f"Error fetching AI model from database: {e}")
             return "gpt-3.5-turbo"
     
-    def _truncate_content(self, content: str, max_length: int = 2000) -> str:
-        """Truncate content to prevent token limit issues"""
-        if not content or len(content) <= max_length:
+    def _truncate_content(self, content: str, max_tokens: int = 500) -> str:
+        """Shorten content to a token budget, keeping its beginning and end (where the orders are)"""
+        if not content:
             return content
-        return content[:max_length] + "... [Content truncated]"
+        return truncate_to_tokens(content, max_tokens, self.model)
     
     def _log_chat_interaction(self, case_id: int, user_message: str, ai_response: str, 
                             session_id: str = None, user_id: str = None, 
@@ -176,88 +190,115 @@ class AIChatService:
     
     def get_case_context(self, case_id: int) -> Dict[str, Any]:
         """Get comprehensive case context for AI chat"""
+        return self.get_case_context_and_prompt(case_id)[0]
+    
+    def get_case_context_and_prompt(self, case_id: int) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Case context and chat system prompt, from the shared cache while the case is unchanged.
+        
+        The returned context is shared between sessions and must not be
+        modified. On failure the context is {"error": ...} and the prompt None.
+        """
         try:
-            # Get case with metadata
-            case = self.db.query(ReportedCases).outerjoin(
-                CaseMetadata, ReportedCases.id == CaseMetadata.case_id
-            ).filter(ReportedCases.id == case_id).first()
-            
-            if not case:
-                return {"error": "Case not found"}
-            
-            metadata = case.case_metadata
-            
-            # Get case hearings
-            hearings = self.db.query(CaseHearing).filter(
-                CaseHearing.case_id == case_id
-            ).order_by(CaseHearing.hearing_date).all()
-            
-            # Build comprehensive context
-            context = {
-                "case_id": case.id,
-                "title": case.title,
-                "suit_reference_number": case.suit_reference_number,
-                "date": case.date.isoformat() if case.date else None,
-                "year": case.year,
-                "court_type": case.court_type,
-                "court_division": case.court_division,
-                "area_of_law": case.area_of_law,
-                "status": str(case.status) if case.status is not None else None,
-                "protagonist": case.protagonist,
-                "antagonist": case.antagonist,
-                "lawyers": case.lawyers,
-                "region": case.region,
-                "town": case.town,
-                "presiding_judge": case.presiding_judge,
-                "judgement_by": case.judgement_by,
-                "opinion_by": case.opinion_by,
-                
-                # Case content (truncated to prevent token limit issues)
-                "case_summary": self._truncate_content(case.case_summary, 1000),
-                "detail_content": self._truncate_content(case.detail_content, 2000),
-                "decision": self._truncate_content(case.decision, 1500),
-                "judgement": self._truncate_content(case.judgement, 1500),
-                "commentary": self._truncate_content(case.commentary, 1000),
-                "headnotes": self._truncate_content(case.headnotes, 1000),
-                "keywords_phrases": self._truncate_content(case.keywords_phrases, 500),
-                
-                # Hearings
-                "hearings": [
-                    {
-                        "hearing_date": hearing.hearing_date.isoformat() if hearing.hearing_date else None,
-                        "hearing_time": hearing.hearing_time,
-                        "coram": hearing.coram,
-                        "remark": hearing.remark.value if hearing.remark else None,
-                        "proceedings": hearing.proceedings
-                    }
-                    for hearing in hearings
-                ],
-                
-                # Metadata (truncated to prevent token limit issues)
-                "metadata": {
-                    "case_type": metadata.case_type if metadata else None,
-                    "keywords": self._truncate_content(metadata.keywords, 500) if metadata else None,
-                    "judges": self._truncate_content(metadata.judges, 500) if metadata else None,
-                    "lawyers": self._truncate_content(metadata.lawyers, 500) if metadata else None,
-                    "related_people": self._truncate_content(metadata.related_people, 500) if metadata else None,
-                    "organizations": self._truncate_content(metadata.organizations, 500) if metadata else None,
-                    "banks_involved": self._truncate_content(metadata.banks_involved, 500) if metadata else None,
-                    "insurance_involved": self._truncate_content(metadata.insurance_involved, 500) if metadata else None,
-                    "resolution_status": metadata.resolution_status if metadata else None,
-                    "outcome": metadata.outcome if metadata else None,
-                    "decision_type": metadata.decision_type if metadata else None,
-                    "monetary_amount": metadata.monetary_amount if metadata else None,
-                    "statutes_cited": self._truncate_content(metadata.statutes_cited, 500) if metadata else None,
-                    "cases_cited": self._truncate_content(metadata.cases_cited, 500) if metadata else None,
-                    "relevance_score": metadata.relevance_score if metadata else None
-                } if metadata else {}
-            }
+            version = case_context_version(self.db, case_id)
+            if version is None:
+                return {"error": "Case not found"}, None
+            
+            cached = case_context_cache.get(case_id, version)
+            if cached is not None:
+                return cached
+            
+            context = self._load_case_context(case_id)
+            if "error" in context:
+                return context, None
             
-            return context
+            system_prompt = self._build_system_prompt(context)
+            case_context_cache.set(case_id, version, context, system_prompt)
+            return context, system_prompt
             
         except Exception as e:
-            print(f"Error getting case context: {e}")
-            return {"error": f"Failed to get case context: {str(e)}"}
+            ai_chat_logger.error(f"Error getting case context: {e}")
+            return {"error": f"Failed to get case context: {str(e)}"}, None
+    
+    def _load_case_context(self, case_id: int) -> Dict[str, Any]:
+        """Load a case's context from the database"""
+        # Get case with metadata
+        case = self.db.query(ReportedCases).outerjoin(
+            CaseMetadata, ReportedCases.id == CaseMetadata.case_id
+        ).filter(ReportedCases.id == case_id).first()
+        
+        if not case:
+            return {"error": "Case not found"}
+        
+        metadata = case.case_metadata
+        
+        # Get case hearings
+        hearings = self.db.query(CaseHearing).filter(
+            CaseHearing.case_id == case_id
+        ).order_by(CaseHearing.hearing_date).all()
+        
+        # Build comprehensive context
+        context = {
+            "case_id": case.id,
+            "title": case.title,
+            "suit_reference_number": case.suit_reference_number,
+            "date": case.date.isoformat() if case.date else None,
+            "year": case.year,
+            "court_type": case.court_type,
+            "court_division": case.court_division,
+            "area_of_law": case.area_of_law,
+            "status": str(case.status) if case.status is not None else None,
+            "protagonist": case.protagonist,
+            "antagonist": case.antagonist,
+            "lawyers": case.lawyers,
+            "region": case.region,
+            "town": case.town,
+            "presiding_judge": case.presiding_judge,
+            "judgement_by": case.judgement_by,
+            "opinion_by": case.opinion_by,
+            
+            # Case content (truncated to prevent token limit issues)
+            "case_summary": self._truncate_content(case.case_summary, 250),
+            "detail_content": self._truncate_content(case.detail_content, 500),
+            "decision": self._truncate_content(case.decision, 375),
+            "judgement": self._truncate_content(case.judgement, 375),
+            "commentary": self._truncate_content(case.commentary, 250),
+            "headnotes": self._truncate_content(case.headnotes, 250),
+            "keywords_phrases": self._truncate_content(case.keywords_phrases, 125),
+            
+            # Hearings
+            "hearings": [
+                {
+                    "hearing_date": hearing.hearing_date.isoformat() if hearing.hearing_date else None,
+                    "hearing_time": hearing.hearing_time,
+                    "coram": hearing.coram,
+                    "remark": hearing.remark.value if hearing.remark else None,
+                    "proceedings": hearing.proceedings
+                }
+                for hearing in hearings
+            ],
+            
+            # Metadata (truncated to prevent token limit issues)
+            "metadata": {
+                "case_type": metadata.case_type if metadata else None,
+                "keywords": self._truncate_content(metadata.keywords, 125) if metadata else None,
+                "judges": self._truncate_content(metadata.judges, 125) if metadata else None,
+                "lawyers": self._truncate_content(metadata.lawyers, 125) if metadata else None,
+                "related_people": self._truncate_content(metadata.related_people, 125) if metadata else None,
+                "organizations": self._truncate_content(metadata.organizations, 125) if metadata else None,
+                "banks_involved": self._truncate_content(metadata.banks_involved, 125) if metadata else None,
+                "insurance_involved": self._truncate_content(metadata.insurance_involved, 125) if metadata else None,
+                "resolution_status": metadata.resolution_status if metadata else None,
+                "outcome": metadata.outcome if metadata else None,
+                "decision_type": metadata.decision_type if metadata else None,
+                "monetary_amount": metadata.monetary_amount if metadata else None,
+                "statutes_cited": self._truncate_content(metadata.statutes_cited, 125) if metadata else None,
+                "cases_cited": self._truncate_content(metadata.cases_cited, 125) if metadata else None,
+                "relevance_score": metadata.relevance_score if metadata else None
+            } if metadata else {}
+        }
+        
+        return context
     
     def generate_ai_response(self, case_id: int, user_message: str, chat_history: List[Dict] = None, 
                            session_id: str = None, user_id: str = None) -> Dict[str, Any]:
@@ -276,7 +317,7 @@ class AIChatService:
             })
             
             # Get case context
-            case_context = self.get_case_context(case_id)
+            case_context, system_prompt = self.get_case_context_and_prompt(case_id)
             if "error" in case_context:
                 error = case_context["error"]
                 self._log_chat_interaction(
@@ -289,24 +330,8 @@ class AIChatService:
                 )
                 return case_context
             
-            # Build system prompt
-            system_prompt = self._build_system_prompt(case_context)
-            
             # Build messages for OpenAI
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Add chat history if provided
-            if chat_history:
-                for msg in chat_history[-10:]:  # Limit to last 10 messages
-                    messages.append({
-                        "role": "user" if msg["role"] == "user" else "assistant",
-                        "content": msg["content"]
-                    })
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+            messages = self._build_chat_messages(system_prompt, user_message, chat_history)
             
             # Generate response
             response = self.openai_client.chat.completions.create(
@@ -324,33 +349,15 @@ class AIChatService:
             
             ai_response = response.choices[0].message.content
             
-            # Log successful interaction
-            self._log_chat_interaction(
-                case_id=case_id,
-                user_message=user_message,
-                ai_response=ai_response,
+            # Log successful interaction and track usage
+            self._record_chat_completion(
+                case_id, user_message, ai_response, response.usage,
                 session_id=session_id,
                 user_id=user_id,
                 response_time_ms=response_time_ms,
-                tokens_used=tokens_used
+                endpoint="/api/ai-chat/message"
             )
             
-            # Log usage statistics
-            if tokens_used:
-                self._log_usage_statistics(case_id, session_id, tokens_used, response_time_ms)
-                
-                # Track usage for billing
-                self.usage_service.track_ai_usage(
-                    user_id=user_id,
-                    session_id=session_id,
-                    endpoint="/api/ai-chat/message",
-                    ai_model=self.model,
-                    prompt_tokens=response.usage.prompt_tokens if response.usage else 0,
-                    completion_tokens=response.usage.completion_tokens if response.usage else 0,
-                    response_time_ms=response_time_ms,
-                    query=user_message
-                )
-            
             return {
                 "success": True,
                 "response": ai_response,
@@ -384,6 +391,155 @@ class AIChatService:
                 "response_time_ms": response_time_ms
             }
     
+    def _build_chat_messages(self, system_prompt: str, user_message: str,
+                             chat_history: List[Dict] = None) -> List[Dict[str, str]]:
+        """Build the completion messages: system prompt, recent history and the new message"""
+        messages = [
+            {"role": "system", "content": system_prompt}
+        ]
+        
+        # Add chat history if provided
+        if chat_history:
+            for msg in chat_history[-10:]:  # Limit to last 10 messages
+                messages.append({
+                    "role": "user" if msg["role"] == "user" else "assistant",
+                    "content": msg["content"]
+                })
+        
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _record_chat_completion(self, case_id: int, user_message: str, ai_response: str, usage,
+                                session_id: str = None, user_id: str = None,
+                                response_time_ms: int = None, endpoint: str = "/api/ai-chat/message"):
+        """Log a finished chat completion and track its token usage for billing"""
+        tokens_used = usage.total_tokens if usage else None
+        
+        self._log_chat_interaction(
+            case_id=case_id,
+            user_message=user_message,
+            ai_response=ai_response,
+            session_id=session_id,
+            user_id=user_id,
+            response_time_ms=response_time_ms,
+            tokens_used=tokens_used
+        )
+        
+        # Log usage statistics
+        if tokens_used:
+            self._log_usage_statistics(case_id, session_id, tokens_used, response_time_ms)
+            
+            # Track usage for billing
+            self.usage_service.track_ai_usage(
+                user_id=user_id,
+                session_id=session_id,
+                endpoint=endpoint,
+                ai_model=self.model,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                response_time_ms=response_time_ms,
+                query=user_message
+            )
+    
+    async def stream_ai_response(self, case_id: int, user_message: str, chat_history: List[Dict] = None,
+                                 session_id: str = None, user_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_ai_response.
+        
+        Yields events as they happen:
+            {"type": "token", "content": ...} for each piece of the answer,
+            then {"type": "done", "response": ..., "response_time_ms": ...,
+            "first_token_ms": ..., "tokens_used": ...} or {"type": "error", "error": ...}
+        
+        The interaction log and token usage are recorded after the stream
+        closes; the blocking database work runs off the event loop.
+        """
+        start_time = time.monotonic()
+        first_token_ms = None
+        parts = []
+        usage = None
+        
+        try:
+            self._log_session_analytics(session_id, case_id, "message_sent", {
+                "user_message_length": len(user_message),
+                "chat_history_length": len(chat_history) if chat_history else 0,
+                "stream": True
+            })
+            
+            case_context, system_prompt = await asyncio.to_thread(self.get_case_context_and_prompt, case_id)
+            if "error" in case_context:
+                await asyncio.to_thread(
+                    self._log_chat_interaction,
+                    case_id=case_id,
+                    user_message=user_message,
+                    ai_response=None,
+                    session_id=session_id,
+                    user_id=user_id,
+                    error=case_context["error"]
+                )
+                yield {"type": "error", "error": case_context["error"]}
+                return
+            
+            stream = await self._get_async_openai_client().chat.completions.create(
+                model=self.model,
+                messages=self._build_chat_messages(system_prompt, user_message, chat_history),
+                max_tokens=800,
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            async for chunk in stream:
+                # The final chunk carries usage and no choices
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    if first_token_ms is None:
+                        first_token_ms = int((time.monotonic() - start_time) * 1000)
+                    parts.append(content)
+                    yield {"type": "token", "content": content}
+            
+        except Exception as e:
+            error = f"Failed to generate AI response: {str(e)}"
+            response_time_ms = int((time.monotonic() - start_time) * 1000)
+            await asyncio.to_thread(
+                self._log_chat_interaction,
+                case_id=case_id,
+                user_message=user_message,
+                ai_response="".join(parts) or None,
+                session_id=session_id,
+                user_id=user_id,
+                response_time_ms=response_time_ms,
+                error=error
+            )
+            ai_chat_logger.error(f"Error streaming AI response: {e}")
+            yield {"type": "error", "error": error}
+            return
+        
+        ai_response = "".join(parts)
+        response_time_ms = int((time.monotonic() - start_time) * 1000)
+        await asyncio.to_thread(
+            self._record_chat_completion,
+            case_id, user_message, ai_response, usage,
+            session_id=session_id,
+            user_id=user_id,
+            response_time_ms=response_time_ms,
+            endpoint="/api/ai-chat/message/stream"
+        )
+        
+        yield {
+            "type": "done",
+            "response": ai_response,
+            "timestamp": datetime.utcnow().isoformat(),
+            "response_time_ms": response_time_ms,
+            "first_token_ms": first_token_ms,
+            "tokens_used": usage.total_tokens if usage else None
+        }
+    
     def _get_region_name(self, region_code: str) -> str:
         """Convert region code to full region name"""
         region_mapping = {
@@ -0,0 +1,311 @@
+"""
+Content-addressed cache for AI completions.
+
+Re-processing a case used to send the model the same prompt it had already
+answered whenever none of the case's text had changed. Completions are now
+stored in the ai_response_cache table under a sha256 of
+
+    (namespace, template version, model, sampling parameters, normalized prompt)
+
+so an identical request is answered from the table. Whitespace is collapsed
+before hashing, so reformatting a judgement does not count as a change.
+
+Invalidation:
+- Editing a prompt changes the hash, so old entries simply stop matching.
+- Each namespace has a template version in TEMPLATE_VERSIONS that is part
+  of the hash; bump it when the meaning of a response changes without the
+  prompt text changing (e.g. new parsing). ``migrate_ai_response_cache.py``
+  drops entries of superseded versions and expired ones.
+- Entries expire after settings.ai_cache_ttl_days (0 keeps them forever).
+
+Hits are counted in memory and added to hit_count / last_hit_at by a
+background thread every settings.ai_cache_hit_flush_seconds (and at exit),
+so a lookup is a read only.
+
+Cache failures never fail the caller: a lookup error is a miss and a write
+error is logged and dropped. Statements run on the table directly (no ORM
+session), so the batch scripts can use the cache without loading every model.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, String, column, delete, func, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from database import engine
+from models.ai_response_cache import AIResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Namespace (call site) -> current prompt template version
+TEMPLATE_VERSIONS = {
+    "case_analysis": "1",       # AICaseAnalysisService, on-demand analysis, process_all_cases.py
+    "case_reanalysis": "2.0",   # reanalyze_all_cases.py
+    "banking_summary": "2.0",   # BankingSummaryService
+    "case_summary": "1",        # AIService.generate_case_summary
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Entries per hit count UPDATE statement
+HIT_FLUSH_BATCH_SIZE = 1000
+
+cache_table = AIResponseCache.__table__
+
+
+def normalize_content(text: Optional[str]) -> str:
+    """Collapse whitespace so formatting-only edits hash the same"""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def _live(now: datetime):
+    return or_(cache_table.c.expires_at.is_(None), cache_table.c.expires_at > now)
+
+
+class CompletionCache:
+    """Persistent completion cache with per-namespace hit/miss counters"""
+
+    def __init__(self, ttl_days: int = 180, enabled: bool = True, hit_flush_seconds: float = 30.0):
+        self.ttl_days = ttl_days
+        self.enabled = enabled
+        self.hit_flush_seconds = hit_flush_seconds
+        # namespace -> hits, misses, writes since process start
+        self._counters: Dict[str, Dict[str, int]] = {}
+        # cache key -> hits, last hit not yet written to the table
+        self._pending_hits: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _count(self, namespace: str, counter: str, amount: int = 1) -> None:
+        if not amount:
+            return
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0, "writes": 0})
+            counters[counter] += amount
+
+    @staticmethod
+    def make_key(namespace: str, template_version: str, model: str, messages: List[Dict[str, str]],
+                 max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> str:
+        """Hash of everything that determines a completion"""
+        normalized = [(message.get("role"), normalize_content(message.get("content"))) for message in messages]
+        material = json.dumps(
+            [namespace, template_version, model, max_tokens, temperature, normalized],
+            ensure_ascii=False, separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up several keys in one query.
+
+        Returns:
+            dict: cache key -> stored completion, for the keys that hit
+        """
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled or not keys:
+            return {}
+
+        now = datetime.utcnow()
+        try:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(cache_table.c.cache_key, cache_table.c.response)
+                    .where(cache_table.c.cache_key.in_(keys), _live(now))
+                )
+                found = {row.cache_key: row.response for row in rows}
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {e}")
+            found = {}
+
+        self._record_hits(found, now)
+        self._count(namespace, "hits", len(found))
+        self._count(namespace, "misses", len(keys) - len(found))
+        return found
+
+    def _record_hits(self, keys: Iterable[str], now: datetime) -> None:
+        with self._lock:
+            for key in keys:
+                hits, _ = self._pending_hits.get(key, (0, now))
+                self._pending_hits[key] = (hits + 1, now)
+            pending = bool(self._pending_hits)
+        if pending:
+            self.start()
+
+    def flush_hits(self) -> int:
+        """
+        Add pending hits to the stored entries.
+
+        Returns:
+            int: Number of entries updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending_hits = self._pending_hits, {}
+            if not pending:
+                return 0
+
+            # Sorted keys keep lock order consistent across processes
+            rows = [(key, hits, last_hit_at) for key, (hits, last_hit_at) in sorted(pending.items())]
+            try:
+                with engine.begin() as conn:
+                    for start in range(0, len(rows), HIT_FLUSH_BATCH_SIZE):
+                        hits = values(
+                            column("cache_key", String),
+                            column("hits", Integer),
+                            column("last_hit_at", DateTime),
+                            name="hits"
+                        ).data(rows[start:start + HIT_FLUSH_BATCH_SIZE])
+                        conn.execute(
+                            update(cache_table)
+                            .where(cache_table.c.cache_key == hits.c.cache_key)
+                            .values(hit_count=cache_table.c.hit_count + hits.c.hits, last_hit_at=hits.c.last_hit_at)
+                        )
+            except Exception as e:
+                logger.warning(f"AI response cache hit count flush failed: {e}")
+                return 0
+            return len(rows)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.hit_flush_seconds):
+            self.flush_hits()
+
+    def start(self) -> None:
+        """Start the background hit count flush (started by the first hit; batch scripts flush at exit)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="ai-cache-hit-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever hits are still pending"""
+        self._stopping.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.hit_flush_seconds + 5)
+            atexit.unregister(self.stop)
+        self.flush_hits()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def put(self, namespace: str, key: str, template_version: str, model: str, response: str) -> None:
+        """Store a completion, replacing any expired entry under the same key"""
+        if not self.enabled or not response or not response.strip():
+            return
+
+        now = datetime.utcnow()
+        values = {
+            "cache_key": key,
+            "namespace": namespace,
+            "template_version": template_version,
+            "model": model,
+            "response": response,
+            "hit_count": 0,
+            "last_hit_at": None,
+            "created_at": now,
+            "expires_at": now + timedelta(days=self.ttl_days) if self.ttl_days else None,
+        }
+        statement = insert(cache_table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[cache_table.c.cache_key],
+            set_={column: statement.excluded[column] for column in values if column != "cache_key"}
+        )
+        try:
+            with engine.begin() as conn:
+                conn.execute(statement)
+            self._count(namespace, "writes")
+        except Exception as e:
+            logger.warning(f"AI response cache write failed: {e}")
+
+    def complete(self, client, namespace: str, template_version: str, model: str,
+                 messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        """
+        Chat completion through the cache.
+
+        Args:
+            client: openai.OpenAI client, only called on a miss
+            namespace: Call site name, for metrics and invalidation
+            template_version: The call site's prompt template version
+
+        Returns:
+            str: Completion text (cached or fresh)
+        """
+        key = self.make_key(namespace, template_version, model, messages, max_tokens, temperature)
+        cached = self.get(namespace, key)
+        if cached is not None:
+            return cached
+
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        content = response.choices[0].message.content or ""
+        self.put(namespace, key, template_version, model, content)
+        return content
+
+    def invalidate(self, namespace: str, keep_version: Optional[str] = None) -> int:
+        """
+        Delete a namespace's entries, or only those not at keep_version.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        statement = delete(cache_table).where(cache_table.c.namespace == namespace)
+        if keep_version is not None:
+            statement = statement.where(cache_table.c.template_version != keep_version)
+        with engine.begin() as conn:
+            return conn.execute(statement).rowcount
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns the number deleted"""
+        with engine.begin() as conn:
+            return conn.execute(
+                delete(cache_table).where(cache_table.c.expires_at <= datetime.utcnow())
+            ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-namespace counters for this process plus stored entry totals"""
+        with self._lock:
+            counters = {namespace: dict(counts) for namespace, counts in self._counters.items()}
+        for counts in counters.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+
+        stored = {}
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    select(
+                        cache_table.c.namespace,
+                        func.count(cache_table.c.id),
+                        func.coalesce(func.sum(cache_table.c.hit_count), 0)
+                    ).where(_live(datetime.utcnow())).group_by(cache_table.c.namespace)
+                ).all()
+            stored = {namespace: {"entries": entries, "total_hits": int(hits)} for namespace, entries, hits in rows}
+        except Exception as e:
+            logger.warning(f"AI response cache stats unavailable: {e}")
+
+        return {"enabled": self.enabled, "ttl_days": self.ttl_days, "process": counters, "stored": stored}
+
+
+completion_cache = CompletionCache(
+    ttl_days=settings.ai_cache_ttl_days,
+    enabled=settings.ai_cache_enabled,
+    hit_flush_seconds=settings.ai_cache_hit_flush_seconds
+)
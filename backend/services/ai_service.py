@@ -1,10 +1,16 @@
 from openai import OpenAI
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
 import re
 from sqlalchemy.orm import Session
 from models.settings import Settings
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+from services.packed_prompts import run_packed
+
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+SUMMARY_CACHE_NAMESPACE = "case_summary"
+SUMMARY_TEMPLATE_VERSION = TEMPLATE_VERSIONS[SUMMARY_CACHE_NAMESPACE]
 
 # Initialize OpenAI client with error handling
 def get_openai_client(db: Session = None):
@@ -82,18 +88,20 @@ class AIService:
             """
             
             client = get_openai_client(db)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            ai_content = completion_cache.complete(
+                client,
+                SUMMARY_CACHE_NAMESPACE,
+                SUMMARY_TEMPLATE_VERSION,
+                "gpt-3.5-turbo",
+                [
                     {"role": "system", "content": "You are a legal AI assistant specializing in case analysis and legal document summarization."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=2000,
                 temperature=0.3
-            )
+            ).strip()
             
             # Parse the AI response
-            ai_content = response.choices[0].message.content.strip()
             
             # Try to extract JSON from the response
             try:
@@ -244,13 +252,7 @@ class AIService:
         Generate relevant legal keywords and phrases for the case
         """
         try:
-            context = f"""
-            Case Title: {case_data.get('title', '')}
-            Area of Law: {case_data.get('area_of_law', '')}
-            Court Type: {case_data.get('court_type', '')}
-            Case Summary: {case_data.get('case_summary', '')}
-            Judgement: {case_data.get('judgement', '')}
-            """
+            context = AIService._keywords_context(case_data)
             
             prompt = f"""
             Generate relevant legal keywords and phrases for this case:
@@ -285,3 +287,58 @@ class AIService:
         except Exception as e:
             print(f"Error generating keywords: {str(e)}")
             return case_data.get('keywords_phrases', '')
+
+    @staticmethod
+    def _keywords_context(case_data: Dict[str, Any]) -> str:
+        """The case fields keyword generation is based on"""
+        return f"""
+            Case Title: {case_data.get('title', '')}
+            Area of Law: {case_data.get('area_of_law', '')}
+            Court Type: {case_data.get('court_type', '')}
+            Case Summary: {case_data.get('case_summary', '')}
+            Judgement: {case_data.get('judgement', '')}
+            """
+
+    @staticmethod
+    def generate_legal_keywords_batch(cases: List[Dict[str, Any]], db: Session = None, pack_size: int = 10) -> Dict[int, str]:
+        """
+        Generate legal keywords for several cases, pack_size cases per request
+        
+        Cases whose packed answer is missing or invalid fall back to
+        generate_legal_keywords one at a time.
+        
+        Returns:
+            dict: case id -> comma-separated keywords
+        """
+        by_id = {case['id']: case for case in cases if case.get('id')}
+        if not by_id:
+            return {}
+        
+        def clean(value):
+            if isinstance(value, list):
+                value = ", ".join(str(keyword).strip() for keyword in value if str(keyword).strip())
+            return value.strip() if isinstance(value, str) and value.strip() else None
+        
+        try:
+            client = get_openai_client(db)
+        except Exception as e:
+            print(f"Error generating keywords: {str(e)}")
+            return {case_id: case.get('keywords_phrases', '') for case_id, case in by_id.items()}
+        
+        return run_packed(
+            client,
+            "gpt-3.5-turbo",
+            [(case_id, AIService._keywords_context(case)) for case_id, case in by_id.items()],
+            instruction="""Generate relevant legal keywords and phrases for each of the following cases: legal concepts,
+relevant statutes, court procedures, legal principles, case types and jurisdictional terms.
+Focus on terms that would be useful for legal research and case categorization.""",
+            answer_field="keywords",
+            answer_description="comma-separated keywords and phrases",
+            validate=clean,
+            single=lambda case_id, _: AIService.generate_legal_keywords(by_id[case_id], db),
+            system_prompt="You are a legal research assistant specializing in keyword generation for case law.",
+            pack_size=pack_size,
+            excerpt_tokens=600,
+            answer_tokens=120,
+            temperature=0.3
+        )
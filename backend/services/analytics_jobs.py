@@ -0,0 +1,310 @@
+"""
+Durable queue for analytics regeneration.
+
+Regenerating analytics for every person used to run inside the API process:
+/regenerate-all handed a generator bound to the request's (soon closed)
+session to BackgroundTasks, and /regenerate-missing ran the whole loop
+inside the HTTP request. Regenerations are now queued in Postgres and run
+by a separate worker (analytics_worker.py):
+
+- enqueue_job records an AnalyticsJob and inserts one AnalyticsTask per
+  person with a single INSERT ... SELECT. A person is queued at most once
+  per job, and regenerating a person's analytics is idempotent, so a task
+  that runs twice (after a crash or a stale lock) is harmless.
+- AnalyticsWorker claims pending tasks with FOR UPDATE SKIP LOCKED, so any
+  number of worker processes share the queue without blocking each other
+  or taking the same task. Failed tasks are retried with backoff up to
+  settings.analytics_task_max_attempts; tasks locked by a worker that died
+  are released after settings.analytics_task_lock_timeout_minutes.
+- job_progress counts a job's tasks by status for the status endpoints.
+
+Between queued tasks the worker also keeps analytics current incrementally
+(services/incremental_analytics.py), recomputing only the entities that
+case, gazette and people changes affect.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, engine
+from models.analytics_job import AnalyticsJob, AnalyticsTask
+from models.people import People
+from models.person_analytics import PersonAnalytics
+from services.incremental_analytics import IncrementalAnalytics
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("regenerate_all", "regenerate_missing", "people")
+FINISHED_TASK_STATUSES = ("done", "failed", "cancelled")
+RETRY_BASE_SECONDS = 30
+
+jobs_table = AnalyticsJob.__table__
+tasks_table = AnalyticsTask.__table__
+
+
+def enqueue_job(db: Session, kind: str, person_ids: Optional[Iterable[int]] = None,
+                requested_by: Optional[str] = None) -> AnalyticsJob:
+    """
+    Queue an analytics regeneration.
+
+    Args:
+        kind: regenerate_all (every person), regenerate_missing (people
+              without analytics) or people (the given person_ids)
+        person_ids: People to regenerate, for kind "people"
+
+    Returns:
+        AnalyticsJob: The committed job (completed at once if it has no tasks)
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown analytics job kind: {kind}")
+
+    job = AnalyticsJob(kind=kind, status="queued", requested_by=requested_by)
+    db.add(job)
+    db.flush()
+
+    people = select(literal(job.id), People.id)
+    if kind == "regenerate_missing":
+        people = people.where(~People.id.in_(select(PersonAnalytics.person_id)))
+    elif kind == "people":
+        people = people.where(People.id.in_(list(person_ids or [])))
+
+    result = db.execute(
+        insert(AnalyticsTask).from_select(["job_id", "person_id"], people.order_by(People.id))
+        .on_conflict_do_nothing(constraint="uq_analytics_tasks_job_person")
+    )
+    job.total_tasks = result.rowcount or 0
+    if not job.total_tasks:
+        job.status = "completed"
+        job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    logger.info(f"Queued analytics job {job.id} ({kind}) with {job.total_tasks} tasks")
+    return job
+
+
+def cancel_job(db: Session, job_id: int) -> int:
+    """Cancel a job's tasks that have not started; returns how many were cancelled"""
+    cancelled = db.execute(
+        update(AnalyticsTask)
+        .where(AnalyticsTask.job_id == job_id, AnalyticsTask.status == "pending")
+        .values(status="cancelled", finished_at=func.now())
+    ).rowcount
+    db.query(AnalyticsJob).filter(
+        AnalyticsJob.id == job_id, AnalyticsJob.status.in_(("queued", "running"))
+    ).update({"status": "cancelled", "finished_at": func.now()}, synchronize_session=False)
+    db.commit()
+    return cancelled
+
+
+def job_progress(db: Session, job: AnalyticsJob, error_limit: int = 10) -> Dict[str, Any]:
+    """Status, per-status task counts, completion rate and recent errors of a job"""
+    counts = dict(
+        db.query(AnalyticsTask.status, func.count(AnalyticsTask.id))
+        .filter(AnalyticsTask.job_id == job.id)
+        .group_by(AnalyticsTask.status)
+        .all()
+    )
+    finished = sum(counts.get(status, 0) for status in FINISHED_TASK_STATUSES)
+    progress = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "requested_by": job.requested_by,
+        "total_tasks": job.total_tasks,
+        "tasks": {status: counts.get(status, 0) for status in ("pending", "running") + FINISHED_TASK_STATUSES},
+        "completion_percentage": round(finished / job.total_tasks * 100, 2) if job.total_tasks else 100.0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+    if job.started_at and finished:
+        # Job timestamps are database time
+        now = job.finished_at or db.execute(select(func.localtimestamp())).scalar()
+        elapsed = (now - job.started_at).total_seconds()
+        if elapsed > 0:
+            progress["tasks_per_minute"] = round(finished / elapsed * 60, 1)
+            if job.status == "running":
+                progress["estimated_seconds_remaining"] = round((job.total_tasks - finished) / finished * elapsed)
+
+    if counts.get("failed"):
+        progress["recent_errors"] = [
+            {"person_id": person_id, "attempts": attempts, "error": error}
+            for person_id, attempts, error in db.query(
+                AnalyticsTask.person_id, AnalyticsTask.attempts, AnalyticsTask.last_error
+            ).filter(
+                AnalyticsTask.job_id == job.id, AnalyticsTask.status == "failed"
+            ).order_by(AnalyticsTask.finished_at.desc()).limit(error_limit).all()
+        ]
+    return progress
+
+
+class AnalyticsWorker:
+    """Claims and runs queued analytics tasks, then incremental recomputations; run one per process"""
+
+    def __init__(self, worker_id: str, batch_size: int = 10, max_attempts: Optional[int] = None,
+                 lock_timeout_minutes: Optional[int] = None):
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts or settings.analytics_task_max_attempts
+        self.lock_timeout = timedelta(minutes=lock_timeout_minutes or settings.analytics_task_lock_timeout_minutes)
+        self.stopping = False
+        self.stats = {"done": 0, "failed": 0, "retried": 0}
+        self.incremental = IncrementalAnalytics(worker_id, batch_size=batch_size, max_attempts=max_attempts,
+                                                lock_timeout_minutes=lock_timeout_minutes)
+
+    def claim(self) -> List[Any]:
+        """Lock up to batch_size pending tasks for this worker (skipping tasks other workers hold)"""
+        candidates = select(tasks_table.c.id).where(
+            tasks_table.c.status == "pending",
+            tasks_table.c.available_at <= func.now()
+        ).order_by(tasks_table.c.id).limit(self.batch_size).with_for_update(skip_locked=True)
+
+        with engine.begin() as conn:
+            tasks = conn.execute(
+                update(tasks_table)
+                .where(tasks_table.c.id.in_(candidates))
+                .values(
+                    status="running",
+                    locked_by=self.worker_id,
+                    locked_at=func.now(),
+                    attempts=tasks_table.c.attempts + 1
+                )
+                .returning(tasks_table.c.id, tasks_table.c.job_id, tasks_table.c.person_id, tasks_table.c.attempts)
+            ).all()
+            if tasks:
+                conn.execute(
+                    update(jobs_table)
+                    .where(jobs_table.c.id.in_({task.job_id for task in tasks}), jobs_table.c.status == "queued")
+                    .values(status="running", started_at=func.now())
+                )
+        return sorted(tasks, key=lambda task: task.id)
+
+    def run_task(self, task) -> None:
+        """Regenerate one person's analytics and record the outcome"""
+        # Imported here so the worker module loads without the analytics stack until it runs
+        from services.auto_analytics_generator import AutoAnalyticsGenerator
+
+        db = SessionLocal()
+        try:
+            AutoAnalyticsGenerator(db).generate_analytics_for_person(task.person_id)
+            outcome = {"status": "done", "last_error": None, "finished_at": func.now()}
+            self.stats["done"] += 1
+        except Exception as e:
+            db.rollback()
+            # A missing person will not appear on retry
+            permanent = isinstance(e, ValueError)
+            if permanent or task.attempts >= self.max_attempts:
+                outcome = {"status": "failed", "last_error": str(e)[:2000], "finished_at": func.now()}
+                self.stats["failed"] += 1
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (task.attempts - 1)
+                outcome = {
+                    "status": "pending",
+                    "last_error": str(e)[:2000],
+                    "available_at": func.now() + timedelta(seconds=delay)
+                }
+                self.stats["retried"] += 1
+            logger.warning(f"Analytics task {task.id} (person {task.person_id}) attempt {task.attempts} failed: {e}")
+        finally:
+            db.close()
+
+        with engine.begin() as conn:
+            conn.execute(
+                update(tasks_table)
+                .where(tasks_table.c.id == task.id, tasks_table.c.locked_by == self.worker_id)
+                .values(locked_by=None, locked_at=None, **outcome)
+            )
+
+    def finish_jobs(self, job_ids: Iterable[int]) -> None:
+        """Mark jobs completed once none of their tasks is pending or running"""
+        unfinished = exists().where(
+            tasks_table.c.job_id == jobs_table.c.id,
+            tasks_table.c.status.in_(("pending", "running"))
+        )
+        with engine.begin() as conn:
+            conn.execute(
+                update(jobs_table)
+                .where(jobs_table.c.id.in_(list(job_ids)), jobs_table.c.status == "running", ~unfinished)
+                .values(status="completed", finished_at=func.now())
+            )
+
+    def release_stale(self) -> int:
+        """Return tasks locked longer than the lock timeout (their worker died) to the queue"""
+        with engine.begin() as conn:
+            released = conn.execute(
+                update(tasks_table)
+                .where(
+                    tasks_table.c.status == "running",
+                    tasks_table.c.locked_at < func.now() - self.lock_timeout
+                )
+                .values(status="pending", locked_by=None, locked_at=None, available_at=func.now())
+            ).rowcount
+        released += self.incremental.release_stale()
+        if released:
+            logger.warning(f"Released {released} analytics tasks and dirty entities with stale locks")
+        return released
+
+    def run_incremental(self) -> bool:
+        """Resolve pending changes and recompute one batch of dirty entities; returns whether there was work"""
+        changes = self.incremental.mark_dirty()
+        targets = self.incremental.claim()
+        for index, target in enumerate(targets):
+            if self.stopping:
+                self.incremental.release(targets[index:])
+                break
+            self.incremental.recompute(target)
+        return bool(changes or targets)
+
+    def run(self, poll_seconds: float = 5.0, once: bool = False) -> Dict[str, int]:
+        """
+        Work the queue until stopped (or, with once, until nothing is claimable).
+
+        Queued regenerations come first; incremental work runs while the queue is empty.
+
+        Returns:
+            dict: done, failed and retried task counts, and the incremental counts
+        """
+        logger.info(f"Analytics worker {self.worker_id} started")
+        last_stale_check = 0.0
+        while not self.stopping:
+            if time.monotonic() - last_stale_check > 60:
+                self.release_stale()
+                self.incremental.purge_processed()
+                last_stale_check = time.monotonic()
+
+            tasks = self.claim()
+            if not tasks:
+                if self.run_incremental():
+                    continue
+                if once:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            for index, task in enumerate(tasks):
+                if self.stopping:
+                    # Hand unstarted tasks back rather than waiting for their locks to go stale
+                    self._release(tasks[index:])
+                    break
+                self.run_task(task)
+            self.finish_jobs({task.job_id for task in tasks})
+
+        stats = {**self.stats, **self.incremental.stats}
+        logger.info(f"Analytics worker {self.worker_id} stopped: {stats}")
+        return stats
+
+    def _release(self, tasks: List[Any]) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                update(tasks_table)
+                .where(tasks_table.c.id.in_([task.id for task in tasks]), tasks_table.c.locked_by == self.worker_id)
+                .values(status="pending", locked_by=None, locked_at=None, attempts=tasks_table.c.attempts - 1)
+            )
@@ -5,15 +5,23 @@ from typing import Dict, List, Any, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, func, desc, asc, select
 from models.people import People
 from models.reported_cases import ReportedCases
 from models.person_analytics import PersonAnalytics
 from models.person_case_statistics import PersonCaseStatistics
 from models.gazette import Gazette
+from services.case_party_index import party_case_ids
+from services.corpus_iterator import Checkpoint, iter_rows
+from services.keyword_scanner import matched, scanner
 import json
 import logging
 
+# Case fields the keyword analyses read
+CASE_TEXT_FIELDS = ('title', 'antagonist', 'protagonist', 'decision')
+
+FINANCIAL_KEYWORDS = ['damages', 'compensation', 'fine', 'penalty', 'costs', 'fees', 'restitution', 'recovery']
+
 class AutoAnalyticsGenerator:
     def __init__(self, db: Session):
         self.db = db
@@ -45,6 +53,10 @@ class AutoAnalyticsGenerator:
             'Constitutional': ['constitution', 'human rights', 'fundamental rights', 'election', 'constitutional'],
             'Administrative': ['administrative', 'public body', 'government', 'permit', 'license', 'administrative']
         }
+        
+        scanner.register_categories(self.risk_keywords)
+        scanner.register_categories(self.subject_categories)
+        scanner.register(FINANCIAL_KEYWORDS)
 
     def generate_analytics_for_person(self, person_id: int) -> Dict[str, Any]:
         """Generate comprehensive analytics for a person based on their cases"""
@@ -84,28 +96,14 @@ class AutoAnalyticsGenerator:
         if not person:
             return []
         
-        # Search in case titles, parties, and other relevant fields
-        search_terms = [person.full_name]
-        if person.first_name and person.last_name:
-            search_terms.extend([person.first_name, person.last_name])
-        
-        cases = []
-        for term in search_terms:
-            if term:
-                case_results = self.db.query(ReportedCases).filter(
-                    or_(
-                        ReportedCases.title.ilike(f"%{term}%"),
-                        ReportedCases.antagonist.ilike(f"%{term}%"),
-                        ReportedCases.protagonist.ilike(f"%{term}%"),
-                        ReportedCases.presiding_judge.ilike(f"%{term}%"),
-                        ReportedCases.decision.ilike(f"%{term}%")
-                    )
-                ).all()
-                cases.extend(case_results)
-        
-        # Remove duplicates
-        unique_cases = list({case.id: case for case in cases}.values())
-        return unique_cases
+        # Case titles, parties and judges naming the person, or resolved to their record
+        return self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
+            ReportedCases.id.in_(party_case_ids(
+                [person.full_name or ""],
+                roles=("title", "protagonist", "antagonist", "judge"),
+                entity=("people", person.id)
+            ))
+        ).all()
 
     def calculate_comprehensive_analytics(self, person: People, cases: List[ReportedCases]) -> Dict[str, Any]:
         """Calculate comprehensive analytics for a person"""
@@ -163,14 +161,14 @@ class AutoAnalyticsGenerator:
         risk_factors = []
         
         for case in cases:
-            case_text = f"{case.title or ''} {case.antagonist or ''} {case.protagonist or ''} {case.decision or ''}".lower()
+            found = scanner.case_hits(case, CASE_TEXT_FIELDS)
             
             for category, data in self.risk_keywords.items():
-                for keyword in data['keywords']:
-                    if keyword in case_text:
-                        total_score += data['weight']
-                        if category not in risk_factors:
-                            risk_factors.append(category)
+                hits = len(matched(found, data['keywords']))
+                if hits:
+                    total_score += data['weight'] * hits
+                    if category not in risk_factors:
+                        risk_factors.append(category)
         
         # Normalize score to 0-100
         max_possible_score = len(cases) * 10  # Assuming max weight is 10
@@ -217,11 +215,9 @@ class AutoAnalyticsGenerator:
                         continue
             
             # Extract financial terms
-            financial_keywords = ['damages', 'compensation', 'fine', 'penalty', 'costs', 'fees', 'restitution', 'recovery']
-            for keyword in financial_keywords:
-                if keyword.lower() in case_text.lower():
-                    if keyword not in financial_terms:
-                        financial_terms.append(keyword)
+            for keyword in matched(scanner.case_hits(case, CASE_TEXT_FIELDS), FINANCIAL_KEYWORDS):
+                if keyword not in financial_terms:
+                    financial_terms.append(keyword)
         
         average_value = total_amount / len(cases) if cases else Decimal('0.00')
         return total_amount, average_value, financial_terms
@@ -232,21 +228,18 @@ class AutoAnalyticsGenerator:
         legal_issues = []
         
         for case in cases:
-            case_text = f"{case.title or ''} {case.antagonist or ''} {case.protagonist or ''} {case.decision or ''}".lower()
+            found = scanner.case_hits(case, CASE_TEXT_FIELDS)
             
             for category, keywords in self.subject_categories.items():
-                score = 0
-                for keyword in keywords:
-                    if keyword in case_text:
-                        score += 1
+                score = len(matched(found, keywords))
                 
                 if score > 0:
                     category_scores[category] = category_scores.get(category, 0) + score
                     
                     # Extract specific legal issues
-                    if category == 'Criminal' and any(k in case_text for k in ['murder', 'theft', 'assault']):
+                    if category == 'Criminal' and matched(found, ['murder', 'theft', 'assault']):
                         legal_issues.extend(['Criminal Offense', 'Legal Violation'])
-                    elif category == 'Fraud' and any(k in case_text for k in ['fraud', 'deception']):
+                    elif category == 'Fraud' and matched(found, ['fraud', 'deception']):
                         legal_issues.extend(['Fraud', 'Deception'])
                     elif category == 'Contract Dispute':
                         legal_issues.extend(['Contract Breach', 'Commercial Dispute'])
@@ -445,18 +438,24 @@ class AutoAnalyticsGenerator:
             logging.error(f"Error generating analytics for gazette person {gazette_id}: {str(e)}")
             raise
 
-    def regenerate_all_analytics(self) -> Dict[str, Any]:
-        """Regenerate analytics for all people in the database"""
+    def regenerate_all_analytics(self, checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """Regenerate analytics for all people in the database, streaming ids (resumable with checkpoint_path)"""
         try:
-            people = self.db.query(People).all()
+            people = iter_rows(
+                select(People.id),
+                People.id,
+                bind=self.db.get_bind(),
+                checkpoint=Checkpoint(checkpoint_path)
+            )
             results = {
-                'total_people': len(people),
+                'total_people': 0,
                 'successful': 0,
                 'failed': 0,
                 'errors': []
             }
             
             for person in people:
+                results['total_people'] += 1
                 try:
                     self.generate_analytics_for_person(person.id)
                     results['successful'] += 1
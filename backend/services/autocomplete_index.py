@@ -0,0 +1,590 @@
+"""
+Memory-resident prefix index for typeahead suggestions.
+
+Serves /api/search/quick and /api/case-search/suggestions without touching
+the database. Each entry (a person, bank, insurance company, company, gazette
+entry, case title or case party) is stored under a normalized key for each of
+its first few word starts, so "men" finds "Kwame Mensah". Keys live in
+sorted lists and a lookup is a few binary searches followed by a top-k
+selection on popularity (search_count, or number of cases for a party name).
+
+The index is loaded from the database in a background thread at startup,
+kept current by the create/update/delete routes through `refresh_entity`,
+`remove_entity`, `refresh_case` and `remove_case`, and rebuilt every
+`settings.autocomplete_rebuild_minutes` to pick up bulk imports and
+background jobs that write directly to the tables. Until the first build
+completes, `is_ready()` is False and callers fall back to their database
+queries.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from config import settings
+from database import SessionLocal
+from models.people import People
+from models.banks import Banks
+from models.insurance import Insurance
+from models.companies import Companies
+from models.gazette import Gazette
+from models.reported_cases import ReportedCases
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+_MAX_CHAR = "\U0010ffff"
+
+# Keys are truncated to this many characters; longer prefixes are verified
+# against the full normalized names
+KEY_LENGTH = 48
+# Only the first few word starts of a name get a key, which keeps long case
+# titles from multiplying the index size
+MAX_WORD_KEYS = 6
+# Completions kept per cached prefix; also the largest supported limit
+MAX_COMPLETIONS = 50
+# Prefixes matching more keys than this have their top completions cached
+CACHE_MIN_MATCHES = 256
+CACHE_MAX_PREFIXES = 4096
+# Added pairs are merged into the main array once there are this many, or
+# 1/MERGE_FRACTION of the main array's size if that is more
+MERGE_THRESHOLD = 4096
+MERGE_FRACTION = 256
+
+# Rows fetched per round trip while building
+BUILD_BATCH_SIZE = 5000
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase `text` and collapse punctuation and whitespace to single spaces"""
+    if not text:
+        return ""
+    return " ".join(_TOKEN.findall(text.lower()))
+
+
+class _Entry:
+    __slots__ = ("keys", "weight", "payload", "text")
+
+    def __init__(self, names: Iterable[Optional[str]], weight: int, payload: Any):
+        normalized = []
+        keys = set()
+        for name in names:
+            name = normalize(name)
+            if not name or name in normalized:
+                continue
+            normalized.append(name)
+            starts = [0] + [i + 1 for i, char in enumerate(name) if char == " "]
+            for start in starts[:MAX_WORD_KEYS]:
+                keys.add(name[start:start + KEY_LENGTH])
+        self.keys = tuple(keys)
+        self.weight = weight or 0
+        self.payload = payload
+        self.text = "\n".join(" " + name for name in normalized)
+
+    def matches(self, prefix: str) -> bool:
+        return (" " + prefix) in self.text
+
+
+class PrefixIndex:
+    """
+    Sorted arrays of (key, entry id) pairs answering top-k prefix completions.
+
+    `load` builds the main array. Later writes insert into a small array of
+    added pairs, which a background thread merges into the main one once it
+    outgrows MERGE_THRESHOLD (or 1/MERGE_FRACTION of the main array). Arrays
+    are replaced, never modified, so a lookup scans a snapshot of them
+    outside the lock. Pairs of replaced or removed entries are skipped by
+    lookups and dropped by the next `load`.
+
+    The top completions of prefixes matching many keys are cached. A write
+    updates the cached lists of its entry's prefixes in place, and lookups
+    that were scanning while it happened apply it before caching.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, Hashable]] = []
+        self._merging_keys: List[Tuple[str, Hashable]] = []  # Added pairs being merged into _keys
+        self._added: List[Tuple[str, Hashable]] = []
+        self._entries: Dict[Hashable, _Entry] = {}
+        # prefix -> [(-weight, entry id)] of its top completions, best first
+        self._top: Dict[str, List[Tuple[int, Hashable]]] = {}
+        # Lookups scanning right now: token -> (prefix, entry ids written meanwhile)
+        self._scans: Dict[object, Tuple[str, set]] = {}
+        self._generation = 0  # Bumped by load, so a merge of replaced arrays is discarded
+        self._merging = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, entries: Iterable[Tuple[Hashable, Iterable[Optional[str]], int, Any]]):
+        """Replace the contents with (entry id, names, weight, payload) tuples"""
+        table = {}
+        for entry_id, names, weight, payload in entries:
+            entry = _Entry(names, weight, payload)
+            if entry.keys:
+                table[entry_id] = entry
+        keys = [(key, entry_id) for entry_id, entry in table.items() for key in entry.keys]
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._merging_keys = []
+            self._added = []
+            self._entries = table
+            self._top = {}
+            self._generation += 1
+            for _, written in self._scans.values():
+                written.add(None)  # Scans of the old contents are not cached
+
+    def add(self, entry_id: Hashable, names: Iterable[Optional[str]], weight: int, payload: Any):
+        """Insert or replace a single entry"""
+        entry = _Entry(names, weight, payload)
+        with self._lock:
+            previous = self._entries.pop(entry_id, None)
+            if entry.keys:
+                self._entries[entry_id] = entry
+                # Pairs of keys the entry already had are still in the arrays
+                fresh = sorted((key, entry_id) for key in entry.keys if previous is None or key not in previous.keys)
+                if fresh:
+                    added = self._added.copy()
+                    for pair in fresh:
+                        insort(added, pair)
+                    self._added = added
+            self._written(entry_id, previous, entry if entry.keys else None)
+            threshold = max(MERGE_THRESHOLD, len(self._keys) // MERGE_FRACTION)
+            merge = len(self._added) >= threshold and not self._merging
+            if merge:
+                self._merging = True
+                self._merging_keys, self._added = self._added, []
+        if merge:
+            threading.Thread(target=self._merge, name="autocomplete-merge", daemon=True).start()
+
+    def remove(self, entry_id: Hashable):
+        """Drop an entry if present"""
+        with self._lock:
+            previous = self._entries.pop(entry_id, None)
+            if previous is not None:
+                self._written(entry_id, previous, None)
+
+    def complete(self, text: str, limit: int = 10) -> List[Any]:
+        """
+        Payloads of the most popular entries with a word starting with `text`.
+
+        Args:
+            text: Raw user input
+            limit: Maximum completions (at most MAX_COMPLETIONS)
+
+        Returns:
+            list: Payloads ordered by weight, then entry id
+        """
+        prefix = normalize(text)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            ranked = self._top.get(prefix)
+            if ranked is not None:
+                return [self._entries[entry_id].payload for _, entry_id in ranked[:limit]]
+            arrays = (self._keys, self._merging_keys, self._added)
+            entries = self._entries
+            token = object()
+            self._scans[token] = (prefix, set())
+
+        ranked, matches = [], 0
+        try:
+            ranked, matches = self._rank(prefix, arrays, entries)
+        finally:
+            with self._lock:
+                _, written = self._scans.pop(token)
+                if matches >= CACHE_MIN_MATCHES and len(prefix) <= KEY_LENGTH and None not in written:
+                    self._cache(prefix, ranked, written)
+        payloads = []
+        for _, entry_id in ranked[:limit]:
+            entry = entries.get(entry_id)
+            if entry is not None:
+                payloads.append(entry.payload)
+        return payloads
+
+    @staticmethod
+    def _rank(prefix: str, arrays, entries: Dict[Hashable, _Entry]) -> Tuple[List[Tuple[int, Hashable]], int]:
+        """Top completions of `prefix` in a snapshot of the arrays, and the number of pairs matched"""
+        lookup = prefix[:KEY_LENGTH]
+        candidates: Dict[Hashable, _Entry] = {}
+        matches = 0
+        for keys in arrays:
+            low = bisect_left(keys, (lookup,))
+            high = bisect_left(keys, (lookup + _MAX_CHAR,), low)
+            matches += high - low
+            for i in range(low, high):
+                key, entry_id = keys[i]
+                entry = entries.get(entry_id)
+                # Skip pairs left by a replaced or removed entry
+                if entry is not None and key in entry.keys:
+                    candidates[entry_id] = entry
+        if len(prefix) > KEY_LENGTH:
+            candidates = {entry_id: entry for entry_id, entry in candidates.items() if entry.matches(prefix)}
+
+        ranked = heapq.nsmallest(MAX_COMPLETIONS, ((-entry.weight, entry_id) for entry_id, entry in candidates.items()))
+        return ranked, matches
+
+    def _cache(self, prefix: str, ranked: List[Tuple[int, Hashable]], written: set):
+        """Cache a scanned ranking after applying the writes made during the scan"""
+        for entry_id in written:
+            ranked = self._apply(prefix, ranked, entry_id, self._entries.get(entry_id))
+            if ranked is None:
+                return
+        if len(self._top) >= CACHE_MAX_PREFIXES:
+            self._top.clear()
+        self._top[prefix] = ranked
+
+    def _written(self, entry_id: Hashable, previous: Optional[_Entry], entry: Optional[_Entry]):
+        """Bring cached rankings and running scans up to date with a write (lock held)"""
+        keys = set(previous.keys if previous else ()) | set(entry.keys if entry else ())
+        prefixes = {key[:length] for key in keys for length in range(1, len(key) + 1)}
+        for prefix in prefixes.intersection(self._top):
+            ranked = self._apply(prefix, self._top[prefix], entry_id, entry)
+            if ranked is None:
+                del self._top[prefix]
+            else:
+                self._top[prefix] = ranked
+        for prefix, written in self._scans.values():
+            if prefix[:KEY_LENGTH] in prefixes:
+                written.add(entry_id)
+
+    @staticmethod
+    def _apply(prefix: str, ranked: List[Tuple[int, Hashable]], entry_id: Hashable,
+               entry: Optional[_Entry]) -> Optional[List[Tuple[int, Hashable]]]:
+        """
+        A ranking of `prefix` updated for the entry's new state (None if it
+        no longer matches), or None when only a new scan can fill the ranking.
+        """
+        # A ranking shorter than MAX_COMPLETIONS holds every match
+        full = len(ranked) >= MAX_COMPLETIONS
+        updated = [item for item in ranked if item[1] != entry_id]
+        dropped = len(updated) < len(ranked)
+        # Only prefixes up to KEY_LENGTH are cached, so matching a key is matching the entry
+        if entry is not None and any(key.startswith(prefix) for key in entry.keys):
+            item = (-entry.weight, entry_id)
+            if not full or not updated or item < updated[-1]:
+                insort(updated, item)
+                del updated[MAX_COMPLETIONS:]
+                dropped = False
+        if dropped and full:
+            return None
+        return updated
+
+    def _merge(self):
+        """Merge the added pairs into the main array"""
+        generation = None
+        try:
+            with self._lock:
+                keys, merging, generation = self._keys, self._merging_keys, self._generation
+            # Both are sorted runs, which sorted() merges in linear time
+            merged = sorted(keys + merging)
+            with self._lock:
+                if self._generation == generation:
+                    self._keys = merged
+                    self._merging_keys = []
+        except Exception as e:
+            logger.warning(f"Failed to merge autocomplete index updates: {e}")
+        finally:
+            with self._lock:
+                self._merging = False
+                # Keep pairs of a failed merge searchable
+                if self._merging_keys and self._generation == generation:
+                    self._added = sorted(self._merging_keys + self._added)
+                    self._merging_keys = []
+
+
+def _person_payload(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.full_name,
+        "type": "people",
+        "description": f"{row.risk_level} Risk",
+        "city": row.city,
+        "region": row.region
+    }
+
+
+def _bank_payload(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "type": "banks",
+        "description": f"{row.bank_type}",
+        "city": row.city,
+        "region": row.region,
+        "logo_url": row.logo_url
+    }
+
+
+def _insurance_payload(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "type": "insurance",
+        "description": f"{row.insurance_type}",
+        "city": row.city,
+        "region": row.region,
+        "logo_url": row.logo_url
+    }
+
+
+def _company_payload(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "type": "companies",
+        "description": f"{row.company_type} • {row.industry or 'N/A'}",
+        "city": row.city,
+        "region": row.region,
+        "logo_url": row.logo_url
+    }
+
+
+def _gazette_payload(row) -> Dict[str, Any]:
+    gazette_type = row.gazette_type.replace('_', ' ').title() if row.gazette_type else 'Gazette Entry'
+    return {
+        "id": row.id,
+        "name": row.new_name or row.old_name or row.title,
+        "type": "gazette",
+        "description": f"{gazette_type} • {row.gazette_number or 'N/A'}",
+        "city": row.court_location,
+        "region": row.jurisdiction,
+        "person_id": row.person_id
+    }
+
+
+class _EntitySource:
+    """How one quick-search entity type is loaded and shown"""
+
+    def __init__(self, model, columns, visible: Callable, names: Callable, weight: Callable, payload: Callable):
+        self.model = model
+        self.columns = columns
+        self.visible = visible
+        self.names = names
+        self.weight = weight
+        self.payload = payload
+
+    def entry(self, row) -> Tuple[int, List[Optional[str]], int, Dict[str, Any]]:
+        return row.id, self.names(row), self.weight(row), self.payload(row)
+
+
+# Quick search entity types; visibility mirrors the database queries in routes/search.py
+ENTITY_SOURCES: Dict[str, _EntitySource] = {
+    "people": _EntitySource(
+        People,
+        [People.id, People.full_name, People.previous_names, People.risk_level,
+         People.city, People.region, People.search_count, People.is_verified],
+        visible=lambda row: row.is_verified == True,
+        names=lambda row: [row.full_name] + [name for name in (row.previous_names or []) if isinstance(name, str)],
+        weight=lambda row: row.search_count,
+        payload=_person_payload
+    ),
+    "banks": _EntitySource(
+        Banks,
+        [Banks.id, Banks.name, Banks.short_name, Banks.bank_type, Banks.city,
+         Banks.region, Banks.logo_url, Banks.search_count, Banks.is_active],
+        visible=lambda row: row.is_active == True,
+        names=lambda row: [row.name, row.short_name],
+        weight=lambda row: row.search_count,
+        payload=_bank_payload
+    ),
+    "insurance": _EntitySource(
+        Insurance,
+        [Insurance.id, Insurance.name, Insurance.short_name, Insurance.insurance_type, Insurance.city,
+         Insurance.region, Insurance.logo_url, Insurance.search_count, Insurance.is_active],
+        visible=lambda row: row.is_active == True,
+        names=lambda row: [row.name, row.short_name],
+        weight=lambda row: row.search_count,
+        payload=_insurance_payload
+    ),
+    "companies": _EntitySource(
+        Companies,
+        [Companies.id, Companies.name, Companies.short_name, Companies.company_type, Companies.industry,
+         Companies.city, Companies.region, Companies.logo_url, Companies.search_count, Companies.is_active],
+        visible=lambda row: row.is_active == True,
+        names=lambda row: [row.name, row.short_name],
+        weight=lambda row: row.search_count,
+        payload=_company_payload
+    ),
+    "gazette": _EntitySource(
+        Gazette,
+        [Gazette.id, Gazette.title, Gazette.old_name, Gazette.new_name, Gazette.gazette_type,
+         Gazette.gazette_number, Gazette.court_location, Gazette.jurisdiction, Gazette.person_id,
+         Gazette.is_public],
+        visible=lambda row: row.is_public == True,
+        names=lambda row: [row.old_name, row.new_name],
+        weight=lambda row: 0,
+        payload=_gazette_payload
+    ),
+}
+
+
+class AutocompleteIndex:
+    """Prefix indexes for quick search entities, case titles and case parties"""
+
+    def __init__(self):
+        self.entities: Dict[str, PrefixIndex] = {entity_type: PrefixIndex() for entity_type in ENTITY_SOURCES}
+        self.case_titles = PrefixIndex()
+        self.case_parties = PrefixIndex()
+        self._ready = threading.Event()
+        self._write_lock = threading.Lock()
+        # case id -> normalized party names it contributes, and their display names and counts
+        self._case_parties: Dict[int, Tuple[str, ...]] = {}
+        self._party_counts: Counter = Counter()
+        self._party_names: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    # Lookups
+
+    def complete(self, entity_type: str, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Quick search suggestions for one entity type"""
+        return self.entities[entity_type].complete(text, limit)
+
+    def complete_case_titles(self, text: str, limit: int = 10) -> List[str]:
+        return self.case_titles.complete(text, limit)
+
+    def complete_case_parties(self, text: str, limit: int = 10) -> List[str]:
+        return self.case_parties.complete(text, limit)
+
+    # Incremental updates
+
+    def refresh_entity(self, entity_type: str, obj):
+        """Re-index an entity after it was created or updated"""
+        source = ENTITY_SOURCES[entity_type]
+        try:
+            if source.visible(obj):
+                self.entities[entity_type].add(*source.entry(obj))
+            else:
+                self.entities[entity_type].remove(obj.id)
+        except Exception as e:
+            logger.warning(f"Failed to refresh autocomplete entry for {entity_type} {getattr(obj, 'id', None)}: {e}")
+
+    def remove_entity(self, entity_type: str, entity_id: int):
+        """Drop a deleted entity"""
+        self.entities[entity_type].remove(entity_id)
+
+    def refresh_case(self, case):
+        """Re-index a case's title and party names after it was created or updated"""
+        try:
+            self.case_titles.add(case.id, [case.title], 0, case.title)
+            with self._write_lock:
+                self._set_case_parties(case.id, [case.protagonist, case.antagonist])
+        except Exception as e:
+            logger.warning(f"Failed to refresh autocomplete entries for case {getattr(case, 'id', None)}: {e}")
+
+    def remove_case(self, case_id: int):
+        """Drop a deleted case"""
+        self.case_titles.remove(case_id)
+        with self._write_lock:
+            self._set_case_parties(case_id, [])
+
+    def _set_case_parties(self, case_id: int, names: List[Optional[str]]):
+        previous = self._case_parties.pop(case_id, ())
+        current = []
+        for name in names:
+            key = normalize(name)
+            if key and key not in current:
+                current.append(key)
+                self._party_names.setdefault(key, name.strip())
+        if current:
+            self._case_parties[case_id] = tuple(current)
+
+        for key in set(previous) ^ set(current):
+            self._party_counts[key] += 1 if key in current else -1
+            if self._party_counts[key] > 0:
+                self.case_parties.add(key, [self._party_names[key]], self._party_counts[key], self._party_names[key])
+            else:
+                del self._party_counts[key]
+                self._party_names.pop(key, None)
+                self.case_parties.remove(key)
+
+    # Bulk loading
+
+    def build(self, db) -> Dict[str, int]:
+        """
+        Load every index from the database.
+
+        Returns:
+            dict: Number of entries per index
+        """
+        counts = {}
+        for entity_type, source in ENTITY_SOURCES.items():
+            rows = db.query(*source.columns).yield_per(BUILD_BATCH_SIZE)
+            self.entities[entity_type].load(source.entry(row) for row in rows if source.visible(row))
+            counts[entity_type] = len(self.entities[entity_type])
+
+        titles = []
+        case_parties = {}
+        party_counts = Counter()
+        party_names = {}
+        rows = db.query(
+            ReportedCases.id, ReportedCases.title, ReportedCases.protagonist, ReportedCases.antagonist
+        ).yield_per(BUILD_BATCH_SIZE)
+        for row in rows:
+            if row.title:
+                titles.append((row.id, [row.title], 0, row.title))
+            keys = []
+            for name in (row.protagonist, row.antagonist):
+                key = normalize(name)
+                if key and key not in keys:
+                    keys.append(key)
+                    party_counts[key] += 1
+                    party_names.setdefault(key, name.strip())
+            if keys:
+                case_parties[row.id] = tuple(keys)
+
+        self.case_titles.load(titles)
+        with self._write_lock:
+            self.case_parties.load(
+                (key, [party_names[key]], count, party_names[key]) for key, count in party_counts.items()
+            )
+            self._case_parties = case_parties
+            self._party_counts = party_counts
+            self._party_names = party_names
+
+        counts["case_titles"] = len(self.case_titles)
+        counts["case_parties"] = len(self.case_parties)
+        self._ready.set()
+        return counts
+
+    def rebuild(self):
+        """Build from a short-lived session"""
+        start_time = time.time()
+        db = SessionLocal()
+        try:
+            counts = self.build(db)
+            logger.info(f"Autocomplete index built in {time.time() - start_time:.2f}s: {counts}")
+        except Exception as e:
+            logger.error(f"Failed to build autocomplete index: {e}")
+        finally:
+            db.close()
+
+    def start(self):
+        """Build in a background thread, then rebuild periodically"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="autocomplete-index", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = settings.autocomplete_rebuild_minutes * 60
+        while True:
+            self.rebuild()
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+
+autocomplete_index = AutocompleteIndex()
@@ -9,8 +9,41 @@ from models.banks import Banks
 from models.reported_cases import ReportedCases
 from models.bank_analytics import BankAnalytics
 from models.bank_case_statistics import BankCaseStatistics
+from services.keyword_scanner import matched, scanner
 import json
 
+# Case fields _get_case_text joins, in order
+CASE_TEXT_FIELDS = ('title', 'case_summary', 'headnotes', 'commentary', 'decision', 'judgement', 'conclusion')
+
+FINANCIAL_TERM_KEYWORDS = [
+    'loan', 'credit', 'mortgage', 'deposit', 'withdrawal', 'interest',
+    'principal', 'collateral', 'default', 'foreclosure', 'bankruptcy',
+    'insolvency', 'debt', 'payment', 'installment', 'refinance'
+]
+
+LEGAL_ISSUE_KEYWORDS = [
+    'breach of contract', 'negligence', 'fraud', 'misrepresentation',
+    'violation', 'non-compliance', 'default', 'breach', 'liability',
+    'damages', 'injunction', 'specific performance', 'restitution'
+]
+
+FAVORABLE_INDICATORS = [
+    'granted', 'allowed', 'successful', 'won', 'victory', 'favor',
+    'upheld', 'dismissed', 'withdrawn', 'settled favorably'
+]
+
+UNFAVORABLE_INDICATORS = [
+    'denied', 'rejected', 'failed', 'lost', 'defeat', 'against',
+    'overruled', 'quashed', 'reversed', 'appeal dismissed'
+]
+
+# Indicators counted by the banking-specific metrics
+METRIC_KEYWORDS = {
+    'regulatory': ['regulatory', 'compliance', 'license', 'penalty', 'violation'],
+    'customer': ['customer', 'complaint', 'service', 'account', 'unauthorized'],
+    'operational': ['system', 'failure', 'breach', 'error', 'operational']
+}
+
 class BankAnalyticsService:
     def __init__(self, db: Session):
         self.db = db
@@ -41,6 +74,12 @@ class BankAnalyticsService:
             'Employment': ['employment dispute', 'labor law', 'workplace harassment', 'discrimination'],
             'Property & Assets': ['real estate', 'property management', 'asset recovery', 'foreclosure']
         }
+        
+        scanner.register_categories(self.risk_keywords)
+        scanner.register_categories(self.subject_categories)
+        scanner.register_categories(METRIC_KEYWORDS)
+        scanner.register(FINANCIAL_TERM_KEYWORDS + LEGAL_ISSUE_KEYWORDS + FAVORABLE_INDICATORS + UNFAVORABLE_INDICATORS)
+        scanner.register(['appeal', 'supreme court'])
 
     def calculate_risk_score(self, cases: List[ReportedCases]) -> Tuple[int, str, List[str]]:
         """Calculate risk score based on case analysis for banks"""
@@ -51,20 +90,16 @@ class BankAnalyticsService:
         risk_factors = []
         
         for case in cases:
-            case_text = self._get_case_text(case)
+            found = self._case_keywords(case)
             case_score = 0
             case_risk_factors = []
             
-            # Analyze case content for risk factors
+            # Analyze case content for risk factors (the first keyword found per category)
             for category, data in self.risk_keywords.items():
-                weight = data['weight']
-                keywords = data['keywords']
-                
-                for keyword in keywords:
-                    if keyword.lower() in case_text.lower():
-                        case_score += weight
-                        case_risk_factors.append(f"{category}: {keyword}")
-                        break
+                hits = matched(found, data['keywords'])
+                if hits:
+                    case_score += data['weight']
+                    case_risk_factors.append(f"{category}: {hits[0]}")
             
             total_score += case_score
             risk_factors.extend(case_risk_factors)
@@ -102,7 +137,7 @@ class BankAnalyticsService:
                 total_amount += sum(amounts)
             
             # Extract financial terms
-            financial_terms.extend(self._extract_financial_terms(case_text))
+            financial_terms.extend(self._extract_financial_terms(self._case_keywords(case)))
         
         average_amount = total_amount / len(cases) if cases else Decimal('0.00')
         
@@ -127,16 +162,16 @@ class BankAnalyticsService:
         legal_issues = []
         
         for case in cases:
-            case_text = self._get_case_text(case)
+            found = self._case_keywords(case)
             
             # Count subject matter categories
             for category, keywords in self.subject_categories.items():
-                count = sum(1 for keyword in keywords if keyword.lower() in case_text.lower())
+                count = len(matched(found, keywords))
                 if count > 0:
                     category_counts[category] = category_counts.get(category, 0) + count
             
             # Extract legal issues
-            legal_issues.extend(self._extract_legal_issues(case_text))
+            legal_issues.extend(self._extract_legal_issues(found))
         
         # Determine primary subject matter
         primary_subject = max(category_counts.items(), key=lambda x: x[1])[0] if category_counts else "N/A"
@@ -167,7 +202,8 @@ class BankAnalyticsService:
             case_text = self._get_case_text(case)
             if len(case_text) > 5000:  # Long cases are more complex
                 complexity += 5
-            if 'appeal' in case_text.lower() or 'supreme court' in case_text.lower():
+            found = self._case_keywords(case)
+            if 'appeal' in found or 'supreme court' in found:
                 complexity += 8
             
             total_complexity += complexity
@@ -190,8 +226,7 @@ class BankAnalyticsService:
                 total_resolved += 1
             else:
                 # Analyze case content for outcome indicators
-                case_text = self._get_case_text(case)
-                if self._is_favorable_outcome(case_text):
+                if self._is_favorable_outcome(self._case_keywords(case)):
                     favorable_cases += 1
                 total_resolved += 1
         
@@ -216,25 +251,22 @@ class BankAnalyticsService:
         credit_exposure = Decimal('0.00')
         
         for case in cases:
-            case_text = self._get_case_text(case)
+            found = self._case_keywords(case)
             
             # Regulatory compliance
-            regulatory_keywords = ['regulatory', 'compliance', 'license', 'penalty', 'violation']
-            if any(keyword in case_text.lower() for keyword in regulatory_keywords):
+            if matched(found, METRIC_KEYWORDS['regulatory']):
                 regulatory_issues += 1
             
             # Customer disputes
-            customer_keywords = ['customer', 'complaint', 'service', 'account', 'unauthorized']
-            if any(keyword in case_text.lower() for keyword in customer_keywords):
+            if matched(found, METRIC_KEYWORDS['customer']):
                 customer_disputes += 1
             
             # Operational risk
-            operational_keywords = ['system', 'failure', 'breach', 'error', 'operational']
-            if any(keyword in case_text.lower() for keyword in operational_keywords):
+            if matched(found, METRIC_KEYWORDS['operational']):
                 operational_issues += 1
             
             # Credit risk exposure
-            amounts = self._extract_monetary_amounts(case_text)
+            amounts = self._extract_monetary_amounts(self._get_case_text(case))
             if amounts:
                 credit_exposure += sum(amounts)
         
@@ -329,11 +361,11 @@ class BankAnalyticsService:
                         mixed_cases += 1
                 else:
                     # Analyze case content for outcome
-                    case_text = self._get_case_text(case)
-                    if self._is_favorable_outcome(case_text):
+                    found = self._case_keywords(case)
+                    if self._is_favorable_outcome(found):
                         resolved_cases += 1
                         favorable_cases += 1
-                    elif self._is_unfavorable_outcome(case_text):
+                    elif self._is_unfavorable_outcome(found):
                         resolved_cases += 1
                         unfavorable_cases += 1
                     else:
@@ -400,7 +432,7 @@ class BankAnalyticsService:
         
         # Search for cases where any bank name variation appears
         if conditions:
-            cases = self.db.query(ReportedCases).filter(
+            cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
                 or_(*conditions)
             ).all()
         else:
@@ -429,6 +461,10 @@ class BankAnalyticsService:
         
         return " ".join(text_parts)
 
+    def _case_keywords(self, case: ReportedCases):
+        """Keywords occurring in the text _get_case_text joins (scanned once per case)"""
+        return scanner.case_hits(case, CASE_TEXT_FIELDS)
+
     def _extract_monetary_amounts(self, text: str) -> List[Decimal]:
         """Extract monetary amounts from text"""
         # Simple regex to find monetary amounts
@@ -453,50 +489,18 @@ class BankAnalyticsService:
         
         return amounts
 
-    def _extract_financial_terms(self, text: str) -> List[str]:
-        """Extract financial terms from text"""
-        financial_keywords = [
-            'loan', 'credit', 'mortgage', 'deposit', 'withdrawal', 'interest',
-            'principal', 'collateral', 'default', 'foreclosure', 'bankruptcy',
-            'insolvency', 'debt', 'payment', 'installment', 'refinance'
-        ]
-        
-        terms = []
-        for keyword in financial_keywords:
-            if keyword.lower() in text.lower():
-                terms.append(keyword)
-        
-        return terms
+    def _extract_financial_terms(self, found) -> List[str]:
+        """Extract financial terms from the keywords found in a case"""
+        return matched(found, FINANCIAL_TERM_KEYWORDS)
 
-    def _extract_legal_issues(self, text: str) -> List[str]:
-        """Extract legal issues from text"""
-        legal_keywords = [
-            'breach of contract', 'negligence', 'fraud', 'misrepresentation',
-            'violation', 'non-compliance', 'default', 'breach', 'liability',
-            'damages', 'injunction', 'specific performance', 'restitution'
-        ]
-        
-        issues = []
-        for keyword in legal_keywords:
-            if keyword.lower() in text.lower():
-                issues.append(keyword)
-        
-        return issues
+    def _extract_legal_issues(self, found) -> List[str]:
+        """Extract legal issues from the keywords found in a case"""
+        return matched(found, LEGAL_ISSUE_KEYWORDS)
 
-    def _is_favorable_outcome(self, text: str) -> bool:
-        """Determine if case outcome is favorable"""
-        favorable_indicators = [
-            'granted', 'allowed', 'successful', 'won', 'victory', 'favor',
-            'upheld', 'dismissed', 'withdrawn', 'settled favorably'
-        ]
-        
-        return any(indicator in text.lower() for indicator in favorable_indicators)
+    def _is_favorable_outcome(self, found) -> bool:
+        """Determine if case outcome is favorable (from the keywords found in its text)"""
+        return bool(matched(found, FAVORABLE_INDICATORS))
 
-    def _is_unfavorable_outcome(self, text: str) -> bool:
-        """Determine if case outcome is unfavorable"""
-        unfavorable_indicators = [
-            'denied', 'rejected', 'failed', 'lost', 'defeat', 'against',
-            'overruled', 'quashed', 'reversed', 'appeal dismissed'
-        ]
-        
-        return any(indicator in text.lower() for indicator in unfavorable_indicators)
+    def _is_unfavorable_outcome(self, found) -> bool:
+        """Determine if case outcome is unfavorable (from the keywords found in its text)"""
+        return bool(matched(found, UNFAVORABLE_INDICATORS))
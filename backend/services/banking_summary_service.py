@@ -10,6 +10,11 @@ from sqlalchemy.orm import Session
 from models.reported_cases import ReportedCases
 import openai
 from config import settings
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+BANKING_CACHE_NAMESPACE = "banking_summary"
+BANKING_TEMPLATE_VERSION = TEMPLATE_VERSIONS[BANKING_CACHE_NAMESPACE]
 
 class BankingSummaryService:
     def __init__(self, db: Session):
@@ -99,9 +104,12 @@ class BankingSummaryService:
         """
 
         client = openai.OpenAI(api_key=settings.openai_api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        ai_response = completion_cache.complete(
+            client,
+            BANKING_CACHE_NAMESPACE,
+            BANKING_TEMPLATE_VERSION,
+            "gpt-3.5-turbo",
+            [
                 {"role": "system", "content": "You are a legal analyst specializing in banking and financial law. Analyze legal cases and provide accurate banking summaries."},
                 {"role": "user", "content": prompt}
             ],
@@ -112,7 +120,7 @@ class BankingSummaryService:
         # Parse the JSON response
         import json
         try:
-            ai_data = json.loads(response.choices[0].message.content.strip())
+            ai_data = json.loads(ai_response.strip())
             ai_data['ai_summary_generated_at'] = datetime.now()
             ai_data['ai_summary_version'] = '2.0'
             return ai_data
@@ -0,0 +1,114 @@
+"""
+Shared cache of AI chat case contexts and system prompts.
+
+Every chat turn needs the case's context (the case row, its metadata and
+hearings) and the system prompt built from it. Both only change when the
+case does, so they are cached per case and shared by every session on that
+case. Entries are keyed on the case id plus a version read with one small
+query (the case's and metadata's updated_at, and the hearings' latest change
+and count), so an edit to the case, its metadata or its hearings makes the
+next turn rebuild the entry.
+
+The cache is an in-process LRU bounded both by entry count and by the
+approximate size of the cached text.
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.case_hearings import CaseHearing
+from models.case_metadata import CaseMetadata
+from models.reported_cases import ReportedCases
+
+logger = logging.getLogger(__name__)
+
+
+def case_context_version(db: Session, case_id: int) -> Optional[Tuple]:
+    """
+    Version of everything a case's chat context is built from, or None if the case does not exist.
+    """
+    metadata_updated = select(func.max(CaseMetadata.updated_at)).where(
+        CaseMetadata.case_id == case_id
+    ).scalar_subquery()
+    hearings_updated = select(
+        func.max(func.coalesce(CaseHearing.updated_at, CaseHearing.created_at))
+    ).where(CaseHearing.case_id == case_id).scalar_subquery()
+    hearing_count = select(func.count(CaseHearing.id)).where(CaseHearing.case_id == case_id).scalar_subquery()
+
+    row = db.execute(
+        select(ReportedCases.updated_at, metadata_updated, hearings_updated, hearing_count)
+        .where(ReportedCases.id == case_id)
+    ).first()
+    return tuple(row) if row is not None else None
+
+
+class CaseContextCache:
+    """Thread-safe LRU of (context, system prompt) pairs, bounded by count and size"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[Hashable, Dict[str, Any], str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, case_id: int, version: Hashable) -> Optional[Tuple[Dict[str, Any], str]]:
+        with self._lock:
+            entry = self._entries.get(case_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(case_id)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, case_id: int, version: Hashable, context: Dict[str, Any], prompt: str) -> None:
+        # Approximate footprint: the serialized context plus the prompt text
+        size = len(json.dumps(context, default=str)) + len(prompt)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # One entry per case: a newer version replaces the old one
+            old = self._entries.pop(case_id, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._entries[case_id] = (version, context, prompt, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+
+    def invalidate(self, case_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(case_id, None)
+            if entry is not None:
+                self._bytes -= entry[3]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+case_context_cache = CaseContextCache(
+    max_entries=settings.chat_context_cache_max_entries,
+    max_bytes=settings.chat_context_cache_max_mb * 1024 * 1024
+)
@@ -1,3 +1,4 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from models.reported_cases import ReportedCases
 from models.people import People
@@ -6,16 +7,21 @@ from models.insurance import Insurance
 from models.companies import Companies
 from models.case_metadata import CaseMetadata, CaseSearchIndex
 from services.ai_service import AIService
-from typing import Dict, Any, List
+from services.case_party_index import index_case_parties
+from services.corpus_iterator import Checkpoint, iter_batches
+from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime
 
 class CaseMetadataService:
     
     @staticmethod
-    def process_case_metadata(case_id: int, db: Session) -> Dict[str, Any]:
+    def process_case_metadata(case_id: int, db: Session, keywords: Optional[str] = None) -> Dict[str, Any]:
         """
         Process case metadata and create related records
+        
+        keywords, when given, are used instead of generating them for this
+        case alone (reprocess_all_cases generates them for a batch at once).
         """
         try:
             # Get the case
@@ -52,7 +58,8 @@ class CaseMetadataService:
             entities = AIService.extract_entities_from_case(case_data, db)
             
             # Generate keywords
-            keywords = AIService.generate_legal_keywords(case_data, db)
+            if keywords is None:
+                keywords = AIService.generate_legal_keywords(case_data, db)
             
             # Update case with AI data
             case.ai_case_outcome = ai_data.get('ai_case_outcome', '')
@@ -131,6 +138,9 @@ class CaseMetadataService:
                 search_index.word_count = len(searchable_text.split())
                 search_index.last_indexed = datetime.now()
             
+            # Refresh the case's party rows, now including related people
+            index_case_parties(db, case, commit=False)
+            
             # Commit all changes
             db.commit()
             
@@ -153,28 +163,45 @@ class CaseMetadataService:
     
     
     @staticmethod
-    def reprocess_all_cases(db: Session) -> Dict[str, Any]:
+    def reprocess_all_cases(db: Session, checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Reprocess all cases to generate metadata
+        
+        Cases are streamed in id order; with checkpoint_path an interrupted
+        run resumes after the last batch it finished. Keywords are generated
+        for each batch with packed prompts rather than one request per case.
         """
         try:
-            cases = db.query(ReportedCases).all()
+            batches = iter_batches(
+                select(
+                    ReportedCases.id, ReportedCases.title, ReportedCases.area_of_law, ReportedCases.court_type,
+                    ReportedCases.case_summary, ReportedCases.judgement, ReportedCases.keywords_phrases
+                ),
+                ReportedCases.id,
+                bind=db.get_bind(),
+                batch_size=50,
+                checkpoint=Checkpoint(checkpoint_path)
+            )
+            total_cases = 0
             processed_count = 0
             errors = []
             
-            for case in cases:
-                try:
-                    result = CaseMetadataService.process_case_metadata(case.id, db)
-                    if result.get("success"):
-                        processed_count += 1
-                    else:
-                        errors.append(f"Case {case.id}: {result.get('error', 'Unknown error')}")
-                except Exception as e:
-                    errors.append(f"Case {case.id}: {str(e)}")
+            for cases in batches:
+                batch_keywords = AIService.generate_legal_keywords_batch([dict(case._mapping) for case in cases], db)
+                for case in cases:
+                    total_cases += 1
+                    try:
+                        result = CaseMetadataService.process_case_metadata(case.id, db, keywords=batch_keywords.get(case.id))
+                        if result.get("success"):
+                            processed_count += 1
+                        else:
+                            errors.append(f"Case {case.id}: {result.get('error', 'Unknown error')}")
+                    except Exception as e:
+                        errors.append(f"Case {case.id}: {str(e)}")
             
             return {
                 "success": True,
-                "total_cases": len(cases),
+                "total_cases": total_cases,
                 "processed_count": processed_count,
                 "errors": errors
             }
@@ -1,12 +1,16 @@
+import os
 import openai
 import re
 from typing import Optional, Dict, Any
 from config import settings
+from services.packed_prompts import run_packed
+
+GENERAL_NATURE = "General Legal Matter"
 
 class CaseNatureService:
     def __init__(self):
-        # Set up OpenAI API key
-        openai.api_key = settings.openai_api_key
+        # Set up OpenAI client (created on first use)
+        self.client = None
         
         # Common case nature patterns and keywords
         self.nature_keywords = {
@@ -76,6 +80,12 @@ class CaseNatureService:
             print(f"Error generating case nature: {e}")
             return "General Legal Matter"
 
+    def _get_client(self):
+        """OpenAI client using the configured API key"""
+        if self.client is None:
+            self.client = openai.OpenAI(api_key=settings.openai_api_key or os.getenv("OPENAI_API_KEY"))
+        return self.client
+
     def _extract_text_content(self, case_data: Dict[str, Any]) -> str:
         """Extract and combine relevant text fields from case data"""
         text_parts = []
@@ -149,7 +159,7 @@ class CaseNatureService:
             Respond with only the category name, nothing else.
             """
             
-            response = openai.ChatCompletion.create(
+            response = self._get_client().chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a legal expert specializing in case classification."},
@@ -172,15 +182,54 @@ class CaseNatureService:
             print(f"AI classification error: {e}")
             return None
 
-    def batch_generate_natures(self, cases: list) -> Dict[int, str]:
-        """Generate natures for multiple cases efficiently"""
+    def batch_generate_natures(self, cases: list, pack_size: int = 25) -> Dict[int, str]:
+        """
+        Generate natures for multiple cases efficiently
+        
+        Cases the keywords classify are answered locally; the rest are sent
+        to the AI pack_size at a time in one prompt, falling back to one
+        request per case for answers that are missing or invalid.
+        """
         results = {}
+        pending = []
         
         for case in cases:
             case_id = case.get('id')
-            if case_id:
-                nature = self.generate_case_nature(case)
-                results[case_id] = nature
+            if not case_id:
+                continue
+            text_content = self._extract_text_content(case)
+            if not text_content:
+                results[case_id] = GENERAL_NATURE
+                continue
+            keyword_nature = self._classify_by_keywords(text_content)
+            if keyword_nature and keyword_nature != GENERAL_NATURE:
+                results[case_id] = keyword_nature
+            else:
+                pending.append((case_id, text_content))
+        
+        if pending:
+            valid_natures = list(self.nature_keywords.keys()) + [GENERAL_NATURE]
+            try:
+                ai_natures = run_packed(
+                    self._get_client(),
+                    "gpt-3.5-turbo",
+                    pending,
+                    instruction="Analyze each of the following legal cases and determine the most appropriate "
+                                f"nature/category of the case. Categories: {', '.join(valid_natures)}.",
+                    answer_field="nature",
+                    answer_description="one category name from the list",
+                    validate=lambda value: value.strip() if isinstance(value, str) and value.strip() in valid_natures else None,
+                    single=lambda case_id, text: self._classify_with_ai(text),
+                    system_prompt="You are a legal expert specializing in case classification.",
+                    pack_size=pack_size,
+                    excerpt_tokens=750,
+                    answer_tokens=20
+                )
+            except Exception as e:
+                print(f"AI batch classification error: {e}")
+                ai_natures = {}
+            for case_id, _ in pending:
+                results[case_id] = ai_natures.get(case_id) or GENERAL_NATURE
         
         return results
 
@@ -0,0 +1,333 @@
+"""
+Normalized party names for reported cases (the case_parties table).
+
+Each case stores its parties, judges, lawyers, title and AI-extracted related
+people as one row per field, lowercased and stripped of punctuation, with a
+trigram index on the normalized name. Person -> cases lookups become index
+lookups on this table instead of ILIKE scans over every reported_cases row.
+
+Rows are written once per case when it is created, edited or (re)processed;
+migrate_case_parties.py backfills existing cases.
+
+EntityNameMatcher goes the other way, from a case's party names to the
+entities whose analytics include the case, for the incremental analytics.
+"""
+
+import logging
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, false, func, insert, or_, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from models.banks import Banks
+from models.case_metadata import CaseMetadata
+from models.case_parties import CaseParty
+from models.companies import Companies
+from models.insurance import Insurance
+from models.people import People
+from models.reported_cases import ReportedCases
+from services.corpus_iterator import Checkpoint, iter_batches
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# reported_cases column -> party role
+PARTY_FIELDS = (
+    ("title", "title"),
+    ("protagonist", "protagonist"),
+    ("antagonist", "antagonist"),
+    ("presiding_judge", "judge"),
+    ("judgement_by", "judgement_by"),
+    ("lawyers", "lawyer"),
+)
+
+# Entity tables names are resolved against, in order of precedence
+ENTITY_NAME_COLUMNS = (
+    ("people", People.id, People.full_name),
+    ("banks", Banks.id, Banks.name),
+    ("insurance", Insurance.id, Insurance.name),
+    ("companies", Companies.id, Companies.name),
+)
+
+MAX_NAME_LENGTH = 500
+
+# Names shorter than this occur in nearly every case, so they are not matched
+MIN_MATCH_LENGTH = 3
+
+
+def normalize_party_name(name: Optional[str]) -> str:
+    """Lowercase a name and reduce it to space-separated words"""
+    if not name:
+        return ""
+    return " ".join(_TOKEN.findall(name.lower()))
+
+
+def extract_parties(case: ReportedCases, related_people: Optional[Sequence] = None) -> List[Tuple[str, str]]:
+    """
+    Collect the (role, name) pairs of a case.
+
+    Fields are stored whole rather than split into individual names, so a
+    substring lookup matches exactly what an ILIKE over the column would.
+    """
+    parties = []
+    seen = set()
+
+    def add(role: str, name) -> None:
+        if not isinstance(name, str):
+            return
+        name = name.strip()[:MAX_NAME_LENGTH]
+        if normalize_party_name(name) and (role, name) not in seen:
+            seen.add((role, name))
+            parties.append((role, name))
+
+    for field, role in PARTY_FIELDS:
+        add(role, getattr(case, field))
+    for name in related_people or []:
+        add("related", name)
+    return parties
+
+
+def _resolve_entities(db: Session, names: Iterable[str]) -> Dict[str, Tuple[str, int]]:
+    """Map normalized names to the first entity record with that exact name"""
+    lowered = {name.strip().lower() for name in names}
+    if not lowered:
+        return {}
+
+    resolved = {}
+    for entity_type, id_column, name_column in ENTITY_NAME_COLUMNS:
+        rows = db.query(id_column, name_column).filter(func.lower(func.trim(name_column)).in_(lowered)).all()
+        for entity_id, name in rows:
+            resolved.setdefault(normalize_party_name(name), (entity_type, entity_id))
+    return resolved
+
+
+def _party_rows(case_id: int, parties: List[Tuple[str, str]], entities: Dict[str, Tuple[str, int]]) -> List[Dict]:
+    rows = []
+    for role, name in parties:
+        normalized = normalize_party_name(name)[:MAX_NAME_LENGTH]
+        entity_type, entity_id = entities.get(normalized, (None, None))
+        rows.append({
+            "case_id": case_id,
+            "party_name": name,
+            "normalized_name": normalized,
+            "role": role,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+        })
+    return rows
+
+
+def index_case_parties(db: Session, case: ReportedCases, commit: bool = True) -> int:
+    """
+    Replace the case_parties rows of a case.
+
+    Args:
+        db: Database session
+        case: The case, with its current party fields
+        commit: Commit after writing (False when the caller commits)
+
+    Returns:
+        int: Number of rows written
+    """
+    db.flush()
+    related_people = db.query(CaseMetadata.related_people).filter(
+        CaseMetadata.case_id == case.id
+    ).scalar()
+    parties = extract_parties(case, related_people)
+    entities = _resolve_entities(db, [name for _, name in parties])
+
+    db.query(CaseParty).filter(CaseParty.case_id == case.id).delete(synchronize_session=False)
+    rows = _party_rows(case.id, parties, entities)
+    if rows:
+        db.execute(insert(CaseParty), rows)
+    if commit:
+        db.commit()
+    return len(rows)
+
+
+def rebuild_case_parties(db: Session, batch_size: int = 1000, checkpoint_path: Optional[str] = None) -> int:
+    """
+    Rebuild case_parties for every case, walking reported_cases by id.
+
+    Entity names are loaded once up front rather than resolved per case.
+    With a checkpoint path, an interrupted rebuild resumes after the last
+    committed batch.
+
+    Returns:
+        int: Number of rows written
+    """
+    entities = {}
+    for entity_type, id_column, name_column in ENTITY_NAME_COLUMNS:
+        for entity_id, name in db.query(id_column, name_column).filter(name_column.isnot(None)).yield_per(5000):
+            entities.setdefault(normalize_party_name(name), (entity_type, entity_id))
+
+    party_columns = [getattr(ReportedCases, field) for field, _ in PARTY_FIELDS]
+    total = 0
+    for cases in iter_batches(
+        select(ReportedCases.id, *party_columns),
+        ReportedCases.id,
+        bind=db.get_bind(),
+        batch_size=batch_size,
+        checkpoint=Checkpoint(checkpoint_path)
+    ):
+        case_ids = [case.id for case in cases]
+        related = dict(
+            db.query(CaseMetadata.case_id, CaseMetadata.related_people).filter(
+                CaseMetadata.case_id.in_(case_ids)
+            ).all()
+        )
+
+        rows = []
+        for case in cases:
+            rows.extend(_party_rows(case.id, extract_parties(case, related.get(case.id)), entities))
+
+        db.query(CaseParty).filter(CaseParty.case_id.in_(case_ids)).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(CaseParty), rows)
+        db.commit()
+
+        total += len(rows)
+        logger.info(f"Indexed parties for cases up to id {case_ids[-1]} ({total} rows)")
+    return total
+
+
+def party_case_ids(names: Iterable[str], roles: Optional[Sequence[str]] = None, entity: Optional[Tuple[str, int]] = None):
+    """
+    Select the ids of cases whose party fields contain any of the names.
+
+    Use as ``ReportedCases.id.in_(party_case_ids(...))``.
+
+    Args:
+        names: Names to look for (substring match on normalized names)
+        roles: Restrict to these roles (default: all)
+        entity: (entity_type, entity_id) whose resolved rows also match
+
+    Returns:
+        Select: A SELECT of case_parties.case_id
+    """
+    conditions = [
+        CaseParty.normalized_name.like(f"%{normalized}%")
+        for normalized in {normalize_party_name(name) for name in names}
+        if normalized
+    ]
+    if entity:
+        conditions.append(and_(CaseParty.entity_type == entity[0], CaseParty.entity_id == entity[1]))
+
+    query = select(CaseParty.case_id).where(or_(*conditions) if conditions else false())
+    if roles:
+        query = query.where(CaseParty.role.in_(roles))
+    return query
+
+
+def _name_list(value) -> List[str]:
+    # previous_names is a JSON array, or a comma-separated string in older rows
+    if isinstance(value, list):
+        return [name for name in value if isinstance(name, str)]
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(",")]
+    return []
+
+
+def _entity_names(conn: Connection) -> Iterator[Tuple[str, Tuple[str, int]]]:
+    """
+    (normalized name, entity) for every name an entity's analytics search
+    case titles and parties for: a person's full name, a bank's name and
+    previous names, an insurer's name and a company's name and short name.
+    """
+    lookups = (
+        ("people", select(People.id, People.full_name), lambda row: [row[1]]),
+        ("banks", select(Banks.id, Banks.name, Banks.previous_names), lambda row: [row[1], *_name_list(row[2])]),
+        ("insurance", select(Insurance.id, Insurance.name), lambda row: [row[1]]),
+        ("companies", select(Companies.id, Companies.name, Companies.short_name), lambda row: [row[1], row[2]]),
+    )
+    for entity_type, statement, names in lookups:
+        for row in conn.execution_options(yield_per=5000).execute(statement):
+            for name in names(row):
+                normalized = normalize_party_name(name)
+                if len(normalized) >= MIN_MATCH_LENGTH:
+                    yield normalized, (entity_type, row[0])
+
+
+class EntityNameMatcher:
+    """
+    Finds the entities whose names occur in case party names.
+
+    This is the substring rule the analytics use to collect an entity's cases
+    (party_case_ids and the ILIKE lookups of the bank, insurance and company
+    services), applied in reverse. Titles like "X v. Y" and fields like
+    "John Mensah & 2 Ors" name entities without resolving to them.
+
+    Every entity name is loaded into an Aho-Corasick automaton (a dict of
+    names without pyahocorasick), reloaded after refresh_seconds. An entity
+    created since the last load is recomputed through its own change.
+    """
+
+    def __init__(self, refresh_seconds: float = 900):
+        self.refresh_seconds = refresh_seconds
+        self._automaton = None
+        self._names: Optional[Dict[str, Set[Tuple[str, int]]]] = None
+        self._max_length = 0
+        self._loaded_at = 0.0
+
+    def load(self, bind: Engine) -> None:
+        """Load every entity name"""
+        start_time = time.time()
+        names: Dict[str, Set[Tuple[str, int]]] = {}
+        with bind.connect() as conn:
+            for name, entity in _entity_names(conn):
+                names.setdefault(name, set()).add(entity)
+
+        try:
+            import ahocorasick
+        except ImportError:
+            logger.info("pyahocorasick is not installed; matching entity names by substring lookups")
+            self._automaton = None
+            self._names = names
+            self._max_length = max(map(len, names), default=0)
+        else:
+            automaton = ahocorasick.Automaton()
+            for name, entities in names.items():
+                automaton.add_word(name, tuple(entities))
+            automaton.make_automaton()
+            self._automaton = automaton
+            self._names = None
+
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(names)} entity names for case matching in {time.time() - start_time:.1f}s")
+
+    def _stale(self) -> bool:
+        return (self._automaton is None and self._names is None) or \
+            time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def match(self, bind: Engine, names: Iterable[str]) -> Set[Tuple[str, int]]:
+        """
+        Entities named in any of the normalized party names.
+
+        Args:
+            bind: Engine to (re)load entity names with when they are stale
+            names: Normalized party names (normalize_party_name)
+
+        Returns:
+            set: (entity_type, entity_id) pairs
+        """
+        names = [name for name in names if name]
+        if not names:
+            return set()
+        if self._stale():
+            self.load(bind)
+
+        found: Set[Tuple[str, int]] = set()
+        for name in names:
+            if self._automaton is not None:
+                for _, entities in self._automaton.iter(name):
+                    found.update(entities)
+                continue
+            # Every substring of a party name no longer than the longest entity name
+            for start in range(len(name)):
+                for end in range(start + MIN_MATCH_LENGTH, min(len(name), start + self._max_length) + 1):
+                    found.update(self._names.get(name[start:end], ()))
+        return found
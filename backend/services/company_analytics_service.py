@@ -11,15 +11,58 @@ from models.companies import Companies
 from models.reported_cases import ReportedCases
 from sqlalchemy import or_, and_, func
 from typing import List, Dict, Any, Optional
+from services.keyword_scanner import matched, scanner
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Case fields the keyword analyses read
+CASE_TEXT_FIELDS = ('title', 'case_summary')
+TITLE_FIELDS = ('title',)
+
+RISK_KEYWORDS = [
+    'fraud', 'embezzlement', 'corruption', 'bribery', 'money_laundering',
+    'tax_evasion', 'insider_trading', 'securities_fraud', 'accounting_fraud',
+    'contract_breach', 'intellectual_property', 'patent_infringement',
+    'trademark_violation', 'copyright_infringement', 'antitrust',
+    'monopoly', 'price_fixing', 'market_manipulation', 'regulatory_violation',
+    'environmental_violation', 'safety_violation', 'labor_violation',
+    'discrimination', 'harassment', 'wrongful_termination', 'breach_of_fiduciary',
+    'negligence', 'malpractice', 'product_liability', 'consumer_protection',
+    'data_breach', 'privacy_violation', 'cyber_security', 'compliance_failure'
+]
+
+# Subject matter categories for companies (a category matches when any of its words occurs)
+SUBJECT_CATEGORIES = [
+    'Corporate Law', 'Commercial Law', 'Contract Disputes', 'Employment Law',
+    'Intellectual Property', 'Securities Law', 'Tax Law', 'Environmental Law',
+    'Consumer Protection', 'Antitrust Law', 'Regulatory Compliance',
+    'Product Liability', 'Data Protection', 'Corporate Governance',
+    'Mergers & Acquisitions', 'Bankruptcy', 'Insolvency', 'Restructuring'
+]
+
+FINANCIAL_TERMS = ['damages', 'compensation', 'penalty', 'fine', 'settlement',
+                   'award', 'restitution', 'reimbursement', 'indemnity', 'liquidated']
+
+# Title terms behind the company-specific metrics
+METRIC_TERMS = {
+    'regulatory': ['regulatory', 'compliance', 'violation', 'breach'],
+    'customer': ['customer', 'consumer', 'client', 'dispute'],
+    'operational': ['operational', 'management', 'administration', 'process'],
+    'continuity': ['continuity', 'disruption', 'interruption', 'suspension'],
+    'market': ['market', 'competition', 'antitrust', 'monopoly'],
+    'credit': ['credit', 'debt', 'loan', 'default', 'bankruptcy'],
+    'reputation': ['reputation', 'defamation', 'libel', 'slander', 'publicity']
+}
+
 class CompanyAnalyticsService:
     """Service for generating company analytics and case statistics."""
     
     def __init__(self, db: Session):
         self.db = db
+        scanner.register(RISK_KEYWORDS + FINANCIAL_TERMS)
+        scanner.register(term for category in SUBJECT_CATEGORIES for term in category.split())
+        scanner.register_categories(METRIC_TERMS)
     
     def generate_company_analytics(self, company_id: int) -> Optional[CompanyAnalytics]:
         """Generate analytics for a specific company."""
@@ -136,7 +179,7 @@ class CompanyAnalyticsService:
                     func.lower(ReportedCases.antagonist).like(f"%{term}%")
                 ])
             
-            cases = self.db.query(ReportedCases).filter(
+            cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
                 or_(*conditions)
             ).all()
             
@@ -149,40 +192,15 @@ class CompanyAnalyticsService:
     def _calculate_analytics(self, cases: List[ReportedCases], company: Companies) -> Dict[str, Any]:
         """Calculate analytics from cases."""
         try:
-            # Risk keywords for companies
-            risk_keywords = [
-                'fraud', 'embezzlement', 'corruption', 'bribery', 'money_laundering',
-                'tax_evasion', 'insider_trading', 'securities_fraud', 'accounting_fraud',
-                'contract_breach', 'intellectual_property', 'patent_infringement',
-                'trademark_violation', 'copyright_infringement', 'antitrust',
-                'monopoly', 'price_fixing', 'market_manipulation', 'regulatory_violation',
-                'environmental_violation', 'safety_violation', 'labor_violation',
-                'discrimination', 'harassment', 'wrongful_termination', 'breach_of_fiduciary',
-                'negligence', 'malpractice', 'product_liability', 'consumer_protection',
-                'data_breach', 'privacy_violation', 'cyber_security', 'compliance_failure'
-            ]
-            
-            # Subject matter categories for companies
-            subject_categories = [
-                'Corporate Law', 'Commercial Law', 'Contract Disputes', 'Employment Law',
-                'Intellectual Property', 'Securities Law', 'Tax Law', 'Environmental Law',
-                'Consumer Protection', 'Antitrust Law', 'Regulatory Compliance',
-                'Product Liability', 'Data Protection', 'Corporate Governance',
-                'Mergers & Acquisitions', 'Bankruptcy', 'Insolvency', 'Restructuring'
-            ]
-            
             # Calculate risk score
             risk_score = 0
             risk_factors = []
             
             for case in cases:
-                case_text = f"{case.title or ''} {case.case_summary or ''}".lower()
-                
-                for keyword in risk_keywords:
-                    if keyword in case_text:
-                        risk_score += 2
-                        if keyword not in risk_factors:
-                            risk_factors.append(keyword)
+                for keyword in matched(scanner.case_hits(case, CASE_TEXT_FIELDS), RISK_KEYWORDS):
+                    risk_score += 2
+                    if keyword not in risk_factors:
+                        risk_factors.append(keyword)
             
             # Determine risk level
             if risk_score >= 50:
@@ -214,9 +232,9 @@ class CompanyAnalyticsService:
             # Analyze subject matter
             subject_matter_counts = {}
             for case in cases:
-                case_text = f"{case.title or ''} {case.case_summary or ''}".lower()
-                for category in subject_categories:
-                    if any(term.lower() in case_text for term in category.split()):
+                found = scanner.case_hits(case, CASE_TEXT_FIELDS)
+                for category in SUBJECT_CATEGORIES:
+                    if matched(found, category.split()):
                         subject_matter_counts[category] = subject_matter_counts.get(category, 0) + 1
             
             primary_subject_matter = max(subject_matter_counts, key=subject_matter_counts.get) if subject_matter_counts else "General Corporate"
@@ -270,38 +288,31 @@ class CompanyAnalyticsService:
         """Calculate company-specific metrics."""
         try:
             # Regulatory compliance score (based on regulatory cases)
-            regulatory_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['regulatory', 'compliance', 'violation', 'breach'])]
+            regulatory_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['regulatory'])]
             regulatory_compliance_score = max(0, 100 - (len(regulatory_cases) * 10))
             
             # Customer dispute rate (based on customer-related cases)
-            customer_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['customer', 'consumer', 'client', 'dispute'])]
+            customer_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['customer'])]
             customer_dispute_rate = (len(customer_cases) / len(cases)) * 100 if cases else 0
             
             # Operational risk score (based on operational cases)
-            operational_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['operational', 'management', 'administration', 'process'])]
+            operational_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['operational'])]
             operational_risk_score = min(100, len(operational_cases) * 15)
             
             # Business continuity score (based on continuity-related cases)
-            continuity_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['continuity', 'disruption', 'interruption', 'suspension'])]
+            continuity_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['continuity'])]
             business_continuity_score = max(0, 100 - (len(continuity_cases) * 20))
             
             # Market risk score (based on market-related cases)
-            market_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['market', 'competition', 'antitrust', 'monopoly'])]
+            market_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['market'])]
             market_risk_score = min(100, len(market_cases) * 12)
             
             # Credit risk score (based on credit-related cases)
-            credit_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['credit', 'debt', 'loan', 'default', 'bankruptcy'])]
+            credit_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['credit'])]
             credit_risk_score = min(100, len(credit_cases) * 18)
             
             # Reputation risk score (based on reputation-related cases)
-            reputation_cases = [case for case in cases if any(term in (case.title or '').lower() 
-                            for term in ['reputation', 'defamation', 'libel', 'slander', 'publicity'])]
+            reputation_cases = [case for case in cases if matched(scanner.case_hits(case, TITLE_FIELDS), METRIC_TERMS['reputation'])]
             reputation_risk_score = min(100, len(reputation_cases) * 25)
             
             return {
@@ -330,11 +341,8 @@ class CompanyAnalyticsService:
         """Extract financial terms from cases."""
         financial_terms = []
         for case in cases:
-            case_text = f"{case.title or ''} {case.case_summary or ''}".lower()
-            terms = ['damages', 'compensation', 'penalty', 'fine', 'settlement', 
-                    'award', 'restitution', 'reimbursement', 'indemnity', 'liquidated']
-            for term in terms:
-                if term in case_text and term not in financial_terms:
+            for term in matched(scanner.case_hits(case, CASE_TEXT_FIELDS), FINANCIAL_TERMS):
+                if term not in financial_terms:
                     financial_terms.append(term)
         return financial_terms[:10]
     
@@ -0,0 +1,116 @@
+"""
+Streaming reader for corpus-wide batch jobs.
+
+Batch jobs over reported_cases, people and the other large tables used to
+page with OFFSET (each page rescans every row before it, so a full pass is
+quadratic) or load the whole table with .all(). iter_batches walks a table
+by primary key instead:
+
+- Keyset pagination: each batch is ``WHERE id > :last_id ORDER BY id LIMIT
+  :batch_size``, an index range scan however deep into the table the job is.
+- Short reads: a batch is fetched in full on its own connection, which is
+  returned to the pool before the batch is handed to the job. Jobs spend
+  minutes on a batch (LLM calls, analytics), and no connection, snapshot or
+  transaction is held open while they do; memory stays bounded by the batch.
+- Column projection: callers pass a select() of just the columns they need,
+  not whole ORM rows with every large text column.
+- Checkpointing: with a Checkpoint, the id of the last row of each batch the
+  job has finished with is saved, and a restarted job continues after it.
+  A batch counts as finished when the job asks for the next one, so a crash
+  repeats at most one batch. The checkpoint is cleared when the pass
+  completes, so the next run starts from the beginning.
+
+    statement = select(ReportedCases.id, ReportedCases.title).where(ReportedCases.title.isnot(None))
+    for case in iter_rows(statement, ReportedCases.id, checkpoint=Checkpoint("titles.checkpoint")):
+        ...
+"""
+
+import logging
+import os
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Column
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.sql import Select
+
+from database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class Checkpoint:
+    """Last processed id of a batch job, kept in a small file (or only in memory without a path)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.last_id = 0
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                content = checkpoint_file.read().strip()
+            self.last_id = int(content) if content else 0
+            if self.last_id:
+                logger.info(f"Resuming after id {self.last_id} (checkpoint {path})")
+
+    def save(self, last_id: int) -> None:
+        self.last_id = last_id
+        if not self.path:
+            return
+        # Write then rename, so a crash mid-write never leaves a truncated file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            checkpoint_file.write(str(last_id))
+        os.replace(temp_path, self.path)
+
+    def clear(self) -> None:
+        self.last_id = 0
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_batches(
+    statement: Select,
+    id_column: Column,
+    bind: Optional[Engine] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint: Optional[Checkpoint] = None
+) -> Iterator[List[Row]]:
+    """
+    Yield the rows of `statement` in id order, in lists of up to batch_size.
+
+    Args:
+        statement: select() of the columns to read, with any filters; must
+                   include id_column and must not have its own ORDER BY/LIMIT
+        id_column: Unique, indexed integer column to paginate on (selected
+                   under its own name)
+        bind: Engine to read with (default: the application engine)
+        batch_size: Rows per yielded batch (and per keyset query)
+        checkpoint: Where to resume from and record progress
+    """
+    bind = bind or default_engine
+    last_id = checkpoint.last_id if checkpoint else 0
+    while True:
+        with bind.connect() as conn:
+            batch = conn.execute(
+                statement.where(id_column > last_id).order_by(id_column).limit(batch_size)
+            ).all()
+        if not batch:
+            break
+
+        yield batch
+        # The caller asked for more, so it is done with this batch
+        last_id = batch[-1]._mapping[id_column.key]
+        if checkpoint:
+            checkpoint.save(last_id)
+        if len(batch) < batch_size:
+            break
+
+    if checkpoint:
+        checkpoint.clear()
+
+
+def iter_rows(statement: Select, id_column: Column, **kwargs) -> Iterator[Row]:
+    """iter_batches, one row at a time"""
+    for batch in iter_batches(statement, id_column, **kwargs):
+        yield from batch
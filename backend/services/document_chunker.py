@@ -0,0 +1,326 @@
+"""
+Token-aware chunking of long case documents.
+
+Prompts used to cut case text at a fixed number of characters, so on long
+judgments the model never saw the end of the document (where the orders
+usually are), and every prompt was the same size however much of it
+mattered. This module measures text in tokens and splits it at natural
+boundaries instead:
+
+- count_tokens uses tiktoken when it is installed (and its encoding files
+  are available), and otherwise a fast offline approximation that errs on
+  the high side.
+- chunk_sections splits labelled sections (headnotes, decision, judgement,
+  conclusion...) into chunks of at most max_tokens. Long sections are split
+  between paragraphs, then sentences, and only as a last resort
+  mid-sentence. Sections short enough to send whole are labelled and packed
+  in with their neighbours.
+- truncate_to_tokens shortens a field to a budget keeping both its beginning
+  and its end, for prompts that only have room for part of a field.
+- analysis_job builds the completion job for a case analysis prompt: the
+  usual single prompt when the case text fits settings.ai_prompt_token_budget,
+  otherwise a map-reduce job. Each chunk is sent with a short case header to
+  extract its facts (map, run in parallel), and the notes, in document
+  order, stand in for the case text in the caller's usual prompt (reduce).
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import settings
+from services.llm_worker_pool import CompletionJob, MapReduceJob
+
+logger = logging.getLogger(__name__)
+
+# Fallback tokenizer: roughly one token per 5 characters of a word, one per punctuation mark
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+# Completion budget per chunk's notes (shrunk for documents with many chunks)
+MAP_MAX_TOKENS = 400
+MAP_MIN_TOKENS = 120
+
+MAP_SYSTEM_PROMPT = (
+    "You are a legal AI assistant extracting facts from one part of a long court judgment. "
+    "Report only what the given part states."
+)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: Optional[str]):
+    """tiktoken encoding for a model, or None to use the approximation"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed; using approximate token counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encoding files are downloaded on first use, which fails offline
+        logger.warning(f"tiktoken encoding unavailable ({e}); using approximate token counts")
+        return None
+
+
+def count_tokens(text: Optional[str], model: Optional[str] = None) -> int:
+    """Number of tokens `text` takes in `model`'s encoding (approximate without tiktoken)"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(1 + (len(token) - 1) // 5 for token in _APPROX_TOKEN.findall(text))
+
+
+def _split_to_fit(text: str, max_tokens: int, model: Optional[str]) -> List[str]:
+    """Split an oversized piece by sentences, then by words"""
+    pieces = [piece for piece in _SENTENCE_END.split(text) if piece.strip()]
+    if len(pieces) == 1:
+        pieces = text.split(" ")
+        if len(pieces) == 1:
+            # One unbroken run of characters: cut it by length
+            step = max(1, len(text) * max_tokens // max(1, count_tokens(text, model)))
+            return [text[start:start + step] for start in range(0, len(text), step)]
+    return _pack(pieces, max_tokens, model, " ")
+
+
+def _pack(pieces: Sequence[str], max_tokens: int, model: Optional[str], separator: str) -> List[str]:
+    """Greedily join consecutive pieces into parts of at most max_tokens"""
+    parts = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece, model)
+        if piece_tokens > max_tokens:
+            if current:
+                parts.append(separator.join(current))
+                current, current_tokens = [], 0
+            parts.extend(_split_to_fit(piece, max_tokens, model))
+            continue
+        if current and current_tokens + piece_tokens > max_tokens:
+            parts.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        parts.append(separator.join(current))
+    return parts
+
+
+class Chunk:
+    """A piece of one section of a document"""
+
+    def __init__(self, section: str, text: str, tokens: int):
+        self.section = section
+        self.text = text
+        self.tokens = tokens
+        self.whole = False  # Holds only whole, labelled sections
+        self.index = 0
+        self.total = 0
+
+    @property
+    def label(self) -> str:
+        return f"Part {self.index}/{self.total} ({self.section})"
+
+
+def chunk_sections(sections: Sequence[Tuple[str, Optional[str]]], max_tokens: int,
+                   model: Optional[str] = None) -> List[Chunk]:
+    """
+    Split labelled sections into chunks of at most max_tokens, in document order.
+
+    Args:
+        sections: (label, text) pairs, e.g. [("Decision", case.decision), ...];
+                  empty sections are skipped
+        max_tokens: Upper bound on each chunk's text
+        model: Model whose tokenizer to count with
+    """
+    pieces = []
+    for section, text in sections:
+        if not text or not text.strip():
+            continue
+        labelled = f"{section}:\n{text.strip()}"
+        labelled_tokens = count_tokens(labelled, model)
+        if labelled_tokens <= max_tokens:
+            chunk = Chunk(section, labelled, labelled_tokens)
+            chunk.whole = True
+            pieces.append(chunk)
+            continue
+        paragraphs = [paragraph.strip() for paragraph in _PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+        parts = _pack(paragraphs, max_tokens, model, "\n\n")
+        # Head the section's first part with its label, unless that would overflow it
+        if count_tokens(section, model) + 2 + count_tokens(parts[0], model) <= max_tokens:
+            parts[0] = f"{section}:\n{parts[0]}"
+        for part in parts:
+            pieces.append(Chunk(section, part, count_tokens(part, model)))
+
+    # Pack whole sections in with their neighbours (parts of one long section stay apart)
+    chunks = []
+    for piece in pieces:
+        previous = chunks[-1] if chunks else None
+        if previous and (previous.whole or piece.whole) and previous.tokens + piece.tokens <= max_tokens:
+            if piece.section not in previous.section.split(", "):
+                previous.section = f"{previous.section}, {piece.section}"
+            previous.text = f"{previous.text}\n\n{piece.text}"
+            previous.tokens += piece.tokens
+            previous.whole = previous.whole and piece.whole
+            continue
+        chunks.append(piece)
+    for index, chunk in enumerate(chunks, 1):
+        chunk.index = index
+        chunk.total = len(chunks)
+    return chunks
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int, model: Optional[str] = None,
+                       tail_share: float = 0.3) -> str:
+    """
+    Shorten text to about max_tokens, keeping its beginning and its last tail_share.
+
+    Cuts fall between sentences where possible, and the gap is marked, so a
+    long judgment keeps its opening and its orders.
+    """
+    if not text:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    pieces = [piece for piece in _SENTENCE_END.split(text) if piece.strip()]
+    if len(pieces) < 3:
+        pieces = text.split(" ")
+    tail_budget = int(max_tokens * tail_share)
+    head_budget = max_tokens - tail_budget
+
+    head, head_tokens = [], 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece, model)
+        if head_tokens + piece_tokens > head_budget:
+            break
+        head.append(piece)
+        head_tokens += piece_tokens
+    tail, tail_tokens = [], 0
+    for piece in reversed(pieces[len(head):]):
+        piece_tokens = count_tokens(piece, model)
+        if tail_tokens + piece_tokens > tail_budget:
+            break
+        tail.insert(0, piece)
+        tail_tokens += piece_tokens
+
+    if not head and not tail:
+        # A single huge sentence: fall back to a character cut of the right size
+        approx_chars = len(text) * max_tokens // count_tokens(text, model)
+        return text[:approx_chars] + "..."
+    return " ".join(head) + TRUNCATION_MARKER + " ".join(tail)
+
+
+def map_messages(chunk: Chunk, case_header: str) -> List[Dict[str, str]]:
+    """Messages asking for the facts in one chunk of a case"""
+    return [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
+{case_header}
+
+{chunk.label} of the case text:
+
+{chunk.text}
+
+Extract from this part only, as JSON:
+
+{{
+    "outcome": "How the court disposed of the claims or appeal and who prevailed, if this part says",
+    "court_orders": "Orders, judgments, awards, costs, injunctions or directives in this part",
+    "financial_details": "Amounts, damages, interest or other financial terms in this part",
+    "key_findings": "The court's main findings and holdings in this part"
+}}
+
+Use an empty string for anything this part does not mention. Respond only with valid JSON, no additional text.
+"""
+        }
+    ]
+
+
+def notes_content(case_header: str, chunks: Sequence[Chunk], notes: Sequence[str]) -> str:
+    """Case content for the reduce prompt: the header plus each chunk's notes in order"""
+    parts = [
+        case_header,
+        "The full case text is too long to include; these are notes extracted from each part of it, in document order."
+    ]
+    for chunk, note in zip(chunks, notes):
+        parts.append(f"{chunk.label}:\n{note.strip()}")
+    return "\n\n".join(parts)
+
+
+def case_header_and_sections(case: Any) -> Tuple[str, List[Tuple[str, Optional[str]]]]:
+    """
+    Split a case into its short identifying header and its long text sections.
+
+    Accepts an ORM object, a result row or a dict; the fields mirror the
+    case content the analysis prompts are built from.
+    """
+    def field(name):
+        return case.get(name) if isinstance(case, dict) else getattr(case, name, None)
+
+    header = []
+    if field("title"):
+        header.append(f"Case Title: {field('title')}")
+    if field("area_of_law"):
+        header.append(f"Area of Law: {field('area_of_law')}")
+    if field("protagonist"):
+        header.append(f"Plaintiff/Appellant: {field('protagonist')}")
+    if field("antagonist"):
+        header.append(f"Defendant/Respondent: {field('antagonist')}")
+
+    sections = [("Headnotes", field("headnotes"))]
+    if field("decision"):
+        sections.append(("Decision", field("decision")))
+    else:
+        sections.append(("Judgement", field("judgement")))
+    sections.append(("Conclusion", field("conclusion")))
+    sections.append(("Case Summary", field("case_summary")))
+    return "\n".join(header), sections
+
+
+def analysis_job(key: Any, case: Any, case_content: str,
+                 build_messages: Callable[[str], List[Dict[str, str]]],
+                 model: Optional[str] = None, max_tokens: int = 2000,
+                 temperature: float = 0.3) -> CompletionJob:
+    """
+    Completion job for analysing a case.
+
+    Args:
+        key: Job key (the case id)
+        case: The case (ORM object, row or dict), read when it must be chunked
+        case_content: The case content the caller would send whole
+        build_messages: Turns case content into the caller's analysis messages
+        model: Model whose tokenizer to count with
+
+    Returns:
+        CompletionJob: A single-prompt job if case_content fits
+        settings.ai_prompt_token_budget, otherwise a MapReduceJob
+    """
+    budget = settings.ai_prompt_token_budget
+    if count_tokens(case_content, model) <= budget:
+        return CompletionJob(key, build_messages(case_content), max_tokens=max_tokens, temperature=temperature)
+
+    header, sections = case_header_and_sections(case)
+    chunks = chunk_sections(sections, settings.ai_chunk_tokens, model)
+    # Keep the combined notes near the prompt budget however many chunks there are
+    note_tokens = max(MAP_MIN_TOKENS, min(MAP_MAX_TOKENS, budget // max(1, len(chunks))))
+    parts = [
+        CompletionJob(key, map_messages(chunk, header), max_tokens=note_tokens, temperature=0)
+        for chunk in chunks
+    ]
+
+    def combine(notes: List[str]) -> List[Dict[str, str]]:
+        return build_messages(truncate_to_tokens(notes_content(header, chunks, notes), budget, model))
+
+    logger.debug(f"Case {key}: {count_tokens(case_content, model)} tokens, summarizing {len(chunks)} chunks")
+    return MapReduceJob(key, parts, combine, max_tokens=max_tokens, temperature=temperature)
@@ -18,6 +18,7 @@ from models.case_metadata import CaseMetadata, CaseSearchIndex
 from services.person_analytics_service import PersonAnalyticsService
 from services.bank_analytics_service import BankAnalyticsService
 from services.ai_service import AIService
+from services.case_party_index import index_case_parties, party_case_ids
 import json
 
 class EnhancedCaseProcessingService:
@@ -92,6 +93,9 @@ class EnhancedCaseProcessingService:
             # Create search index
             self._create_search_index(case_id, case, entities)
             
+            # Refresh the case's party rows, now including related people
+            index_case_parties(self.db, case, commit=False)
+            
             self.db.commit()
             
             return {
@@ -233,11 +237,11 @@ class EnhancedCaseProcessingService:
                 self.db.flush()
             
             # Get all cases for this person
-            person_cases = self.db.query(ReportedCases).filter(
-                ReportedCases.protagonist.ilike(f"%{str(person.full_name)}%")
-                | ReportedCases.antagonist.ilike(f"%{str(person.full_name)}%")
-                | ReportedCases.lawyers.ilike(f"%{str(person.full_name)}%")
-                | ReportedCases.presiding_judge.ilike(f"%{str(person.full_name)}%")
+            person_cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
+                ReportedCases.id.in_(party_case_ids(
+                    [str(person.full_name)],
+                    roles=("protagonist", "antagonist", "lawyer", "judge")
+                ))
             ).all()
             
             # Calculate risk assessment
@@ -316,7 +320,7 @@ class EnhancedCaseProcessingService:
                 self.db.flush()
             
             # Get all cases for this bank
-            bank_cases = self.db.query(ReportedCases).filter(
+            bank_cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
                 ReportedCases.title.ilike(f"%{str(bank.name)}%")
                 | ReportedCases.case_summary.ilike(f"%{str(bank.name)}%")
                 | ReportedCases.commentary.ilike(f"%{str(bank.name)}%")
@@ -399,7 +403,7 @@ class EnhancedCaseProcessingService:
                 self.db.flush()
             
             # Get all cases for this insurance company
-            insurance_cases = self.db.query(ReportedCases).filter(
+            insurance_cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
                 ReportedCases.title.ilike(f"%{str(insurance.name)}%")
                 | ReportedCases.case_summary.ilike(f"%{str(insurance.name)}%")
                 | ReportedCases.commentary.ilike(f"%{str(insurance.name)}%")
@@ -482,7 +486,7 @@ class EnhancedCaseProcessingService:
                 self.db.flush()
             
             # Get all cases for this company
-            company_cases = self.db.query(ReportedCases).filter(
+            company_cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
                 ReportedCases.title.ilike(f"%{str(company.name)}%")
                 | ReportedCases.case_summary.ilike(f"%{str(company.name)}%")
                 | ReportedCases.commentary.ilike(f"%{str(company.name)}%")
@@ -0,0 +1,253 @@
+"""
+PostgreSQL full-text and fuzzy-name search for people, banks, insurance, companies, gazette entries and cases.
+
+Each searchable model stores a weighted `tsvector` in a generated
+`search_vector` column with a GIN index (see models/search_vectors.py).
+Matching and ranking read the stored vector, so ranking a match does not
+re-parse its text (for cases, up to 200KB of judgement). Routes build their
+predicates through `apply_full_text_search`, which reads the column off the
+model's index.
+
+Cases are indexed in four weighted sections (title, parties, summary,
+judgement) and ranked with cover density (`cover_density=True`), which
+rewards query terms that appear close together and normalizes for document
+length, in the spirit of BM25.
+
+People and gazette names additionally have pg_trgm indexes over a normalized
+name document; `fuzzy_name_match` uses them for typo-tolerant matching
+(Kwaku/Kweku, Mensah/Mensa) ranked by word similarity. `contains_match`
+answers substring searches (LIKE '%term%') from a trigram index over all the
+columns such a search covers.
+
+Fresh databases get the columns and indexes from `create_tables()`; existing
+databases get them from `migrate_search_indexes.py`.
+"""
+
+import logging
+import re
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Index, String, desc, false, func, inspect, literal, text
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.elements import Label
+
+from models.people import People
+from models.banks import Banks
+from models.insurance import Insurance
+from models.companies import Companies
+from models.gazette import Gazette
+from models.reported_cases import ReportedCases
+from models.search_vectors import SEARCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# entity type -> (model, name of its full-text index)
+SEARCHABLE_ENTITIES: Dict[str, Tuple[type, str]] = {
+    "people": (People, "ix_people_search_vector"),
+    "banks": (Banks, "ix_banks_search_vector"),
+    "insurance": (Insurance, "ix_insurance_search_vector"),
+    "companies": (Companies, "ix_companies_search_vector"),
+    "gazette": (Gazette, "ix_gazette_entries_search_vector"),
+    "cases": (ReportedCases, "ix_reported_cases_search_vector"),
+}
+
+# entity type -> (model, name of its trigram name index)
+FUZZY_NAME_ENTITIES: Dict[str, Tuple[type, str]] = {
+    "people": (People, "ix_people_name_trgm"),
+    "gazette": (Gazette, "ix_gazette_entries_name_trgm"),
+}
+
+# entity type -> (model, name of its trigram index over the columns substring searches cover)
+CONTAINS_ENTITIES: Dict[str, Tuple[type, str]] = {
+    "people": (People, "ix_people_contains_trgm"),
+}
+
+# pg_trgm's default word similarity threshold (0.6) rejects most one-letter
+# spelling variants of short names; 0.4 keeps Kwaku ~ Kweku as a match
+FUZZY_NAME_THRESHOLD = 0.4
+
+# ts_rank_cd normalization flag 1: divide the rank by 1 + log(document length)
+COVER_DENSITY_NORMALIZATION = 1
+
+_PREFIX_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _search_index(entity_type: str, registry=SEARCHABLE_ENTITIES) -> Index:
+    model, index_name = registry[entity_type]
+    for index in model.__table__.indexes:
+        if index.name == index_name:
+            return index
+    raise KeyError(f"{model.__tablename__} has no index named {index_name}")
+
+
+def search_vector(entity_type: str):
+    """The stored tsvector column for an entity type"""
+    return _search_index(entity_type).expressions[0]
+
+
+def search_indexes() -> List[Index]:
+    """All full-text and trigram search indexes"""
+    return (
+        [_search_index(entity_type) for entity_type in SEARCHABLE_ENTITIES]
+        + [_search_index(entity_type, FUZZY_NAME_ENTITIES) for entity_type in FUZZY_NAME_ENTITIES]
+        + [_search_index(entity_type, CONTAINS_ENTITIES) for entity_type in CONTAINS_ENTITIES]
+    )
+
+
+def websearch_tsquery(search_text: str):
+    """Parse free text with web-search syntax ("quoted phrases", OR, -exclusions)"""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, search_text)
+
+
+def prefix_tsquery(search_text: str):
+    """
+    Build a prefix query for typeahead, e.g. "kwame men" -> 'kwame:* & men:*'.
+
+    Returns None when the input contains no searchable tokens.
+    """
+    tokens = _PREFIX_TOKEN.findall(search_text.lower())
+    if not tokens:
+        return None
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{token}:*" for token in tokens))
+
+
+def full_text_match(entity_type: str, search_text: str, prefix: bool = False, cover_density: bool = False):
+    """
+    Build the match condition and rank expression for an entity type.
+
+    Args:
+        entity_type: One of the keys of SEARCHABLE_ENTITIES
+        search_text: Raw user input
+        prefix: Match the trailing characters of each word (for typeahead)
+        cover_density: Rank with length-normalized ts_rank_cd instead of ts_rank
+
+    Returns:
+        tuple: (condition, rank); condition is false() if nothing is searchable
+    """
+    vector = search_vector(entity_type)
+    ts_query = prefix_tsquery(search_text) if prefix else websearch_tsquery(search_text)
+    if ts_query is None:
+        return false(), literal(0.0)
+    if cover_density:
+        rank = func.ts_rank_cd(vector, ts_query, COVER_DENSITY_NORMALIZATION)
+    else:
+        rank = func.ts_rank(vector, ts_query)
+    return vector.op("@@")(ts_query), rank
+
+
+def apply_full_text_search(query_obj: Query, entity_type: str, search_text: str, prefix: bool = False, cover_density: bool = False) -> Query:
+    """
+    Restrict `query_obj` to rows matching `search_text` and order them by rank.
+
+    Args:
+        query_obj: Query selecting the entity's model
+        entity_type: One of the keys of SEARCHABLE_ENTITIES
+        search_text: Raw user input
+        prefix: Match the trailing characters of each word (for typeahead)
+        cover_density: Rank with length-normalized ts_rank_cd instead of ts_rank
+
+    Returns:
+        Query: Filtered query ordered by rank, then id for a stable order
+    """
+    model, _ = SEARCHABLE_ENTITIES[entity_type]
+    condition, rank = full_text_match(entity_type, search_text, prefix, cover_density)
+    return query_obj.filter(condition).order_by(desc(rank), model.id)
+
+
+def set_fuzzy_threshold(db: Session, threshold: float = FUZZY_NAME_THRESHOLD):
+    """Set the word similarity cut-off used by `<%` for the current transaction"""
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(threshold)}
+    )
+
+
+def fuzzy_name_match(entity_type: str, search_text: str):
+    """
+    Build the fuzzy name condition and rank expression for an entity type.
+
+    The condition uses pg_trgm's `<%` operator, which the trigram index can
+    answer; call `set_fuzzy_threshold` in the same transaction first.
+
+    Returns:
+        tuple: (condition, rank) where rank is word_similarity in [0, 1]
+    """
+    document = _search_index(entity_type, FUZZY_NAME_ENTITIES).expressions[0]
+    if isinstance(document, Label):
+        document = document.element
+    normalized = literal(search_text.strip().lower(), String)
+    return normalized.op("<%")(document), func.word_similarity(normalized, document)
+
+
+def contains_match(entity_type: str, search_text: str):
+    """
+    Case-insensitive substring condition over the columns of an entity's
+    contains index, which the trigram index can answer.
+
+    The columns are matched as one space-separated document, so a term may
+    also span two adjacent columns.
+    """
+    document = _search_index(entity_type, CONTAINS_ENTITIES).expressions[0]
+    if isinstance(document, Label):
+        document = document.element
+    return document.like(literal(f"%{search_text.lower()}%", String))
+
+
+def apply_fuzzy_name_search(query_obj: Query, entity_type: str, search_text: str) -> Query:
+    """
+    Restrict `query_obj` to rows whose names resemble `search_text`, closest first.
+
+    Args:
+        query_obj: Query selecting the entity's model
+        entity_type: One of the keys of FUZZY_NAME_ENTITIES
+        search_text: Raw user input
+
+    Returns:
+        Query: Filtered query ordered by word similarity, then id
+    """
+    model, _ = FUZZY_NAME_ENTITIES[entity_type]
+    condition, rank = fuzzy_name_match(entity_type, search_text)
+    return query_obj.filter(condition).order_by(desc(rank), model.id)
+
+
+def ensure_search_vectors(engine) -> int:
+    """
+    Add the stored search_vector column to tables that predate it, replacing
+    the expression index of the same name that indexed the vector before.
+    Adding a stored generated column rewrites the table.
+
+    Returns:
+        int: Number of columns added
+    """
+    added = 0
+    for entity_type, (model, index_name) in SEARCHABLE_ENTITIES.items():
+        table = model.__table__
+        if "search_vector" in {column["name"] for column in inspect(engine).get_columns(table.name)}:
+            continue
+        logger.info(f"Adding stored search vector to {table.name}")
+        column_ddl = CreateColumn(search_vector(entity_type)).compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+        added += 1
+    return added
+
+
+def ensure_search_indexes(engine) -> int:
+    """
+    Create the pg_trgm extension, the stored search vectors and any missing
+    search indexes.
+
+    Returns:
+        int: Number of indexes checked
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    ensure_search_vectors(engine)
+
+    indexes = search_indexes()
+    for index in indexes:
+        logger.info(f"Ensuring full-text index {index.name}")
+        index.create(bind=engine, checkfirst=True)
+    return len(indexes)
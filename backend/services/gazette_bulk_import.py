@@ -0,0 +1,512 @@
+"""
+Bulk gazette spreadsheet imports.
+
+The Excel upload (routes/gazette_import.py) and the gazette import scripts
+used to walk a sheet row by row: look the person up with an ILIKE, commit,
+generate a new person's analytics, insert the gazette entry, commit, update
+the person, commit. Here a whole sheet is imported with a handful of
+set-based statements:
+
+- A normalizer turns the sheet into a frame of gazette_entries values with
+  vectorized pandas operations (normalize_upload for the upload layouts; the
+  scripts build frames from their own sheets with the same helpers).
+- All people are resolved with one lookup on the normalized-name index
+  (ix_people_name_key, see models/search_vectors.name_key), and the people
+  that do not exist yet are inserted with one multi-row INSERT.
+- Gazette entries are inserted in batches with INSERT ... ON CONFLICT DO
+  NOTHING on import_key, a hash of the row, so importing a sheet again only
+  adds the rows that are new.
+- Each batch copies its rows' values onto their people with one
+  UPDATE ... FROM unnest(...) (a person's last row wins, blank values keep
+  what the person has) and logs the people to analytics_changes, so the
+  incremental analytics worker recomputes their analytics after the import.
+
+A batch the database rejects is retried in halves, so only the offending
+rows are skipped; every skipped row is reported with its reason.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import JSON, Integer, Text, bindparam, cast, column, func, insert, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config import settings
+from database import engine
+from models.analytics_change import record_changes
+from models.gazette import Gazette, GazettePriority, GazetteStatus, GazetteType
+from models.people import People
+from models.search_vectors import name_key
+
+logger = logging.getLogger(__name__)
+
+gazette_table = Gazette.__table__
+people_table = People.__table__
+
+# Serializes person creation between concurrent imports
+_ADVISORY_LOCK_KEY = 0x475A4554  # "GZET"
+
+# Frame columns named "person.<column>" hold People values for the people an import creates
+NEW_PERSON_PREFIX = "person."
+
+# gazette_entries values for every imported row the frame does not set itself
+GAZETTE_DEFAULTS = {
+    "status": GazetteStatus.PUBLISHED,
+    "priority": GazettePriority.MEDIUM,
+    "jurisdiction": "Ghana",
+    "is_public": True,
+}
+
+# gazette_entries columns the importer sets itself
+_MANAGED_COLUMNS = {"id", "gazette_type", "person_id", "import_key", "created_at", "updated_at"}
+
+DATE_FORMATS = [
+    "%d %B, %Y",  # 23 February, 2017 (ordinal suffixes are stripped first)
+    "%d %B %Y",   # 18 November 2019
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y"
+]
+
+# "No. 172, 18th November 2019, Page 3516"
+GAZETTE_SOURCE_PATTERN = r"No\.\s*(\d+),\s*(\d+(?:st|nd|rd|th)?\s+\w+,?\s+\d{4}),\s*Page\s*(\d+)"
+
+
+def blank_column(index) -> pd.Series:
+    return pd.Series(None, index=index, dtype=object)
+
+
+def sheet_column(sheet: pd.DataFrame, name: Optional[str]) -> pd.Series:
+    """A sheet column by name, or an all-blank column if the sheet has no such column"""
+    return sheet[name] if name is not None and name in sheet.columns else blank_column(sheet.index)
+
+
+def text_values(cells: pd.Series) -> pd.Series:
+    """Cells as stripped text; blank and missing cells become None"""
+    stripped = cells.astype("string").str.strip()
+    return stripped.astype(object).where(stripped.fillna("") != "", None)
+
+
+def clean_names(cells: pd.Series) -> pd.Series:
+    """Names with whitespace runs collapsed to one space; blank names become None"""
+    return text_values(text_values(cells).astype("string").str.replace(r"\s+", " ", regex=True))
+
+
+def name_keys(names: pd.Series) -> pd.Series:
+    """The normalized-name key of each name, as name_key computes it in SQL"""
+    cleaned = clean_names(names)
+    return cleaned.astype("string").str.lower().astype(object).where(cleaned.notna(), None)
+
+
+def integer_values(cells: pd.Series) -> pd.Series:
+    """Cells as ints; blank and non-numeric cells become None"""
+    numbers = pd.to_numeric(cells, errors="coerce")
+    return pd.Series([None if pd.isna(number) else int(number) for number in numbers], index=cells.index, dtype=object)
+
+
+def parse_dates(cells: pd.Series, formats: List[str] = DATE_FORMATS) -> pd.Series:
+    """
+    Parse date cells ("23rd February, 2017", "18 November 2019", Excel dates)
+    with the first format that fits each cell; other cells become None.
+    """
+    dates = text_values(cells).astype("string").str.replace(r"(\d+)(st|nd|rd|th)\b", r"\1", regex=True)
+    parsed = pd.Series(pd.NaT, index=cells.index, dtype="datetime64[us]")
+    for date_format in formats:
+        parsed = parsed.fillna(pd.to_datetime(dates, format=date_format, errors="coerce"))
+    unparsed = int((dates.notna() & parsed.isna()).sum())
+    if unparsed:
+        logger.warning(f"Could not parse {unparsed} dates in column {cells.name}")
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
+def split_gazette_source(cells: pd.Series) -> pd.DataFrame:
+    """Gazette number, date and page of "No. 172, 18th November 2019, Page 3516" style source cells"""
+    parts = text_values(cells).astype("string").str.extract(GAZETTE_SOURCE_PATTERN, flags=re.IGNORECASE)
+    return pd.DataFrame({
+        "gazette_number": text_values(parts[0]),
+        "gazette_date": parse_dates(parts[1]),
+        "page_number": integer_values(parts[2]),
+    }, index=cells.index)
+
+
+def _present(cells: pd.Series) -> pd.Series:
+    """Cells with blanks (None, NaN, "", []) as None"""
+    present = cells.map(lambda value: bool(value) if isinstance(value, (list, str)) else not pd.isna(value))
+    return cells.astype(object).where(present, None)
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Frame rows as dicts of plain Python values, missing values as None"""
+    cells = frame.astype(object)
+    return cells.where(cells.notna(), None).to_dict("records")
+
+
+# Upload layouts (the columns of the sheets the gazette import page accepts)
+
+def _upload_common(sheet: pd.DataFrame, frame: pd.DataFrame, effective_column: str = "Effective Date",
+                   source_column: str = "Source") -> pd.DataFrame:
+    gazette_date = parse_dates(sheet_column(sheet, "Gazette Date"))
+    effective_date = parse_dates(sheet_column(sheet, effective_column))
+    frame["publication_date"] = gazette_date.where(gazette_date.notna(), effective_date)
+    frame["gazette_date"] = gazette_date
+    frame["effective_date"] = effective_date
+    frame["effective_date_of_change"] = effective_date
+    frame["source"] = text_values(sheet_column(sheet, source_column))
+    frame["gazette_number"] = text_values(sheet_column(sheet, "Gazette Number"))
+    frame["page_number"] = integer_values(sheet_column(sheet, "Page Number"))
+    return frame
+
+
+def _upload_change_of_name(sheet: pd.DataFrame) -> pd.DataFrame:
+    found = {}
+    for name in sheet.columns:
+        label = str(name).lower().strip()
+        if "old" in label and "name" in label:
+            found["old"] = name
+        elif "new" in label and "name" in label:
+            found["new"] = name
+        elif "alias" in label:
+            found["alias"] = name
+    old_name = text_values(sheet_column(sheet, found.get("old")))
+    new_name = text_values(sheet_column(sheet, found.get("new")))
+    aliases = text_values(sheet_column(sheet, found.get("alias")))
+    # The new name is the person's name, the old one is kept as an alias
+    primary = new_name.where(new_name.notna(), old_name)
+    alias_names = [
+        [alias.strip() for alias in (alias_cell or "").split(",") if alias.strip()]
+        + ([old] if old and old != new else [])
+        for alias_cell, old, new in zip(aliases, old_name, new_name)
+    ]
+    frame = pd.DataFrame({
+        "person_name": primary,
+        "title": "Change of Name - " + primary.fillna(""),
+        "content": "Name change from " + old_name.fillna("") + " to " + new_name.fillna(""),
+        "old_name": old_name,
+        "new_name": new_name,
+        "alias_names": pd.Series(alias_names, index=sheet.index, dtype=object),
+    }, index=sheet.index)
+    return _upload_common(sheet, frame)
+
+
+def _upload_change_of_date_of_birth(sheet: pd.DataFrame) -> pd.DataFrame:
+    name = text_values(sheet_column(sheet, "Name"))
+    old_dob = parse_dates(sheet_column(sheet, "Old Date of Birth"))
+    new_dob = parse_dates(sheet_column(sheet, "New Date of Birth"))
+    frame = pd.DataFrame({
+        "person_name": name,
+        "title": "Change of Date of Birth - " + name.fillna(""),
+        "content": "Date of birth change from " + old_dob.map(str) + " to " + new_dob.map(str),
+        "old_date_of_birth": old_dob,
+        "new_date_of_birth": new_dob,
+    }, index=sheet.index)
+    return _upload_common(sheet, frame)
+
+
+def _upload_change_of_place_of_birth(sheet: pd.DataFrame) -> pd.DataFrame:
+    name = text_values(sheet_column(sheet, "Name"))
+    old_pob = text_values(sheet_column(sheet, "Old Place of Birth"))
+    new_pob = text_values(sheet_column(sheet, "New Place of Birth"))
+    frame = pd.DataFrame({
+        "person_name": name,
+        "title": "Change of Place of Birth - " + name.fillna(""),
+        "content": "Place of birth change from " + old_pob.fillna("") + " to " + new_pob.fillna(""),
+        "old_place_of_birth": old_pob,
+        "new_place_of_birth": new_pob,
+    }, index=sheet.index)
+    return _upload_common(sheet, frame)
+
+
+def _upload_marriage_officers(sheet: pd.DataFrame) -> pd.DataFrame:
+    officer = text_values(sheet_column(sheet, "Name of the Appointed Marriage Officer"))
+    church = text_values(sheet_column(sheet, "Church of the Marriage Officer"))
+    location = text_values(sheet_column(sheet, "Location of the Church"))
+    authority = text_values(sheet_column(sheet, "Appointing Authority"))
+    title = "Appointment of Marriage Officer - " + officer.fillna("")
+    frame = pd.DataFrame({
+        "person_name": officer,
+        "title": title,
+        "content": (
+            title + "\n\nOfficer Details:\n- Name: " + officer.fillna("")
+            + "\n- Church: " + church.fillna("")
+            + "\n- Location: " + location.fillna("")
+            + "\n- Appointing Authority: " + authority.fillna("")
+        ),
+        "officer_name": officer,
+        "officer_title": "Marriage Officer",
+        "appointment_authority": authority,
+        "jurisdiction_area": location,
+        "person.occupation": "Marriage Officer",
+        "person.organization": church,
+        "person.address": location,
+    }, index=sheet.index)
+    return _upload_common(sheet, frame, effective_column="Appointment Date",
+                          source_column="Source (Gazette No., Date, Page)")
+
+
+UPLOAD_NORMALIZERS = {
+    GazetteType.CHANGE_OF_NAME: _upload_change_of_name,
+    GazetteType.CHANGE_OF_DATE_OF_BIRTH: _upload_change_of_date_of_birth,
+    GazetteType.CHANGE_OF_PLACE_OF_BIRTH: _upload_change_of_place_of_birth,
+    GazetteType.APPOINTMENT_OF_MARRIAGE_OFFICERS: _upload_marriage_officers,
+}
+
+# People column -> gazette value copied onto the person by the upload, per gazette type
+_GAZETTE_REFERENCE_SYNC = {"gazette_source": "source", "gazette_reference": "gazette_number"}
+UPLOAD_PERSON_SYNC = {
+    GazetteType.CHANGE_OF_NAME: dict(
+        previous_names="alias_names", effective_date_of_change="effective_date_of_change", **_GAZETTE_REFERENCE_SYNC
+    ),
+    GazetteType.CHANGE_OF_DATE_OF_BIRTH: dict(
+        date_of_birth="new_date_of_birth", effective_date_of_change="effective_date_of_change", **_GAZETTE_REFERENCE_SYNC
+    ),
+    GazetteType.CHANGE_OF_PLACE_OF_BIRTH: dict(
+        place_of_birth="new_place_of_birth", effective_date_of_change="effective_date_of_change", **_GAZETTE_REFERENCE_SYNC
+    ),
+    GazetteType.APPOINTMENT_OF_MARRIAGE_OFFICERS: dict(
+        job_title="officer_title", employer="appointment_authority", address="jurisdiction_area", **_GAZETTE_REFERENCE_SYNC
+    ),
+}
+
+
+def normalize_upload(sheet: pd.DataFrame, gazette_type: GazetteType) -> pd.DataFrame:
+    """Turn an uploaded sheet of a supported gazette type into an import frame"""
+    frame = UPLOAD_NORMALIZERS[gazette_type](sheet)
+    frame["row"] = sheet.index + 1
+    return frame
+
+
+class GazetteBulkImporter:
+    """Imports frames of gazette rows with set-based person matching and batched inserts"""
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    def import_frame(self, frame: pd.DataFrame, gazette_type: GazetteType,
+                     person_sync: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Import a frame with one row per gazette entry: the person's name in
+        person_name, gazette_entries values in columns of the same name,
+        values for people the import creates in "person.<column>" columns
+        and optionally the sheet row number in row (for error reports).
+
+        Args:
+            frame: Rows to import
+            gazette_type: Type of every imported entry
+            person_sync: People column -> frame column copied onto each row's person
+
+        Returns:
+            dict: total_rows, imported_count, duplicate_count (rows imported
+            before), skipped_count, created_people, updated_people and errors
+            ({"row", "name", "error"} for every skipped row)
+        """
+        start_time = time.time()
+        result = {
+            "total_rows": len(frame),
+            "imported_count": 0,
+            "duplicate_count": 0,
+            "skipped_count": 0,
+            "created_people": 0,
+            "updated_people": 0,
+            "errors": [],
+        }
+        frame = frame.copy()
+        if "row" not in frame.columns:
+            frame["row"] = range(1, len(frame) + 1)
+
+        frame["person_name"] = clean_names(frame["person_name"])
+        frame["name_key"] = name_keys(frame["person_name"])
+        frame = self._reject(result, frame, frame["name_key"].isna(), "No name")
+        too_long = frame["person_name"].str.len() > people_table.c.full_name.type.length
+        frame = self._reject(result, frame, too_long, "Name is too long")
+
+        columns = [name for name in frame.columns if name in gazette_table.c and name not in _MANAGED_COLUMNS]
+        if "publication_date" not in columns:
+            frame["publication_date"] = None
+            columns.append("publication_date")
+        # Entries without any date are published as of the import
+        frame["publication_date"] = frame["publication_date"].where(frame["publication_date"].notna(), datetime.now())
+
+        frame["import_key"] = self._import_keys(frame, gazette_type, [name for name in columns if name != "publication_date"])
+        # Rows repeated in the sheet or imported before (ON CONFLICT still covers concurrent imports)
+        with engine.connect() as conn:
+            imported = set(conn.execute(
+                select(gazette_table.c.import_key).where(gazette_table.c.import_key.in_(frame["import_key"].tolist()))
+            ).scalars())
+        repeated = frame["import_key"].duplicated() | frame["import_key"].isin(imported)
+        result["duplicate_count"] += int(repeated.sum())
+        frame = frame[~repeated]
+
+        if not frame.empty:
+            frame["person_id"] = self._resolve_people(frame, result)
+            for start in range(0, len(frame), self.batch_size):
+                self._import_batch(frame.iloc[start:start + self.batch_size], gazette_type, columns, person_sync or {}, result)
+
+        logger.info(
+            f"Imported {result['imported_count']} of {result['total_rows']} {gazette_type.value} gazette rows "
+            f"({result['duplicate_count']} already imported, {result['skipped_count']} skipped, "
+            f"{result['created_people']} new people) in {time.time() - start_time:.2f}s"
+        )
+        return result
+
+    @staticmethod
+    def _reject(result: Dict[str, Any], frame: pd.DataFrame, mask: pd.Series, message: str) -> pd.DataFrame:
+        """Report the masked rows as skipped and return the others"""
+        rejected = frame[mask]
+        result["skipped_count"] += len(rejected)
+        result["errors"].extend(
+            {"row": int(row), "name": name, "error": message}
+            for row, name in zip(rejected["row"], rejected["person_name"])
+        )
+        return frame[~mask]
+
+    @staticmethod
+    def _import_keys(frame: pd.DataFrame, gazette_type: GazetteType, key_columns: List[str]) -> pd.Series:
+        """Hash of each row's gazette type, person and values, identifying it across imports"""
+        content = gazette_type.value + "\x1f" + frame["name_key"]
+        for name in sorted(key_columns):
+            content = content + "\x1f" + frame[name].map(str)
+        return pd.Series(
+            [hashlib.sha256(row.encode()).hexdigest() for row in content],
+            index=frame.index, dtype=object
+        )
+
+    def _resolve_people(self, frame: pd.DataFrame, result: Dict[str, Any]) -> pd.Series:
+        """Person id of every row, creating the people not found by normalized name"""
+        firsts = frame.drop_duplicates("name_key")
+        key_column = name_key(people_table.c.full_name)
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            # The oldest person with the name, as the ILIKE lookups mostly found
+            person_ids = dict(conn.execute(
+                select(key_column, func.min(people_table.c.id))
+                .where(key_column.in_(firsts["name_key"].tolist()))
+                .group_by(key_column)
+            ).all())
+            new_people = firsts[~firsts["name_key"].isin(person_ids)]
+            if not new_people.empty:
+                created = conn.execute(
+                    insert(people_table).returning(people_table.c.id, sort_by_parameter_order=True),
+                    self._new_people(new_people)
+                ).scalars().all()
+                person_ids.update(zip(new_people["name_key"], created))
+                record_changes(conn, "people", created, "insert")
+                result["created_people"] += len(created)
+        return frame["name_key"].map(person_ids)
+
+    @staticmethod
+    def _new_people(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        names = frame["person_name"].astype("string")
+        parts = names.str.split(" ", n=1)
+        people = pd.DataFrame({
+            "full_name": names,
+            "first_name": parts.str[0].str.slice(0, people_table.c.first_name.type.length),
+            "last_name": parts.str[1].fillna("").str.slice(0, people_table.c.last_name.type.length),
+            "created_by": None,
+        }, index=frame.index)
+        for name in frame.columns:
+            if name.startswith(NEW_PERSON_PREFIX):
+                target = name[len(NEW_PERSON_PREFIX):]
+                cells = text_values(frame[name])
+                length = getattr(people_table.c[target].type, "length", None)
+                people[target] = cells.astype("string").str.slice(0, length) if length else cells
+        return _records(people)
+
+    def _import_batch(self, batch: pd.DataFrame, gazette_type: GazetteType, columns: List[str],
+                      person_sync: Dict[str, str], result: Dict[str, Any]) -> None:
+        """Insert a batch; a batch the database rejects is split in halves until the offending rows are isolated"""
+        try:
+            inserted, updated = self._write(batch, gazette_type, columns, person_sync)
+        except (IntegrityError, DataError) as e:
+            if len(batch) > 1:
+                logger.warning(f"Gazette import batch of {len(batch)} rows rejected, retrying it in halves: {e.orig}")
+                middle = len(batch) // 2
+                for half in (batch.iloc[:middle], batch.iloc[middle:]):
+                    self._import_batch(half, gazette_type, columns, person_sync, result)
+                return
+            reason = str(e.orig).strip().splitlines()[0]
+            self._reject(result, batch, pd.Series(True, index=batch.index), reason)
+            return
+        result["imported_count"] += inserted
+        result["duplicate_count"] += len(batch) - inserted
+        result["updated_people"] += updated
+
+    def _write(self, batch: pd.DataFrame, gazette_type: GazetteType, columns: List[str],
+               person_sync: Dict[str, str]):
+        """
+        Insert a batch's new entries and update their people, in one transaction.
+
+        Returns:
+            tuple: (entries inserted, people updated)
+        """
+        rows = [
+            dict(GAZETTE_DEFAULTS, **row, gazette_type=gazette_type)
+            for row in _records(batch[columns + ["person_id", "import_key"]])
+        ]
+        statement = (
+            pg_insert(gazette_table)
+            .on_conflict_do_nothing(index_elements=["import_key"])
+            .returning(gazette_table.c.import_key)
+        )
+        with engine.begin() as conn:
+            inserted_keys = set(conn.execute(statement, rows).scalars())
+            inserted = batch[batch["import_key"].isin(inserted_keys)]
+            updated = self._sync_people(conn, inserted, person_sync)
+            record_changes(conn, "people", sorted(set(inserted["person_id"].tolist())))
+        return len(inserted), updated
+
+    @staticmethod
+    def _sync_people(conn, rows: pd.DataFrame, person_sync: Dict[str, str]) -> int:
+        """Copy each person's last row's non-blank values onto them with one UPDATE ... FROM unnest(...)"""
+        if not person_sync or rows.empty:
+            return 0
+        latest = rows.drop_duplicates("person_id", keep="last")
+        updates = pd.DataFrame({"id": latest["person_id"]}, index=latest.index)
+        for target, source in person_sync.items():
+            updates[target] = _present(latest[source])
+        updates = updates[updates[list(person_sync)].notna().any(axis=1)]
+        if updates.empty:
+            return 0
+
+        # One array parameter per column, unnested into rows: the statement's SQL does not grow with the batch
+        # JSON values travel as text (PostgreSQL arrays cannot hold nested lists)
+        records = _records(updates)
+        json_columns = {name for name in person_sync if isinstance(people_table.c[name].type, JSON)}
+        for record in records:
+            for name in json_columns:
+                if record[name] is not None:
+                    record[name] = json.dumps(record[name])
+        types = dict({"id": Integer()}, **{
+            name: Text() if name in json_columns else people_table.c[name].type for name in person_sync
+        })
+        gazette_values = func.unnest(*(
+            cast(bindparam(name, [record[name] for record in records]), ARRAY(column_type))
+            for name, column_type in types.items()
+        )).table_valued(*(column(name, column_type) for name, column_type in types.items()), name="gazette_values").render_derived()
+        synced = {
+            name: func.coalesce(
+                cast(gazette_values.c[name], JSON) if name in json_columns else gazette_values.c[name],
+                people_table.c[name]
+            )
+            for name in person_sync
+        }
+        return conn.execute(
+            update(people_table)
+            .where(
+                people_table.c.id == gazette_values.c.id,
+                # Leave people the rows do not change alone (re-imports, repeated rows)
+                or_(*(cast(people_table.c[name], Text).is_distinct_from(cast(value, Text)) for name, value in synced.items()))
+            )
+            .values(synced)
+        ).rowcount
+
+
+gazette_importer = GazetteBulkImporter(batch_size=settings.gazette_import_batch_size)
@@ -0,0 +1,219 @@
+"""
+Excel gazette imports with bounded memory and full error reports.
+
+The upload endpoint used to read the whole upload into memory, load the
+whole sheet with pd.read_excel and return only the first 10 errors, so a
+large gazette archive cost the worker gigabytes of memory. An import now
+runs as a GazetteImportJob:
+
+- save_upload streams the upload to a temporary file,
+  settings.gazette_import_upload_chunk_bytes at a time.
+- read_sheet_chunks reads the sheet with openpyxl's read-only reader and
+  yields settings.gazette_import_chunk_rows rows at a time, each imported
+  with gazette_importer (services/gazette_bulk_import.py). Memory is bounded
+  by the chunk size, not the sheet size; import keys make rows repeated
+  across chunks count as already imported.
+- The job's counts are updated after every chunk, for job_progress.
+- Every skipped row is appended to a CSV error report in
+  settings.gazette_import_report_dir.
+
+Jobs run in the API process that received the upload (the upload is on its
+disk), so a job whose process stops stays "running".
+"""
+
+import csv
+import logging
+import os
+import tempfile
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import engine
+from models.gazette import GazetteType
+from models.gazette_import_job import GazetteImportJob
+from services.gazette_bulk_import import UPLOAD_PERSON_SYNC, gazette_importer, normalize_upload
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+jobs_table = GazetteImportJob.__table__
+
+# Workbooks openpyxl reads; other Excel files (legacy .xls) are loaded whole by pandas
+STREAMED_EXTENSIONS = (".xlsx", ".xlsm")
+ERROR_REPORT_COLUMNS = ["row", "name", "error"]
+COUNT_COLUMNS = ("imported_count", "duplicate_count", "skipped_count", "created_people", "updated_people")
+
+
+async def save_upload(upload: UploadFile, suffix: str) -> str:
+    """Write an upload to a temporary file chunk by chunk; returns its path"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        while chunk := await upload.read(settings.gazette_import_upload_chunk_bytes):
+            tmp_file.write(chunk)
+        return tmp_file.name
+
+
+def _cell_value(value: Any) -> Any:
+    # As pd.read_excel does, whole numbers are ints (Excel stores every number as a float)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _header(values: tuple) -> List[str]:
+    return [f"Unnamed: {position}" if value is None else str(value) for position, value in enumerate(values)]
+
+
+def sheet_row_count(path: str) -> Optional[int]:
+    """Rows below the header of the first sheet, from its dimensions (None if the workbook does not record them)"""
+    if not path.lower().endswith(STREAMED_EXTENSIONS):
+        return None
+    # Imported here so the API starts without openpyxl; only an import needs it
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        max_row = workbook.worksheets[0].max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def read_sheet_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield the first sheet of a workbook as frames of up to chunk_rows rows,
+    with the header row as column names and the row's position below the
+    header as index (as pd.read_excel numbers them). Cells keep their own
+    types (dtype object), so a chunk's values do not depend on the other
+    rows in it; blank rows are left out.
+    """
+    if not path.lower().endswith(STREAMED_EXTENSIONS):
+        # Legacy .xls has no streaming reader, but holds at most 65,536 rows
+        sheet = pd.read_excel(path, header=0, dtype=object)
+        for start in range(0, len(sheet), chunk_rows):
+            yield sheet.iloc[start:start + chunk_rows]
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        values, positions = [], []
+        for position, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+            row = [_cell_value(value) for value in row[:len(header)]]
+            values.append(row + [None] * (len(header) - len(row)))
+            positions.append(position)
+            if len(values) == chunk_rows:
+                yield pd.DataFrame(values, columns=header, index=positions, dtype=object)
+                values, positions = [], []
+        if values:
+            yield pd.DataFrame(values, columns=header, index=positions, dtype=object)
+    finally:
+        workbook.close()
+
+
+def create_job(db: Session, gazette_type: GazetteType, filename: Optional[str],
+               requested_by: Optional[str] = None) -> GazetteImportJob:
+    """Record a queued import job"""
+    job = GazetteImportJob(gazette_type=gazette_type.value, filename=filename, status="queued", requested_by=requested_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _update_job(job_id: int, **values: Any) -> None:
+    with engine.begin() as conn:
+        conn.execute(update(jobs_table).where(jobs_table.c.id == job_id).values(**values))
+
+
+def run_job(job_id: int, path: str) -> None:
+    """
+    Import the uploaded workbook at path for a queued job, then delete it.
+    Runs in a worker thread; failures are recorded on the job.
+    """
+    with engine.connect() as conn:
+        gazette_type = GazetteType(conn.execute(
+            select(jobs_table.c.gazette_type).where(jobs_table.c.id == job_id)
+        ).scalar_one())
+
+    os.makedirs(settings.gazette_import_report_dir, exist_ok=True)
+    report_path = os.path.join(settings.gazette_import_report_dir, f"gazette-import-{job_id}-errors.csv")
+    skipped = 0
+    try:
+        _update_job(job_id, status="running", started_at=func.now(), total_rows=sheet_row_count(path))
+        with open(report_path, "w", newline="", encoding="utf-8") as report:
+            writer = csv.DictWriter(report, fieldnames=ERROR_REPORT_COLUMNS)
+            writer.writeheader()
+            for chunk in read_sheet_chunks(path, settings.gazette_import_chunk_rows):
+                result = gazette_importer.import_frame(
+                    normalize_upload(chunk, gazette_type), gazette_type, UPLOAD_PERSON_SYNC[gazette_type]
+                )
+                writer.writerows(result["errors"])
+                report.flush()
+                skipped += result["skipped_count"]
+                if result["imported_count"]:
+                    response_cache.invalidate("gazette", "people")
+                _update_job(
+                    job_id,
+                    processed_rows=int(chunk.index[-1]) + 1,
+                    **{name: jobs_table.c[name] + result[name] for name in COUNT_COLUMNS},
+                )
+        _update_job(job_id, status="completed", finished_at=func.now(), error_report=report_path if skipped else None)
+    except Exception as e:
+        logger.exception(f"Gazette import job {job_id} failed")
+        # Rows skipped before the failure are still reported
+        _update_job(job_id, status="failed", finished_at=func.now(), error=str(e),
+                    error_report=report_path if skipped else None)
+    finally:
+        if not skipped and os.path.exists(report_path):
+            os.unlink(report_path)
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def read_error_report(job: GazetteImportJob, limit: int) -> List[Dict[str, str]]:
+    """The first rows of a job's error report"""
+    if not job.error_report or not os.path.exists(job.error_report):
+        return []
+    with open(job.error_report, newline="", encoding="utf-8") as report:
+        return list(islice(csv.DictReader(report), limit))
+
+
+def job_progress(db: Session, job: GazetteImportJob) -> Dict[str, Any]:
+    """Status, counts and completion rate of an import job"""
+    progress = {
+        "job_id": job.id,
+        "gazette_type": job.gazette_type,
+        "filename": job.filename,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        **{name: getattr(job, name) for name in COUNT_COLUMNS},
+        "has_error_report": bool(job.error_report),
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == "completed":
+        progress["completion_percentage"] = 100.0
+    elif job.total_rows:
+        progress["completion_percentage"] = round(min(job.processed_rows / job.total_rows, 1) * 100, 2)
+
+    if job.started_at and job.processed_rows:
+        # Job timestamps are database time
+        now = job.finished_at or db.execute(select(func.localtimestamp())).scalar()
+        elapsed = (now - job.started_at).total_seconds()
+        if elapsed > 0:
+            progress["rows_per_minute"] = round(job.processed_rows / elapsed * 60, 1)
+    return progress
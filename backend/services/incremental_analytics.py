@@ -0,0 +1,250 @@
+"""
+Incremental analytics: recompute only what a change affects.
+
+Writes to reported_cases, gazette_entries and people are logged to
+analytics_changes in the writing transaction (models/analytics_change.py).
+The analytics worker (analytics_worker.py) consumes them in two steps:
+
+- mark_dirty resolves a batch of unprocessed changes to the people, banks,
+  insurers and companies they affect and upserts those into analytics_dirty.
+  A changed person, or a gazette entry's person, is known when the change is
+  logged. A case's parties are read from case_parties when the change is
+  processed (settings.analytics_change_delay_seconds after the write, so the
+  parties index written after the case has caught up), and the names a case
+  had before an edit or delete are logged with the change. Both resolve to
+  the entities whose names they contain (EntityNameMatcher), the substring
+  rule the analytics themselves use to collect an entity's cases.
+- claim locks dirty entities with FOR UPDATE SKIP LOCKED and recompute
+  regenerates each one's analytics and case statistics. An entity marked again
+  while it is being recomputed stays dirty for another pass.
+
+Processed changes are kept for settings.analytics_change_retention_hours and
+then deleted by purge_processed, so the change log does not grow forever.
+
+The dirty set collapses repeated changes: a person named in fifty edited
+cases is recomputed once. Full regenerations (services/analytics_jobs.py)
+are only needed when the analytics calculations themselves change.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from database import SessionLocal, engine
+from models.analytics_change import AnalyticsChange, AnalyticsDirty
+from models.case_parties import ANALYTICS_ROLES, CaseParty
+from services.case_party_index import EntityNameMatcher
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ("people", "banks", "insurance", "companies")
+RETRY_BASE_SECONDS = 30
+# Processed changes deleted per statement
+PURGE_BATCH_SIZE = 10000
+
+changes_table = AnalyticsChange.__table__
+dirty_table = AnalyticsDirty.__table__
+parties_table = CaseParty.__table__
+
+
+def _recompute(db, entity_type: str, entity_id: int) -> None:
+    """Regenerate one entity's analytics and case statistics"""
+    # Imported here so the worker module loads without the analytics stack until it runs
+    if entity_type == "people":
+        from services.auto_analytics_generator import AutoAnalyticsGenerator
+        AutoAnalyticsGenerator(db).generate_analytics_for_person(entity_id)
+    elif entity_type == "banks":
+        from services.bank_analytics_service import BankAnalyticsService
+        service = BankAnalyticsService(db)
+        service.generate_bank_analytics(entity_id)
+        service.generate_bank_case_statistics(entity_id)
+    elif entity_type == "insurance":
+        from services.insurance_analytics_service import InsuranceAnalyticsService
+        service = InsuranceAnalyticsService(db)
+        service.generate_insurance_analytics(entity_id)
+        service.generate_insurance_case_statistics(entity_id)
+    elif entity_type == "companies":
+        from services.company_analytics_service import CompanyAnalyticsService
+        service = CompanyAnalyticsService(db)
+        service.generate_company_analytics(entity_id)
+        service.generate_company_case_statistics(entity_id)
+    else:
+        raise ValueError(f"Unknown analytics entity type: {entity_type}")
+
+
+def pending_counts(db) -> Dict[str, Any]:
+    """Unprocessed changes and dirty entities by type, for the status endpoint"""
+    return {
+        "unprocessed_changes": db.query(func.count(AnalyticsChange.id)).filter(AnalyticsChange.processed_at.is_(None)).scalar(),
+        "dirty": dict(
+            db.query(AnalyticsDirty.entity_type, func.count())
+            .group_by(AnalyticsDirty.entity_type)
+            .all()
+        ),
+    }
+
+
+class IncrementalAnalytics:
+    """Turns logged changes into dirty entities and recomputes them; run one per worker process"""
+
+    def __init__(self, worker_id: str, batch_size: int = 10, change_batch_size: int = 1000,
+                 max_attempts: Optional[int] = None, lock_timeout_minutes: Optional[int] = None):
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.change_batch_size = change_batch_size
+        self.max_attempts = max_attempts or settings.analytics_task_max_attempts
+        self.lock_timeout = timedelta(minutes=lock_timeout_minutes or settings.analytics_task_lock_timeout_minutes)
+        self.delay = timedelta(seconds=settings.analytics_change_delay_seconds)
+        self.retention = timedelta(hours=settings.analytics_change_retention_hours)
+        self.names = EntityNameMatcher(refresh_seconds=settings.analytics_entity_names_refresh_minutes * 60)
+        self.stats = {"changes": 0, "recomputed": 0, "dropped": 0}
+
+    def mark_dirty(self) -> int:
+        """Resolve a batch of settled, unprocessed changes into analytics_dirty; returns the changes processed"""
+        with engine.begin() as conn:
+            changes = conn.execute(
+                select(changes_table.c.id, changes_table.c.source, changes_table.c.source_id,
+                       changes_table.c.entity_type, changes_table.c.entity_id, changes_table.c.party_names)
+                .where(changes_table.c.processed_at.is_(None), changes_table.c.created_at <= func.now() - self.delay)
+                .order_by(changes_table.c.id)
+                .limit(self.change_batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not changes:
+                return 0
+
+            targets: Set[Tuple[str, int]] = {
+                (change.entity_type, change.entity_id) for change in changes if change.entity_type
+            }
+            case_changes = [change for change in changes if not change.entity_type and change.source == "reported_cases"]
+            names = {name for change in case_changes if change.party_names for name in change.party_names.split("\n")}
+            case_ids = {change.source_id for change in case_changes}
+            if case_ids:
+                for role, normalized_name, entity_type, entity_id in conn.execute(
+                    select(parties_table.c.role, parties_table.c.normalized_name,
+                           parties_table.c.entity_type, parties_table.c.entity_id)
+                    .where(parties_table.c.case_id.in_(case_ids))
+                ):
+                    if entity_type in ENTITY_TYPES:
+                        targets.add((entity_type, entity_id))
+                    if role in ANALYTICS_ROLES:
+                        names.add(normalized_name)
+            targets.update(self.names.match(engine, names))
+
+            if targets:
+                statement = insert(dirty_table).values([
+                    {"entity_type": entity_type, "entity_id": entity_id}
+                    for entity_type, entity_id in sorted(targets)
+                ])
+                conn.execute(statement.on_conflict_do_update(
+                    index_elements=["entity_type", "entity_id"],
+                    set_={"marked_at": func.now(), "attempts": 0, "available_at": func.now()}
+                ))
+            conn.execute(
+                update(changes_table)
+                .where(changes_table.c.id.in_([change.id for change in changes]))
+                .values(processed_at=func.now())
+            )
+
+        self.stats["changes"] += len(changes)
+        logger.info(f"Resolved {len(changes)} analytics changes to {len(targets)} dirty entities")
+        return len(changes)
+
+    def purge_processed(self) -> int:
+        """Delete changes processed longer ago than the retention window; returns the number deleted"""
+        deleted = 0
+        while True:
+            expired = select(changes_table.c.id).where(
+                changes_table.c.processed_at < func.now() - self.retention
+            ).limit(PURGE_BATCH_SIZE).with_for_update(skip_locked=True)
+            with engine.begin() as conn:
+                count = conn.execute(delete(changes_table).where(changes_table.c.id.in_(expired))).rowcount
+            deleted += count
+            if count < PURGE_BATCH_SIZE:
+                break
+        if deleted:
+            logger.info(f"Purged {deleted} processed analytics changes")
+        return deleted
+
+    def claim(self) -> List[Any]:
+        """Lock up to batch_size dirty entities for this worker"""
+        key = tuple_(dirty_table.c.entity_type, dirty_table.c.entity_id)
+        candidates = select(dirty_table.c.entity_type, dirty_table.c.entity_id).where(
+            dirty_table.c.locked_by.is_(None),
+            dirty_table.c.available_at <= func.now()
+        ).order_by(dirty_table.c.available_at).limit(self.batch_size).with_for_update(skip_locked=True)
+
+        with engine.begin() as conn:
+            return conn.execute(
+                update(dirty_table)
+                .where(key.in_(candidates))
+                .values(locked_by=self.worker_id, locked_at=func.now(), attempts=dirty_table.c.attempts + 1)
+                .returning(dirty_table.c.entity_type, dirty_table.c.entity_id,
+                           dirty_table.c.marked_at, dirty_table.c.attempts)
+            ).all()
+
+    def recompute(self, target) -> None:
+        """Recompute one dirty entity and clear it (unless it was marked again meanwhile)"""
+        row = and_(
+            dirty_table.c.entity_type == target.entity_type,
+            dirty_table.c.entity_id == target.entity_id,
+            dirty_table.c.locked_by == self.worker_id
+        )
+        db = SessionLocal()
+        try:
+            _recompute(db, target.entity_type, target.entity_id)
+            error = None
+        except ValueError as e:
+            # The entity was deleted; there is nothing left to recompute
+            db.rollback()
+            error = None
+            logger.info(f"Skipping {target.entity_type} {target.entity_id}: {e}")
+        except Exception as e:
+            db.rollback()
+            error = e
+        finally:
+            db.close()
+
+        with engine.begin() as conn:
+            if error is None:
+                self.stats["recomputed"] += 1
+                cleared = conn.execute(delete(dirty_table).where(row, dirty_table.c.marked_at == target.marked_at)).rowcount
+                if not cleared:
+                    conn.execute(update(dirty_table).where(row).values(locked_by=None, locked_at=None))
+            elif target.attempts >= self.max_attempts:
+                self.stats["dropped"] += 1
+                logger.error(f"Giving up on analytics for {target.entity_type} {target.entity_id} "
+                             f"after {target.attempts} attempts: {error}")
+                conn.execute(delete(dirty_table).where(row, dirty_table.c.marked_at == target.marked_at))
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (target.attempts - 1)
+                logger.warning(f"Analytics for {target.entity_type} {target.entity_id} attempt {target.attempts} failed: {error}")
+                conn.execute(update(dirty_table).where(row).values(
+                    locked_by=None, locked_at=None, last_error=str(error)[:2000],
+                    available_at=func.now() + timedelta(seconds=delay)
+                ))
+
+    def release_stale(self) -> int:
+        """Unlock dirty entities held longer than the lock timeout (their worker died)"""
+        with engine.begin() as conn:
+            return conn.execute(
+                update(dirty_table)
+                .where(dirty_table.c.locked_by.isnot(None), dirty_table.c.locked_at < func.now() - self.lock_timeout)
+                .values(locked_by=None, locked_at=None)
+            ).rowcount
+
+    def release(self, targets: List[Any]) -> None:
+        """Hand claimed but unstarted entities back"""
+        with engine.begin() as conn:
+            for target in targets:
+                conn.execute(
+                    update(dirty_table)
+                    .where(dirty_table.c.entity_type == target.entity_type,
+                           dirty_table.c.entity_id == target.entity_id,
+                           dirty_table.c.locked_by == self.worker_id)
+                    .values(locked_by=None, locked_at=None, attempts=dirty_table.c.attempts - 1)
+                )
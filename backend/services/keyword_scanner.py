@@ -0,0 +1,170 @@
+"""
+One-pass keyword matching over case text.
+
+The analytics services score cases by which phrases of their keyword tables
+(risk categories, subject matter, legal issues, financial terms, outcome
+indicators) occur in a case's text. Testing each phrase with
+``keyword.lower() in case_text.lower()`` lowercased the whole judgment once
+per phrase per case, and every table and service scanned the text again.
+
+The shared `scanner` holds every phrase the services register and finds all
+of them in one pass over the lowercased text, with results equal to plain
+substring tests:
+
+- With pyahocorasick installed, an Aho-Corasick automaton reports every
+  occurrence of every phrase.
+- Otherwise the phrases are compiled into a trie-shaped regex alternation
+  inside a lookahead, so the scan tries each position once and reports the
+  longest phrase starting there; the shorter phrases a match contains
+  (``breach`` in ``breach of contract``) are added from a precomputed table.
+
+The phrases found in a case are cached on the case object per combination of
+text fields, so each service's later lookups for the same case are set
+membership tests.
+
+    scanner.register(["fraud", "breach of contract"])
+    found = scanner.case_hits(case, ("title", "decision"))
+    "fraud" in found
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_CACHE_ATTRIBUTE = "_keyword_hits"
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex alternation for phrases with common prefixes factored out (longest match first)"""
+    trie: Dict[str, Any] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase can end here: the longer continuation is optional
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _build_automaton(phrases: Sequence[str]):
+    """Aho-Corasick automaton over phrases, or None without pyahocorasick"""
+    try:
+        import ahocorasick
+    except ImportError:
+        logger.info("pyahocorasick is not installed; scanning keywords with a regex")
+        return None
+    automaton = ahocorasick.Automaton()
+    for phrase in phrases:
+        automaton.add_word(phrase, phrase)
+    automaton.make_automaton()
+    return automaton
+
+
+class KeywordScanner:
+    """Finds which registered phrases occur in a text, in one pass"""
+
+    def __init__(self):
+        self._phrases = set()
+        self._automaton = None
+        self._pattern = None
+        self._contained: Dict[str, FrozenSet[str]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def register(self, phrases: Iterable[str]) -> None:
+        """Add phrases to match (case-insensitive); cheap when they are already registered"""
+        new = {phrase.lower() for phrase in phrases if phrase} - self._phrases
+        if not new:
+            return
+        with self._lock:
+            self._phrases |= new
+            self._automaton = None
+            self._pattern = None
+            self._version += 1
+
+    def register_categories(self, categories: Dict[str, Any]) -> None:
+        """Register a {category: keywords} table (or {category: {"keywords": [...]}})"""
+        for keywords in categories.values():
+            self.register(keywords["keywords"] if isinstance(keywords, dict) else keywords)
+
+    def _compile(self):
+        """Build the automaton (or the fallback regex) for the registered phrases"""
+        with self._lock:
+            if self._automaton is None and self._pattern is None:
+                phrases = sorted(self._phrases)
+                automaton = _build_automaton(phrases)
+                if automaton is not None:
+                    self._automaton = automaton
+                else:
+                    self._contained = {
+                        phrase: frozenset(other for other in phrases if other != phrase and other in phrase)
+                        for phrase in phrases
+                    }
+                    self._pattern = re.compile(f"(?=({_trie_pattern(phrases)}))")
+                logger.debug(f"Compiled keyword scanner for {len(phrases)} phrases")
+            return self._automaton, self._pattern, self._contained
+
+    def scan(self, text: Optional[str]) -> FrozenSet[str]:
+        """The registered phrases occurring in text"""
+        if not text or not self._phrases:
+            return frozenset()
+        automaton, pattern, contained = self._compile()
+        if automaton is not None:
+            return frozenset(phrase for _, phrase in automaton.iter(text.lower()))
+        longest = {match.group(1) for match in pattern.finditer(text.lower())}
+        found = set(longest)
+        for phrase in longest:
+            found |= contained[phrase]
+        return frozenset(found)
+
+    def case_hits(self, case: Any, fields: Sequence[str]) -> FrozenSet[str]:
+        """
+        Phrases occurring in a case's text fields (joined by spaces), cached on the case.
+
+        The cache entry is reused while the fields hold the same values and no
+        phrases were registered since; objects that take no attributes (rows)
+        are scanned every time.
+        """
+        values = tuple(getattr(case, field, None) for field in fields)
+        cache = getattr(case, _CACHE_ATTRIBUTE, None)
+        entry = cache.get(tuple(fields)) if cache else None
+        if entry and entry[0] == self._version and all(a is b for a, b in zip(entry[1], values)):
+            return entry[2]
+
+        found = self.scan(" ".join(str(value) for value in values if value))
+        try:
+            if cache is None:
+                cache = {}
+                setattr(case, _CACHE_ATTRIBUTE, cache)
+            cache[tuple(fields)] = (self._version, values, found)
+        except AttributeError:
+            pass
+        return found
+
+
+def matched(found: FrozenSet[str], keywords: Iterable[str]) -> List[str]:
+    """The keywords (as given, in order) that a scan found"""
+    return [keyword for keyword in keywords if keyword.lower() in found]
+
+
+def category_hits(found: FrozenSet[str], categories: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Keywords found per category of a {category: keywords} (or {"keywords": [...]}) table"""
+    return {
+        category: matched(found, keywords["keywords"] if isinstance(keywords, dict) else keywords)
+        for category, keywords in categories.items()
+    }
+
+
+# Shared by the analytics services, so each case's text is scanned once
+scanner = KeywordScanner()
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import and_, func, desc, asc
 from typing import List, Dict, Optional, Tuple
 import re
 from datetime import datetime
@@ -9,6 +9,8 @@ from models.legal_history import LegalHistory, CaseMention, LegalSearchIndex
 from models.people import People
 from models.banks import Banks
 from models.insurance import Insurance
+from services.case_party_index import party_case_ids
+from services.full_text_search import full_text_match
 
 class LegalHistoryService:
     def __init__(self, db: Session):
@@ -108,35 +110,22 @@ class LegalHistoryService:
 
     def _search_in_titles(self, search_terms: List[str]) -> List[ReportedCases]:
         """Search for entity mentions in case titles"""
-        conditions = []
-        for term in search_terms:
-            conditions.append(ReportedCases.title.ilike(f"%{term}%"))
-        
-        return self.db.query(ReportedCases).filter(or_(*conditions)).all()
+        return self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
+            ReportedCases.id.in_(party_case_ids(search_terms, roles=("title",)))
+        ).all()
 
     def _search_in_parties(self, search_terms: List[str]) -> List[ReportedCases]:
         """Search for entity mentions in antagonist/protagonist fields"""
-        conditions = []
-        for term in search_terms:
-            conditions.extend([
-                ReportedCases.antagonist.ilike(f"%{term}%"),
-                ReportedCases.protagonist.ilike(f"%{term}%")
-            ])
-        
-        return self.db.query(ReportedCases).filter(or_(*conditions)).all()
+        return self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
+            ReportedCases.id.in_(party_case_ids(search_terms, roles=("protagonist", "antagonist")))
+        ).all()
 
     def _search_in_content(self, search_terms: List[str]) -> List[ReportedCases]:
         """Search for entity mentions in case content"""
-        conditions = []
-        for term in search_terms:
-            conditions.extend([
-                ReportedCases.judgement.ilike(f"%{term}%"),
-                ReportedCases.decision.ilike(f"%{term}%"),
-                ReportedCases.case_summary.ilike(f"%{term}%"),
-                ReportedCases.keywords_phrases.ilike(f"%{term}%")
-            ])
-        
-        return self.db.query(ReportedCases).filter(or_(*conditions)).all()
+        # Any of the terms, each as a phrase, against the indexed case vector
+        condition, _ = full_text_match("cases", " OR ".join(f'"{term}"' for term in search_terms))
+        
+        return self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(condition).all()
 
     def _combine_search_results(self, *result_sets) -> List[ReportedCases]:
         """Combine and deduplicate search results"""
@@ -276,7 +265,7 @@ class LegalHistoryService:
         
         # Get case details
         case_ids = [entry.case_id for entry in legal_history]
-        cases = self.db.query(ReportedCases).filter(ReportedCases.id.in_(case_ids)).all()
+        cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(ReportedCases.id.in_(case_ids)).all()
         
         # Calculate statistics
         total_cases = len(cases)
@@ -0,0 +1,285 @@
+"""
+Concurrent, rate-limited execution of chat completion jobs.
+
+Bulk AI passes over the case corpus used to send one request at a time, so
+a full run was bounded by round-trip latency. LLMWorkerPool keeps up to
+`concurrency` requests in flight while staying inside the account's
+requests-per-minute and tokens-per-minute budgets, retries rate limits and
+server errors with jittered exponential backoff, and records finished jobs
+in a progress log so an interrupted run resumes where it stopped.
+
+Typical use from a batch script:
+
+    pool = LLMWorkerPool(async_openai_client(api_key), model, progress_path="analysis_progress.log")
+    stats = asyncio.run(pool.run(jobs, on_result))
+
+`jobs` may be a lazy iterator (e.g. reading cases batch by batch); it is only
+advanced as workers free up. `on_result(job, text)` runs in a worker thread,
+so it can do blocking database writes. A MapReduceJob (a long document split
+by services/document_chunker.py) runs its parts in parallel, then the prompt
+built from their results; parts share the pool's budgets and concurrency.
+
+llm_mock_server.py serves a local stand-in for the completions API to
+benchmark the pool offline.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import openai
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for budgeting (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def async_openai_client(api_key: str, base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+    """Async client for the pool; retries are left to the pool so they respect its budgets"""
+    return openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+class CompletionJob:
+    """One chat completion request, identified by a stable key (e.g. the case id)"""
+
+    def __init__(self, key: Any, messages: List[Dict[str, str]], max_tokens: int = 2000,
+                 temperature: float = 0.3, payload: Any = None):
+        self.key = key
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.payload = payload
+
+    @property
+    def estimated_tokens(self) -> int:
+        prompt_chars = sum(len(message.get("content") or "") for message in self.messages)
+        return prompt_chars // CHARS_PER_TOKEN + self.max_tokens
+
+    @property
+    def cache_messages(self) -> List[Dict[str, str]]:
+        """The messages that determine this job's result (for response cache keys)"""
+        return self.messages
+
+
+class MapReduceJob(CompletionJob):
+    """
+    A job whose prompt is built from the results of its parts.
+
+    The parts run first (in parallel); `combine(part_texts)` then returns the
+    messages of the final request, whose completion is the job's result.
+    """
+
+    def __init__(self, key: Any, parts: List[CompletionJob], combine: Callable[[List[str]], List[Dict[str, str]]],
+                 max_tokens: int = 2000, temperature: float = 0.3, payload: Any = None):
+        super().__init__(key, [], max_tokens=max_tokens, temperature=temperature, payload=payload)
+        self.parts = parts
+        self.combine = combine
+
+    @property
+    def cache_messages(self) -> List[Dict[str, str]]:
+        return [message for part in self.parts for message in part.messages]
+
+
+def complete_sync(client: openai.OpenAI, model: str, job: CompletionJob, max_workers: Optional[int] = None) -> str:
+    """
+    Run one job with a synchronous client (for single requests outside a pool).
+
+    A MapReduceJob's parts are sent from a thread pool, up to max_workers
+    (default: settings.llm_concurrency) at a time.
+    """
+    def request(single: CompletionJob) -> str:
+        response = client.chat.completions.create(
+            model=model,
+            messages=single.messages,
+            max_tokens=single.max_tokens,
+            temperature=single.temperature
+        )
+        return response.choices[0].message.content or ""
+
+    if isinstance(job, MapReduceJob):
+        with ThreadPoolExecutor(max_workers=min(len(job.parts), max_workers or settings.llm_concurrency) or 1) as executor:
+            notes = list(executor.map(request, job.parts))
+        job.messages = job.combine(notes)
+    return request(job)
+
+
+class RateBudget:
+    """Per-minute budget refilled continuously (token bucket)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, amount: float) -> None:
+        """Wait until `amount` is available, then spend it"""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.level >= amount:
+                self.level -= amount
+                return
+            await asyncio.sleep((amount - self.level) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) the difference from an estimate"""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ProgressLog:
+    """Append-only file of finished job keys, one per line"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as progress_file:
+                self.done = {line.strip() for line in progress_file if line.strip()}
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self.done
+
+    def mark(self, key: Any) -> None:
+        self.done.add(str(key))
+        if self.path:
+            with open(self.path, "a") as progress_file:
+                progress_file.write(f"{key}\n")
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class LLMWorkerPool:
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        model: str,
+        concurrency: int = None,
+        requests_per_minute: int = None,
+        tokens_per_minute: int = None,
+        max_retries: int = None,
+        progress_path: Optional[str] = None,
+        log_every: int = 50
+    ):
+        self.client = client
+        self.model = model
+        self.concurrency = concurrency or settings.llm_concurrency
+        self.requests = RateBudget(requests_per_minute or settings.llm_requests_per_minute)
+        self.tokens = RateBudget(tokens_per_minute or settings.llm_tokens_per_minute)
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+        self.progress = ProgressLog(progress_path)
+        self.log_every = log_every
+        self.stats = {"succeeded": 0, "failed": 0, "skipped": 0, "retries": 0}
+        self._start_time = time.time()
+        # Bounds requests in flight, including the parts of map-reduce jobs
+        self._in_flight = asyncio.Semaphore(self.concurrency)
+        # Workers take jobs from the shared source one at a time
+        self._source_lock = asyncio.Lock()
+
+    async def complete(self, job: CompletionJob) -> str:
+        """Run one job within the budgets, retrying transient failures"""
+        if isinstance(job, MapReduceJob):
+            notes = await asyncio.gather(*(self.complete(part) for part in job.parts))
+            job.messages = job.combine(list(notes))
+
+        estimate = job.estimated_tokens
+        attempt = 0
+        while True:
+            await self.requests.take(1)
+            await self.tokens.take(estimate)
+            try:
+                async with self._in_flight:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=job.messages,
+                        max_tokens=job.max_tokens,
+                        temperature=job.temperature
+                    )
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                delay = max(delay, _retry_after(e))
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"Job {job.key}: {type(e).__name__}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.usage is not None:
+                self.tokens.adjust(response.usage.total_tokens - estimate)
+            return response.choices[0].message.content or ""
+
+    async def _next_job(self, jobs: Iterator[CompletionJob]) -> Optional[CompletionJob]:
+        # A lazy source queries and stores cached results as it is read, so it is read off the event loop
+        async with self._source_lock:
+            return await asyncio.to_thread(next, jobs, None)
+
+    async def _worker(self, jobs: Iterator[CompletionJob], on_result: Callable[[CompletionJob, str], Any]) -> None:
+        while (job := await self._next_job(jobs)) is not None:
+            if job.key in self.progress:
+                self.stats["skipped"] += 1
+                continue
+            try:
+                text = await self.complete(job)
+                await asyncio.to_thread(on_result, job, text)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Job {job.key} failed: {e}")
+                continue
+
+            self.progress.mark(job.key)
+            self.stats["succeeded"] += 1
+            finished = self.stats["succeeded"] + self.stats["failed"]
+            if finished % self.log_every == 0:
+                elapsed = time.time() - self._start_time
+                logger.info(f"Progress: {finished} jobs finished ({finished / elapsed * 60:.1f}/min)")
+
+    async def run(self, jobs: Iterable[CompletionJob], on_result: Callable[[CompletionJob, str], Any]) -> Dict[str, Any]:
+        """
+        Run all jobs and hand each completion to `on_result`.
+
+        A job counts as done once `on_result` returns; jobs that fail after
+        all retries (or whose handler raises) are not marked in the progress
+        log and run again on the next invocation.
+
+        Returns:
+            dict: succeeded, failed, skipped and retries counts and elapsed_seconds
+        """
+        self.stats = {"succeeded": 0, "failed": 0, "skipped": 0, "retries": 0}
+        self._start_time = time.time()
+
+        # Workers share one iterator, so a lazy source is read only as fast as jobs finish
+        job_iterator = iter(jobs)
+        await asyncio.gather(*(self._worker(job_iterator, on_result) for _ in range(self.concurrency)))
+
+        self.stats["elapsed_seconds"] = round(time.time() - self._start_time, 2)
+        return self.stats
@@ -0,0 +1,146 @@
+"""
+Time partitions for the log tables.
+
+access_logs, activity_logs, audit_logs, error_logs and security_logs are
+range-partitioned on created_at (models/logs.py): access logs by UTC day,
+the others by UTC month. Expiring old logs is then a DROP TABLE of whole
+partitions instead of a DELETE that rewrites indexes and leaves bloat.
+
+The log sink (services/log_sink.py) calls ensure_partitions and
+drop_expired_partitions periodically, so partitions exist ahead of the
+rows written into them and partitions older than the table's retention
+(settings.log_retention_days_*, 0 keeps everything) are dropped.
+Partitions are named <table>_pYYYYMMDD (daily) or <table>_pYYYYMM
+(monthly); only partitions named that way are ever dropped.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Partitioned log table -> (partition interval, retention setting)
+PARTITIONED_LOGS = {
+    "access_logs": ("day", "log_retention_days_access"),
+    "activity_logs": ("month", "log_retention_days_activity"),
+    "audit_logs": ("month", "log_retention_days_audit"),
+    "error_logs": ("month", "log_retention_days_error"),
+    "security_logs": ("month", "log_retention_days_security"),
+}
+
+# Partitions created ahead of the current one
+LOOKAHEAD = {"day": 3, "month": 1}
+
+# Serializes partition DDL between API workers
+_ADVISORY_LOCK_KEY = 0x4C4F4750  # "LOGP"
+
+
+def _period_start(moment: datetime, interval: str) -> datetime:
+    moment = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1) if interval == "month" else moment
+
+
+def _next_period(start: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_name(table: str, start: datetime, interval: str) -> str:
+    return f"{table}_p{start.strftime('%Y%m%d' if interval == 'day' else '%Y%m')}"
+
+
+def retention_days(table: str) -> int:
+    """Days a table's logs are kept (0 keeps them forever)"""
+    return getattr(settings, PARTITIONED_LOGS[table][1])
+
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"),
+        {"table": table}
+    ).scalar())
+
+
+def _partitions(conn, table: str) -> List[str]:
+    return list(conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table}
+    ).scalars())
+
+
+def ensure_partitions(conn, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      tables: Optional[List[str]] = None) -> int:
+    """
+    Create the missing partitions covering [start, end] (default: now through the lookahead).
+
+    Returns:
+        int: Partitions created
+    """
+    now = datetime.now(timezone.utc)
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    created = 0
+    for table in tables or PARTITIONED_LOGS:
+        if not is_partitioned(conn, table):
+            continue
+        interval = PARTITIONED_LOGS[table][0]
+        existing = set(_partitions(conn, table))
+        period = _period_start(start or now, interval)
+        last = _period_start(end or now, interval)
+        if end is None:
+            for _ in range(LOOKAHEAD[interval]):
+                last = _next_period(last, interval)
+        while period <= last:
+            name = _partition_name(table, period, interval)
+            if name not in existing:
+                upper = _next_period(period, interval)
+                conn.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{period.isoformat()}') TO ('{upper.isoformat()}')"
+                ))
+                created += 1
+            period = _next_period(period, interval)
+    if created:
+        logger.info(f"Created {created} log partitions")
+    return created
+
+
+def drop_expired_partitions(conn, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Drop partitions whose whole range is older than their table's retention.
+
+    Returns:
+        dict: table -> partitions dropped
+    """
+    now = now or datetime.now(timezone.utc)
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+    dropped = {}
+    for table, (interval, _) in PARTITIONED_LOGS.items():
+        days = retention_days(table)
+        if not days or not is_partitioned(conn, table):
+            continue
+        cutoff = now - timedelta(days=days)
+        pattern = re.compile(rf"^{table}_p(\d{{8}}|\d{{6}})$")
+        for name in _partitions(conn, table):
+            match = pattern.match(name)
+            if not match:
+                continue
+            stamp = match.group(1)
+            start = datetime.strptime(stamp, "%Y%m%d" if len(stamp) == 8 else "%Y%m").replace(tzinfo=timezone.utc)
+            if _next_period(start, interval) <= cutoff:
+                conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                dropped[table] = dropped.get(table, 0) + 1
+    if dropped:
+        logger.info(f"Dropped expired log partitions: {dropped}")
+    return dropped
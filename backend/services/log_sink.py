@@ -0,0 +1,248 @@
+"""
+Batched writes for the access, activity, audit, error and security logs.
+
+LoggingService's log_* methods queue a prepared row here instead of
+committing it in the request. A background thread drains the queue every
+flush interval, or as soon as a batch worth of rows is waiting, and inserts
+each table's rows with one multi-row INSERT per batch.
+
+- The queue is bounded; when it is full new rows are dropped and counted
+  per table in stats().
+- A batch the database rejects is retried row by row, so only the offending
+  rows are dropped; a batch that fails otherwise (the database is
+  unreachable) is put back at the front of the queue and retried.
+- Access logs are sampled (sample_access): errors and slow requests are
+  always kept, other requests at settings.access_log_sample_rate, and each
+  kept row records the rate so totals can be scaled back up.
+- Every maintenance interval the writer creates upcoming log partitions and
+  drops expired ones (services/log_partitions.py).
+
+Pending rows are written on shutdown.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config import settings
+from database import engine
+from models.logs import AccessLog, ActivityLog, AuditLog, ErrorLog, SecurityLog
+from services.log_partitions import drop_expired_partitions, ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLES = {
+    "access": AccessLog.__table__,
+    "activity": ActivityLog.__table__,
+    "audit": AuditLog.__table__,
+    "error": ErrorLog.__table__,
+    "security": SecurityLog.__table__,
+}
+
+# Seconds between partition maintenance runs
+MAINTENANCE_SECONDS = 3600
+
+
+class _PartialWrite(Exception):
+    """A row-by-row retry failed after writing some of its rows"""
+
+    def __init__(self, written: int, remaining: list, error: Exception):
+        super().__init__(str(error))
+        self.written = written
+        self.remaining = remaining
+
+
+class LogSink:
+    """Queues log rows in memory and inserts them in batches"""
+
+    def __init__(self, capacity: int = 50000, batch_size: int = 500, flush_ms: int = 2000,
+                 access_sample_rate: float = 1.0, slow_request_ms: int = 1000):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.access_sample_rate = access_sample_rate
+        self.slow_request_ms = slow_request_ms
+        # (log kind, row) in arrival order
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_maintenance = 0.0
+        self._stats = {
+            "recorded": 0,
+            "written": 0,
+            "dropped": dict.fromkeys(LOG_TABLES, 0),
+            "sampled_out": 0,
+            "failed_batches": 0,
+            "high_water_mark": 0,
+        }
+
+    def sample_access(self, status_code: int, response_time: Optional[int]) -> Optional[float]:
+        """
+        Decide whether to keep a request's access log.
+
+        Returns:
+            float: The sample rate to store with the row, or None to skip it
+        """
+        if (self.access_sample_rate >= 1 or status_code >= 400
+                or (response_time or 0) >= self.slow_request_ms):
+            return 1.0
+        if random.random() < self.access_sample_rate:
+            return self.access_sample_rate
+        with self._lock:
+            self._stats["sampled_out"] += 1
+        return None
+
+    def record(self, kind: str, row: Dict[str, Any]) -> bool:
+        """
+        Queue one log row (a dict of column values) for a log table.
+
+        Returns:
+            bool: False if the row was dropped because the queue is full
+        """
+        with self._lock:
+            pending = len(self._rows)
+            if pending >= self.capacity:
+                self._stats["dropped"][kind] += 1
+                return False
+            self._rows.append((kind, row))
+            self._stats["recorded"] += 1
+            pending += 1
+            if pending > self._stats["high_water_mark"]:
+                self._stats["high_water_mark"] = pending
+        if pending >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._rows), self.batch_size)
+            return [self._rows.popleft() for _ in range(count)]
+
+    def _requeue(self, batch) -> None:
+        """Put a failed batch back in front of newer rows, dropping what no longer fits"""
+        with self._lock:
+            room = self.capacity - len(self._rows)
+            for kind, _ in batch[max(room, 0):]:
+                self._stats["dropped"][kind] += 1
+            self._rows.extendleft(reversed(batch[:max(room, 0)]))
+
+    def _write(self, kind: str, rows) -> int:
+        """Insert one table's rows; a rejected batch is retried row by row"""
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(LOG_TABLES[kind]), rows)
+            return len(rows)
+        except (IntegrityError, DataError) as e:
+            if len(rows) > 1:
+                logger.warning(f"{kind} log batch rejected, writing its {len(rows)} rows one by one: {e.orig}")
+                written = 0
+                for index, row in enumerate(rows):
+                    try:
+                        written += self._write(kind, [row])
+                    except Exception as error:
+                        # The rows before this one are committed and must not be requeued
+                        raise _PartialWrite(written, rows[index:], error) from error
+                return written
+            with self._lock:
+                self._stats["dropped"][kind] += 1
+            logger.error(f"Dropping {kind} log row: {e.orig}")
+            return 0
+
+    def flush(self) -> int:
+        """
+        Write every pending row, one INSERT per table per batch.
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._flush_lock:
+            written = 0
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                by_kind: Dict[str, list] = {}
+                for kind, row in batch:
+                    by_kind.setdefault(kind, []).append(row)
+                try:
+                    for kind, rows in by_kind.items():
+                        written += self._write(kind, rows)
+                        # Written tables are not retried if a later one fails
+                        batch = [item for item in batch if item[0] != kind]
+                except Exception as e:
+                    if isinstance(e, _PartialWrite):
+                        written += e.written
+                        batch = [(kind, row) for row in e.remaining] + [item for item in batch if item[0] != kind]
+                    self._requeue(batch)
+                    with self._lock:
+                        self._stats["failed_batches"] += 1
+                    logger.error(f"Error writing {len(batch)} log rows: {e}")
+                    break
+            with self._lock:
+                self._stats["written"] += written
+            return written
+
+    def maintain(self) -> None:
+        """Create upcoming log partitions and drop expired ones"""
+        try:
+            with engine.begin() as conn:
+                ensure_partitions(conn)
+                drop_expired_partitions(conn)
+        except Exception as e:
+            logger.error(f"Error maintaining log partitions: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue occupancy and counters, for monitoring backpressure"""
+        with self._lock:
+            return dict(
+                self._stats,
+                dropped=dict(self._stats["dropped"]),
+                pending=len(self._rows),
+                capacity=self.capacity,
+                access_sample_rate=self.access_sample_rate
+            )
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            if time.time() - self._last_maintenance >= MAINTENANCE_SECONDS:
+                self._last_maintenance = time.time()
+                self.maintain()
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            written = self.flush()
+            if written:
+                logger.debug(f"Wrote {written} log rows")
+
+    def start(self) -> None:
+        """Start the background writer thread (which first makes sure current partitions exist)"""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the writer thread and write whatever is still pending"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+
+log_sink = LogSink(
+    capacity=settings.log_buffer_capacity,
+    batch_size=settings.log_buffer_batch_size,
+    flush_ms=settings.log_buffer_flush_ms,
+    access_sample_rate=settings.access_log_sample_rate,
+    slow_request_ms=settings.access_log_slow_ms
+)
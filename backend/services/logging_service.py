@@ -5,17 +5,19 @@ Comprehensive logging service for tracking user activities, access logs, and sys
 import json
 import traceback
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
+from sqlalchemy import desc, and_, or_, func
 from models.logs import AccessLog, ActivityLog, AuditLog, ErrorLog, SecurityLog, LogLevel, ActivityType
 from models.user import User
+from services.log_sink import log_sink
 import requests
 import ipaddress
 
 class LoggingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session] = None):
+        # The log_* methods queue rows in services.log_sink; only the queries need a session
         self.db = db
     
     def get_client_info(self, request) -> Dict[str, Any]:
@@ -95,36 +97,35 @@ class LoggingService:
             }
     
     def log_access(self, request, response, user_id: Optional[int] = None, 
-                   session_id: Optional[str] = None, response_time: Optional[int] = None):
-        """Log HTTP access"""
+                   session_id: Optional[str] = None, response_time: Optional[int] = None,
+                   sample_rate: Optional[float] = None):
+        """Log HTTP access (queued; sample_rate records the access log sampling that kept it)"""
         try:
             client_info = self.get_client_info(request)
             
-            access_log = AccessLog(
-                user_id=user_id,
-                session_id=session_id,
-                ip_address=client_info["ip_address"],
-                user_agent=client_info["user_agent"],
-                method=request.method,
-                url=str(request.url),
-                endpoint=request.url.path,
-                status_code=response.status_code,
-                response_time=response_time,
-                request_size=len(str(request.body)) if hasattr(request, 'body') else None,
-                response_size=len(response.body) if hasattr(response, 'body') else None,
-                referer=request.headers.get("referer"),
-                country=client_info["country"],
-                city=client_info["city"],
-                device_type=client_info["device_type"],
-                browser=client_info["browser"],
-                os=client_info["os"]
-            )
-            
-            self.db.add(access_log)
-            self.db.commit()
+            log_sink.record("access", {
+                "user_id": user_id,
+                "session_id": session_id,
+                "ip_address": client_info["ip_address"],
+                "user_agent": client_info["user_agent"],
+                "method": request.method,
+                "url": str(request.url),
+                "endpoint": request.url.path,
+                "status_code": response.status_code,
+                "response_time": response_time,
+                "request_size": len(str(request.body)) if hasattr(request, 'body') else None,
+                "response_size": len(response.body) if hasattr(response, 'body') else None,
+                "referer": request.headers.get("referer"),
+                "country": client_info["country"],
+                "city": client_info["city"],
+                "device_type": client_info["device_type"],
+                "browser": client_info["browser"],
+                "os": client_info["os"],
+                "sample_rate": sample_rate,
+                "created_at": datetime.now(timezone.utc)
+            })
         except Exception as e:
             print(f"Error logging access: {e}")
-            self.db.rollback()
     
     def log_activity(self, user_id: Optional[int], activity_type: ActivityType, 
                     action: str, description: Optional[str] = None,
@@ -133,55 +134,49 @@ class LoggingService:
                     session_id: Optional[str] = None, ip_address: Optional[str] = None,
                     user_agent: Optional[str] = None, metadata: Optional[Dict] = None,
                     severity: LogLevel = LogLevel.INFO):
-        """Log user activity"""
+        """Log user activity (queued)"""
         try:
-            activity_log = ActivityLog(
-                user_id=user_id,
-                session_id=session_id,
-                activity_type=activity_type,
-                action=action,
-                description=description,
-                resource_type=resource_type,
-                resource_id=resource_id,
-                old_values=old_values,
-                new_values=new_values,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                log_metadata=metadata,
-                severity=severity
-            )
-            
-            self.db.add(activity_log)
-            self.db.commit()
+            log_sink.record("activity", {
+                "user_id": user_id,
+                "session_id": session_id,
+                "activity_type": activity_type,
+                "action": action,
+                "description": description,
+                "resource_type": resource_type,
+                "resource_id": resource_id,
+                "old_values": old_values,
+                "new_values": new_values,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "log_metadata": metadata,
+                "severity": severity,
+                "created_at": datetime.now(timezone.utc)
+            })
         except Exception as e:
             print(f"Error logging activity: {e}")
-            self.db.rollback()
     
     def log_audit(self, user_id: Optional[int], table_name: str, record_id: str,
                  action: str, field_name: Optional[str] = None,
                  old_value: Optional[str] = None, new_value: Optional[str] = None,
                  session_id: Optional[str] = None, ip_address: Optional[str] = None,
                  user_agent: Optional[str] = None):
-        """Log audit trail for data changes"""
+        """Log audit trail for data changes (queued)"""
         try:
-            audit_log = AuditLog(
-                user_id=user_id,
-                session_id=session_id,
-                table_name=table_name,
-                record_id=record_id,
-                action=action,
-                field_name=field_name,
-                old_value=old_value,
-                new_value=new_value,
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
-            
-            self.db.add(audit_log)
-            self.db.commit()
+            log_sink.record("audit", {
+                "user_id": user_id,
+                "session_id": session_id,
+                "table_name": table_name,
+                "record_id": record_id,
+                "action": action,
+                "field_name": field_name,
+                "old_value": old_value,
+                "new_value": new_value,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "created_at": datetime.now(timezone.utc)
+            })
         except Exception as e:
             print(f"Error logging audit: {e}")
-            self.db.rollback()
     
     def log_error(self, user_id: Optional[int], error_type: str, error_message: str,
                  stack_trace: Optional[str] = None, url: Optional[str] = None,
@@ -189,55 +184,50 @@ class LoggingService:
                  session_id: Optional[str] = None, ip_address: Optional[str] = None,
                  user_agent: Optional[str] = None, metadata: Optional[Dict] = None,
                  severity: LogLevel = LogLevel.ERROR):
-        """Log system errors"""
+        """Log system errors (queued)"""
         try:
-            error_log = ErrorLog(
-                user_id=user_id,
-                session_id=session_id,
-                error_type=error_type,
-                error_message=error_message,
-                stack_trace=stack_trace,
-                url=url,
-                method=method,
-                status_code=status_code,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                log_metadata=metadata,
-                severity=severity
-            )
-            
-            self.db.add(error_log)
-            self.db.commit()
+            log_sink.record("error", {
+                "user_id": user_id,
+                "session_id": session_id,
+                "error_type": error_type,
+                "error_message": error_message,
+                "stack_trace": stack_trace,
+                "url": url,
+                "method": method,
+                "status_code": status_code,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "log_metadata": metadata,
+                "severity": severity,
+                "resolved": False,
+                "created_at": datetime.now(timezone.utc)
+            })
         except Exception as e:
             print(f"Error logging error: {e}")
-            self.db.rollback()
     
     def log_security(self, user_id: Optional[int], event_type: str, description: str,
                     severity: LogLevel = LogLevel.WARNING, ip_address: Optional[str] = None,
                     user_agent: Optional[str] = None, country: Optional[str] = None,
                     city: Optional[str] = None, metadata: Optional[Dict] = None,
                     blocked: bool = False, session_id: Optional[str] = None):
-        """Log security events"""
+        """Log security events (queued)"""
         try:
-            security_log = SecurityLog(
-                user_id=user_id,
-                session_id=session_id,
-                event_type=event_type,
-                description=description,
-                severity=severity,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                country=country,
-                city=city,
-                log_metadata=metadata,
-                blocked=blocked
-            )
-            
-            self.db.add(security_log)
-            self.db.commit()
+            log_sink.record("security", {
+                "user_id": user_id,
+                "session_id": session_id,
+                "event_type": event_type,
+                "description": description,
+                "severity": severity,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "country": country,
+                "city": city,
+                "log_metadata": metadata,
+                "blocked": blocked,
+                "created_at": datetime.now(timezone.utc)
+            })
         except Exception as e:
             print(f"Error logging security event: {e}")
-            self.db.rollback()
     
     def get_access_logs(self, user_id: Optional[int] = None, limit: int = 100, 
                        offset: int = 0, start_date: Optional[datetime] = None,
@@ -347,7 +337,10 @@ class LoggingService:
             if date_filter:
                 access_query = access_query.filter(date_filter)
             
-            total_requests = access_query.count()
+            # Sampled access logs count 1/sample_rate requests each
+            total_requests = int(round(access_query.with_entities(
+                func.sum(1.0 / func.coalesce(AccessLog.sample_rate, 1.0))
+            ).scalar() or 0))
             unique_users = access_query.distinct(AccessLog.user_id).count()
             error_requests = access_query.filter(AccessLog.status_code >= 400).count()
             
@@ -16,9 +16,17 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import settings
+from models.analytics_change import record_changes
+from services.ai_response_cache import TEMPLATE_VERSIONS, completion_cache
+from services.document_chunker import analysis_job
+from services.llm_worker_pool import complete_sync
 
 logger = logging.getLogger(__name__)
 
+# Response cache namespace (template versions are in services/ai_response_cache.py)
+ANALYSIS_CACHE_NAMESPACE = "case_analysis"
+ANALYSIS_TEMPLATE_VERSION = TEMPLATE_VERSIONS[ANALYSIS_CACHE_NAMESPACE]
+
 class OnDemandAIAnalysis:
     def __init__(self):
         self.engine = create_engine(settings.database_url)
@@ -66,7 +74,7 @@ class OnDemandAIAnalysis:
             with self.engine.connect() as conn:
                 result = conn.execute(text("""
                     SELECT id, title, decision, judgement, conclusion, case_summary, 
-                           area_of_law, protagonist, antagonist
+                           area_of_law, protagonist, antagonist, headnotes
                     FROM reported_cases 
                     WHERE id = :case_id
                 """), {"case_id": case_id}).fetchone()
@@ -83,7 +91,8 @@ class OnDemandAIAnalysis:
                     'case_summary': result[5],
                     'area_of_law': result[6],
                     'protagonist': result[7],
-                    'antagonist': result[8]
+                    'antagonist': result[8],
+                    'headnotes': result[9]
                 }
         except Exception as e:
             logger.error(f"Error getting case content for {case_id}: {e}")
@@ -117,19 +126,9 @@ class OnDemandAIAnalysis:
         
         return "\n\n".join(content_parts)
     
-    def analyze_case(self, case):
-        """Analyze a single case with AI"""
-        try:
-            case_content = self.prepare_case_content(case)
-            
-            if not case_content.strip():
-                return self.get_default_analysis()
-            
-            # Truncate content to fit within token limits
-            if len(case_content) > 6000:
-                case_content = case_content[:6000] + "..."
-            
-            prompt = f"""
+    def build_messages(self, case_content):
+        """Build the chat messages for a case's content"""
+        prompt = f"""
 Analyze the following legal case and provide structured insights for banking and financial assessment purposes:
 
 CASE CONTENT:
@@ -156,24 +155,35 @@ Guidelines:
 
 Respond only with valid JSON, no additional text.
 """
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation. Be conservative and accurate in your assessments."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def analyze_case(self, case):
+        """Analyze a single case with AI (chunked map-reduce for long cases)"""
+        try:
+            case_content = self.prepare_case_content(case)
             
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a legal AI assistant specializing in case analysis for banking and financial institutions. Analyze legal cases and provide structured insights for credit assessment and risk evaluation. Be conservative and accurate in your assessments."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.2
+            if not case_content.strip():
+                return self.get_default_analysis()
+            
+            job = analysis_job(case['id'], case, case_content, self.build_messages, self.model, max_tokens=2000, temperature=0.2)
+            job.payload = completion_cache.make_key(
+                ANALYSIS_CACHE_NAMESPACE, ANALYSIS_TEMPLATE_VERSION, self.model, job.cache_messages, 2000, 0.2
             )
+            ai_response = completion_cache.get(ANALYSIS_CACHE_NAMESPACE, job.payload)
+            if ai_response is None:
+                ai_response = complete_sync(self.openai_client, self.model, job)
+                completion_cache.put(ANALYSIS_CACHE_NAMESPACE, job.payload, ANALYSIS_TEMPLATE_VERSION, self.model, ai_response)
             
-            ai_response = response.choices[0].message.content
             return self.parse_ai_response(ai_response)
             
         except Exception as e:
@@ -231,6 +241,7 @@ Respond only with valid JSON, no additional text.
                     "generated_at": datetime.utcnow(),
                     "version": "2.0"
                 })
+                record_changes(conn, "reported_cases", [case_id])
                 conn.commit()
                 return True
         except Exception as e:
@@ -0,0 +1,164 @@
+"""
+Several short classification tasks per completion.
+
+Labelling a case (its nature, its keywords) needs only a short excerpt in
+and a few tokens out, so sending one request per case spends most of each
+call on the instructions and request overhead. run_packed puts up to
+pack_size excerpts into one prompt as a JSON list, asks for a JSON array of
+answers keyed by case id, and validates each answer. Items whose answer is
+missing or invalid, and every item of a pack whose response cannot be
+parsed, are retried one at a time through the caller's single-item
+function, so packing never loses results.
+
+    labels = run_packed(
+        client, "gpt-3.5-turbo", items,
+        instruction="Classify each case into one of: ...",
+        answer_field="nature", answer_description="one category name",
+        validate=lambda value: value if value in CATEGORIES else None,
+        single=lambda item_id, excerpt: classify_one(excerpt)
+    )
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from config import settings
+from services.document_chunker import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PACK_SIZE = 20
+DEFAULT_EXCERPT_TOKENS = 400
+# Completion tokens per pack are capped below the models' output limit
+MAX_PACK_COMPLETION_TOKENS = 4000
+
+
+def _parse_answers(response_text: str, answer_field: str) -> Dict[str, Any]:
+    """Answers by case id (as a string) from a JSON array response"""
+    text = (response_text or "").strip()
+    start = text.find("[")
+    end = text.rfind("]") + 1
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array found in response")
+    answers = {}
+    for entry in json.loads(text[start:end]):
+        if isinstance(entry, dict) and "id" in entry and answer_field in entry:
+            answers[str(entry["id"])] = entry[answer_field]
+    return answers
+
+
+def _pack_items(items: Sequence[Tuple[Hashable, str]], pack_size: int, prompt_tokens: int,
+                model: Optional[str]) -> List[List[Tuple[Hashable, str]]]:
+    """Group items into packs of at most pack_size items and about prompt_tokens of excerpts"""
+    packs = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        tokens = count_tokens(item[1], model)
+        if current and (len(current) >= pack_size or current_tokens + tokens > prompt_tokens):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def run_packed(
+    client,
+    model: str,
+    items: Sequence[Tuple[Hashable, str]],
+    instruction: str,
+    answer_field: str,
+    answer_description: str,
+    validate: Callable[[Any], Optional[Any]],
+    single: Callable[[Hashable, str], Optional[Any]],
+    system_prompt: str = "You are a legal expert classifying court cases.",
+    pack_size: int = DEFAULT_PACK_SIZE,
+    excerpt_tokens: int = DEFAULT_EXCERPT_TOKENS,
+    answer_tokens: int = 30,
+    temperature: float = 0.1,
+    max_workers: Optional[int] = None
+) -> Dict[Hashable, Any]:
+    """
+    Answer one short task for many items with few requests.
+
+    Args:
+        client: openai.OpenAI client
+        model: Model name
+        items: (item id, excerpt) pairs; ids must be unique
+        instruction: What to do for each case
+        answer_field: Key of the answer in each returned object
+        answer_description: What the answer looks like (goes in the schema)
+        validate: Returns the cleaned answer, or None if it is unacceptable
+        single: Fallback for one item, called with (id, excerpt); returns an
+                answer or None
+        pack_size: Items per request
+        excerpt_tokens: Each excerpt is shortened to this many tokens
+        answer_tokens: Expected completion tokens per item
+        max_workers: Packs sent at once (default: settings.llm_concurrency)
+
+    Returns:
+        dict: item id -> answer, for the items that got one
+    """
+    originals = dict(items)
+    excerpts = [(item_id, truncate_to_tokens(excerpt, excerpt_tokens, model)) for item_id, excerpt in items]
+    # Leave room in each pack's completion for every item's answer
+    pack_size = max(1, min(pack_size, MAX_PACK_COMPLETION_TOKENS // max(1, answer_tokens)))
+    packs = _pack_items(excerpts, pack_size, pack_size * excerpt_tokens, model)
+
+    def send(pack: List[Tuple[Hashable, str]]) -> Dict[Hashable, Any]:
+        cases = json.dumps([{"id": str(item_id), "text": excerpt} for item_id, excerpt in pack], ensure_ascii=False)
+        prompt = f"""{instruction}
+
+Cases (JSON list of {{"id", "text"}}):
+{cases}
+
+Respond only with a JSON array containing one object per case, with no additional text:
+[{{"id": "<case id>", "{answer_field}": <{answer_description}>}}, ...]
+"""
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=min(MAX_PACK_COMPLETION_TOKENS, answer_tokens * len(pack) + 50),
+                temperature=temperature
+            )
+            answers = _parse_answers(response.choices[0].message.content, answer_field)
+        except Exception as e:
+            logger.warning(f"Packed request for {len(pack)} items failed, answering them one by one: {e}")
+            answers = {}
+
+        results = {}
+        for item_id, _ in pack:
+            # Answers for ids outside the pack are ignored
+            if str(item_id) in answers:
+                cleaned = validate(answers[str(item_id)])
+                if cleaned is not None:
+                    results[item_id] = cleaned
+        return results
+
+    results: Dict[Hashable, Any] = {}
+    if len(packs) == 1:
+        results.update(send(packs[0]))
+    elif packs:
+        with ThreadPoolExecutor(max_workers=min(len(packs), max_workers or settings.llm_concurrency)) as executor:
+            for pack_results in executor.map(send, packs):
+                results.update(pack_results)
+
+    fallbacks = [(item_id, excerpt) for item_id, excerpt in excerpts if item_id not in results]
+    if fallbacks:
+        logger.info(f"Answering {len(fallbacks)} of {len(excerpts)} items individually")
+    for item_id, _ in fallbacks:
+        answer = single(item_id, originals[item_id])
+        if answer is not None:
+            results[item_id] = answer
+
+    logger.info(f"Answered {len(results)} of {len(excerpts)} items with {len(packs)} packed and {len(fallbacks)} single requests")
+    return results
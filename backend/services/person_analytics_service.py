@@ -7,8 +7,31 @@ from sqlalchemy.orm import Session
 from models.people import People
 from models.reported_cases import ReportedCases
 from models.person_analytics import PersonAnalytics
+from services.case_party_index import party_case_ids
+from services.keyword_scanner import matched, scanner
 import json
 
+# Case fields _get_case_text joins, in order
+CASE_TEXT_FIELDS = ('title', 'case_summary', 'decision', 'judgement', 'conclusion', 'keywords_phrases', 'area_of_law')
+
+LEGAL_ISSUE_KEYWORDS = [
+    'constitutional', 'human rights', 'due process', 'equal protection',
+    'contract breach', 'negligence', 'fraud', 'misrepresentation',
+    'employment law', 'discrimination', 'harassment', 'wrongful termination',
+    'property rights', 'intellectual property', 'patent', 'copyright',
+    'criminal law', 'evidence', 'procedure', 'jurisdiction'
+]
+
+FINANCIAL_TERM_KEYWORDS = [
+    'interest rate', 'compound interest', 'penalty', 'fine',
+    'damages', 'compensation', 'restitution', 'remedy',
+    'injunction', 'specific performance', 'liquidated damages',
+    'breach of contract', 'unjust enrichment', 'quantum meruit'
+]
+
+COMPLEXITY_KEYWORDS = ['appeal', 'supreme court', 'multiple', 'several']
+FAVORABLE_KEYWORDS = ['dismissed', 'acquitted', 'favorable', 'won', 'successful']
+
 class PersonAnalyticsService:
     def __init__(self, db: Session):
         self.db = db
@@ -38,6 +61,10 @@ class PersonAnalyticsService:
             'Constitutional': ['constitution', 'human rights', 'fundamental rights', 'election'],
             'Administrative': ['administrative', 'public body', 'government', 'permit', 'license']
         }
+        
+        scanner.register_categories(self.risk_keywords)
+        scanner.register_categories(self.subject_categories)
+        scanner.register(LEGAL_ISSUE_KEYWORDS + FINANCIAL_TERM_KEYWORDS + COMPLEXITY_KEYWORDS + FAVORABLE_KEYWORDS)
 
     def calculate_risk_score(self, cases: List[ReportedCases]) -> Tuple[int, str, List[str]]:
         """Calculate risk score based on case analysis"""
@@ -48,19 +75,17 @@ class PersonAnalyticsService:
         risk_factors = []
         
         for case in cases:
-            case_text = self._get_case_text(case)
+            found = self._case_keywords(case)
             case_score = 0
             case_risk_factors = []
             
             # Analyze case text for risk indicators
             for category, data in self.risk_keywords.items():
                 weight = data['weight']
-                keywords = data['keywords']
                 
-                for keyword in keywords:
-                    if keyword.lower() in case_text.lower():
-                        case_score += weight
-                        case_risk_factors.append(f"{category}: {keyword}")
+                for keyword in matched(found, data['keywords']):
+                    case_score += weight
+                    case_risk_factors.append(f"{category}: {keyword}")
             
             # Additional factors
             if case.area_of_law and 'criminal' in case.area_of_law.lower():
@@ -123,12 +148,13 @@ class PersonAnalyticsService:
         if not cases:
             return "N/A", [], [], []
         
-        all_text = " ".join([self._get_case_text(case) for case in cases])
+        # Phrases found in any of the cases
+        found = frozenset().union(*(self._case_keywords(case) for case in cases))
         
         # Analyze subject matter categories
         category_scores = {}
         for category, keywords in self.subject_categories.items():
-            score = sum(1 for keyword in keywords if keyword.lower() in all_text.lower())
+            score = len(matched(found, keywords))
             if score > 0:
                 category_scores[category] = score
         
@@ -136,8 +162,8 @@ class PersonAnalyticsService:
         subject_categories = list(category_scores.keys())
         
         # Extract legal issues and financial terms
-        legal_issues = self._extract_legal_issues(all_text)
-        financial_terms = self._extract_financial_terms(all_text)
+        legal_issues = self._extract_legal_issues(found)
+        financial_terms = self._extract_financial_terms(found)
         
         return primary_subject, subject_categories, legal_issues, financial_terms
 
@@ -148,16 +174,16 @@ class PersonAnalyticsService:
         
         complexity_factors = 0
         for case in cases:
-            case_text = self._get_case_text(case)
+            found = self._case_keywords(case)
             
             # Complexity indicators
-            if len(case_text) > 5000:
+            if len(self._get_case_text(case)) > 5000:
                 complexity_factors += 2
-            if 'appeal' in case_text.lower():
+            if 'appeal' in found:
                 complexity_factors += 3
-            if 'supreme court' in case_text.lower():
+            if 'supreme court' in found:
                 complexity_factors += 2
-            if 'multiple' in case_text.lower() or 'several' in case_text.lower():
+            if 'multiple' in found or 'several' in found:
                 complexity_factors += 1
             if case.area_of_law and 'constitutional' in case.area_of_law.lower():
                 complexity_factors += 2
@@ -175,8 +201,7 @@ class PersonAnalyticsService:
         
         favorable_outcomes = 0
         for case in resolved_cases:
-            case_text = self._get_case_text(case)
-            if any(word in case_text.lower() for word in ['dismissed', 'acquitted', 'favorable', 'won', 'successful']):
+            if matched(self._case_keywords(case), FAVORABLE_KEYWORDS):
                 favorable_outcomes += 1
         
         success_rate = (favorable_outcomes / len(resolved_cases)) * 100
@@ -202,6 +227,10 @@ class PersonAnalyticsService:
         
         return " ".join(text_parts)
 
+    def _case_keywords(self, case: ReportedCases):
+        """Keywords occurring in the text _get_case_text joins (scanned once per case)"""
+        return scanner.case_hits(case, CASE_TEXT_FIELDS)
+
     def _extract_monetary_amounts(self, text: str) -> List[Decimal]:
         """Extract monetary amounts from text"""
         amounts = []
@@ -227,38 +256,13 @@ class PersonAnalyticsService:
         
         return amounts
 
-    def _extract_legal_issues(self, text: str) -> List[str]:
-        """Extract legal issues from text"""
-        legal_issues = []
-        issue_keywords = [
-            'constitutional', 'human rights', 'due process', 'equal protection',
-            'contract breach', 'negligence', 'fraud', 'misrepresentation',
-            'employment law', 'discrimination', 'harassment', 'wrongful termination',
-            'property rights', 'intellectual property', 'patent', 'copyright',
-            'criminal law', 'evidence', 'procedure', 'jurisdiction'
-        ]
-        
-        for keyword in issue_keywords:
-            if keyword.lower() in text.lower():
-                legal_issues.append(keyword.title())
-        
-        return list(set(legal_issues))
+    def _extract_legal_issues(self, found) -> List[str]:
+        """Legal issues among the keywords found in the cases"""
+        return list(set(keyword.title() for keyword in matched(found, LEGAL_ISSUE_KEYWORDS)))
 
-    def _extract_financial_terms(self, text: str) -> List[str]:
-        """Extract financial terms from text"""
-        financial_terms = []
-        term_keywords = [
-            'interest rate', 'compound interest', 'penalty', 'fine',
-            'damages', 'compensation', 'restitution', 'remedy',
-            'injunction', 'specific performance', 'liquidated damages',
-            'breach of contract', 'unjust enrichment', 'quantum meruit'
-        ]
-        
-        for keyword in term_keywords:
-            if keyword.lower() in text.lower():
-                financial_terms.append(keyword.title())
-        
-        return list(set(financial_terms))
+    def _extract_financial_terms(self, found) -> List[str]:
+        """Financial terms among the keywords found in the cases"""
+        return list(set(keyword.title() for keyword in matched(found, FINANCIAL_TERM_KEYWORDS)))
 
     async def generate_analytics_for_person(self, person_id: int) -> Optional[PersonAnalytics]:
         """Generate comprehensive analytics for a person"""
@@ -279,8 +283,8 @@ class PersonAnalyticsService:
             return None
         
         # Get related cases
-        cases = self.db.query(ReportedCases).filter(
-            ReportedCases.title.contains(person.full_name)
+        cases = self.db.query(ReportedCases).options(ReportedCases.loader("analysis")).filter(
+            ReportedCases.id.in_(party_case_ids([person.full_name], roles=("title",)))
         ).all()
         
         try:
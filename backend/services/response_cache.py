@@ -0,0 +1,236 @@
+"""
+Response cache for read-heavy endpoints whose results change slowly (stats,
+dashboard counts, court lookups).
+
+Entries live in an in-process LRU with a per-entry TTL. When
+settings.response_cache_redis_url is set, entries are also shared between
+workers through Redis, and the local LRU acts as a first tier in front of it.
+
+Invalidation is tag based: every cached endpoint declares the data it reads
+("people", "cases", ...), and write routes call
+``response_cache.invalidate("people")``. Each tag has a version number that is
+part of every cache key, so invalidating bumps the version and all entries
+built from the old data stop matching; they age out through the TTL and LRU.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "response-cache:"
+
+_KEY_PARAM_TYPES = (str, int, float, bool, Enum, type(None))
+
+
+class LocalCache:
+    """Thread-safe LRU of JSON-compatible values with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class FakeSharedClient:
+    """
+    In-memory stand-in for the Redis client, for tests and single-worker runs.
+
+    Implements only the commands the response cache uses: get, set (with ex)
+    and incr.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Optional[float], str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str, ex: Optional[float] = None) -> bool:
+        with self._lock:
+            self._values[key] = (time.monotonic() + ex if ex else None, value)
+            return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._values.get(key, (None, "0"))
+            value = str(int(value) + 1)
+            self._values[key] = (None, value)
+            return int(value)
+
+
+class ResponseCache:
+    """LRU + TTL cache with an optional shared second tier and tag invalidation"""
+
+    def __init__(self, max_entries: int = 1024, shared_client=None, enabled: bool = True):
+        self.local = LocalCache(max_entries)
+        self.shared = shared_client
+        self.enabled = enabled
+        self._tag_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _tag_version(self, tag: str) -> int:
+        if self.shared is not None:
+            return int(self.shared.get(f"{KEY_PREFIX}tag:{tag}") or 0)
+        with self._lock:
+            return self._tag_versions.get(tag, 0)
+
+    def make_key(self, name: str, params: Dict[str, Any], tags: Sequence[str]) -> Optional[str]:
+        """
+        Build the cache key for a call, or None when the shared tier is unreachable.
+
+        Only plain values (query and path parameters) take part in the key;
+        sessions, users and other injected dependencies are ignored.
+        """
+        try:
+            versions = ",".join(f"{tag}={self._tag_version(tag)}" for tag in tags)
+        except Exception as e:
+            logger.warning(f"Response cache unavailable, bypassing: {e}")
+            return None
+        key_params = {
+            param: value.value if isinstance(value, Enum) else value
+            for param, value in params.items()
+            if isinstance(value, _KEY_PARAM_TYPES)
+        }
+        return f"{KEY_PREFIX}{name}:{json.dumps(key_params, sort_keys=True, default=str)}:{versions}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            raw = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.local.set(key, value, ttl)
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(key, json.dumps(value), ex=max(1, int(ttl)))
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry built from data with any of the given tags"""
+        for tag in tags:
+            if self.shared is None:
+                with self._lock:
+                    self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+                continue
+            try:
+                self.shared.incr(f"{KEY_PREFIX}tag:{tag}")
+            except Exception as e:
+                logger.warning(f"Response cache invalidation of '{tag}' failed: {e}")
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def cached(self, ttl: float, tags: Sequence[str]) -> Callable:
+        """
+        Cache a route's response, keyed on the route and its parameters.
+
+        Place below the router decorator. The response is stored in its JSON
+        form, so it is re-validated against the route's response_model on a
+        hit just as it is on a miss. Exceptions are never cached.
+
+        Args:
+            ttl: Seconds an entry stays valid without an invalidation
+            tags: Data the response is computed from, matching the tags
+                  passed to invalidate() by write routes
+        """
+        def decorator(func: Callable) -> Callable:
+            name = f"{func.__module__}.{func.__qualname__}"
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    key = self.make_key(name, kwargs, tags) if self.enabled else None
+                    if key is not None:
+                        value = self.get(key)
+                        if value is not None:
+                            return value
+                    value = jsonable_encoder(await func(*args, **kwargs))
+                    if key is not None:
+                        self.set(key, value, ttl)
+                    return value
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.make_key(name, kwargs, tags) if self.enabled else None
+                if key is not None:
+                    value = self.get(key)
+                    if value is not None:
+                        return value
+                value = jsonable_encoder(func(*args, **kwargs))
+                if key is not None:
+                    self.set(key, value, ttl)
+                return value
+            return wrapper
+
+        return decorator
+
+
+def _shared_client_from_settings():
+    if not settings.response_cache_redis_url:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("response_cache_redis_url is set but redis is not installed; using the local cache only")
+        return None
+    return redis.Redis.from_url(settings.response_cache_redis_url, decode_responses=True, socket_timeout=0.5)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    shared_client=_shared_client_from_settings(),
+    enabled=settings.response_cache_enabled
+)
@@ -0,0 +1,165 @@
+"""
+Batched search_count / last_searched updates.
+
+Search and profile endpoints record which rows they returned instead of
+incrementing the counters in the request's own transaction. Hits are
+aggregated in memory per row and written periodically by a background
+thread, one bulk ``UPDATE ... FROM (VALUES ...)`` per table, so reads no
+longer take row locks on popular records or commit at all.
+
+Pending hits are bounded by distinct rows: rows that already have pending
+hits always accumulate, new rows beyond the limit are dropped (and counted)
+until the next flush. Pending hits are flushed on shutdown.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import Integer, DateTime, column, func, update, values
+
+from config import settings
+from database import SessionLocal
+from models.banks import Banks
+from models.companies import Companies
+from models.court import Court
+from models.insurance import Insurance
+from models.people import People
+
+logger = logging.getLogger(__name__)
+
+# Tables with search_count and last_searched columns
+COUNTED_MODELS = {
+    "people": People,
+    "banks": Banks,
+    "insurance": Insurance,
+    "companies": Companies,
+    "courts": Court,
+}
+
+# Rows per UPDATE statement
+FLUSH_BATCH_SIZE = 1000
+
+
+class SearchCountAggregator:
+    """Collects search hits per row and writes them in bulk"""
+
+    def __init__(self, flush_seconds: float = 5.0, max_pending: int = 50000):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        # table -> row id -> (hits, last searched)
+        self._pending: Dict[str, Dict[int, Tuple[int, datetime]]] = {table: {} for table in COUNTED_MODELS}
+        self._pending_rows = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def record(self, table: str, ids: Iterable[int]) -> None:
+        """Count one search hit for each row id of a table"""
+        now = datetime.now()
+        with self._lock:
+            pending = self._pending[table]
+            for row_id in ids:
+                if row_id in pending:
+                    hits, _ = pending[row_id]
+                    pending[row_id] = (hits + 1, now)
+                elif self._pending_rows < self.max_pending:
+                    pending[row_id] = (1, now)
+                    self._pending_rows += 1
+                else:
+                    self._dropped += 1
+            full = self._pending_rows >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def _take_pending(self) -> Dict[str, Dict[int, Tuple[int, datetime]]]:
+        with self._lock:
+            pending = self._pending
+            self._pending = {table: {} for table in COUNTED_MODELS}
+            self._pending_rows = 0
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning(f"Dropped search hits for {dropped} rows while the pending buffer was full")
+        return pending
+
+    def flush(self) -> int:
+        """
+        Write all pending hits.
+
+        Returns:
+            int: Number of rows updated
+        """
+        with self._flush_lock:
+            pending = self._take_pending()
+            if not any(pending.values()):
+                return 0
+
+            db = SessionLocal()
+            written = 0
+            try:
+                for table, hits in pending.items():
+                    # Sorted ids keep lock order consistent across workers
+                    rows = [(row_id, count, searched_at) for row_id, (count, searched_at) in sorted(hits.items())]
+                    for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+                        written += self._update_rows(db, COUNTED_MODELS[table], rows[start:start + FLUSH_BATCH_SIZE])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error flushing search counts: {e}")
+            finally:
+                db.close()
+            return written
+
+    @staticmethod
+    def _update_rows(db, model, rows) -> int:
+        hits = values(
+            column("id", Integer),
+            column("hits", Integer),
+            column("last_searched", DateTime),
+            name="hits"
+        ).data(rows)
+        db.execute(
+            update(model)
+            .where(model.id == hits.c.id)
+            .values(
+                search_count=func.coalesce(model.search_count, 0) + hits.c.hits,
+                last_searched=hits.c.last_searched
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return len(rows)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            start_time = time.time()
+            written = self.flush()
+            if written:
+                logger.debug(f"Flushed search counts for {written} rows in {time.time() - start_time:.3f}s")
+
+    def start(self) -> None:
+        """Start the background flush thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="search-count-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever is still pending"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+
+search_counter = SearchCountAggregator(
+    flush_seconds=settings.search_count_flush_seconds,
+    max_pending=settings.search_count_max_pending
+)
@@ -0,0 +1,96 @@
+"""
+Scatter-gather execution for searches that query several independent sources.
+
+Each source runs in a worker thread on its own pooled session, so sources
+proceed in parallel and the event loop stays free while they wait on the
+database. Every source has a deadline: the request stops waiting for it
+when the deadline passes, and PostgreSQL cancels its statement at the same
+point (statement_timeout), so a slow scan releases its thread and connection
+instead of piling up behind later requests.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Bounds the connections fan-out searches can hold at once (pool_size is 20)
+SEARCH_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search-source")
+
+
+class SearchSource:
+    """A named search function and its deadline in seconds"""
+
+    def __init__(self, name: str, search: Callable[[Session], List[Dict[str, Any]]], timeout: float):
+        self.name = name
+        self.search = search
+        self.timeout = timeout
+
+
+def _run_source(source: SearchSource) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(int(source.timeout * 1000))}
+        )
+        return source.search(db)
+    finally:
+        db.close()
+
+
+async def _gather_one(source: SearchSource) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+    try:
+        results = await asyncio.wait_for(
+            loop.run_in_executor(_executor, _run_source, source),
+            timeout=source.timeout
+        )
+        status = "ok"
+    except asyncio.TimeoutError:
+        logger.warning(f"Search source '{source.name}' timed out after {source.timeout}s")
+        results, status = [], "timeout"
+    except Exception as e:
+        logger.error(f"Search source '{source.name}' failed: {e}")
+        results, status = [], "error"
+
+    return results, {
+        "status": status,
+        "count": len(results),
+        "elapsed_ms": round((time.time() - start_time) * 1000)
+    }
+
+
+async def gather_search_sources(sources: List[SearchSource]) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+    """
+    Run all sources concurrently and wait for each until its deadline.
+
+    A source that times out or fails contributes no results; the others are
+    returned as usual.
+
+    Args:
+        sources: Sources to query
+
+    Returns:
+        tuple: (results by source name, report by source name with status
+               "ok", "timeout" or "error", result count and elapsed_ms)
+    """
+    outcomes = await asyncio.gather(*(_gather_one(source) for source in sources))
+
+    results = {}
+    report = {}
+    for source, (source_results, source_report) in zip(sources, outcomes):
+        results[source.name] = source_results
+        report[source.name] = source_report
+    return results, report
@@ -0,0 +1,80 @@
+"""
+Keyset cursors and planner-based row estimates for paginated search endpoints.
+"""
+
+import base64
+import json
+import logging
+from typing import Any, List, Optional
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque token"""
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, length: int) -> List[Any]:
+    """
+    Decode a token produced by `encode_cursor`.
+
+    Args:
+        token: Cursor token from the client
+        length: Number of values the sort key must contain
+
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursorError("Invalid cursor: unexpected sort key")
+    return values
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper around any selectable"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJSON)
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_row_count(db: Session, statement) -> Optional[int]:
+    """
+    Ask the query planner how many rows `statement` would return.
+
+    This only plans the query, so it costs about as much as parsing it,
+    regardless of table size. The number is an estimate and can be off in
+    either direction; returns None if the plan could not be read.
+    """
+    try:
+        # Savepoint so a failed EXPLAIN doesn't abort the caller's transaction
+        with db.begin_nested():
+            plan = db.execute(_ExplainJSON(statement)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Could not estimate row count: {e}")
+        return None
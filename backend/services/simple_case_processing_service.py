@@ -11,6 +11,7 @@ from models.companies import Companies
 from models.reported_cases import ReportedCases
 from models.case_metadata import CaseMetadata, CaseSearchIndex
 from services.ai_service import AIService
+from services.case_party_index import index_case_parties
 import json
 
 class SimpleCaseProcessingService:
@@ -83,6 +84,9 @@ class SimpleCaseProcessingService:
             # Create search index
             self._create_search_index(case_id, case, entities)
             
+            # Refresh the case's party rows, now including related people
+            index_case_parties(self.db, case, commit=False)
+            
             self.db.commit()
             
             return {
@@ -0,0 +1,194 @@
+"""
+Buffered usage_tracking inserts.
+
+Tracked requests append a prepared usage_tracking row to a bounded in-memory
+ring buffer instead of committing it in the request. A background thread
+drains the buffer every flush interval, or as soon as a batch worth of events
+is waiting, and writes each batch with one multi-row INSERT in its own
+transaction, together with the batch's hourly and daily rollup totals
+(services/usage_rollups.py).
+
+When the buffer is full the drop policy decides what is lost: "oldest"
+overwrites the oldest pending event (a ring buffer), "newest" refuses the new
+one. Drops, failed batches and the buffer's high-water mark are counted for
+stats(). A batch the database rejects (a deleted user, an oversized value) is
+retried row by row so only the offending events are dropped; a batch that
+fails otherwise (the database is unreachable) is put back at the front of the
+buffer, as far as there is room, and retried on the next flush. Pending events
+are written on shutdown.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config import settings
+from database import engine
+from models.usage_tracking import UsageTracking
+from services.usage_rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+DROP_POLICIES = ("oldest", "newest")
+
+
+class UsageEventBuffer:
+    """Collects usage events in memory and inserts them in batches"""
+
+    def __init__(self, capacity: int = 100000, batch_size: int = 500, flush_ms: int = 1000,
+                 drop_policy: str = "oldest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown usage buffer drop policy: {drop_policy}")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.drop_policy = drop_policy
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._stats = {
+            "recorded": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed_batches": 0,
+            "high_water_mark": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    def record(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue one usage_tracking row (a dict of column values).
+
+        Returns:
+            bool: False if the event was dropped because the buffer is full
+        """
+        with self._lock:
+            pending = len(self._events)
+            if pending >= self.capacity:
+                self._stats["dropped"] += 1
+                if self.drop_policy == "newest":
+                    return False
+            else:
+                pending += 1
+                if pending > self._stats["high_water_mark"]:
+                    self._stats["high_water_mark"] = pending
+            # A full deque discards its oldest entry on append
+            self._events.append(event)
+            self._stats["recorded"] += 1
+        if pending >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._events), self.batch_size)
+            return [self._events.popleft() for _ in range(count)]
+
+    def _requeue(self, batch) -> None:
+        """Put a failed batch back in front of newer events, dropping what no longer fits"""
+        with self._lock:
+            room = self.capacity - len(self._events)
+            if room < len(batch):
+                self._stats["dropped"] += len(batch) - room
+                batch = batch[:room]
+            self._events.extendleft(reversed(batch))
+
+    def _write_rows(self, batch) -> int:
+        """Insert events one per transaction, dropping those the database rejects"""
+        written = 0
+        for event in batch:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(UsageTracking.__table__), [event])
+                    apply_rollups(conn, [event])
+                written += 1
+            except (IntegrityError, DataError) as e:
+                with self._lock:
+                    self._stats["dropped"] += 1
+                logger.error(f"Dropping usage event for {event.get('endpoint')}: {e.orig}")
+        return written
+
+    def flush(self) -> int:
+        """
+        Write every pending event, one INSERT per batch.
+
+        Returns:
+            int: Number of events written
+        """
+        with self._flush_lock:
+            start_time = time.time()
+            written = 0
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(UsageTracking.__table__), batch)
+                        apply_rollups(conn, batch)
+                except (IntegrityError, DataError) as e:
+                    logger.warning(f"Usage batch rejected, writing its {len(batch)} events one by one: {e.orig}")
+                    written += self._write_rows(batch)
+                    continue
+                except Exception as e:
+                    self._requeue(batch)
+                    with self._lock:
+                        self._stats["failed_batches"] += 1
+                    logger.error(f"Error writing {len(batch)} usage events: {e}")
+                    break
+                written += len(batch)
+            with self._lock:
+                self._stats["written"] += written
+                if written:
+                    self._stats["last_flush_ms"] = round((time.time() - start_time) * 1000, 2)
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer occupancy and counters, for monitoring backpressure"""
+        with self._lock:
+            return dict(
+                self._stats,
+                pending=len(self._events),
+                capacity=self.capacity,
+                drop_policy=self.drop_policy
+            )
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            written = self.flush()
+            if written:
+                logger.debug(f"Wrote {written} usage events")
+
+    def start(self) -> None:
+        """Start the background writer thread"""
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="usage-event-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the writer thread and write whatever is still pending"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+
+usage_buffer = UsageEventBuffer(
+    capacity=settings.usage_buffer_capacity,
+    batch_size=settings.usage_buffer_batch_size,
+    flush_ms=settings.usage_buffer_flush_ms,
+    drop_policy=settings.usage_buffer_drop_policy
+)
@@ -0,0 +1,223 @@
+"""
+Hourly and daily usage rollups.
+
+Billing and usage summaries used to load every usage_tracking row of a
+period and sum it in Python. The usage writer (services/usage_buffer.py)
+now also adds each batch to per-hour and per-day totals keyed by (user,
+resource type, endpoint), in the transaction that inserts the raw rows, so
+the rollups always match the committed events.
+
+A period is read from the coarsest buckets that fit inside it: whole UTC
+days from usage_rollup_daily, the whole hours around them from
+usage_rollup_hourly, and the partial hours at either end from
+usage_tracking itself (the un-rolled tail). A 30-day summary touches about
+30 daily rows per resource type and endpoint, plus at most two hours of raw
+events.
+
+rebuild_rollups recomputes both tables from usage_tracking, for events
+written before the rollups existed (migrate_usage_rollups.py).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models.usage_rollup import UsageRollupDaily, UsageRollupHourly
+from models.usage_tracking import UsageTracking
+
+logger = logging.getLogger(__name__)
+
+hourly_table = UsageRollupHourly.__table__
+daily_table = UsageRollupDaily.__table__
+usage_table = UsageTracking.__table__
+
+KEY_COLUMNS = ["user_id", "bucket_start", "resource_type", "endpoint"]
+TOTAL_COLUMNS = ["events", "tokens", "api_calls", "cost", "response_time_ms"]
+
+
+def _utc(moment: datetime) -> datetime:
+    """Aware UTC datetime (naive datetimes are taken to be UTC)"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ceil(moment: datetime, floor, step: timedelta) -> datetime:
+    floored = floor(moment)
+    return floored if floored == moment else floored + step
+
+
+def _event_totals(event: Dict[str, Any]) -> Tuple:
+    """An event's contribution to the totals (NULL metrics count as 0, as the summaries always did)"""
+    return (
+        1,
+        event.get("tokens_used") or 0,
+        event.get("api_calls") or 0,
+        event.get("estimated_cost") or 0.0,
+        event.get("response_time_ms") or 0,
+    )
+
+
+def _upsert(conn, table, totals: Dict[Tuple, List]) -> None:
+    # Sorted keys keep row lock order consistent across API workers
+    rows = [
+        dict(zip(KEY_COLUMNS, key), **dict(zip(TOTAL_COLUMNS, values)))
+        for key, values in sorted(totals.items())
+    ]
+    statement = pg_insert(table).values(rows)
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={column: table.c[column] + statement.excluded[column] for column in TOTAL_COLUMNS}
+    ))
+
+
+def apply_rollups(conn, events: Iterable[Dict[str, Any]]) -> None:
+    """Add usage_tracking rows (as inserted) to the hourly and daily rollups, on the inserting connection"""
+    hourly = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+    daily = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+    for event in events:
+        if event.get("user_id") is None:
+            continue
+        created_at = _utc(event["created_at"])
+        totals = _event_totals(event)
+        for buckets, bucket_start in ((hourly, _floor_hour(created_at)), (daily, _floor_day(created_at))):
+            key = (int(event["user_id"]), bucket_start, event["resource_type"], event["endpoint"])
+            sums = buckets[key]
+            for index, value in enumerate(totals):
+                sums[index] += value
+    if hourly:
+        _upsert(conn, hourly_table, hourly)
+        _upsert(conn, daily_table, daily)
+
+
+def _segments(start: datetime, end: datetime):
+    """
+    Split [start, end] into rollup-aligned pieces.
+
+    Returns:
+        tuple: (daily ranges, hourly ranges, raw ranges); daily and hourly
+        ranges are half-open, the last raw range includes its end
+    """
+    first_hour, last_hour = _ceil(start, _floor_hour, timedelta(hours=1)), _floor_hour(end)
+    if first_hour > last_hour:
+        return [], [], [(start, end)]
+    raw = [(start, first_hour), (last_hour, end)]
+    first_day, last_day = _ceil(first_hour, _floor_day, timedelta(days=1)), _floor_day(last_hour)
+    if first_day >= last_day:
+        return [], [(first_hour, last_hour)], raw
+    return [(first_day, last_day)], [(first_hour, first_day), (last_day, last_hour)], raw
+
+
+def usage_totals(db, user_id: int, start: datetime, end: datetime) -> Dict[Tuple[date, str], Dict[str, Any]]:
+    """
+    A user's usage totals over [start, end] by UTC day and resource type.
+
+    Returns:
+        dict: (day, resource_type) -> {"events", "tokens", "api_calls", "cost", "response_time_ms"}
+    """
+    start, end = _utc(start), _utc(end)
+    daily_ranges, hourly_ranges, raw_ranges = _segments(start, end)
+    totals: Dict[Tuple[date, str], Dict[str, Any]] = defaultdict(lambda: dict.fromkeys(TOTAL_COLUMNS, 0))
+
+    def add(day, resource_type, row):
+        # SUM of a bigint is numeric; keep the totals int (cost float)
+        sums = totals[(day, resource_type)]
+        for column in TOTAL_COLUMNS:
+            sums[column] += (float if column == "cost" else int)(row[column] or 0)
+
+    for table, ranges in ((daily_table, daily_ranges), (hourly_table, hourly_ranges)):
+        for range_start, range_end in ranges:
+            if range_start >= range_end:
+                continue
+            rows = db.execute(
+                select(
+                    table.c.bucket_start, table.c.resource_type,
+                    *(func.sum(table.c[column]).label(column) for column in TOTAL_COLUMNS)
+                ).where(
+                    table.c.user_id == user_id,
+                    table.c.bucket_start >= range_start,
+                    table.c.bucket_start < range_end
+                ).group_by(table.c.bucket_start, table.c.resource_type)
+            ).mappings()
+            for row in rows:
+                add(_utc(row["bucket_start"]).date(), row["resource_type"], row)
+
+    for index, (range_start, range_end) in enumerate(raw_ranges):
+        inclusive = index == len(raw_ranges) - 1
+        if range_start > range_end or (range_start == range_end and not inclusive):
+            continue
+        upper = usage_table.c.created_at <= range_end if inclusive else usage_table.c.created_at < range_end
+        rows = db.execute(
+            select(
+                usage_table.c.resource_type,
+                func.count().label("events"),
+                func.sum(func.coalesce(usage_table.c.tokens_used, 0)).label("tokens"),
+                func.sum(func.coalesce(usage_table.c.api_calls, 0)).label("api_calls"),
+                func.sum(func.coalesce(usage_table.c.estimated_cost, 0.0)).label("cost"),
+                func.sum(func.coalesce(usage_table.c.response_time_ms, 0)).label("response_time_ms")
+            ).where(
+                usage_table.c.user_id == user_id,
+                usage_table.c.created_at >= range_start,
+                upper
+            ).group_by(usage_table.c.resource_type)
+        ).mappings()
+        # A raw range lies within one hour, so within one day
+        for row in rows:
+            add(range_start.date(), row["resource_type"], row)
+
+    return dict(totals)
+
+
+def rebuild_rollups(conn) -> int:
+    """
+    Recompute both rollup tables from usage_tracking.
+
+    Holds a SHARE lock on usage_tracking, so usage writers wait (their
+    events stay buffered) and then add to the rebuilt totals.
+
+    Returns:
+        int: Hourly rollup rows written
+    """
+    conn.execute(text("LOCK TABLE usage_tracking IN SHARE MODE"))
+    conn.execute(delete(hourly_table))
+    conn.execute(delete(daily_table))
+
+    hour = func.date_trunc("hour", func.timezone("UTC", usage_table.c.created_at))
+    hourly_rows = conn.execute(insert(hourly_table).from_select(
+        KEY_COLUMNS + TOTAL_COLUMNS,
+        select(
+            usage_table.c.user_id,
+            func.timezone("UTC", hour),
+            usage_table.c.resource_type,
+            usage_table.c.endpoint,
+            func.count(),
+            func.sum(func.coalesce(usage_table.c.tokens_used, 0)),
+            func.sum(func.coalesce(usage_table.c.api_calls, 0)),
+            func.sum(func.coalesce(usage_table.c.estimated_cost, 0.0)),
+            func.sum(func.coalesce(usage_table.c.response_time_ms, 0))
+        ).where(usage_table.c.user_id.isnot(None))
+        .group_by(usage_table.c.user_id, hour, usage_table.c.resource_type, usage_table.c.endpoint)
+    )).rowcount
+
+    day = func.timezone("UTC", func.date_trunc("day", func.timezone("UTC", hourly_table.c.bucket_start)))
+    conn.execute(insert(daily_table).from_select(
+        KEY_COLUMNS + TOTAL_COLUMNS,
+        select(
+            hourly_table.c.user_id, day, hourly_table.c.resource_type, hourly_table.c.endpoint,
+            *(func.sum(hourly_table.c[column]) for column in TOTAL_COLUMNS)
+        ).group_by(hourly_table.c.user_id, day, hourly_table.c.resource_type, hourly_table.c.endpoint)
+    ))
+    logger.info(f"Rebuilt {hourly_rows} hourly usage rollups")
+    return hourly_rows
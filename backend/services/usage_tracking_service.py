@@ -3,16 +3,18 @@ Comprehensive usage tracking service for real-time billing and analytics
 """
 
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
-from models.usage_tracking import UsageTracking, BillingSummary
+from models.usage_tracking import BillingSummary
 from models.user import User
+from services.usage_buffer import usage_buffer
+from services.usage_rollups import usage_totals
 import logging
 
 class UsageTrackingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session] = None):
+        # Tracking needs no session (events are buffered); summaries and billing do
         self.db = db
         
         # Cost rates (configurable)
@@ -54,8 +56,13 @@ class UsageTrackingService:
                    completion_tokens: Optional[int] = None,
                    ip_address: Optional[str] = None,
                    user_agent: Optional[str] = None,
-                   referer: Optional[str] = None) -> UsageTracking:
-        """Track a single usage event"""
+                   referer: Optional[str] = None) -> float:
+        """
+        Track a single usage event.
+        
+        The event is buffered and written in the background, so this never
+        touches the database; returns the event's estimated cost.
+        """
         
         try:
             # Calculate estimated cost
@@ -72,43 +79,39 @@ class UsageTrackingService:
             # Get cost rates
             cost_per_token, cost_per_api_call = self._get_cost_rates(resource_type, ai_model)
             
-            # Create usage record
-            usage_record = UsageTracking(
-                user_id=user_id,
-                session_id=session_id,
-                endpoint=endpoint,
-                method=method,
-                resource_type=resource_type,
-                tokens_used=tokens_used or 0,
-                api_calls=api_calls,
-                response_time_ms=response_time_ms,
-                data_processed=data_processed,
-                estimated_cost=estimated_cost,
-                cost_per_token=cost_per_token,
-                cost_per_api_call=cost_per_api_call,
-                query=query,
-                filters_applied=filters_applied,
-                results_count=results_count,
-                ai_model=ai_model,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                referer=referer
-            )
-            
-            self.db.add(usage_record)
-            self.db.commit()
-            self.db.refresh(usage_record)
+            # Queue the usage row; services.usage_buffer inserts it in a batch
+            usage_buffer.record({
+                "user_id": user_id,
+                "session_id": session_id,
+                "endpoint": endpoint,
+                "method": method,
+                "resource_type": resource_type,
+                "tokens_used": tokens_used or 0,
+                "api_calls": api_calls,
+                "response_time_ms": response_time_ms,
+                "data_processed": data_processed,
+                "estimated_cost": estimated_cost,
+                "cost_per_token": cost_per_token,
+                "cost_per_api_call": cost_per_api_call,
+                "query": query,
+                "filters_applied": filters_applied,
+                "results_count": results_count,
+                "ai_model": ai_model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "referer": referer,
+                "created_at": datetime.now(timezone.utc)
+            })
             
             # Update user's real-time usage stats
             self._update_user_usage_stats(user_id, resource_type, estimated_cost)
             
-            return usage_record
+            return estimated_cost
             
         except Exception as e:
             logging.error(f"Error tracking usage: {e}")
-            self.db.rollback()
             raise
     
     def track_search_usage(self, 
@@ -120,7 +123,7 @@ class UsageTrackingService:
                           response_time_ms: Optional[int] = None,
                           filters_applied: Optional[Dict] = None,
                           ip_address: Optional[str] = None,
-                          user_agent: Optional[str] = None) -> UsageTracking:
+                          user_agent: Optional[str] = None) -> float:
         """Track search operation usage"""
         
         return self.track_usage(
@@ -148,7 +151,7 @@ class UsageTrackingService:
                       response_time_ms: Optional[int] = None,
                       query: Optional[str] = None,
                       ip_address: Optional[str] = None,
-                      user_agent: Optional[str] = None) -> UsageTracking:
+                      user_agent: Optional[str] = None) -> float:
         """Track AI chat usage"""
         
         total_tokens = prompt_tokens + completion_tokens
@@ -175,25 +178,16 @@ class UsageTrackingService:
                               days: int = 30) -> Dict[str, Any]:
         """Get comprehensive usage summary for a user"""
         
-        end_date = datetime.utcnow()
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Get usage records
-        usage_records = self.db.query(UsageTracking).filter(
-            UsageTracking.user_id == user_id,
-            UsageTracking.created_at >= start_date,
-            UsageTracking.created_at <= end_date
-        ).all()
-        
-        # Calculate totals
-        total_tokens = sum(record.tokens_used or 0 for record in usage_records)
-        total_api_calls = sum(record.api_calls or 0 for record in usage_records)
-        total_cost = sum(record.estimated_cost or 0 for record in usage_records)
+        # Totals by day and resource type, from the rollups plus the un-rolled tail
+        totals = usage_totals(self.db, user_id, start_date, end_date)
         
-        # Group by resource type
+        # Group by resource type and by day
         by_resource_type = {}
-        for record in usage_records:
-            resource_type = record.resource_type
+        by_day = {}
+        for (day, resource_type), sums in totals.items():
             if resource_type not in by_resource_type:
                 by_resource_type[resource_type] = {
                     "count": 0,
@@ -202,22 +196,21 @@ class UsageTrackingService:
                     "api_calls": 0
                 }
             
-            by_resource_type[resource_type]["count"] += 1
-            by_resource_type[resource_type]["tokens"] += record.tokens_used or 0
-            by_resource_type[resource_type]["cost"] += record.estimated_cost or 0
-            by_resource_type[resource_type]["api_calls"] += record.api_calls or 0
+            by_resource_type[resource_type]["count"] += sums["events"]
+            by_resource_type[resource_type]["tokens"] += sums["tokens"]
+            by_resource_type[resource_type]["cost"] += sums["cost"]
+            by_resource_type[resource_type]["api_calls"] += sums["api_calls"]
+            
+            day_totals = by_day.setdefault(day, {"count": 0, "tokens": 0, "cost": 0.0})
+            day_totals["count"] += sums["events"]
+            day_totals["tokens"] += sums["tokens"]
+            day_totals["cost"] += sums["cost"]
         
-        # Get daily usage
-        daily_usage = self.db.query(
-            func.date(UsageTracking.created_at).label('date'),
-            func.count(UsageTracking.id).label('count'),
-            func.sum(UsageTracking.tokens_used).label('tokens'),
-            func.sum(UsageTracking.estimated_cost).label('cost')
-        ).filter(
-            UsageTracking.user_id == user_id,
-            UsageTracking.created_at >= start_date,
-            UsageTracking.created_at <= end_date
-        ).group_by(func.date(UsageTracking.created_at)).order_by('date').all()
+        # Calculate totals
+        total_records = sum(group["count"] for group in by_resource_type.values())
+        total_tokens = sum(group["tokens"] for group in by_resource_type.values())
+        total_api_calls = sum(group["api_calls"] for group in by_resource_type.values())
+        total_cost = sum(group["cost"] for group in by_resource_type.values())
         
         return {
             "user_id": user_id,
@@ -227,7 +220,7 @@ class UsageTrackingService:
                 "days": days
             },
             "totals": {
-                "total_records": len(usage_records),
+                "total_records": total_records,
                 "total_tokens": total_tokens,
                 "total_api_calls": total_api_calls,
                 "total_cost": round(total_cost, 4)
@@ -235,12 +228,12 @@ class UsageTrackingService:
             "by_resource_type": by_resource_type,
             "daily_usage": [
                 {
-                    "date": day.date.isoformat(),
-                    "count": day.count,
-                    "tokens": day.tokens or 0,
-                    "cost": round(day.cost or 0, 4)
+                    "date": day.isoformat(),
+                    "count": day_totals["count"],
+                    "tokens": day_totals["tokens"],
+                    "cost": round(day_totals["cost"], 4)
                 }
-                for day in daily_usage
+                for day, day_totals in sorted(by_day.items())
             ]
         }
     
@@ -250,32 +243,35 @@ class UsageTrackingService:
                                 end_date: datetime) -> BillingSummary:
         """Generate billing summary for a user for a specific period"""
         
-        # Get usage records for the period
-        usage_records = self.db.query(UsageTracking).filter(
-            UsageTracking.user_id == user_id,
-            UsageTracking.created_at >= start_date,
-            UsageTracking.created_at <= end_date
-        ).all()
+        # Totals by resource type, from the rollups plus the un-rolled tail
+        by_resource_type = {}
+        for (day, resource_type), sums in usage_totals(self.db, user_id, start_date, end_date).items():
+            type_totals = by_resource_type.setdefault(resource_type, dict.fromkeys(sums, 0))
+            for column, value in sums.items():
+                type_totals[column] += value
+        empty = {"events": 0, "tokens": 0, "api_calls": 0, "cost": 0.0, "response_time_ms": 0}
         
         # Calculate totals
-        total_tokens = sum(record.tokens_used or 0 for record in usage_records)
-        total_api_calls = sum(record.api_calls or 0 for record in usage_records)
-        total_cost = sum(record.estimated_cost or 0 for record in usage_records)
+        total_records = sum(t["events"] for t in by_resource_type.values())
+        total_tokens = sum(t["tokens"] for t in by_resource_type.values())
+        total_api_calls = sum(t["api_calls"] for t in by_resource_type.values())
+        total_cost = sum(t["cost"] for t in by_resource_type.values())
+        total_response_time = sum(t["response_time_ms"] for t in by_resource_type.values())
         
         # Count by resource type
-        searches = [r for r in usage_records if r.resource_type == "search"]
-        ai_sessions = [r for r in usage_records if r.resource_type == "ai_chat"]
-        api_calls = [r for r in usage_records if r.resource_type == "api_call"]
+        searches = by_resource_type.get("search", empty)
+        ai_sessions = by_resource_type.get("ai_chat", empty)
+        api_calls = by_resource_type.get("api_call", empty)
         
         # Calculate costs by type
-        ai_chat_cost = sum(r.estimated_cost or 0 for r in ai_sessions)
-        search_cost = sum(r.estimated_cost or 0 for r in searches)
-        api_cost = sum(r.estimated_cost or 0 for r in api_calls)
+        ai_chat_cost = ai_sessions["cost"]
+        search_cost = searches["cost"]
+        api_cost = api_calls["cost"]
         
         # Calculate averages
-        tokens_per_search = total_tokens / len(searches) if searches else 0
-        cost_per_search = search_cost / len(searches) if searches else 0
-        avg_response_time = sum(r.response_time_ms or 0 for r in usage_records) / len(usage_records) if usage_records else 0
+        tokens_per_search = total_tokens / searches["events"] if searches["events"] else 0
+        cost_per_search = search_cost / searches["events"] if searches["events"] else 0
+        avg_response_time = total_response_time / total_records if total_records else 0
         
         # Create billing summary
         billing_summary = BillingSummary(
@@ -284,8 +280,8 @@ class UsageTrackingService:
             billing_period_end=end_date,
             total_tokens=total_tokens,
             total_api_calls=total_api_calls,
-            total_searches=len(searches),
-            total_ai_sessions=len(ai_sessions),
+            total_searches=searches["events"],
+            total_ai_sessions=ai_sessions["events"],
             total_cost=round(total_cost, 4),
             ai_chat_cost=round(ai_chat_cost, 4),
             search_cost=round(search_cost, 4),